@@ -20,18 +20,20 @@ class ProcessController:
         db: Session,
     ) -> AsyncGenerator[str, None]:
         queue: asyncio.Queue[str] = asyncio.Queue()
+        loop = asyncio.get_running_loop()
 
-        # log callback – pipeline ichidan chaqiriladi
+        # log callback – pipeline bosqichlari ichidan (worker thread'lardan ham) chaqiriladi
         def log_callback(msg: str):
             try:
-                queue.put_nowait(
+                loop.call_soon_threadsafe(
+                    queue.put_nowait,
                     json.dumps(
                         {"type": "log", "message": msg},
                         ensure_ascii=False,
-                    )
+                    ),
                 )
             except RuntimeError:
-                # queue yopilayotganda xotirjam o'tkazib yuboramiz
+                # loop yopilayotganda xotirjam o'tkazib yuboramiz
                 pass
 
         async def run_pipeline():
@@ -41,9 +43,8 @@ class ProcessController:
             result: dict[str, Any] | None = None
 
             try:
-                # sync pipeline'ni background thread'da ishlatamiz
-                result = await asyncio.to_thread(
-                    self.pipeline_service.process_article,
+                # pipeline bosqichlari o'zi thread'larga tarqaladi (PipelineEngine)
+                result = await self.pipeline_service.process_article_async(
                     article=article,
                     log_callback=log_callback,
                 )
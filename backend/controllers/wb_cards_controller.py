@@ -1,18 +1,41 @@
+import asyncio
 from typing import List
 from fastapi import HTTPException
+from repositories.wb_async_repository import AsyncWBRepository
 from repositories.wb_repository import WBRepository
+from services.wb_catalog_service import WBCatalogService
 from schemas.wb_cards import WBCardUpdateItem
 
 
 class WBCardsController:
     def __init__(self):
-        self.repo = WBRepository()
+        self.async_repo = AsyncWBRepository()
+        self.repo = WBRepository(self.async_repo)
+        self.catalog = WBCatalogService(self.repo)
 
     async def update_cards(self, cards: List[WBCardUpdateItem]) -> dict:
         if not cards:
             raise HTTPException(status_code=400, detail="Empty cards list")
         payload = [c.model_dump(exclude_none=True) for c in cards]
         try:
-            return self.repo.update_cards(payload)
+            result = await self.async_repo.update_cards(payload)
         except Exception as e:
             raise HTTPException(status_code=502, detail=str(e))
+
+        # Mirror'dagi eski nusxalar keyingi o'qishda WB'dan qayta olinadi
+        await asyncio.to_thread(self.catalog.invalidate, [item.get("nmID") for item in payload])
+        return result
+
+    async def update_dimensions(self, nm_id: int, dimensions: dict) -> dict:
+        payload = [{
+            "nmID": nm_id,
+            "dimensions": {
+                "length": int(dimensions.get("length", 0)),
+                "width": int(dimensions.get("width", 0)),
+                "height": int(dimensions.get("height", 0)),
+                "weightBrutto": float(dimensions.get("weightBrutto", 0)),
+            }
+        }]
+        result = await self.async_repo.update_cards(payload)
+        await asyncio.to_thread(self.catalog.invalidate, [nm_id])
+        return result
@@ -1,41 +1,38 @@
 # controllers/wb_media_controller.py
 
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, AsyncIterator, Optional
 from fastapi import UploadFile, HTTPException
+from repositories.wb_async_repository import AsyncWBRepository
 from repositories.wb_repository import WBRepository
+from services.wb_catalog_service import WBCatalogService
+from services.wb_media_uploader import MediaUploadError, ProgressCallback, WBMediaUploader
+
+
+# Ishlayotgan stream sync task'lari (GC ularni yig'ib olmasligi uchun)
+_running_tasks: set = set()
 
 
 class WBMediaController:
     def __init__(self):
-        self.repo = WBRepository()
+        self.repo = AsyncWBRepository()
+        self.uploader = WBMediaUploader(repo=self.repo)
+        self.catalog = WBCatalogService(WBRepository(self.repo))
 
     async def sync_media(
         self,
         nm_id: int,
         final_photos: List[Dict[str, Any]],
         new_files: List[UploadFile],
+        on_progress: Optional[ProgressCallback] = None,
     ):
-        uploaded_urls: List[str] = []
+        # 1) yangi fayllarni parallel yuklash (tartib saqlanadi)
+        try:
+            reports = await self.uploader.upload_all(nm_id, new_files, on_progress=on_progress)
+        except MediaUploadError as e:
+            raise HTTPException(status_code=502, detail=f"Upload failed: {e}")
 
-        # 1) yangi fayllarni yuklash
-        for index, file in enumerate(new_files, start=1):
-            data = await file.read()
-            if not data:
-                continue
-
-            try:
-                resp = self.repo.upload_media_file(
-                    nm_id=nm_id,
-                    photo_number=index,
-                    file_bytes=data,
-                    filename=file.filename or f"image_{index}.jpg",
-                    content_type=file.content_type or "image/jpeg",
-                )
-                url = resp.get("data", {}).get("file")
-                if url:
-                    uploaded_urls.append(url)
-            except Exception as e:
-                raise HTTPException(status_code=502, detail=f"Upload failed: {e}")
+        uploaded_urls: List[str] = [r["url"] for r in reports if r.get("url")]
 
         # 2) frontenddan kelgan final_photos ichidan URL larni olish
         final_urls: List[str] = []
@@ -49,12 +46,58 @@ class WBMediaController:
 
         # 4) /content/v3/media/save
         try:
-            save_resp = self.repo.save_media_state(nm_id, final_urls)
+            save_resp = await self.repo.save_media_state(nm_id, final_urls)
         except Exception as e:
             raise HTTPException(status_code=502, detail=f"Save order failed: {e}")
 
+        # Mirror'dagi kartada eski photos qolmasin
+        await asyncio.to_thread(self.catalog.invalidate, [nm_id])
+
         return {
             "uploaded": uploaded_urls,
             "final_data_sent": final_urls,
             "saved": save_resp,
+            "files": reports,
         }
+
+    async def sync_media_stream(
+        self,
+        nm_id: int,
+        final_photos: List[Dict[str, Any]],
+        new_files: List[UploadFile],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        sync_media + har fayl holati event sifatida (SSE uchun):
+        file_status (uploading/retrying/uploaded/failed/skipped),
+        oxirida sync_completed (sync_media natijasi) yoki sync_error.
+
+        Klient uzilsa ham sync oxirigacha davom etadi; fayllar tugagach yopiladi.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def on_progress(report: Dict[str, Any]) -> None:
+            await queue.put({"type": "file_status", "nmID": nm_id, **report})
+
+        async def run() -> None:
+            try:
+                result = await self.sync_media(nm_id, final_photos, new_files, on_progress=on_progress)
+                await queue.put({"type": "sync_completed", "nmID": nm_id, **result})
+            except HTTPException as e:
+                await queue.put({"type": "sync_error", "nmID": nm_id, "status_code": e.status_code, "message": e.detail})
+            except Exception as e:
+                await queue.put({"type": "sync_error", "nmID": nm_id, "status_code": 500, "message": str(e)})
+            finally:
+                for file in new_files:
+                    await file.close()
+                await queue.put(done)
+
+        await queue.put({"type": "sync_started", "nmID": nm_id, "files": len(new_files)})
+        task = asyncio.create_task(run())
+        _running_tasks.add(task)
+        task.add_done_callback(_running_tasks.discard)
+        while True:
+            event = await queue.get()
+            if event is done:
+                break
+            yield event
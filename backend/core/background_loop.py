@@ -0,0 +1,52 @@
+# core/background_loop.py
+"""
+Sync koddan (worker thread'lar) async coroutine'larni bajarish uchun
+alohida thread'dagi doimiy event loop.
+
+asyncio.run() har chaqiruvda yangi loop ochadi – loop'ga bog'langan
+client'lar (AsyncOpenAI, aiohttp) va limiter navbati har safar yo'qoladi.
+Bu yerda esa bitta loop process umrida ishlaydi.
+"""
+
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="background-loop",
+                    daemon=True,
+                )
+                thread.start()
+                _thread = thread
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    """Coroutine'ni fon loop'da bajaradi va natijani kutadi (thread'ni bloklaydi)."""
+    loop = get_background_loop()
+
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() called from the background loop itself – use await")
+
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    return future.result(timeout)
@@ -1,6 +1,6 @@
 # core/config.py
 from pathlib import Path
-from typing import ClassVar, List, Optional
+from typing import ClassVar, Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -25,9 +25,44 @@ class Settings(BaseSettings):
 
     WB_API_KEY: str
 
+    # Umumiy HTTP client'lar (core/http_clients.py)
+    HTTP_POOL_CONNECTIONS: int = 10  # requests: host'lar soni bo'yicha pool
+    HTTP_POOL_MAXSIZE: int = 32  # bitta host'ga ochiq connection'lar
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP2_ENABLED: bool = True  # OpenAI uchun (h2 o'rnatilgan bo'lsa)
+    OPENAI_TIMEOUT: float = 180.0
+
+    # OpenAI rate limiter (process bo'yicha, core/rate_limit.py) – tarif limitlaridan biroz past
+    OPENAI_RPM_LIMIT: int = 450
+    OPENAI_TPM_LIMIT: int = 180_000
+    OPENAI_MAX_CONCURRENCY: int = 16
+
+    # /api/batch uchun parallel kartalar soni
+    BATCH_MAX_WORKERS: int = 3
+
+    # Batch navbati (batch_jobs/batch_tasks, services/batch_worker.py)
+    BATCH_MAX_ARTICLES: int = 10_000
+    BATCH_TASK_MAX_ATTEMPTS: int = 3
+    BATCH_WORKER_CONCURRENCY: int = 4
+    BATCH_WORKER_POLL_SECONDS: float = 2.0
+    BATCH_TASK_LEASE_SECONDS: int = 300
+    BATCH_RETRY_BASE_DELAY_SECONDS: float = 30.0
+    BATCH_RETRY_MAX_DELAY_SECONDS: float = 900.0
+    BATCH_JOB_LOG_EVENTS: bool = True  # pipeline log'lari – har karta uchun bitta card_log event
+    BATCH_JOB_LOG_RETENTION_DAYS: int = 7  # tugagan job'larning card_log event'lari shundan keyin o'chiriladi
+    BATCH_EVENT_CLEANUP_INTERVAL_SECONDS: int = 3600
+    BATCH_EMBEDDED_WORKER: bool = True  # API process ichida worker; alohida worker process'lar bo'lsa False
+
+    USE_PROXY: bool = False
+    PROXY_URL: Optional[str] = None
+
     SCORE_OK_THRESHOLD: int = 90
     MAX_ITERATIONS: int = 3
 
+    # Characteristics field batch'larini parallel generatsiya/validatsiya qilish (1 = ketma-ket)
+    CHARCS_BATCH_CONCURRENCY: int = 4
+
 
     DB_HOST: str = "localhost"
     DB_PORT: int = 5432
@@ -41,9 +76,108 @@ class Settings(BaseSettings):
     DATABASE_URL: Optional[str] = None
 
     KIE_API_KEY: str = "your-kie-api-key"
+    KIE_API_BASE_URL: str = "https://api.kie.ai"
+    KIE_HTTP_TIMEOUT: float = 60.0
+
+    # KIE task poller (services/kie_service/task_poller.py): boshida tez, keyin siyrakroq
+    KIE_POLL_MIN_INTERVAL: float = 1.0
+    KIE_POLL_MAX_INTERVAL: float = 15.0
+    KIE_POLL_BACKOFF_FACTOR: float = 1.5
+    KIE_POLL_CONCURRENCY: int = 10  # bir vaqtdagi recordInfo so'rovlari
+    KIE_POLL_MAX_ERRORS: int = 10  # ketma-ket tarmoq/API xatolaridan keyin task fail
+    KIE_TASK_TIMEOUT_SECONDS: float = 1200.0
+    # Model bo'yicha kutilgan davomiylik (sekund) – boshlang'ich poll intervali shundan
+    KIE_DEFAULT_EXPECTED_SECONDS: float = 30.0
+    KIE_MODEL_EXPECTED_SECONDS: Dict[str, float] = {
+        "nano-banana": 20.0,
+        "hailuo": 180.0,
+        "grok": 120.0,
+    }
+
+    # KIE callBackUrl rejimi (routers/kie_callback.py); polling callback kechiksa zaxira sifatida
+    KIE_CALLBACK_ENABLED: bool = False
+    KIE_CALLBACK_URL: Optional[str] = None  # None -> PUBLIC_BASE_URL + api/kie/callback
+    KIE_CALLBACK_SECRET: Optional[str] = None  # majburiy: ?token=... bilan tekshiriladi, yo'q bo'lsa callback o'chiq
+    KIE_CALLBACK_FALLBACK_FACTOR: float = 1.5  # birinchi poll: kutilgan davomiylik * factor
+
+    # kie_jobs (services/kie_job_manager.py): restart'dan keyin tugallanmagan job'lar davom ettiriladi
+    KIE_JOB_RESUMER_ENABLED: bool = True  # faqat boshqalarning job'larini olish; heartbeat har doim ishlaydi
+    KIE_JOB_LEASE_SECONDS: int = 120
+    KIE_JOB_HEARTBEAT_SECONDS: float = 30.0
+    KIE_JOB_MAX_ATTEMPTS: int = 3  # process o'limidan keyin necha marta qayta olinadi
+    KIE_JOB_RESUME_BATCH: int = 20
+
+    # generate_product_cards – bir vaqtda generatsiya qilinadigan sahnalar
+    KIE_PRODUCT_CARDS_CONCURRENCY: int = 4
+
+    # normalize: ghost mannequin keshi (kie_ghost_cache + MEDIA_ROOT/ghosts)
+    KIE_GHOST_CACHE_ENABLED: bool = True
+    # KIE tempfile URL'i shu muddatgacha ishlatiladi, keyin – o'zimizdagi nusxa (PUBLIC_BASE_URL)
+    KIE_GHOST_REMOTE_URL_TTL_SECONDS: int = 24 * 3600
 
     BASE_DIR: Path = Path(__file__).resolve().parent.parent
     DATA_DIR: Path = BASE_DIR / "data"
+    CACHE_DIR: Path = BASE_DIR / "cache"
+
+    # OpenAI javoblari keshi (lokal SQLite, LRU + TTL)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: Path = CACHE_DIR / "llm_cache.sqlite3"
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 50_000
+    LLM_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+    # fixed.xlsx -> DATA_DIR/.fixed.index.json (tez cold start uchun)
+    FIXED_SIDECAR_ENABLED: bool = False
+    # DATA_DIR lug'atlari (limitlar, keywords, charcs/*.json) o'zgarishini tekshirish oralig'i; 0 – faqat clear_cache()
+    DATA_REGISTRY_POLL_SECONDS: float = 5.0
+    # python -m services.data_snapshot build – worker'lar o'rtasida mmap orqali bo'lishiladi
+    DATA_SNAPSHOT_ENABLED: bool = False
+    DATA_SNAPSHOT_PATH: Path = DATA_DIR / ".data_snapshot.bin"
+    # color_names.json -> DATA_DIR/.color_names.index.json (ixcham palitra)
+    COLOR_PALETTE_SIDECAR_ENABLED: bool = False
+    # cards_raw.json shundan katta bo'lsa kartalar xotirada saqlanmaydi (faqat offset indeksi); 0 – doim to'liq yuklash
+    CARDS_STREAMING_THRESHOLD_MB: int = 256
+
+    # WB subject charcs meta keshi (xotira + DATA_DIR/subject_charcs snapshot)
+    SUBJECT_CHARCS_TTL_SECONDS: int = 24 * 3600
+    SUBJECT_CHARCS_SNAPSHOT_DIR: Path = DATA_DIR / "subject_charcs"
+    # (subject, gender, config versiyasi) bo'yicha kompilyatsiya qilingan rejalar
+    SUBJECT_PLAN_CACHE_SIZE: int = 256
+
+    # WB kartalar katalogi mirror'i (wb_catalog_cards)
+    WB_CATALOG_MIRROR_ENABLED: bool = True
+    WB_CATALOG_MAX_AGE_SECONDS: int = 3600  # 0 – yangilikni tekshirmaydi
+    WB_CATALOG_SYNC_INTERVAL_SECONDS: int = 600  # 0 – fon sync o'chirilgan
+    WB_CATALOG_PAGE_SIZE: int = 100
+    WB_CATALOG_PAGE_DELAY_SECONDS: float = 0.7
+
+    # WB Content API rate limiter (core/wb_rate_limit.py): endpoint -> [so'rov/minut, burst]
+    WB_RATE_LIMIT_ENABLED: bool = True
+    WB_RATE_LIMITS: Dict[str, List[float]] = {
+        "cards_list": [100, 5],
+        "cards_update": [10, 5],
+        "media": [100, 5],
+        "charcs": [100, 5],
+        "default": [100, 5],
+    }
+    # Worker process'lar o'rtasida umumiy bucket'lar; None – faqat process ichida
+    WB_RATE_LIMIT_DB_PATH: Optional[Path] = CACHE_DIR / "wb_rate_limit.sqlite3"
+    WB_RATE_LIMIT_MAX_RETRIES: int = 3  # 429 dan keyin qayta urinishlar
+    WB_RATE_LIMIT_BACKOFF_BASE: float = 1.0
+    WB_RATE_LIMIT_BACKOFF_MAX: float = 60.0
+    WB_RATE_LIMIT_BUSY_TIMEOUT: float = 0.5  # SQLite lock kutish; oshsa – lokal bucket
+
+    # /wb/media/sync – yangi fotolarni parallel yuklash
+    WB_MEDIA_UPLOAD_CONCURRENCY: int = 4
+    WB_MEDIA_UPLOAD_RETRIES: int = 2
+    WB_MEDIA_UPLOAD_TIMEOUT: float = 120.0
+
+    # /api/history/publish – natijalarni cards/update orqali ommaviy nashr qilish
+    # (WB limiti: 3000 karta va 10 MB bitta so'rovda)
+    WB_BULK_UPDATE_MAX_CARDS: int = 100
+    WB_BULK_UPDATE_MAX_BYTES: int = 9 * 1024 * 1024
+    WB_BULK_UPDATE_CONCURRENCY: int = 2
+    WB_BULK_UPDATE_RETRIES: int = 3
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,188 @@
+# core/http_clients.py
+"""
+Tashqi servislar (OpenAI, WB, KIE) uchun umumiy HTTP client'lar.
+
+Har bir upstream uchun bitta pool'langan, keep-alive client process
+bo'yicha qayta ishlatiladi – har chaqiruvda yangi TLS handshake va
+ephemeral port sarflanmaydi.
+
+- get_openai_client()        – httpx (ixtiyoriy HTTP/2) ustidagi OpenAI client
+- get_async_openai_client()  – joriy event loop uchun AsyncOpenAI
+- get_requests_session(name) – upstream nomi bo'yicha requests.Session
+- get_aiohttp_session()      – joriy event loop uchun aiohttp.ClientSession
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Dict, Optional
+
+import aiohttp
+import httpx
+import requests
+from openai import AsyncOpenAI, OpenAI
+from requests.adapters import HTTPAdapter
+
+from core.config import settings
+
+
+_lock = threading.Lock()
+_openai_client: Optional[OpenAI] = None
+_httpx_client: Optional[httpx.Client] = None
+_requests_sessions: Dict[str, requests.Session] = {}
+_async_openai_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+    weakref.WeakKeyDictionary()
+)
+_aiohttp_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _http2_available() -> bool:
+    if not settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        print("⚠️ HTTP2_ENABLED=True, but 'h2' is not installed – falling back to HTTP/1.1")
+        return False
+    return True
+
+
+# ================== OPENAI (httpx) ==================
+
+def _httpx_options() -> dict:
+    options = {
+        "http2": _http2_available(),
+        "limits": httpx.Limits(
+            max_connections=settings.HTTP_POOL_MAXSIZE,
+            max_keepalive_connections=settings.HTTP_POOL_MAXSIZE,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(
+            settings.OPENAI_TIMEOUT,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+        ),
+    }
+    if settings.USE_PROXY and settings.PROXY_URL:
+        options["proxy"] = settings.PROXY_URL
+    return options
+
+
+def get_httpx_client() -> httpx.Client:
+    global _httpx_client
+    if _httpx_client is None:
+        with _lock:
+            if _httpx_client is None:
+                _httpx_client = httpx.Client(**_httpx_options())
+    return _httpx_client
+
+
+def get_openai_client() -> OpenAI:
+    global _openai_client
+    if _openai_client is None:
+        http_client = get_httpx_client()
+        with _lock:
+            if _openai_client is None:
+                _openai_client = OpenAI(
+                    api_key=settings.OPENAI_API_KEY,
+                    http_client=http_client,
+                    timeout=settings.OPENAI_TIMEOUT,
+                )
+    return _openai_client
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """
+    httpx.AsyncClient event loop'ga bog'langan – har loop uchun o'zining client'i.
+    Retry'lar SDK'da emas, limiter bilan birga BaseOpenAIService'da.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_openai_clients.get(loop)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(**_httpx_options()),
+            timeout=settings.OPENAI_TIMEOUT,
+            max_retries=0,
+        )
+        _async_openai_clients[loop] = client
+    return client
+
+
+# ================== REQUESTS (WB, KIE) ==================
+
+def get_requests_session(name: str) -> requests.Session:
+    """
+    Upstream nomi ("wb", "kie", "openai"...) bo'yicha bitta Session.
+    urllib3 pool'i thread-safe, shuning uchun worker thread'lar bo'lishib ishlatadi.
+    """
+    session = _requests_sessions.get(name)
+    if session is None:
+        with _lock:
+            session = _requests_sessions.get(name)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=settings.HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+                    max_retries=0,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _requests_sessions[name] = session
+    return session
+
+
+# ================== AIOHTTP ==================
+
+def get_aiohttp_session() -> aiohttp.ClientSession:
+    """
+    aiohttp session event loop'ga bog'langan – har loop uchun o'zining session'i.
+    Async kontekstdan chaqirilishi kerak.
+    """
+    loop = asyncio.get_running_loop()
+    session = _aiohttp_sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=settings.HTTP_POOL_MAXSIZE,
+                keepalive_timeout=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=aiohttp.ClientTimeout(
+                total=None,
+                connect=settings.HTTP_CONNECT_TIMEOUT,
+            ),
+        )
+        _aiohttp_sessions[loop] = session
+    return session
+
+
+# ================== SHUTDOWN ==================
+
+async def aclose_http_clients() -> None:
+    """Joriy loop'dagi aiohttp session + barcha sync client'larni yopadi."""
+    try:
+        loop = asyncio.get_running_loop()
+        session = _aiohttp_sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+        client = _async_openai_clients.pop(loop, None)
+        if client is not None:
+            await client.close()
+    finally:
+        close_http_clients()
+
+
+def close_http_clients() -> None:
+    global _openai_client, _httpx_client
+
+    with _lock:
+        if _httpx_client is not None:
+            _httpx_client.close()
+        _httpx_client = None
+        _openai_client = None
+
+        for session in _requests_sessions.values():
+            session.close()
+        _requests_sessions.clear()
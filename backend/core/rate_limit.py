@@ -0,0 +1,346 @@
+# core/rate_limit.py
+"""
+Process bo'yicha umumiy rate limiter (OpenAI RPM/TPM + parallel so'rovlar soni).
+
+Sync (worker thread'lar) va async (istalgan event loop) kodidan bir xil
+ishlatiladi:
+
+    async with limiter.limit(estimated_tokens) as slot:
+        ...
+        slot.settle(actual_tokens)
+
+    with limiter.limit_sync(estimated_tokens) as slot:
+        ...
+
+Navbat adolatli (FIFO): token bucket'lar rezervatsiya asosida ishlaydi –
+har chaqiruv o'z ulushini darhol band qiladi va kerakli vaqtgacha kutadi,
+keyingilar undan keyin turadi. Retry-After / x-ratelimit-* header'lari
+limiter holatini server bilan sinxronlashtiradi.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Mapping, Optional, Tuple
+
+from core.config import settings
+
+
+class TokenBucket:
+    """
+    `capacity` birlik / `period` sekund. Rezervatsiya darajani manfiyga
+    tushirishi mumkin – shunda qaytarilgan qiymat kutish vaqti bo'ladi.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.level = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+        if self.level >= 0:
+            return 0.0
+        return -self.level / self.rate
+
+    def refund(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+    def sync_remaining(self, remaining: float, now: float) -> None:
+        """Server bizdan kam qoldi desa – unga ishonamiz."""
+        self._refill(now)
+        if remaining < self.level:
+            self.level = remaining
+
+
+class FairSemaphore:
+    """
+    Thread'lar va turli event loop'lar orasida bo'lishiladigan FIFO semafor.
+    asyncio.Semaphore bitta loop'ga bog'lanadi, threading.Semaphore esa
+    loop'ni bloklaydi – bu ikkalasini ham qo'llaydi.
+    """
+
+    def __init__(self, value: int):
+        self._value = value
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[Any, Any]] = deque()
+
+    def _acquire_or_enqueue(self, waiter: Tuple[Any, Any]) -> bool:
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return True
+            self._waiters.append(waiter)
+            return False
+
+    def acquire_sync(self) -> None:
+        event = threading.Event()
+        if self._acquire_or_enqueue((None, event)):
+            return
+        event.wait()
+
+    async def acquire_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        if self._acquire_or_enqueue(waiter):
+            return
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # Slot allaqachon berilgan – keyingisiga uzatamiz
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if loop is None:
+                    waiter.set()
+                    return
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(self._wake, waiter)
+                    return
+            self._value += 1
+
+    def _wake(self, future: "asyncio.Future") -> None:
+        if future.done():
+            # Kutuvchi bekor qilingan – slotni qaytaramiz
+            self.release()
+        else:
+            future.set_result(None)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+
+class RateLimitSlot:
+    """Bitta rezervatsiya: haqiqiy token sarfi ma'lum bo'lgach settle()."""
+
+    def __init__(self, limiter: "RateLimiter", reserved_tokens: float):
+        self.limiter = limiter
+        self.reserved_tokens = reserved_tokens
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        if actual_tokens is None:
+            return
+        diff = self.reserved_tokens - actual_tokens
+        if diff > 0:
+            self.limiter.refund_tokens(diff)
+        self.reserved_tokens = actual_tokens
+
+
+class _AsyncLimit:
+    def __init__(self, limiter: "RateLimiter", tokens: float):
+        self.limiter = limiter
+        self.tokens = tokens
+
+    async def __aenter__(self) -> RateLimitSlot:
+        await self.limiter.semaphore.acquire_async()
+        try:
+            wait = self.limiter._reserve(self.tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            # Kutish paytida 429 kelgan bo'lishi mumkin
+            while (blocked := self.limiter._blocked_for()) > 0:
+                await asyncio.sleep(blocked)
+        except BaseException:
+            self.limiter.semaphore.release()
+            raise
+        return RateLimitSlot(self.limiter, self.tokens)
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.limiter.semaphore.release()
+
+
+class _SyncLimit:
+    def __init__(self, limiter: "RateLimiter", tokens: float):
+        self.limiter = limiter
+        self.tokens = tokens
+
+    def __enter__(self) -> RateLimitSlot:
+        self.limiter.semaphore.acquire_sync()
+        try:
+            wait = self.limiter._reserve(self.tokens)
+            if wait > 0:
+                time.sleep(wait)
+            # Kutish paytida 429 kelgan bo'lishi mumkin
+            while (blocked := self.limiter._blocked_for()) > 0:
+                time.sleep(blocked)
+        except BaseException:
+            self.limiter.semaphore.release()
+            raise
+        return RateLimitSlot(self.limiter, self.tokens)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.limiter.semaphore.release()
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.semaphore = FairSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+
+        self.total_requests = 0
+        self.total_wait_seconds = 0.0
+        self.rate_limited = 0
+
+    # ===== PUBLIC =====
+
+    def limit(self, estimated_tokens: float) -> _AsyncLimit:
+        return _AsyncLimit(self, estimated_tokens)
+
+    def limit_sync(self, estimated_tokens: float) -> _SyncLimit:
+        return _SyncLimit(self, estimated_tokens)
+
+    def refund_tokens(self, amount: float) -> None:
+        with self._lock:
+            self.tokens.refund(amount, time.monotonic())
+
+    def backoff(self, seconds: float) -> None:
+        """429 / Retry-After: hamma chaqiruvchilar shu vaqtgacha kutadi."""
+        with self._lock:
+            self.rate_limited += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        now = time.monotonic()
+        remaining_requests = _to_float(headers.get("x-ratelimit-remaining-requests"))
+        remaining_tokens = _to_float(headers.get("x-ratelimit-remaining-tokens"))
+
+        with self._lock:
+            if remaining_requests is not None:
+                self.requests.sync_remaining(remaining_requests, now)
+            if remaining_tokens is not None:
+                self.tokens.sync_remaining(remaining_tokens, now)
+
+    @staticmethod
+    def retry_after_from_headers(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+        if not headers:
+            return None
+
+        retry_ms = _to_float(headers.get("retry-after-ms"))
+        if retry_ms is not None:
+            return retry_ms / 1000.0
+
+        retry = _to_float(headers.get("retry-after"))
+        if retry is not None:
+            return retry
+
+        resets = [
+            parse_reset_duration(headers.get("x-ratelimit-reset-requests")),
+            parse_reset_duration(headers.get("x-ratelimit-reset-tokens")),
+        ]
+        resets = [r for r in resets if r is not None]
+        return max(resets) if resets else None
+
+    @staticmethod
+    def estimate_tokens(text_chars: int, image_count: int, max_tokens: int) -> int:
+        # ~3 belgi = 1 token (kirill matn), "detail: high" rasm ~ 1100 token
+        return int(text_chars / 3) + image_count * 1100 + max_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            return {
+                "name": self.name,
+                "requests_available": round(self.requests.level, 1),
+                "tokens_available": round(self.tokens.level),
+                "rpm": self.requests.capacity,
+                "tpm": self.tokens.capacity,
+                "max_concurrency": self.max_concurrency,
+                "waiting": self.semaphore.waiting,
+                "blocked_for": round(max(0.0, self._blocked_until - now), 2),
+                "total_requests": self.total_requests,
+                "total_wait_seconds": round(self.total_wait_seconds, 2),
+                "rate_limited": self.rate_limited,
+            }
+
+    # ===== INTERNAL =====
+
+    def _reserve(self, tokens: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self.requests.reserve(1, now),
+                self.tokens.reserve(tokens, now),
+            )
+            self.total_requests += 1
+            self.total_wait_seconds += wait
+            return wait
+
+    def _blocked_for(self) -> float:
+        with self._lock:
+            return self._blocked_until - time.monotonic()
+
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """OpenAI formatlari: '1s', '6m0s', '120ms', '1h2m3.5s'."""
+    if not value:
+        return None
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return _to_float(value)
+    return sum(float(num) * _DURATION_UNITS[unit] for num, unit in parts)
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_openai_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_openai_limiter() -> RateLimiter:
+    global _openai_limiter
+    if _openai_limiter is None:
+        with _limiter_lock:
+            if _openai_limiter is None:
+                _openai_limiter = RateLimiter(
+                    name="openai",
+                    requests_per_minute=settings.OPENAI_RPM_LIMIT,
+                    tokens_per_minute=settings.OPENAI_TPM_LIMIT,
+                    max_concurrency=settings.OPENAI_MAX_CONCURRENCY,
+                )
+    return _openai_limiter
@@ -0,0 +1,336 @@
+# core/wb_rate_limit.py
+"""
+WB Content API uchun endpoint bo'yicha rate limiter.
+
+WB limitlari metodlar bo'yicha har xil (cards/list, cards/update, media...),
+va ular seller token bo'yicha hisoblanadi – ya'ni barcha worker process'lar
+uchun umumiy. Shuning uchun token bucket holati lokal SQLite'da
+(WB_RATE_LIMIT_DB_PATH) saqlanadi va har rezervatsiya bitta qisqa
+tranzaksiyada bajariladi. Path berilmasa – process ichidagi bucket'lar.
+
+- bucket: WB_RATE_LIMITS[endpoint] = [so'rov/minut, burst]
+- rezervatsiya (core.rate_limit.TokenBucket kabi): chaqiruv o'z ulushini
+  darhol band qiladi va kerakli vaqtgacha kutadi
+- 429: X-Ratelimit-Retry / Retry-After bo'yicha (bo'lmasa – jitter'li
+  eksponensial backoff) endpoint butun process'lar uchun bloklanadi
+- SQLite band bo'lsa (busy timeout qisqa) rezervatsiya process ichidagi
+  zaxira bucket'lar bilan bajariladi – so'rov uzoq kutib qolmaydi
+- stats() – endpoint bo'yicha metrikalar
+"""
+
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from core.config import settings
+
+
+ENDPOINT_PREFIXES: Tuple[Tuple[str, str], ...] = (
+    ("/content/v2/get/cards/list", "cards_list"),
+    ("/content/v2/cards/update", "cards_update"),
+    ("/content/v3/media/", "media"),
+    ("/content/v2/object/charcs/", "charcs"),
+)
+DEFAULT_ENDPOINT = "default"
+
+
+def endpoint_for_path(path: str) -> str:
+    for prefix, name in ENDPOINT_PREFIXES:
+        if path.startswith(prefix):
+            return name
+    return DEFAULT_ENDPOINT
+
+
+class _LocalBucketStore:
+    """Process ichidagi bucket'lar (WB_RATE_LIMIT_DB_PATH berilmaganda)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> [level, updated_at, blocked_until]
+        self._buckets: Dict[str, list] = {}
+
+    def reserve(self, name: str, capacity: float, rate: float, now: float) -> float:
+        with self._lock:
+            state = self._buckets.setdefault(name, [capacity, now, 0.0])
+            level = min(capacity, state[0] + (now - state[1]) * rate) - 1
+            state[0], state[1] = level, now
+            wait = -level / rate if level < 0 else 0.0
+            return max(wait, state[2] - now)
+
+    def block(self, name: str, until: float, capacity: float, now: float) -> None:
+        with self._lock:
+            state = self._buckets.setdefault(name, [capacity, now, 0.0])
+            state[2] = max(state[2], until)
+
+    def snapshot(self) -> Dict[str, Tuple[float, float, float]]:
+        with self._lock:
+            return {name: tuple(state) for name, state in self._buckets.items()}
+
+
+class _SQLiteBucketStore:
+    """Worker process'lar o'rtasida umumiy bucket'lar (BEGIN IMMEDIATE – yozish lock'i)."""
+
+    def __init__(self, path: Path, busy_timeout: float = 0.5):
+        self.path = Path(path)
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS wb_rate_buckets (
+                name TEXT PRIMARY KEY,
+                level REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                blocked_until REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+
+    def reserve(self, name: str, capacity: float, rate: float, now: float) -> float:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            level, updated_at, blocked_until = self._read(conn, name, capacity, now)
+            level = min(capacity, level + max(0.0, now - updated_at) * rate) - 1
+            conn.execute(
+                "UPDATE wb_rate_buckets SET level = ?, updated_at = ? WHERE name = ?",
+                (level, now, name),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        wait = -level / rate if level < 0 else 0.0
+        return max(wait, blocked_until - now)
+
+    def block(self, name: str, until: float, capacity: float, now: float) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._read(conn, name, capacity, now)
+            conn.execute(
+                "UPDATE wb_rate_buckets SET blocked_until = MAX(blocked_until, ?) WHERE name = ?",
+                (until, name),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def snapshot(self) -> Dict[str, Tuple[float, float, float]]:
+        rows = self._conn().execute(
+            "SELECT name, level, updated_at, blocked_until FROM wb_rate_buckets"
+        ).fetchall()
+        return {name: (level, updated_at, blocked) for name, level, updated_at, blocked in rows}
+
+    @staticmethod
+    def _read(conn: sqlite3.Connection, name: str, capacity: float, now: float) -> Tuple[float, float, float]:
+        row = conn.execute(
+            "SELECT level, updated_at, blocked_until FROM wb_rate_buckets WHERE name = ?",
+            (name,),
+        ).fetchone()
+        if row is None:
+            conn.execute(
+                "INSERT INTO wb_rate_buckets (name, level, updated_at, blocked_until) VALUES (?, ?, ?, 0)",
+                (name, capacity, now),
+            )
+            return capacity, now, 0.0
+        return row
+
+    def _conn(self) -> sqlite3.Connection:
+        # Har bir thread o'z connection'iga ega (sqlite3 thread-safe emas)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+class WBRateLimiter:
+    def __init__(
+        self,
+        limits: Mapping[str, Any],
+        db_path: Optional[Path] = None,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        busy_timeout: float = 0.5,
+    ):
+        # endpoint -> (capacity=burst, rate=so'rov/sekund)
+        self.limits: Dict[str, Tuple[float, float]] = {}
+        for name, value in limits.items():
+            per_minute, burst = value
+            self.limits[name] = (max(1.0, float(burst)), max(float(per_minute), 0.01) / 60.0)
+        self.limits.setdefault(DEFAULT_ENDPOINT, (5.0, 100 / 60.0))
+
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.store: Any = _LocalBucketStore()
+        # Umumiy store xato bersa (lock band va h.k.) – shu process bucket'lari
+        self._fallback = _LocalBucketStore()
+        self.shared = False
+        if db_path:
+            try:
+                self.store = _SQLiteBucketStore(db_path, busy_timeout=busy_timeout)
+                self.shared = True
+            except Exception as e:
+                print(f"⚠️ WB rate limit store unavailable ({e}), using in-process buckets")
+
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+
+    # ===== PUBLIC =====
+
+    def endpoint_for(self, path: str) -> str:
+        name = endpoint_for_path(path)
+        return name if name in self.limits else DEFAULT_ENDPOINT
+
+    def reserve(self, endpoint: str) -> float:
+        """
+        Bitta so'rov uchun joy band qiladi; qaytaradi: kutish kerak bo'lgan sekundlar.
+        Sinxron (SQLite) – async koddan asyncio.to_thread orqali chaqiriladi.
+        """
+        capacity, rate = self.limits[endpoint]
+        now = time.time()
+        try:
+            wait = self.store.reserve(endpoint, capacity, rate, now)
+        except Exception as e:
+            # Limiter xatosi so'rovni buzmasin – lokal bucket'lar bilan davom etamiz
+            print(f"⚠️ WB rate limit reserve error: {e}, using in-process bucket")
+            wait = self._fallback.reserve(endpoint, capacity, rate, now)
+
+        wait = max(0.0, wait)
+        with self._lock:
+            m = self._metric(endpoint)
+            m["requests"] += 1
+            m["wait_seconds"] += wait
+            if wait > 0:
+                m["throttled"] += 1
+        return wait
+
+    def on_rate_limited(
+        self,
+        endpoint: str,
+        headers: Optional[Mapping[str, str]],
+        attempt: int,
+    ) -> float:
+        """
+        429 keldi: endpoint'ni barcha process'lar uchun bloklaydi.
+        Qaytaradi: backoff (sekund) – keyingi reserve() shuni ham hisobga oladi.
+        """
+        delay = self.retry_after_from_headers(headers)
+        if delay is None:
+            delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        # Jitter – bir vaqtda bloklangan worker'lar bir vaqtda qaytmasin
+        delay = min(self.backoff_max, delay) * random.uniform(1.0, 1.25)
+
+        capacity, _ = self.limits[endpoint]
+        now = time.time()
+        try:
+            self.store.block(endpoint, now + delay, capacity, now)
+        except Exception as e:
+            print(f"⚠️ WB rate limit block error: {e}, blocking in-process bucket")
+            self._fallback.block(endpoint, now + delay, capacity, now)
+
+        with self._lock:
+            m = self._metric(endpoint)
+            m["rate_limited"] += 1
+            m["last_rate_limited_at"] = now
+        print(f"⏳ WB 429 on {endpoint}: backing off {delay:.1f}s (attempt {attempt + 1})")
+        return delay
+
+    def on_retry(self, endpoint: str) -> None:
+        with self._lock:
+            self._metric(endpoint)["retries"] += 1
+
+    @staticmethod
+    def retry_after_from_headers(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+        if not headers:
+            return None
+        for name in ("X-Ratelimit-Retry", "Retry-After", "X-Ratelimit-Reset"):
+            value = headers.get(name)
+            if value is None:
+                continue
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                continue
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        try:
+            buckets = self.store.snapshot()
+        except Exception as e:
+            print(f"⚠️ WB rate limit stats error: {e}")
+            buckets = {}
+
+        with self._lock:
+            metrics = {name: dict(m) for name, m in self._metrics.items()}
+
+        endpoints = {}
+        for name, (capacity, rate) in self.limits.items():
+            level, updated_at, blocked_until = buckets.get(name, (capacity, now, 0.0))
+            available = min(capacity, level + max(0.0, now - updated_at) * rate)
+            m = metrics.get(name) or self._empty_metric()
+            endpoints[name] = {
+                "per_minute": round(rate * 60, 2),
+                "burst": capacity,
+                "available": round(available, 2),
+                "blocked_for": round(max(0.0, blocked_until - now), 2),
+                **m,
+                "wait_seconds": round(m["wait_seconds"], 2),
+            }
+
+        return {
+            "shared": self.shared,
+            "max_retries": self.max_retries,
+            "endpoints": endpoints,
+        }
+
+    # ===== INTERNAL =====
+
+    @staticmethod
+    def _empty_metric() -> Dict[str, Any]:
+        return {
+            "requests": 0,
+            "throttled": 0,
+            "wait_seconds": 0.0,
+            "rate_limited": 0,
+            "retries": 0,
+            "last_rate_limited_at": None,
+        }
+
+    def _metric(self, endpoint: str) -> Dict[str, Any]:
+        m = self._metrics.get(endpoint)
+        if m is None:
+            m = self._metrics[endpoint] = self._empty_metric()
+        return m
+
+
+_wb_limiter: Optional[WBRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_wb_rate_limiter() -> WBRateLimiter:
+    global _wb_limiter
+    if _wb_limiter is None:
+        with _limiter_lock:
+            if _wb_limiter is None:
+                _wb_limiter = WBRateLimiter(
+                    limits=settings.WB_RATE_LIMITS,
+                    db_path=settings.WB_RATE_LIMIT_DB_PATH,
+                    max_retries=settings.WB_RATE_LIMIT_MAX_RETRIES,
+                    backoff_base=settings.WB_RATE_LIMIT_BACKOFF_BASE,
+                    backoff_max=settings.WB_RATE_LIMIT_BACKOFF_MAX,
+                    busy_timeout=settings.WB_RATE_LIMIT_BUSY_TIMEOUT,
+                )
+    return _wb_limiter
@@ -4,9 +4,14 @@ from fastapi.staticfiles import StaticFiles
 
 from core.config import settings
 from core.database import init_db
+from core.http_clients import aclose_http_clients
+from services.wb_catalog_service import start_periodic_sync, stop_periodic_sync
+from services.batch_worker import start_embedded_worker, stop_embedded_worker
+from services.data_registry import get_data_registry
+from services.kie_job_manager import get_kie_job_manager
 
 from routers import auth, process, process_batch, history
-from routers.admin import users, admin_promts, keywords, photo_template
+from routers.admin import users, admin_promts, keywords, photo_template, wb_catalog
 from routers import photo_templates, photo_generator, wb_media, wb_cards
 from routers import photo_models, admin_photo_models 
 
@@ -15,6 +20,7 @@ from routers import photo_upload_router
 from routers import video_scenarios_router, admin_video_scenarios_router
 
 from routers.photo_ui_config import router as photo_ui_config_router
+from routers.kie_callback import router as kie_callback_router
 
 # Initialize database
 init_db()
@@ -44,6 +50,7 @@ app.include_router(history.router, prefix="/api/history", tags=["History"])
 app.include_router(users.router, prefix="/api/admin", tags=["Admin - Users"])
 app.include_router(admin_promts.router, prefix="/api/admin", tags=["Admin - Prompts"])
 app.include_router(keywords.router, prefix="/api/admin", tags=["Admin - Keywords"])
+app.include_router(wb_catalog.router, prefix="/api/admin", tags=["Admin - WB Catalog"])
 app.include_router(photo_template.router, prefix="", tags=["Admin - Photo Templates"])
 
 app.include_router(photo_templates.router)
@@ -62,11 +69,38 @@ app.include_router(video_scenarios_router)
 app.include_router(admin_video_scenarios_router)
 
 app.include_router(photo_ui_config_router)
+app.include_router(kie_callback_router)
 
 # Media fayllar
 app.mount("/media", StaticFiles(directory=settings.MEDIA_ROOT), name="media")
 
 
+@app.on_event("startup")
+async def on_startup():
+    # DATA_DIR lug'atlarini oldindan yuklash + o'zgarishlarni kuzatish
+    get_data_registry().start_watcher()
+
+    # WB katalog mirror'ini fonda incremental yangilab turish
+    if settings.WB_CATALOG_MIRROR_ENABLED:
+        start_periodic_sync(settings.WB_CATALOG_SYNC_INTERVAL_SECONDS)
+
+    if settings.BATCH_EMBEDDED_WORKER:
+        start_embedded_worker()
+
+    # Restart'dan oldin tugallanmagan KIE job'larini davom ettirish
+    if settings.KIE_JOB_RESUMER_ENABLED:
+        get_kie_job_manager().start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    stop_periodic_sync()
+    stop_embedded_worker()
+    await get_kie_job_manager().stop()
+    get_data_registry().stop_watcher()
+    await aclose_http_clients()
+
+
 @app.get("/")
 async def root():
     return {
@@ -0,0 +1,45 @@
+"""image analysis results
+
+Revision ID: 3c1f9a2d7e41
+Revises: be97c7da8808
+Create Date: 2026-10-17 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f9a2d7e41'
+down_revision: Union[str, Sequence[str], None] = 'be97c7da8808'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('image_analysis_results',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('photo_urls', sa.JSON(), nullable=False),
+    sa.Column('subject_name', sa.String(length=200), nullable=True),
+    sa.Column('target_fields', sa.JSON(), nullable=True),
+    sa.Column('prompt_version', sa.String(length=100), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_image_analysis_results_cache_key'), 'image_analysis_results', ['cache_key'], unique=True)
+    op.create_index(op.f('ix_image_analysis_results_id'), 'image_analysis_results', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_image_analysis_results_id'), table_name='image_analysis_results')
+    op.drop_index(op.f('ix_image_analysis_results_cache_key'), table_name='image_analysis_results')
+    op.drop_table('image_analysis_results')
@@ -0,0 +1,63 @@
+"""wb catalog mirror
+
+Revision ID: 5d2e8b1c4a90
+Revises: 3c1f9a2d7e41
+Create Date: 2026-10-17 11:02:17.443915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8b1c4a90'
+down_revision: Union[str, Sequence[str], None] = '3c1f9a2d7e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('wb_catalog_cards',
+    sa.Column('nm_id', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('imt_id', sa.BigInteger(), nullable=True),
+    sa.Column('vendor_code', sa.String(length=255), nullable=True),
+    sa.Column('vendor_code_lower', sa.String(length=255), nullable=True),
+    sa.Column('subject_id', sa.Integer(), nullable=True),
+    sa.Column('wb_updated_at_raw', sa.String(length=64), nullable=True),
+    sa.Column('wb_updated_at', sa.DateTime(), nullable=True),
+    sa.Column('card', sa.JSON(), nullable=False),
+    sa.Column('synced_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('nm_id')
+    )
+    op.create_index(op.f('ix_wb_catalog_cards_imt_id'), 'wb_catalog_cards', ['imt_id'], unique=False)
+    op.create_index(op.f('ix_wb_catalog_cards_subject_id'), 'wb_catalog_cards', ['subject_id'], unique=False)
+    op.create_index(op.f('ix_wb_catalog_cards_vendor_code_lower'), 'wb_catalog_cards', ['vendor_code_lower'], unique=False)
+    op.create_index(op.f('ix_wb_catalog_cards_wb_updated_at'), 'wb_catalog_cards', ['wb_updated_at'], unique=False)
+    op.create_table('wb_catalog_sync_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('cursor_updated_at', sa.String(length=64), nullable=True),
+    sa.Column('cursor_nm_id', sa.BigInteger(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('total_synced', sa.Integer(), nullable=False),
+    sa.Column('last_full_sync_at', sa.DateTime(), nullable=True),
+    sa.Column('last_sync_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_wb_catalog_sync_state_id'), 'wb_catalog_sync_state', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_wb_catalog_sync_state_id'), table_name='wb_catalog_sync_state')
+    op.drop_table('wb_catalog_sync_state')
+    op.drop_index(op.f('ix_wb_catalog_cards_wb_updated_at'), table_name='wb_catalog_cards')
+    op.drop_index(op.f('ix_wb_catalog_cards_vendor_code_lower'), table_name='wb_catalog_cards')
+    op.drop_index(op.f('ix_wb_catalog_cards_subject_id'), table_name='wb_catalog_cards')
+    op.drop_index(op.f('ix_wb_catalog_cards_imt_id'), table_name='wb_catalog_cards')
+    op.drop_table('wb_catalog_cards')
@@ -0,0 +1,89 @@
+"""batch job queue
+
+Revision ID: 8e4f0c7b2d13
+Revises: 5d2e8b1c4a90
+Create Date: 2026-10-17 12:21:05.672190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4f0c7b2d13'
+down_revision: Union[str, Sequence[str], None] = '5d2e8b1c4a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('batch_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_batch_jobs_created_at'), 'batch_jobs', ['created_at'], unique=False)
+    op.create_index(op.f('ix_batch_jobs_id'), 'batch_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_batch_jobs_status'), 'batch_jobs', ['status'], unique=False)
+    op.create_index(op.f('ix_batch_jobs_user_id'), 'batch_jobs', ['user_id'], unique=False)
+    op.create_table('batch_tasks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('article', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('lease_owner', sa.String(length=100), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('history_id', sa.Integer(), nullable=True),
+    sa.Column('processing_time', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['history_id'], ['processing_history.id'], ),
+    sa.ForeignKeyConstraint(['job_id'], ['batch_jobs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_batch_tasks_id'), 'batch_tasks', ['id'], unique=False)
+    op.create_index(op.f('ix_batch_tasks_job_id'), 'batch_tasks', ['job_id'], unique=False)
+    op.create_index('ix_batch_tasks_status_run_after', 'batch_tasks', ['status', 'run_after'], unique=False)
+    op.create_table('batch_job_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('article', sa.String(length=100), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['batch_jobs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_batch_job_events_job_id'), 'batch_job_events', ['job_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_batch_job_events_job_id'), table_name='batch_job_events')
+    op.drop_table('batch_job_events')
+    op.drop_index('ix_batch_tasks_status_run_after', table_name='batch_tasks')
+    op.drop_index(op.f('ix_batch_tasks_job_id'), table_name='batch_tasks')
+    op.drop_index(op.f('ix_batch_tasks_id'), table_name='batch_tasks')
+    op.drop_table('batch_tasks')
+    op.drop_index(op.f('ix_batch_jobs_user_id'), table_name='batch_jobs')
+    op.drop_index(op.f('ix_batch_jobs_status'), table_name='batch_jobs')
+    op.drop_index(op.f('ix_batch_jobs_id'), table_name='batch_jobs')
+    op.drop_index(op.f('ix_batch_jobs_created_at'), table_name='batch_jobs')
+    op.drop_table('batch_jobs')
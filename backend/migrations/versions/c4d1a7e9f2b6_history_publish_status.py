@@ -0,0 +1,34 @@
+"""history publish status
+
+Revision ID: c4d1a7e9f2b6
+Revises: 8e4f0c7b2d13
+Create Date: 2026-10-17 15:02:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d1a7e9f2b6'
+down_revision: Union[str, Sequence[str], None] = '8e4f0c7b2d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('processing_history', sa.Column('publish_status', sa.String(length=20), nullable=True))
+    op.add_column('processing_history', sa.Column('published_at', sa.DateTime(), nullable=True))
+    op.add_column('processing_history', sa.Column('publish_error', sa.Text(), nullable=True))
+    op.create_index(op.f('ix_processing_history_publish_status'), 'processing_history', ['publish_status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_processing_history_publish_status'), table_name='processing_history')
+    op.drop_column('processing_history', 'publish_error')
+    op.drop_column('processing_history', 'published_at')
+    op.drop_column('processing_history', 'publish_status')
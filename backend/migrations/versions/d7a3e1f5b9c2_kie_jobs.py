@@ -0,0 +1,59 @@
+"""kie jobs
+
+Revision ID: d7a3e1f5b9c2
+Revises: c4d1a7e9f2b6
+Create Date: 2026-10-17 16:47:12.904531
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3e1f5b9c2'
+down_revision: Union[str, Sequence[str], None] = 'c4d1a7e9f2b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('kie_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('input_data', sa.JSON(), nullable=False),
+    sa.Column('input_hash', sa.String(length=64), nullable=False),
+    sa.Column('task_id', sa.String(length=100), nullable=True),
+    sa.Column('state', sa.String(length=20), nullable=False),
+    sa.Column('result_urls', sa.JSON(), nullable=True),
+    sa.Column('file_path', sa.String(length=512), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('lease_owner', sa.String(length=100), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('task_id')
+    )
+    op.create_index(op.f('ix_kie_jobs_created_at'), 'kie_jobs', ['created_at'], unique=False)
+    op.create_index(op.f('ix_kie_jobs_id'), 'kie_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_kie_jobs_user_id'), 'kie_jobs', ['user_id'], unique=False)
+    op.create_index('ix_kie_jobs_state_lease', 'kie_jobs', ['state', 'lease_expires_at'], unique=False)
+    op.create_index('ix_kie_jobs_user_input_hash', 'kie_jobs', ['user_id', 'input_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_kie_jobs_user_input_hash', table_name='kie_jobs')
+    op.drop_index('ix_kie_jobs_state_lease', table_name='kie_jobs')
+    op.drop_index(op.f('ix_kie_jobs_user_id'), table_name='kie_jobs')
+    op.drop_index(op.f('ix_kie_jobs_id'), table_name='kie_jobs')
+    op.drop_index(op.f('ix_kie_jobs_created_at'), table_name='kie_jobs')
+    op.drop_table('kie_jobs')
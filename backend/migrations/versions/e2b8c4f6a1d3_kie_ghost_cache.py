@@ -0,0 +1,42 @@
+"""kie ghost cache
+
+Revision ID: e2b8c4f6a1d3
+Revises: d7a3e1f5b9c2
+Create Date: 2026-10-17 18:09:33.517046
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b8c4f6a1d3'
+down_revision: Union[str, Sequence[str], None] = 'd7a3e1f5b9c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('kie_ghost_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('photo_hash', sa.String(length=64), nullable=False),
+    sa.Column('prompt_hash', sa.String(length=64), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('result_url', sa.Text(), nullable=True),
+    sa.Column('file_path', sa.String(length=512), nullable=False),
+    sa.Column('hits', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('photo_hash', 'prompt_hash', 'model', name='uq_kie_ghost_cache_key')
+    )
+    op.create_index(op.f('ix_kie_ghost_cache_id'), 'kie_ghost_cache', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_kie_ghost_cache_id'), table_name='kie_ghost_cache')
+    op.drop_table('kie_ghost_cache')
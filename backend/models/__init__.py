@@ -3,6 +3,11 @@ from core.database import Base
 from .user import User, UserRole
 from .promt import PromptTemplate, PromptVersion
 from .processing_history import ProcessingHistory
+from .image_analysis import ImageAnalysisResult
+from .wb_catalog import WBCatalogCard, WBCatalogSyncState
+from .batch_job import BatchJob, BatchTask, BatchJobEvent
+from .kie_job import KIEJob
+from .ghost_cache import GhostCacheEntry
 from .generator import (
     SceneItem,
     PosePrompt,
@@ -24,6 +29,14 @@ __all__ = [
     "PromptTemplate",
     "PromptVersion",
     "ProcessingHistory",
+    "ImageAnalysisResult",
+    "WBCatalogCard",
+    "WBCatalogSyncState",
+    "BatchJob",
+    "BatchTask",
+    "BatchJobEvent",
+    "KIEJob",
+    "GhostCacheEntry",
     "SceneItem",
     "PosePrompt",
     "AdminLog",
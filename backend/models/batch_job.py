@@ -0,0 +1,97 @@
+# models/batch_job.py
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    JSON,
+    String,
+    Text,
+)
+from sqlalchemy.orm import relationship
+
+from core.database import Base
+
+
+class BatchJob(Base):
+    """
+    Batch (ko'p artikul) ishlov berish – navbatdagi bitta job.
+    Kartalar alohida BatchTask'lar, progress BatchJobEvent'larda.
+    """
+
+    __tablename__ = "batch_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    # queued | running | completed | cancelled
+    status = Column(String(20), default="queued", nullable=False, index=True)
+
+    total = Column(Integer, default=0, nullable=False)
+    completed = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+
+    error_message = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    tasks = relationship("BatchTask", back_populates="job", cascade="all, delete-orphan")
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<BatchJob(id={self.id}, status={self.status}, total={self.total})>"
+
+
+class BatchTask(Base):
+    """Job ichidagi bitta artikul. Worker'lar SKIP LOCKED bilan lease qiladi."""
+
+    __tablename__ = "batch_tasks"
+    __table_args__ = (
+        Index("ix_batch_tasks_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("batch_jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, default=0, nullable=False)
+    article = Column(String(100), nullable=False)
+
+    # pending | running | completed | failed | cancelled
+    status = Column(String(20), default="pending", nullable=False)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    last_error = Column(Text, nullable=True)
+    history_id = Column(Integer, ForeignKey("processing_history.id"), nullable=True)
+    processing_time = Column(Float, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+    job = relationship("BatchJob", back_populates="tasks")
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<BatchTask(id={self.id}, article={self.article}, status={self.status})>"
+
+
+class BatchJobEvent(Base):
+    """SSE uchun progress event'lari; id – Last-Event-ID sifatida ishlatiladi."""
+
+    __tablename__ = "batch_job_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    job_id = Column(Integer, ForeignKey("batch_jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    type = Column(String(50), nullable=False)
+    article = Column(String(100), nullable=True)
+    payload = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
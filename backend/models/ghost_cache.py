@@ -0,0 +1,42 @@
+# models/ghost_cache.py
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
+
+from core.database import Base
+
+
+class GhostCacheEntry(Base):
+    """
+    Normalize'ning 1-qadami (ghost mannequin) natijasi.
+    Kalit: (foto kontenti sha256, ghost prompt matni sha256, KIE model) –
+    own_model / new_model va qayta urinishlar bir xil ghost'ni qayta ishlatadi.
+    """
+
+    __tablename__ = "kie_ghost_cache"
+    __table_args__ = (
+        UniqueConstraint("photo_hash", "prompt_hash", "model", name="uq_kie_ghost_cache_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    photo_hash = Column(String(64), nullable=False)
+    prompt_hash = Column(String(64), nullable=False)
+    model = Column(String(100), nullable=False)
+
+    result_url = Column(Text, nullable=True)  # KIE tempfile URL (vaqtinchalik)
+    file_path = Column(String(512), nullable=False)  # MEDIA_ROOT ga nisbatan nusxa
+
+    hits = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<GhostCacheEntry(id={self.id}, model={self.model}, hits={self.hits})>"
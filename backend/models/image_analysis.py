@@ -0,0 +1,44 @@
+# models/image_analysis.py
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    JSON,
+    Text,
+)
+
+from core.database import Base
+
+
+class ImageAnalysisResult(Base):
+    """
+    ImageAnalyzerService natijasi (image_description).
+
+    WB photo URL'lari bitta upload uchun o'zgarmaydi, shuning uchun
+    natija (sorted photo URLs, subject, target fields, prompt version,
+    model) bo'yicha saqlanadi va process/batch/foydalanuvchilar o'rtasida
+    qayta ishlatiladi.
+    """
+
+    __tablename__ = "image_analysis_results"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)
+
+    photo_urls = Column(JSON, nullable=False)
+    subject_name = Column(String(200), nullable=True)
+    target_fields = Column(JSON, nullable=True)
+    prompt_version = Column(String(100), nullable=False)
+    model = Column(String(100), nullable=False)
+
+    description = Column(Text, nullable=False)
+
+    hit_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<ImageAnalysisResult(id={self.id}, key={self.cache_key[:12]}, hits={self.hit_count})>"
@@ -0,0 +1,59 @@
+# models/kie_job.py
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    JSON,
+    String,
+    Text,
+)
+
+from core.database import Base
+
+
+class KIEJob(Base):
+    """
+    Bitta KIE generatsiyasi (video / rasm). Holat DB'da – worker restart
+    bo'lsa yoki klient uzilsa ham task_id yo'qolmaydi va natija yuklab olinadi
+    (services/kie_job_manager.py).
+    """
+
+    __tablename__ = "kie_jobs"
+    __table_args__ = (
+        Index("ix_kie_jobs_state_lease", "state", "lease_expires_at"),
+        Index("ix_kie_jobs_user_input_hash", "user_id", "input_hash"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    kind = Column(String(20), nullable=False)  # video | image
+    model = Column(String(100), nullable=False)
+    input_data = Column(JSON, nullable=False)
+    # sha256(model + input) – bir xil so'rov ikki marta pul to'lamasin
+    input_hash = Column(String(64), nullable=False)
+
+    # KIE createTask javobi; None – hali yuborilmagan
+    task_id = Column(String(100), nullable=True, unique=True)
+
+    # queued -> submitting -> submitted -> downloading -> completed / failed
+    state = Column(String(20), default="queued", nullable=False)
+
+    result_urls = Column(JSON, nullable=True)
+    file_path = Column(String(512), nullable=True)  # MEDIA_ROOT ga nisbatan
+    error_message = Column(Text, nullable=True)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<KIEJob(id={self.id}, task_id={self.task_id}, state={self.state})>"
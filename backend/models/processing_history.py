@@ -48,6 +48,13 @@ class ProcessingHistory(Base):
     fixed_data = Column(JSON, nullable=True)
     photo_urls = Column(JSON, nullable=True)
 
+    # WB'ga nashr qilish (services/wb_bulk_publisher.py):
+    # None -> publishing -> published / unchanged / failed
+    # (skipped – tanlanmadi: yangiroq natija bor yoki completed emas)
+    publish_status = Column(String(20), nullable=True, index=True)
+    published_at = Column(DateTime, nullable=True)
+    publish_error = Column(Text, nullable=True)
+
     created_at = Column(
         DateTime,
         default=datetime.utcnow,
@@ -0,0 +1,57 @@
+# models/wb_catalog.py
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Integer,
+    JSON,
+    String,
+    Text,
+)
+
+from core.database import Base
+
+
+class WBCatalogCard(Base):
+    """
+    WB kartochkalar katalogining lokal nusxasi (content/v2/get/cards/list).
+    nmID, vendorCode va imtID bo'yicha indekslangan.
+    """
+
+    __tablename__ = "wb_catalog_cards"
+
+    nm_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    imt_id = Column(BigInteger, nullable=True, index=True)
+    vendor_code = Column(String(255), nullable=True)
+    vendor_code_lower = Column(String(255), nullable=True, index=True)
+    subject_id = Column(Integer, nullable=True, index=True)
+
+    # WB'dagi updatedAt: cursor uchun aniq satr + filtr/sort uchun datetime
+    wb_updated_at_raw = Column(String(64), nullable=True)
+    wb_updated_at = Column(DateTime, nullable=True, index=True)
+
+    card = Column(JSON, nullable=False)
+
+    synced_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<WBCatalogCard(nm_id={self.nm_id}, vendor_code={self.vendor_code})>"
+
+
+class WBCatalogSyncState(Base):
+    __tablename__ = "wb_catalog_sync_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(50), unique=True, nullable=False)
+
+    cursor_updated_at = Column(String(64), nullable=True)
+    cursor_nm_id = Column(BigInteger, nullable=True)
+
+    status = Column(String(20), default="idle", nullable=False)
+    error_message = Column(Text, nullable=True)
+
+    total_synced = Column(Integer, default=0, nullable=False)
+    last_full_sync_at = Column(DateTime, nullable=True)
+    last_sync_at = Column(DateTime, nullable=True)
@@ -0,0 +1,415 @@
+# repositories/batch_job_repository.py
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from models.batch_job import BatchJob, BatchJobEvent, BatchTask
+
+
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+
+class BatchJobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ================== JOBS ==================
+
+    def create_job(
+        self,
+        user_id: int,
+        articles: List[str],
+        max_attempts: int = 3,
+    ) -> BatchJob:
+        job = BatchJob(user_id=user_id, status="queued", total=len(articles))
+        self.db.add(job)
+        self.db.flush()
+
+        now = datetime.utcnow()
+        self.db.bulk_insert_mappings(
+            BatchTask,
+            [
+                {
+                    "job_id": job.id,
+                    "position": i,
+                    "article": article,
+                    "status": "pending",
+                    "attempts": 0,
+                    "max_attempts": max_attempts,
+                    "run_after": now,
+                    "created_at": now,
+                }
+                for i, article in enumerate(articles)
+            ],
+        )
+        self._add_event(
+            job.id,
+            "batch_started",
+            payload={"total": len(articles)},
+        )
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get_job(self, job_id: int) -> Optional[BatchJob]:
+        return self.db.query(BatchJob).filter(BatchJob.id == job_id).first()
+
+    def list_jobs(self, user_id: int, limit: int = 50, offset: int = 0) -> List[BatchJob]:
+        return (
+            self.db.query(BatchJob)
+            .filter(BatchJob.user_id == user_id)
+            .order_by(BatchJob.created_at.desc())
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+
+    def get_tasks(self, job_id: int, status: Optional[str] = None) -> List[BatchTask]:
+        query = self.db.query(BatchTask).filter(BatchTask.job_id == job_id)
+        if status:
+            query = query.filter(BatchTask.status == status)
+        return query.order_by(BatchTask.position).all()
+
+    def cancel_job(self, job_id: int) -> Optional[BatchJob]:
+        job = (
+            self.db.query(BatchJob)
+            .filter(BatchJob.id == job_id)
+            .with_for_update()
+            .first()
+        )
+        if job is None or job.status not in ACTIVE_JOB_STATUSES:
+            return job
+
+        now = datetime.utcnow()
+        (
+            self.db.query(BatchTask)
+            .filter(BatchTask.job_id == job_id, BatchTask.status == "pending")
+            .update({"status": "cancelled", "finished_at": now}, synchronize_session=False)
+        )
+        job.status = "cancelled"
+        job.finished_at = now
+        self._add_event(job_id, "batch_cancelled")
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    # ================== LEASING ==================
+
+    def lease_tasks(
+        self,
+        worker_id: str,
+        limit: int,
+        lease_seconds: int,
+    ) -> List[BatchTask]:
+        """
+        Bajarilishi kerak bo'lgan task'larni olish (FOR UPDATE SKIP LOCKED):
+        - pending va run_after o'tgan
+        - running, lekin lease muddati tugagan (worker o'lgan / restart)
+        """
+        now = datetime.utcnow()
+
+        active_jobs = (
+            self.db.query(BatchJob.id)
+            .filter(BatchJob.status.in_(ACTIVE_JOB_STATUSES))
+        )
+
+        tasks = (
+            self.db.query(BatchTask)
+            .filter(
+                BatchTask.job_id.in_(active_jobs),
+                or_(
+                    and_(BatchTask.status == "pending", BatchTask.run_after <= now),
+                    and_(BatchTask.status == "running", BatchTask.lease_expires_at < now),
+                ),
+            )
+            .order_by(BatchTask.run_after, BatchTask.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        job_ids = set()
+        leased = []
+        for task in tasks:
+            job_ids.add(task.job_id)
+
+            # Lease bir necha marta tugagan (worker har safar o'lgan) – boshqa urinmaymiz
+            if task.status == "running" and task.attempts >= task.max_attempts:
+                task.status = "failed"
+                task.last_error = task.last_error or "Lease expired (worker died)"
+                task.lease_owner = None
+                task.lease_expires_at = None
+                task.finished_at = now
+                self._add_event(task.job_id, "card_failed", task.article, {"error": task.last_error})
+                self._refresh_job(task.job_id)
+                continue
+
+            task.status = "running"
+            task.lease_owner = worker_id
+            task.lease_expires_at = now + timedelta(seconds=lease_seconds)
+            task.attempts += 1
+            leased.append(task)
+
+        if job_ids:
+            (
+                self.db.query(BatchJob)
+                .filter(BatchJob.id.in_(job_ids), BatchJob.status == "queued")
+                .update({"status": "running", "started_at": now}, synchronize_session=False)
+            )
+
+        self.db.commit()
+        return leased
+
+    def heartbeat(self, worker_id: str, task_ids: List[int], lease_seconds: int) -> int:
+        if not task_ids:
+            return 0
+        updated = (
+            self.db.query(BatchTask)
+            .filter(
+                BatchTask.id.in_(task_ids),
+                BatchTask.lease_owner == worker_id,
+                BatchTask.status == "running",
+            )
+            .update(
+                {"lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)},
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return updated
+
+    # ================== RESULTS ==================
+
+    def complete_task(
+        self,
+        task_id: int,
+        worker_id: str,
+        history_id: Optional[int],
+        processing_time: float,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        task = self._owned_task(task_id, worker_id)
+        if task is None:
+            return False
+
+        task.status = "completed"
+        task.history_id = history_id
+        task.processing_time = processing_time
+        task.last_error = None
+        task.lease_expires_at = None
+        task.finished_at = datetime.utcnow()
+
+        self._add_event(task.job_id, "card_completed", task.article, payload)
+        self._refresh_job(task.job_id)
+        self.db.commit()
+        return True
+
+    def fail_task(
+        self,
+        task_id: int,
+        worker_id: str,
+        error: str,
+        retry_delay_seconds: float,
+        processing_time: float,
+        retryable: bool = True,
+    ) -> str:
+        """
+        Qaytadi: "retry" yoki "failed".
+        retryable=False – qayta urinish foydasiz (karta yo'q va h.k.), darhol failed.
+        """
+        task = self._owned_task(task_id, worker_id)
+        if task is None:
+            return "lost"
+
+        task.last_error = error
+        task.processing_time = processing_time
+        task.lease_owner = None
+        task.lease_expires_at = None
+
+        if retryable and task.attempts < task.max_attempts:
+            task.status = "pending"
+            task.run_after = datetime.utcnow() + timedelta(seconds=retry_delay_seconds)
+            self._add_event(
+                task.job_id,
+                "card_retry",
+                task.article,
+                {
+                    "error": error,
+                    "attempt": task.attempts,
+                    "max_attempts": task.max_attempts,
+                    "retry_in": round(retry_delay_seconds, 1),
+                },
+            )
+            outcome = "retry"
+        else:
+            task.status = "failed"
+            task.finished_at = datetime.utcnow()
+            self._add_event(task.job_id, "card_failed", task.article, {"error": error})
+            self._refresh_job(task.job_id)
+            outcome = "failed"
+
+        self.db.commit()
+        return outcome
+
+    # ================== EVENTS ==================
+
+    def add_event(
+        self,
+        job_id: int,
+        type: str,
+        article: Optional[str] = None,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self._add_event(job_id, type, article, payload)
+        self.db.commit()
+
+    def get_events_after(
+        self,
+        job_id: int,
+        last_event_id: int = 0,
+        limit: int = 500,
+        created_before: Optional[datetime] = None,
+    ) -> List[BatchJobEvent]:
+        """
+        created_before – parallel tranzaksiyalar id'larni tartibsiz commit qilishi
+        mumkin; juda yangi event'larni keyingi so'rovga qoldirib, Last-Event-ID
+        bo'yicha o'tkazib yuborishning oldini olamiz.
+        """
+        query = self.db.query(BatchJobEvent).filter(
+            BatchJobEvent.job_id == job_id,
+            BatchJobEvent.id > last_event_id,
+        )
+        if created_before is not None:
+            query = query.filter(BatchJobEvent.created_at <= created_before)
+        return query.order_by(BatchJobEvent.id).limit(limit).all()
+
+    def delete_log_events(self, older_than_days: int) -> int:
+        """
+        Tugaganiga older_than_days kundan oshgan job'larning card_log event'lari.
+        card_completed / card_failed qoladi – get_results ularga tayanadi.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        finished_jobs = (
+            self.db.query(BatchJob.id)
+            .filter(
+                BatchJob.status.notin_(ACTIVE_JOB_STATUSES),
+                BatchJob.finished_at < cutoff,
+            )
+        )
+        deleted = (
+            self.db.query(BatchJobEvent)
+            .filter(
+                BatchJobEvent.type == "card_log",
+                BatchJobEvent.job_id.in_(finished_jobs.scalar_subquery()),
+            )
+            .delete(synchronize_session=False)
+        )
+        self.db.commit()
+        return deleted
+
+    def get_results(self, job: BatchJob) -> Dict[str, Any]:
+        """
+        Tugagan job natijasi – eski /batch "final_results" formatida
+        (total / completed / failed / cards / errors).
+        """
+        payloads = {
+            e.article: e.payload or {}
+            for e in (
+                self.db.query(BatchJobEvent)
+                .filter(BatchJobEvent.job_id == job.id, BatchJobEvent.type == "card_completed")
+                .order_by(BatchJobEvent.id)
+                .all()
+            )
+        }
+
+        cards: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        for task in self.get_tasks(job.id):
+            if task.status == "completed":
+                cards.append({"article": task.article, **payloads.get(task.article, {})})
+            elif task.status == "failed":
+                errors.append({
+                    "article": task.article,
+                    "error": task.last_error,
+                    "timestamp": task.finished_at.isoformat() if task.finished_at else None,
+                })
+
+        processing_time = (
+            (job.finished_at - job.started_at).total_seconds()
+            if job.started_at and job.finished_at
+            else 0
+        )
+        return {
+            "job_id": job.id,
+            "total": job.total,
+            "completed": job.completed,
+            "failed": job.failed,
+            "processing": 0,
+            "cards": cards,
+            "errors": errors,
+            "processing_time": processing_time,
+            "avg_time_per_card": processing_time / job.total if job.total else 0,
+        }
+
+    # ================== INTERNAL ==================
+
+    def _owned_task(self, task_id: int, worker_id: str) -> Optional[BatchTask]:
+        # Lease boshqa worker'ga o'tgan bo'lsa (muddati tugab) – natijani yozmaymiz
+        return (
+            self.db.query(BatchTask)
+            .filter(
+                BatchTask.id == task_id,
+                BatchTask.lease_owner == worker_id,
+                BatchTask.status == "running",
+            )
+            .with_for_update()
+            .first()
+        )
+
+    def _add_event(
+        self,
+        job_id: int,
+        type: str,
+        article: Optional[str] = None,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.db.add(
+            BatchJobEvent(job_id=job_id, type=type, article=article, payload=payload)
+        )
+
+    def _refresh_job(self, job_id: int) -> None:
+        """Hisoblagichlarni yangilash; hamma task tugagan bo'lsa – job yopiladi."""
+        job = (
+            self.db.query(BatchJob)
+            .filter(BatchJob.id == job_id)
+            .with_for_update()
+            .first()
+        )
+        if job is None:
+            return
+
+        self.db.flush()
+        counts = dict(
+            self.db.query(BatchTask.status, func.count(BatchTask.id))
+            .filter(BatchTask.job_id == job_id)
+            .group_by(BatchTask.status)
+            .all()
+        )
+        job.completed = counts.get("completed", 0)
+        job.failed = counts.get("failed", 0)
+
+        unfinished = counts.get("pending", 0) + counts.get("running", 0)
+        if unfinished == 0 and job.status in ACTIVE_JOB_STATUSES:
+            job.status = "completed"
+            job.finished_at = datetime.utcnow()
+            self._add_event(
+                job_id,
+                "batch_completed",
+                payload={
+                    "total": job.total,
+                    "completed": job.completed,
+                    "failed": job.failed,
+                },
+            )
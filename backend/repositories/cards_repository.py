@@ -1,44 +1,166 @@
+import copy
 import json
-from typing import List, Dict, Any, Optional
+import re
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 
 from core.config import settings
 
 
+class _CardsSnapshot:
+    """
+    cards_raw.json indeksi: nmID -> karta, vendorCode (lower) -> karta.
+    O'zgartirilmaydi – fayl o'zgarsa yangisi quriladi va bitta assignment
+    bilan almashtiriladi (o'quvchilar lock'siz, yarim qurilgan indeksni ko'rmaydi).
+
+    Katta dump'larda (CARDS_STREAMING_THRESHOLD_MB) kartalar xotirada
+    saqlanmaydi – faqat fayldagi (offset, length), karta so'ralganda o'sha
+    bo'lak o'qiladi.
+    """
+
+    __slots__ = ("signature", "streaming", "by_nm_id", "by_vendor_code", "cards", "offsets")
+
+    def __init__(
+        self,
+        signature: tuple,
+        streaming: bool,
+        by_nm_id: Dict[int, int],
+        by_vendor_code: Dict[str, int],
+        cards: List[Dict[str, Any]],
+        offsets: List[Tuple[int, int]],
+    ):
+        self.signature = signature
+        self.streaming = streaming
+        # nmID / vendorCode -> pozitsiya (cards ro'yxatidagi indeks yoki offsets)
+        self.by_nm_id = by_nm_id
+        self.by_vendor_code = by_vendor_code
+        self.cards = cards
+        self.offsets = offsets
+
+
+class _CardsIndex:
+    """Barcha CardsRepository instance'lari uchun bitta: joriy snapshot + qurish lock'i."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot: Optional[_CardsSnapshot] = None
+
+
+class _TechIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (signature, data) – bitta assignment bilan almashtiriladi
+        self.snapshot: Optional[Tuple[tuple, Dict[str, str]]] = None
+
+
+# Top-level massiv ichidagi obyekt chegaralarini topish uchun: faqat shu
+# belgilar holatni o'zgartiradi, qolganini regex o'tkazib yuboradi
+_JSON_STRUCTURAL = re.compile(rb'[\\"{}\[\]]')
+_STREAM_CHUNK = 4 * 1024 * 1024
+
+
+def _file_signature(path: Path) -> Optional[tuple]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def iter_array_objects(path: Path, chunk_size: int = _STREAM_CHUNK) -> Iterator[Tuple[int, bytes]]:
+    """
+    Katta JSON massivini butunlay xotiraga yuklamasdan o'qish:
+    har bir top-level obyekt uchun (offset, bytes) qaytaradi.
+    """
+    depth = 0
+    in_string = False
+    escape = False
+    obj_start = -1
+    pending = b""
+    pending_offset = 0
+    base = 0
+
+    with path.open("rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            data = pending + chunk
+            data_offset = pending_offset if pending else base
+            keep_from = len(data)
+
+            # pending allaqachon skanerlangan – faqat yangi chunk'dan boshlaymiz
+            i = len(pending)
+            if escape:
+                # Oldingi chunk "\" bilan tugagan – keyingi belgi escape qilingan
+                escape = False
+                i += 1
+            while True:
+                m = _JSON_STRUCTURAL.search(data, i)
+                if m is None:
+                    break
+                ch = m.group()
+                pos = m.start()
+                i = pos + 1
+
+                if in_string:
+                    if ch == b"\\":
+                        if pos + 1 >= len(data):
+                            escape = True
+                            break
+                        i = pos + 2
+                    elif ch == b'"':
+                        in_string = False
+                    continue
+
+                if ch == b'"':
+                    in_string = True
+                elif ch in (b"{", b"["):
+                    depth += 1
+                    if depth == 2 and ch == b"{":
+                        obj_start = pos
+                elif ch in (b"}", b"]"):
+                    depth -= 1
+                    if depth == 1 and ch == b"}" and obj_start >= 0:
+                        yield data_offset + obj_start, data[obj_start:pos + 1]
+                        obj_start = -1
+
+            base += len(chunk)
+            if obj_start >= 0:
+                # Tugallanmagan obyekt – keyingi chunk bilan davom etamiz
+                keep_from = obj_start
+                obj_start = 0
+            pending = data[keep_from:]
+            pending_offset = data_offset + keep_from
+
+
 class CardsRepository:
+    _cards_indexes: Dict[Path, _CardsIndex] = {}
+    _tech_indexes: Dict[Path, _TechIndex] = {}
+    _indexes_lock = threading.Lock()
+
     def __init__(self):
         self.cards_path = settings.DATA_DIR / "cards_raw.json"
         self.tech_path = settings.DATA_DIR / "tech_descriptions.json"
-        self._cards_cache = None
-    
+
     def _load_cards(self) -> List[Dict[str, Any]]:
-        if self._cards_cache is None:
-            if not self.cards_path.exists():
-                raise FileNotFoundError(f"cards_raw.json not found")
-            
-            with self.cards_path.open("r", encoding="utf-8") as f:
-                self._cards_cache = json.load(f)
-        
-        return self._cards_cache
-    
+        index = self._get_cards_index()
+        if index.streaming:
+            return [self._read_card(index, pos) for pos in range(len(index.offsets))]
+        return index.cards
+
     def find_by_article(self, article: str) -> Dict[str, Any]:
-        cards = self._load_cards()
+        card = self._lookup(self._get_cards_index(), article)
+        if card is None:
+            raise ValueError(f"Card not found: {article}")
+        return card
 
-        try:
-            nm_id = int(article)
-            for card in cards:
-                if card.get("nmID") == nm_id:
-                    return card
-        except ValueError:
-            pass
+    def find_many(self, articles: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Bir nechta artikul – bitta indeks snapshot'idan; topilmaganlar None."""
+        index = self._get_cards_index()
+        return {str(article): self._lookup(index, str(article)) for article in articles}
 
-        article_lower = article.strip().lower()
-        for card in cards:
-            vendor_code = str(card.get("vendorCode", "")).strip().lower()
-            if vendor_code == article_lower:
-                return card
-        
-        raise ValueError(f"Card not found: {article}")
-    
     def extract_photo_urls(self, card: Dict[str, Any]) -> List[str]:
         photos = card.get("photos", [])
         urls = []
@@ -47,18 +169,140 @@ class CardsRepository:
             if big:
                 urls.append(big)
         return urls
-    
+
     def get_tech_description(self, nm_id: Optional[int]) -> Optional[str]:
         if not nm_id:
             return None
-        
+
+        try:
+            return self._get_tech_index().get(str(nm_id))
+        except Exception:
+            return None
+
+    def reload(self) -> None:
+        for holder in (self._cards_holder(), self._tech_holder()):
+            with holder.lock:
+                holder.snapshot = None
+
+    # ===== LOOKUP =====
+
+    def _lookup(self, index: _CardsSnapshot, article: str) -> Optional[Dict[str, Any]]:
+        pos = None
         try:
-            if not self.tech_path.exists():
-                return None
-            
-            with self.tech_path.open("r", encoding="utf-8") as f:
-                tech_data = json.load(f)
-            
-            return tech_data.get(str(nm_id))
-        except:
-            return None
\ No newline at end of file
+            pos = index.by_nm_id.get(int(article))
+        except ValueError:
+            pass
+
+        if pos is None:
+            pos = index.by_vendor_code.get(article.strip().lower())
+        if pos is None:
+            return None
+        return self._read_card(index, pos)
+
+    def _read_card(self, index: _CardsSnapshot, pos: int) -> Dict[str, Any]:
+        if not index.streaming:
+            # Indeks umumiy – chaqiruvchi kartani o'zgartirsa ham buzilmasin
+            return copy.deepcopy(index.cards[pos])
+
+        offset, length = index.offsets[pos]
+        with self.cards_path.open("rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    # ===== CARDS INDEX =====
+
+    def _cards_holder(self) -> _CardsIndex:
+        with self._indexes_lock:
+            holder = self._cards_indexes.get(self.cards_path)
+            if holder is None:
+                holder = _CardsIndex()
+                self._cards_indexes[self.cards_path] = holder
+            return holder
+
+    def _get_cards_index(self) -> _CardsSnapshot:
+        signature = _file_signature(self.cards_path)
+        if signature is None:
+            raise FileNotFoundError("cards_raw.json not found")
+
+        holder = self._cards_holder()
+        snapshot = holder.snapshot
+        if snapshot is not None and snapshot.signature == signature:
+            return snapshot
+
+        with holder.lock:
+            snapshot = holder.snapshot
+            if snapshot is None or snapshot.signature != signature:
+                threshold = settings.CARDS_STREAMING_THRESHOLD_MB * 1024 * 1024
+                if threshold > 0 and signature[1] >= threshold:
+                    snapshot = self._build_streaming(signature)
+                else:
+                    snapshot = self._build_in_memory(signature)
+                holder.snapshot = snapshot
+            return snapshot
+
+    def _build_in_memory(self, signature: tuple) -> _CardsSnapshot:
+        with self.cards_path.open("r", encoding="utf-8") as f:
+            cards = json.load(f)
+
+        by_nm_id: Dict[int, int] = {}
+        by_vendor_code: Dict[str, int] = {}
+        for pos, card in enumerate(cards):
+            self._index_card(card, pos, by_nm_id, by_vendor_code)
+
+        return _CardsSnapshot(signature, False, by_nm_id, by_vendor_code, cards, [])
+
+    def _build_streaming(self, signature: tuple) -> _CardsSnapshot:
+        print(f"📚 Indexing large cards dump (streaming): {self.cards_path}")
+        by_nm_id: Dict[int, int] = {}
+        by_vendor_code: Dict[str, int] = {}
+        offsets: List[Tuple[int, int]] = []
+
+        for offset, raw in iter_array_objects(self.cards_path):
+            card = json.loads(raw)
+            self._index_card(card, len(offsets), by_nm_id, by_vendor_code)
+            offsets.append((offset, len(raw)))
+
+        print(f"✅ Cards dump indexed: {len(offsets)} cards")
+        return _CardsSnapshot(signature, True, by_nm_id, by_vendor_code, [], offsets)
+
+    @staticmethod
+    def _index_card(
+        card: Dict[str, Any],
+        pos: int,
+        by_nm_id: Dict[int, int],
+        by_vendor_code: Dict[str, int],
+    ) -> None:
+        # Takroriy kalitlarda birinchisi ustun (avvalgi chiziqli qidiruv xulqi)
+        nm_id = card.get("nmID")
+        if isinstance(nm_id, int):
+            by_nm_id.setdefault(nm_id, pos)
+        vendor_code = str(card.get("vendorCode", "")).strip().lower()
+        by_vendor_code.setdefault(vendor_code, pos)
+
+    # ===== TECH DESCRIPTIONS =====
+
+    def _tech_holder(self) -> _TechIndex:
+        with self._indexes_lock:
+            holder = self._tech_indexes.get(self.tech_path)
+            if holder is None:
+                holder = _TechIndex()
+                self._tech_indexes[self.tech_path] = holder
+            return holder
+
+    def _get_tech_index(self) -> Dict[str, str]:
+        signature = _file_signature(self.tech_path)
+        if signature is None:
+            return {}
+
+        holder = self._tech_holder()
+        snapshot = holder.snapshot
+        if snapshot is not None and snapshot[0] == signature:
+            return snapshot[1]
+
+        with holder.lock:
+            snapshot = holder.snapshot
+            if snapshot is None or snapshot[0] != signature:
+                with self.tech_path.open("r", encoding="utf-8") as f:
+                    snapshot = (signature, json.load(f))
+                holder.snapshot = snapshot
+            return snapshot[1]
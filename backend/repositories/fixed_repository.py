@@ -1,32 +1,118 @@
-from typing import Dict, Any
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 import pandas as pd
 
 from core.config import settings
 
 
+class _FixedIndex:
+    """
+    fixed.xlsx'ning xotiradagi indeksi: artikul -> tozalangan qator.
+
+    Barcha FixedRepository instance'lari (va thread'lar) uchun bitta.
+    Fayl mtime/size o'zgarsa avtomatik qayta quriladi.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.signature: Optional[tuple] = None
+        self.rows: Dict[str, Dict[str, Any]] = {}
+
+
 class FixedRepository:
+    _indexes: Dict[Path, _FixedIndex] = {}
+    _indexes_lock = threading.Lock()
+
+    SIDECAR_FORMAT_VERSION = 2
     
-    def __init__(self):
+    def __init__(self, use_sidecar: Optional[bool] = None):
         self.fixed_path = settings.DATA_DIR / "fixed.xlsx"
+        self.sidecar_path = self.fixed_path.with_name(".fixed.index.json")
+        self.use_sidecar = (
+            settings.FIXED_SIDECAR_ENABLED if use_sidecar is None else use_sidecar
+        )
     
     def get_by_artikul(self, artikul_id: str) -> Dict[str, Any]:
         artikul_id = str(artikul_id).strip()
-        
-        if not self.fixed_path.exists():
+        row = self._get_index().get(artikul_id)
+        return dict(row) if row else {}
+
+    def get_many(self, artikuls: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Bir nechta artikul uchun bitta indeks snapshot'idan o'qish."""
+        index = self._get_index()
+        result: Dict[str, Dict[str, Any]] = {}
+        for artikul in artikuls:
+            key = str(artikul).strip()
+            row = index.get(key)
+            result[key] = dict(row) if row else {}
+        return result
+
+    def reload(self) -> None:
+        index = self._index_holder()
+        with index.lock:
+            index.signature = None
+            index.rows = {}
+
+    # ===== INDEX =====
+
+    def _index_holder(self) -> _FixedIndex:
+        with self._indexes_lock:
+            holder = self._indexes.get(self.fixed_path)
+            if holder is None:
+                holder = _FixedIndex()
+                self._indexes[self.fixed_path] = holder
+            return holder
+
+    def _file_signature(self) -> Optional[tuple]:
+        try:
+            stat = self.fixed_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _get_index(self) -> Dict[str, Dict[str, Any]]:
+        holder = self._index_holder()
+        signature = self._file_signature()
+
+        if signature is None:
             return {}
-        
+
+        if holder.signature == signature:
+            return holder.rows
+
+        with holder.lock:
+            # Boshqa thread qurib bo'lgan bo'lishi mumkin
+            if holder.signature != signature:
+                rows = None
+                if self.use_sidecar:
+                    rows = self._read_sidecar(signature)
+                if rows is None:
+                    columns, rows = self._build_rows()
+                    if self.use_sidecar:
+                        self._write_sidecar(signature, columns, rows)
+                holder.rows = rows
+                holder.signature = signature
+            return holder.rows
+
+    def _build_rows(self) -> Tuple[List[Any], Dict[str, Dict[str, Any]]]:
+        """Qaytadi: (excel ustunlari tartibi, artikul -> tozalangan qator)."""
         df = pd.read_excel(self.fixed_path, dtype=str)
         if df.empty:
-            return {}
-        
+            return list(df.columns), {}
+
         first_col_name = df.columns[0]
-        matched = df[df[first_col_name].astype(str).str.strip() == artikul_id]
-        
-        if matched.empty:
-            return {}
-        
-        row_dict = matched.to_dict(orient="records")[-1]
-        
+        keys = df[first_col_name].astype(str).str.strip()
+
+        rows: Dict[str, Dict[str, Any]] = {}
+        # Takroriy artikul bo'lsa – oxirgi qator ustun (avvalgi [-1] xulqi)
+        for key, row_dict in zip(keys, df.to_dict(orient="records")):
+            rows[key] = self._clean_row(row_dict)
+        return list(df.columns), rows
+
+    @staticmethod
+    def _clean_row(row_dict: Dict[str, Any]) -> Dict[str, Any]:
         cleaned = {}
         for k, v in row_dict.items():
             if isinstance(v, float) and pd.isna(v):
@@ -37,9 +123,67 @@ class FixedRepository:
             if val == "":
                 continue
             cleaned[k] = val
-        
         return cleaned
 
+    # ===== SIDECAR =====
+    # fixed.xlsx'ni openpyxl orqali parse qilish sekin. Sidecar – ustunlar
+    # ro'yxati + har bir artikul uchun qiymatlar massivi (columnar JSON),
+    # manba faylning mtime/size imzosi bilan. Imzo mos kelmasa e'tiborsiz qoldiriladi.
+
+    def _read_sidecar(self, signature: tuple) -> Optional[Dict[str, Dict[str, Any]]]:
+        try:
+            with self.sidecar_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if data.get("format") != self.SIDECAR_FORMAT_VERSION:
+            return None
+        if tuple(data.get("source_signature") or ()) != tuple(signature):
+            return None
+
+        columns: List[str] = data["columns"]
+        rows: Dict[str, Dict[str, Any]] = {}
+        for key, values in data["rows"].items():
+            rows[key] = {
+                columns[i]: v for i, v in enumerate(values) if v is not None
+            }
+        return rows
+
+    def _write_sidecar(
+        self,
+        signature: tuple,
+        columns: List[Any],
+        rows: Dict[str, Dict[str, Any]],
+    ) -> None:
+        # Ustunlar excel tartibida – qayta tiklangan qatorda artikul ustuni birinchi
+        # qoladi (tozalangan qatorlardan yig'ilsa, bo'sh katakli qatorda tartib buziladi)
+        col_index = {col: i for i, col in enumerate(columns)}
+
+        packed = {}
+        for key, row in rows.items():
+            values = [None] * len(columns)
+            for col, v in row.items():
+                values[col_index[col]] = v
+            packed[key] = values
+
+        tmp_path = self.sidecar_path.with_suffix(".tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "format": self.SIDECAR_FORMAT_VERSION,
+                        "source_signature": list(signature),
+                        "columns": columns,
+                        "rows": packed,
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+            tmp_path.replace(self.sidecar_path)
+        except OSError as e:
+            print(f"⚠️ fixed.xlsx sidecar write failed: {e}")
+
 
 fixed_list = [
     "Состав",
@@ -0,0 +1,67 @@
+# repositories/ghost_cache_repository.py
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.ghost_cache import GhostCacheEntry
+
+
+class GhostCacheRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, photo_hash: str, prompt_hash: str, model: str) -> Optional[GhostCacheEntry]:
+        return (
+            self.db.query(GhostCacheEntry)
+            .filter(
+                GhostCacheEntry.photo_hash == photo_hash,
+                GhostCacheEntry.prompt_hash == prompt_hash,
+                GhostCacheEntry.model == model,
+            )
+            .first()
+        )
+
+    def touch(self, entry_id: int) -> None:
+        (
+            self.db.query(GhostCacheEntry)
+            .filter(GhostCacheEntry.id == entry_id)
+            .update(
+                {
+                    "hits": GhostCacheEntry.hits + 1,
+                    "last_used_at": datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+
+    def save(
+        self,
+        photo_hash: str,
+        prompt_hash: str,
+        model: str,
+        result_url: Optional[str],
+        file_path: str,
+    ) -> GhostCacheEntry:
+        entry = GhostCacheEntry(
+            photo_hash=photo_hash,
+            prompt_hash=prompt_hash,
+            model=model,
+            result_url=result_url,
+            file_path=file_path,
+            hits=0,
+        )
+        self.db.add(entry)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Boshqa process bir vaqtda yozib ulgurdi – o'shanisi qoladi
+            self.db.rollback()
+            existing = self.get(photo_hash, prompt_hash, model)
+            if existing is not None:
+                return existing
+            raise
+        self.db.refresh(entry)
+        return entry
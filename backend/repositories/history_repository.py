@@ -94,6 +94,41 @@ class HistoryRepository:
             query = query.filter(ProcessingHistory.status == status)
         return query.scalar() or 0
 
+    def get_for_publish(
+        self,
+        history_ids: List[int],
+        user_id: Optional[int] = None,
+    ) -> List[ProcessingHistory]:
+        """Nashr uchun tanlangan natijalar (user_id=None – admin, hammasi)."""
+        query = self.db.query(ProcessingHistory).filter(
+            ProcessingHistory.id.in_(history_ids)
+        )
+        if user_id is not None:
+            query = query.filter(ProcessingHistory.user_id == user_id)
+        return query.order_by(ProcessingHistory.id).all()
+
+    def set_publish_status(
+        self,
+        history_ids: List[int],
+        publish_status: str,
+        error: Optional[str] = None,
+    ) -> int:
+        if not history_ids:
+            return 0
+        values: Dict[str, Any] = {
+            "publish_status": publish_status,
+            "publish_error": error,
+        }
+        if publish_status == "published":
+            values["published_at"] = datetime.utcnow()
+        updated = (
+            self.db.query(ProcessingHistory)
+            .filter(ProcessingHistory.id.in_(history_ids))
+            .update(values, synchronize_session=False)
+        )
+        self.db.commit()
+        return updated
+
     def get_statistics(self, user_id: int, days: int = 30) -> Dict[str, Any]:
         since = datetime.utcnow() - timedelta(days=days)
 
@@ -0,0 +1,65 @@
+# repositories/image_analysis_repository.py
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.image_analysis import ImageAnalysisResult
+
+
+class ImageAnalysisRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_by_key(self, cache_key: str) -> Optional[ImageAnalysisResult]:
+        return (
+            self.db.query(ImageAnalysisResult)
+            .filter(ImageAnalysisResult.cache_key == cache_key)
+            .first()
+        )
+
+    def touch(self, row: ImageAnalysisResult) -> None:
+        row.hit_count = (row.hit_count or 0) + 1
+        row.last_used_at = datetime.utcnow()
+        self.db.commit()
+
+    def save(
+        self,
+        cache_key: str,
+        photo_urls: List[str],
+        subject_name: Optional[str],
+        target_fields: List[str],
+        prompt_version: str,
+        model: str,
+        description: str,
+    ) -> Optional[ImageAnalysisResult]:
+        row = ImageAnalysisResult(
+            cache_key=cache_key,
+            photo_urls=photo_urls,
+            subject_name=subject_name,
+            target_fields=target_fields,
+            prompt_version=prompt_version,
+            model=model,
+            description=description,
+        )
+        self.db.add(row)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Parallel worker xuddi shu kalitni allaqachon yozib bo'lgan
+            self.db.rollback()
+            return self.get_by_key(cache_key)
+        self.db.refresh(row)
+        return row
+
+    def get_statistics(self) -> Dict[str, Any]:
+        total, total_hits = self.db.query(
+            func.count(ImageAnalysisResult.id),
+            func.coalesce(func.sum(ImageAnalysisResult.hit_count), 0),
+        ).one()
+        return {
+            "stored_results": total or 0,
+            "stored_hits": int(total_hits or 0),
+        }
@@ -0,0 +1,197 @@
+# repositories/kie_job_repository.py
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from models.kie_job import KIEJob
+
+
+ACTIVE_KIE_STATES = ("queued", "submitting", "submitted", "downloading")
+
+# createTask paytida process o'lsa – KIE task yaratilganmi, noma'lum
+SUBMIT_INTERRUPTED_ERROR = (
+    "Interrupted while submitting to KIE – not resubmitted to avoid a double charge"
+)
+
+
+class KIEJobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_job(
+        self,
+        user_id: int,
+        kind: str,
+        model: str,
+        input_data: Dict[str, Any],
+        input_hash: str,
+        worker_id: str,
+        lease_seconds: int,
+    ) -> KIEJob:
+        # Yaratgan process darhol lease oladi – resumer uni boshqa joyda qayta boshlamasin
+        job = KIEJob(
+            user_id=user_id,
+            kind=kind,
+            model=model,
+            input_data=input_data,
+            input_hash=input_hash,
+            state="queued",
+            attempts=1,
+            lease_owner=worker_id,
+            lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds),
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get_job(self, job_id: int) -> Optional[KIEJob]:
+        return self.db.query(KIEJob).filter(KIEJob.id == job_id).first()
+
+    def find_active(self, user_id: int, input_hash: str) -> Optional[KIEJob]:
+        return (
+            self.db.query(KIEJob)
+            .filter(
+                KIEJob.user_id == user_id,
+                KIEJob.input_hash == input_hash,
+                KIEJob.state.in_(ACTIVE_KIE_STATES),
+            )
+            .order_by(KIEJob.id.desc())
+            .first()
+        )
+
+    def list_jobs(
+        self,
+        user_id: int,
+        limit: int = 50,
+        offset: int = 0,
+        state: Optional[str] = None,
+    ) -> List[KIEJob]:
+        query = self.db.query(KIEJob).filter(KIEJob.user_id == user_id)
+        if state:
+            query = query.filter(KIEJob.state == state)
+        return (
+            query.order_by(KIEJob.created_at.desc())
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+
+    # ================== LEASING ==================
+
+    def claim_stale(
+        self,
+        worker_id: str,
+        limit: int,
+        lease_seconds: int,
+        max_attempts: int,
+    ) -> List[KIEJob]:
+        """
+        Tugallanmagan, lekin egasi yo'q (process o'lgan / restart) job'lar –
+        FOR UPDATE SKIP LOCKED bilan shu worker'ga olinadi.
+        """
+        now = datetime.utcnow()
+        jobs = (
+            self.db.query(KIEJob)
+            .filter(
+                KIEJob.state.in_(ACTIVE_KIE_STATES),
+                or_(KIEJob.lease_expires_at.is_(None), KIEJob.lease_expires_at < now),
+            )
+            .order_by(KIEJob.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        claimed = []
+        for job in jobs:
+            if job.state == "submitting" and not job.task_id:
+                # Qayta createTask – ikkinchi marta pul to'lash bo'lishi mumkin
+                job.state = "failed"
+                job.error_message = SUBMIT_INTERRUPTED_ERROR
+                job.lease_owner = None
+                job.lease_expires_at = None
+                job.finished_at = now
+                continue
+            if job.attempts >= max_attempts:
+                job.state = "failed"
+                job.error_message = job.error_message or "Lease expired (worker died)"
+                job.lease_owner = None
+                job.lease_expires_at = None
+                job.finished_at = now
+                continue
+            job.lease_owner = worker_id
+            job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+            job.attempts += 1
+            claimed.append(job)
+
+        self.db.commit()
+        for job in claimed:
+            self.db.refresh(job)
+        return claimed
+
+    def heartbeat(self, worker_id: str, job_ids: List[int], lease_seconds: int) -> int:
+        if not job_ids:
+            return 0
+        updated = (
+            self.db.query(KIEJob)
+            .filter(
+                KIEJob.id.in_(job_ids),
+                KIEJob.lease_owner == worker_id,
+                KIEJob.state.in_(ACTIVE_KIE_STATES),
+            )
+            .update(
+                {"lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)},
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return updated
+
+    # ================== STATE ==================
+
+    def set_submitting(self, job_id: int) -> None:
+        # createTask'dan oldin: shu nuqtadan keyin job avtomatik qayta yuborilmaydi
+        self._update(job_id, {"state": "submitting"})
+
+    def set_submitted(self, job_id: int, task_id: str) -> None:
+        self._update(job_id, {"task_id": task_id, "state": "submitted"})
+
+    def set_downloading(self, job_id: int, result_urls: List[str]) -> None:
+        self._update(job_id, {"result_urls": result_urls, "state": "downloading"})
+
+    def complete(self, job_id: int, file_path: str) -> None:
+        self._update(
+            job_id,
+            {
+                "file_path": file_path,
+                "state": "completed",
+                "error_message": None,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "finished_at": datetime.utcnow(),
+            },
+        )
+
+    def fail(self, job_id: int, error: str) -> None:
+        self._update(
+            job_id,
+            {
+                "state": "failed",
+                "error_message": error,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "finished_at": datetime.utcnow(),
+            },
+        )
+
+    def _update(self, job_id: int, values: Dict[str, Any]) -> None:
+        values["updated_at"] = datetime.utcnow()
+        (
+            self.db.query(KIEJob)
+            .filter(KIEJob.id == job_id)
+            .update(values, synchronize_session=False)
+        )
+        self.db.commit()
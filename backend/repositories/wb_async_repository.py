@@ -0,0 +1,330 @@
+# repositories/wb_async_repository.py
+"""
+WB Content API uchun async client (aiohttp, umumiy keep-alive session).
+
+Har so'rov endpoint bo'yicha WB rate limiter'dan o'tadi (core/wb_rate_limit.py),
+429 esa jitter'li backoff bilan qayta yuboriladi.
+
+async route'lar shu client'ni to'g'ridan-to'g'ri await qiladi – sekin WB
+javobi event loop'ni (va undagi SSE stream'larni) to'xtatib qo'ymaydi.
+Thread'da ishlaydigan pipeline uchun WBRepository sync facade bo'lib qoladi
+(core.background_loop orqali shu client'ni chaqiradi).
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import aiohttp
+import aiohttp.payload
+
+from core.background_loop import run_sync
+from core.config import settings
+from core.http_clients import get_aiohttp_session
+from core.wb_rate_limit import get_wb_rate_limiter
+from services.subject_charcs_cache import get_subject_charcs_cache
+
+
+class WBAPIError(ValueError):
+    """WB javobi xato (status != 200 yoki error=true). ValueError – eski xulq bilan mos."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def select_card_by_article(cards: List[Dict[str, Any]], article: str) -> Dict[str, Any]:
+    """
+    textSearch natijalaridan eng mos karta:
+    vendorCode aniq mos -> nmID mos -> birinchi karta.
+    """
+    if not cards:
+        raise ValueError(
+            f"Card with article/textSearch '{article}' not found in WB API"
+        )
+
+    article_lower = str(article).strip().lower()
+
+    # 1) vendorCode bo'yicha aniq match
+    for card in cards:
+        vendor_code = str(card.get("vendorCode", "")).strip().lower()
+        if vendor_code == article_lower:
+            return card
+
+    nm_id = None
+    try:
+        nm_id = int(article)
+    except ValueError:
+        pass
+
+    if nm_id is not None:
+        for card in cards:
+            if card.get("nmID") == nm_id:
+                return card
+
+    return cards[0]
+
+
+class AsyncWBRepository:
+    BASE_URL = "https://content-api.wildberries.ru"
+
+    def _get_headers(self, json_body: bool = True) -> Dict[str, str]:
+        """
+        Barcha WB API so'rovlari uchun umumiy header.
+        multipart so'rovlarda Content-Type'ni aiohttp o'zi (boundary bilan) qo'yadi.
+        """
+        if not settings.WB_API_KEY:
+            raise ValueError("WB_API_KEY not set")
+
+        headers = {
+            "Authorization": settings.WB_API_KEY,
+            "Accept": "application/json",
+        }
+        if json_body:
+            headers["Content-Type"] = "application/json"
+        return headers
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        error_prefix: str,
+        failed_prefix: str,
+        timeout: float,
+        headers: Optional[Dict[str, str]] = None,
+        data_factory: Optional[Callable[[], Any]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        So'rov + umumiy tekshiruv:
+        status != 200 -> "{error_prefix} {status}: {text}",
+        {"error": true} -> "{failed_prefix}: {errorText}".
+
+        Har so'rov endpoint bo'yicha rate limiter'dan o'tadi; 429 bo'lsa
+        limiter backoff qiladi va so'rov WB_RATE_LIMIT_MAX_RETRIES marta
+        qayta yuboriladi. data_factory – har urinish uchun yangi body
+        (multipart FormData qayta ishlatilmaydi).
+        """
+        limiter = get_wb_rate_limiter() if settings.WB_RATE_LIMIT_ENABLED else None
+        endpoint = limiter.endpoint_for(path) if limiter else None
+        max_retries = limiter.max_retries if limiter else 0
+
+        for attempt in range(max_retries + 1):
+            if limiter is not None:
+                # SQLite tranzaksiyasi – event loop'ni bloklamasin
+                wait = await asyncio.to_thread(limiter.reserve, endpoint)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                if attempt:
+                    limiter.on_retry(endpoint)
+
+            if data_factory is not None:
+                kwargs["data"] = data_factory()
+
+            session = get_aiohttp_session()
+            async with session.request(
+                method,
+                f"{self.BASE_URL}{path}",
+                headers=headers if headers is not None else self._get_headers(),
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                **kwargs,
+            ) as resp:
+                text = await resp.text()
+                if resp.status == 429 and limiter is not None:
+                    # Kutish keyingi reserve()'da (blocked_until) – boshqa so'rovlar ham kutadi
+                    await asyncio.to_thread(limiter.on_rate_limited, endpoint, resp.headers, attempt)
+                    if attempt < max_retries:
+                        continue
+                if resp.status != 200:
+                    raise WBAPIError(f"{error_prefix} {resp.status}: {text}", status=resp.status)
+                data = await resp.json(content_type=None)
+
+            if isinstance(data, dict) and data.get("error"):
+                raise WBAPIError(f"{failed_prefix}: {data.get('errorText')}", status=resp.status)
+            return data
+
+    # ================== SUBJECT CHARCS ==================
+
+    async def get_subject_charcs(self, subject_id: int) -> List[Dict[str, Any]]:
+        """
+        Мета-информация характеристик по subject_id (keshlangan, TTL + disk snapshot).
+        Kesh sync (thread'lar uchun umumiy) – miss bo'lsa fetch fon loop'da bajariladi.
+        """
+        return await asyncio.to_thread(
+            get_subject_charcs_cache().get,
+            subject_id,
+            lambda sid: run_sync(self.fetch_subject_charcs(sid)),
+        )
+
+    async def fetch_subject_charcs(self, subject_id: int) -> List[Dict[str, Any]]:
+        """
+        Мета-информация характеристик по subject_id – to'g'ridan-to'g'ri WB'dan
+        """
+        data = await self._request(
+            "GET",
+            f"/content/v2/object/charcs/{subject_id}",
+            error_prefix="WB API error",
+            failed_prefix="WB API error",
+            timeout=30,
+        )
+
+        raw_charcs = data.get("data", [])
+
+        return [
+            {
+                "charcID": item["charcID"],
+                "name": item["name"],
+                "required": item["required"],
+            }
+            for item in raw_charcs
+        ]
+
+    # ================== KARTALAR BILAN ISH ==================
+
+    async def get_cards_by_article(
+        self,
+        article: str,
+        *,
+        with_photo: int = -1,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        WB content/v2/get/cards/list endpointiga textSearch=article bilan POST yuboradi
+        va "cards" massivini qaytaradi.
+        """
+        body = {
+            "settings": {
+                "cursor": {
+                    "limit": limit,
+                },
+                "filter": {
+                    "textSearch": str(article),
+                    "withPhoto": with_photo,
+                },
+                "sort": {
+                    "ascending": False
+                },
+            }
+        }
+
+        data = await self._request(
+            "POST",
+            "/content/v2/get/cards/list",
+            error_prefix="WB API error",
+            failed_prefix="WB API error",
+            timeout=30,
+            json=body,
+        )
+        return data.get("cards", [])
+
+    async def get_cards_page(
+        self,
+        cursor: Optional[Dict[str, Any]] = None,
+        *,
+        limit: int = 100,
+        with_photo: int = -1,
+    ) -> Dict[str, Any]:
+        """
+        Katalogni cursor bilan sahifalab o'qish (updatedAt bo'yicha o'sish tartibida).
+
+        cursor – oldingi javobdagi {"updatedAt": ..., "nmID": ...} yoki None (boshidan).
+        Qaytaradi: {"cards": [...], "cursor": {"updatedAt", "nmID", "total"}}.
+        total < limit bo'lsa – bu oxirgi sahifa.
+        """
+        cursor_body: Dict[str, Any] = {"limit": limit}
+        if cursor and cursor.get("updatedAt") and cursor.get("nmID"):
+            cursor_body["updatedAt"] = cursor["updatedAt"]
+            cursor_body["nmID"] = cursor["nmID"]
+
+        body = {
+            "settings": {
+                "cursor": cursor_body,
+                "filter": {
+                    "withPhoto": with_photo,
+                },
+                "sort": {
+                    "ascending": True
+                },
+            }
+        }
+
+        data = await self._request(
+            "POST",
+            "/content/v2/get/cards/list",
+            error_prefix="WB API error",
+            failed_prefix="WB API error",
+            timeout=60,
+            json=body,
+        )
+
+        return {
+            "cards": data.get("cards", []) or [],
+            "cursor": data.get("cursor", {}) or {},
+        }
+
+    async def get_card_by_article(self, article: str) -> Dict[str, Any]:
+        """
+        article bo‘yicha WB'dan bitta eng mos kartani qaytaradi.
+        """
+        cards = await self.get_cards_by_article(article)
+        return select_card_by_article(cards, article)
+
+    async def update_cards(self, cards: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        POST /content/v2/cards/update
+        """
+        return await self._request(
+            "POST",
+            "/content/v2/cards/update",
+            error_prefix="WB update error",
+            failed_prefix="WB update failed",
+            timeout=30,
+            json=cards,
+        )
+
+    # ================== MEDIA (FOTO/VIDEO) ==================
+
+    async def upload_media_file(
+        self,
+        nm_id: int,
+        photo_number: int,
+        file_bytes: Union[bytes, aiohttp.payload.Payload],
+        filename: str,
+        content_type: str = "image/jpeg",
+        timeout: float = 60,
+    ) -> Dict[str, Any]:
+        """
+        POST /content/v3/media/file
+        file_bytes – bytes yoki stream qilinadigan aiohttp payload.
+        """
+        headers = self._get_headers(json_body=False)
+        headers["X-Nm-Id"] = str(nm_id)
+        headers["X-Photo-Number"] = str(photo_number)
+
+        def build_form() -> aiohttp.FormData:
+            form = aiohttp.FormData()
+            form.add_field("uploadfile", file_bytes, filename=filename, content_type=content_type)
+            return form
+
+        return await self._request(
+            "POST",
+            "/content/v3/media/file",
+            error_prefix="WB upload failed",
+            failed_prefix="WB upload error",
+            timeout=timeout,
+            headers=headers,
+            data_factory=build_form,
+        )
+
+    async def save_media_state(self, nm_id: int, urls: List[str]) -> Dict[str, Any]:
+        """
+        POST /content/v3/media/save
+        """
+        return await self._request(
+            "POST",
+            "/content/v3/media/save",
+            error_prefix="WB media/save error",
+            failed_prefix="WB media/save failed",
+            timeout=30,
+            json={"nmID": nm_id, "data": urls},
+        )
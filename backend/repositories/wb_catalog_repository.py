@@ -0,0 +1,132 @@
+# repositories/wb_catalog_repository.py
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.wb_catalog import WBCatalogCard, WBCatalogSyncState
+
+
+def _parse_wb_datetime(value: Optional[str]) -> Optional[datetime]:
+    """WB updatedAt: '2024-05-01T12:34:56.123456Z' -> naive UTC datetime."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+class WBCatalogRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ================== CARDS ==================
+
+    def upsert_cards(self, cards: Iterable[Dict[str, Any]]) -> int:
+        now = datetime.utcnow()
+        rows = []
+        for card in cards:
+            nm_id = card.get("nmID")
+            if not nm_id:
+                continue
+            vendor_code = card.get("vendorCode")
+            rows.append(
+                {
+                    "nm_id": nm_id,
+                    "imt_id": card.get("imtID"),
+                    "vendor_code": vendor_code,
+                    "vendor_code_lower": str(vendor_code).strip().lower() if vendor_code else None,
+                    "subject_id": card.get("subjectID"),
+                    "wb_updated_at_raw": card.get("updatedAt"),
+                    "wb_updated_at": _parse_wb_datetime(card.get("updatedAt")),
+                    "card": card,
+                    "synced_at": now,
+                }
+            )
+
+        if not rows:
+            return 0
+
+        stmt = insert(WBCatalogCard).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WBCatalogCard.nm_id],
+            set_={
+                "imt_id": stmt.excluded.imt_id,
+                "vendor_code": stmt.excluded.vendor_code,
+                "vendor_code_lower": stmt.excluded.vendor_code_lower,
+                "subject_id": stmt.excluded.subject_id,
+                "wb_updated_at_raw": stmt.excluded.wb_updated_at_raw,
+                "wb_updated_at": stmt.excluded.wb_updated_at,
+                "card": stmt.excluded.card,
+                "synced_at": stmt.excluded.synced_at,
+            },
+        )
+        self.db.execute(stmt)
+        self.db.commit()
+        return len(rows)
+
+    def get_by_nm_id(self, nm_id: int) -> Optional[WBCatalogCard]:
+        return self.db.query(WBCatalogCard).filter(WBCatalogCard.nm_id == nm_id).first()
+
+    def get_by_vendor_code(self, vendor_code: str) -> Optional[WBCatalogCard]:
+        return (
+            self.db.query(WBCatalogCard)
+            .filter(WBCatalogCard.vendor_code_lower == str(vendor_code).strip().lower())
+            .order_by(WBCatalogCard.wb_updated_at.desc())
+            .first()
+        )
+
+    def get_by_imt_id(self, imt_id: int) -> List[WBCatalogCard]:
+        return self.db.query(WBCatalogCard).filter(WBCatalogCard.imt_id == imt_id).all()
+
+    def find_by_article(self, article: str) -> Optional[WBCatalogCard]:
+        """
+        WBRepository.get_card_by_article bilan bir xil ustuvorlik:
+        avval vendorCode, keyin nmID.
+        """
+        row = self.get_by_vendor_code(article)
+        if row is not None:
+            return row
+
+        try:
+            nm_id = int(str(article).strip())
+        except ValueError:
+            return None
+        return self.get_by_nm_id(nm_id)
+
+    def delete_by_nm_ids(self, nm_ids: Iterable[int]) -> int:
+        ids = [int(n) for n in nm_ids if n]
+        if not ids:
+            return 0
+        removed = (
+            self.db.query(WBCatalogCard)
+            .filter(WBCatalogCard.nm_id.in_(ids))
+            .delete(synchronize_session=False)
+        )
+        self.db.commit()
+        return removed
+
+    def count(self) -> int:
+        return self.db.query(WBCatalogCard).count()
+
+    # ================== SYNC STATE ==================
+
+    def get_state(self, name: str) -> WBCatalogSyncState:
+        state = (
+            self.db.query(WBCatalogSyncState)
+            .filter(WBCatalogSyncState.name == name)
+            .first()
+        )
+        if state is None:
+            state = WBCatalogSyncState(name=name, status="idle", total_synced=0)
+            self.db.add(state)
+            self.db.commit()
+            self.db.refresh(state)
+        return state
+
+    def save_state(self, state: WBCatalogSyncState) -> WBCatalogSyncState:
+        self.db.commit()
+        self.db.refresh(state)
+        return state
@@ -1,58 +1,39 @@
 # repositories/wb_repository.py
+"""
+WB Content API – sync facade.
 
-from typing import List, Dict, Any
-import requests
+Haqiqiy so'rovlar AsyncWBRepository'da (aiohttp). Bu class thread'da
+ishlaydigan kod (pipeline, batch worker, katalog sync) uchun: har metod
+coroutine'ni umumiy fon loop'da bajaradi va natijani kutadi.
+async route'lar AsyncWBRepository'ni to'g'ridan-to'g'ri await qilishi kerak.
+"""
 
-from core.config import settings
+from typing import List, Dict, Any, Optional
 
+from core.background_loop import run_sync
+from repositories.wb_async_repository import AsyncWBRepository
+from services.subject_charcs_cache import get_subject_charcs_cache
 
-class WBRepository:
-    BASE_URL = "https://content-api.wildberries.ru"
 
-    def _get_headers(self) -> Dict[str, str]:
-        """
-        Barcha WB API so'rovlari uchun umumiy header.
-        """
-        if not settings.WB_API_KEY:
-            raise ValueError("WB_API_KEY not set")
+class WBRepository:
+    BASE_URL = AsyncWBRepository.BASE_URL
 
-        return {
-            "Authorization": settings.WB_API_KEY,
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-        }
+    def __init__(self, async_repo: Optional[AsyncWBRepository] = None):
+        self.async_repo = async_repo or AsyncWBRepository()
 
     # ================== SUBJECT CHARCS ==================
 
     def get_subject_charcs(self, subject_id: int) -> List[Dict[str, Any]]:
         """
-        Мета-информация характеристик по subject_id
+        Мета-информация характеристик по subject_id (keshlangan, TTL + disk snapshot)
         """
-        headers = self._get_headers()
-        url = f"{self.BASE_URL}/content/v2/object/charcs/{subject_id}"
-
-        resp = requests.get(url, headers=headers, timeout=30)
-
-        if resp.status_code != 200:
-            raise ValueError(f"WB API error {resp.status_code}: {resp.text}")
+        return get_subject_charcs_cache().get(subject_id, self.fetch_subject_charcs)
 
-        data = resp.json()
-
-        if data.get("error"):
-            raise ValueError(f"WB API error: {data.get('errorText')}")
-
-        raw_charcs = data.get("data", [])
-
-        filtered = [
-            {
-                "charcID": item["charcID"],
-                "name": item["name"],
-                "required": item["required"],
-            }
-            for item in raw_charcs
-        ]
-
-        return filtered
+    def fetch_subject_charcs(self, subject_id: int) -> List[Dict[str, Any]]:
+        """
+        Мета-информация характеристик по subject_id – to'g'ridan-to'g'ri WB'dan
+        """
+        return run_sync(self.async_repo.fetch_subject_charcs(subject_id))
 
     # ================== KARTALAR BILAN ISH ==================
 
@@ -63,88 +44,26 @@ class WBRepository:
         with_photo: int = -1,
         limit: int = 20,
     ) -> List[Dict[str, Any]]:
-        """
-        WB content/v2/get/cards/list endpointiga textSearch=article bilan POST yuboradi
-        va "cards" massivini qaytaradi.
-        """
-        headers = self._get_headers()
-        url = f"{self.BASE_URL}/content/v2/get/cards/list"
-
-        body = {
-            "settings": {
-                "cursor": {
-                    "limit": limit,
-                },
-                "filter": {
-                    "textSearch": str(article),
-                    "withPhoto": with_photo,
-                },
-                "sort": {
-                    "ascending": False
-                },
-            }
-        }
-
-        resp = requests.post(url, headers=headers, json=body, timeout=30)
-
-        if resp.status_code != 200:
-            raise ValueError(f"WB API error {resp.status_code}: {resp.text}")
-
-        data = resp.json()
+        return run_sync(
+            self.async_repo.get_cards_by_article(article, with_photo=with_photo, limit=limit)
+        )
 
-        if isinstance(data, dict) and data.get("error"):
-            raise ValueError(f"WB API error: {data.get('errorText')}")
-
-        cards = data.get("cards", [])
-        return cards
+    def get_cards_page(
+        self,
+        cursor: Optional[Dict[str, Any]] = None,
+        *,
+        limit: int = 100,
+        with_photo: int = -1,
+    ) -> Dict[str, Any]:
+        return run_sync(
+            self.async_repo.get_cards_page(cursor, limit=limit, with_photo=with_photo)
+        )
 
     def get_card_by_article(self, article: str) -> Dict[str, Any]:
-        """
-        article bo‘yicha WB'dan bitta eng mos kartani qaytaradi.
-        """
-        cards = self.get_cards_by_article(article)
-
-        if not cards:
-            raise ValueError(
-                f"Card with article/textSearch '{article}' not found in WB API"
-            )
-
-        article_lower = str(article).strip().lower()
-
-        # 1) vendorCode bo'yicha aniq match
-        for card in cards:
-            vendor_code = str(card.get("vendorCode", "")).strip().lower()
-            if vendor_code == article_lower:
-                return card
-
-        nm_id = None
-        try:
-          nm_id = int(article)
-        except ValueError:
-          pass
-
-        if nm_id is not None:
-          for card in cards:
-            if card.get("nmID") == nm_id:
-              return card
-
-        return cards[0]
+        return run_sync(self.async_repo.get_card_by_article(article))
 
     def update_cards(self, cards: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """
-        POST /content/v2/cards/update
-        """
-        url = f"{self.BASE_URL}/content/v2/cards/update"
-        headers = self._get_headers()
-        r = requests.post(url, headers=headers, json=cards, timeout=30)
-
-        if r.status_code != 200:
-            raise ValueError(f"WB update error {r.status_code}: {r.text}")
-
-        data = r.json()
-        if isinstance(data, dict) and data.get("error"):
-            raise ValueError(f"WB update failed: {data.get('errorText')}")
-        return data
+        return run_sync(self.async_repo.update_cards(cards))
 
     # ================== MEDIA (FOTO/VIDEO) ==================
 
@@ -156,39 +75,15 @@ class WBRepository:
         filename: str,
         content_type: str = "image/jpeg",
     ) -> Dict[str, Any]:
-        """
-        POST /content/v3/media/file
-        """
-        url = f"{self.BASE_URL}/content/v3/media/file"
-        headers = self._get_headers()
-        headers["X-Nm-Id"] = str(nm_id)
-        headers["X-Photo-Number"] = str(photo_number)
-
-        files = {"uploadfile": (filename, file_bytes, content_type)}
-        r = requests.post(url, headers=headers, files=files, timeout=60)
-
-        if r.status_code != 200:
-            raise ValueError(f"WB upload failed {r.status_code}: {r.text}")
-
-        data = r.json()
-        if isinstance(data, dict) and data.get("error"):
-            raise ValueError(f"WB upload error: {data.get('errorText')}")
-        return data
+        return run_sync(
+            self.async_repo.upload_media_file(
+                nm_id=nm_id,
+                photo_number=photo_number,
+                file_bytes=file_bytes,
+                filename=filename,
+                content_type=content_type,
+            )
+        )
 
     def save_media_state(self, nm_id: int, urls: List[str]) -> Dict[str, Any]:
-        """
-        POST /content/v3/media/save
-        """
-        url = f"{self.BASE_URL}/content/v3/media/save"
-        headers = self._get_headers()
-        payload = {"nmID": nm_id, "data": urls}
-
-        r = requests.post(url, headers=headers, json=payload, timeout=30)
-
-        if r.status_code != 200:
-            raise ValueError(f"WB media/save error {r.status_code}: {r.text}")
-
-        data = r.json()
-        if isinstance(data, dict) and data.get("error"):
-            raise ValueError(f"WB media/save failed: {data.get('errorText')}")
-        return data
+        return run_sync(self.async_repo.save_media_state(nm_id, urls))
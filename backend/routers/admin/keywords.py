@@ -1,10 +1,12 @@
 # routers/admin/keywords.py
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
+from core.dependencies import require_admin
 from services.data_loader import DataLoader
+from services.data_registry import get_data_registry
 
 router = APIRouter(
     prefix="/keywords",
@@ -55,3 +57,23 @@ def get_keywords_for_field(
         min=min_limit,
         max=max_limit,
     )
+
+
+@router.get("/registry")
+def data_registry_status(
+    current_user: dict = Depends(require_admin),
+):
+    """DATA_DIR lug'atlari snapshot'i: versiya, subject'lar soni, reload statistikasi."""
+    return get_data_registry().status()
+
+
+@router.post("/reload")
+def reload_data_registry(
+    current_user: dict = Depends(require_admin),
+):
+    """Ключевые_слова.json / лимиты / charcs'ni diskdan qayta o'qish (watcher'ni kutmasdan)."""
+    try:
+        DataLoader.clear_cache()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed: {e}")
+    return get_data_registry().status()
@@ -0,0 +1,35 @@
+# routers/admin/wb_catalog.py
+from fastapi import APIRouter, BackgroundTasks, Depends, Query
+
+from core.dependencies import require_admin
+from services.wb_catalog_service import WBCatalogService
+
+
+router = APIRouter(
+    prefix="/wb-catalog",
+    tags=["Admin - WB Catalog"],
+)
+
+
+def _run_sync(full: bool) -> None:
+    try:
+        WBCatalogService().sync(full=full)
+    except Exception as e:
+        print(f"❌ WB catalog sync error: {e}")
+
+
+@router.post("/sync")
+async def start_sync(
+    background_tasks: BackgroundTasks,
+    full: bool = Query(False, description="True – butun katalogni boshidan qayta o'qish"),
+    current_user: dict = Depends(require_admin),
+):
+    background_tasks.add_task(_run_sync, full)
+    return {"status": "started", "mode": "full" if full else "incremental"}
+
+
+@router.get("/status")
+def sync_status(
+    current_user: dict = Depends(require_admin),
+):
+    return WBCatalogService().get_status()
@@ -1,15 +1,18 @@
 # routers/history.py
+import json
 from typing import List, Optional, Any
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from core.dependencies import get_current_user
 from core.database import get_db_dependency
 from repositories.history_repository import HistoryRepository
 from models.processing_history import ProcessingHistory
+from services.wb_bulk_publisher import WBBulkPublisher
 
 router = APIRouter()
 
@@ -27,6 +30,9 @@ class HistoryItem(BaseModel):
     description_score: Optional[int]
     processing_time: Optional[float]
 
+    publish_status: Optional[str] = None
+    published_at: Optional[datetime] = None
+
     created_at: datetime
 
     class Config:
@@ -40,6 +46,10 @@ class HistoryListResponse(BaseModel):
     items: List[HistoryItem]
 
 
+class HistoryPublishRequest(BaseModel):
+    history_ids: List[int] = Field(..., min_items=1, max_items=5000)
+
+
 class HistoryStatsResponse(BaseModel):
     period_days: int
     total_processed: int
@@ -128,3 +138,25 @@ async def get_history_item(
         raise HTTPException(status_code=404, detail="History item not found")
 
     return HistoryItem.model_validate(obj)
+
+
+@router.post("/publish")
+async def publish_history(
+    request: HistoryPublishRequest,
+    current_user: Any = Depends(get_current_user),
+):
+    """
+    Tanlangan (tasdiqlangan) natijalarni WB'ga ommaviy yuboradi.
+    Har nmID holati SSE bilan uzatiladi; admin istalgan natijani nashr qila oladi.
+    """
+    user_id = _get_user_id(current_user)
+    is_admin = isinstance(current_user, dict) and current_user.get("role") == "admin"
+    history_ids = list(dict.fromkeys(request.history_ids))
+
+    async def event_stream():
+        publisher = WBBulkPublisher()
+        async for event in publisher.publish(history_ids, None if is_admin else user_id):
+            yield f"data: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
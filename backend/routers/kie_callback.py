@@ -0,0 +1,65 @@
+# backend/routers/kie_callback.py
+"""
+KIE callBackUrl qabul qiluvchi endpoint.
+
+KIE_CALLBACK_ENABLED=True va KIE_CALLBACK_SECRET berilgan bo'lsa create_task'ga
+callBackUrl (?token=secret bilan) qo'shiladi va KIE task tugaganda natijani
+shu yerga POST qiladi – kutayotgan poll_task darhol uyg'onadi (10 s gacha
+kechikishsiz). Callback boshqa worker process'ga tushsa yoki umuman kelmasa,
+poller o'zi kechroq so'rab oladi.
+"""
+
+import logging
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from core.config import settings
+from core.dependencies import get_current_user
+from services.kie_service.task_poller import get_kie_task_poller, parse_callback_payload
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/kie", tags=["KIE Callback"])
+
+
+@router.post("/callback")
+async def kie_callback(
+    request: Request,
+    token: Optional[str] = Query(None),
+):
+    # Secret'siz callback qabul qilinmaydi – payload'dagi URL'lar yuklab olinadi
+    if not settings.KIE_CALLBACK_SECRET:
+        raise HTTPException(status_code=403, detail="KIE callbacks are disabled")
+    if not secrets.compare_digest(token or "", settings.KIE_CALLBACK_SECRET):
+        raise HTTPException(status_code=403, detail="Invalid callback token")
+
+    try:
+        payload = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid callback body")
+
+    task_id, outcome = parse_callback_payload(payload)
+    if not task_id:
+        raise HTTPException(status_code=400, detail="taskId is missing")
+
+    delivered = False
+    if outcome is not None:
+        delivered = get_kie_task_poller().deliver(task_id, outcome)
+
+    logger.info(
+        f"KIE callback for {task_id}: state={(payload.get('data') or {}).get('state')}, "
+        f"delivered={delivered}"
+    )
+    # KIE faqat 200 ni kutadi – qolgani bizning ichki ishimiz
+    return {"code": 200, "msg": "ok"}
+
+
+@router.get("/poller")
+async def kie_poller_stats(
+    current_user: dict = Depends(get_current_user),
+):
+    return get_kie_task_poller().stats()
@@ -2,9 +2,11 @@
 
 import asyncio
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Literal
 import base64
+import json
 import logging
 import os
 from pathlib import Path
@@ -14,7 +16,9 @@ from core.dependencies import get_current_user
 from repositories.scence_repositories import SceneCategoryRepository, PoseRepository
 from repositories.model_repository import ModelRepository 
 from repositories.promt_repository import PromptRepository
+from repositories.kie_job_repository import KIEJobRepository
 from services.kie_service.kie_services import kie_service
+from services.kie_job_manager import TERMINAL_KIE_STATES, get_kie_job_manager, kie_job_to_dict
 from sqlalchemy.orm import Session
 
 from core.config import settings
@@ -57,6 +61,13 @@ class VideoGenerateRequest(BaseModel):
     translate_to_en: bool = True
 
 
+class ProductCardsGenerateRequest(BaseModel):
+    photo_url: str
+    generation_type: Literal["all_scenes", "group_scenes", "single_scene"]
+    selected_group: Optional[int] = None
+    selected_item: Optional[int] = None
+
+
 class NormalizeGenerateRequest(BaseModel):
     mode: Literal["own_model", "new_model"]
 
@@ -192,6 +203,25 @@ async def delete_generated(
     return {"status": "deleted" if ok else "not_found", "file_name": file_name}
 
 
+async def _run_image_job(user: dict, input_data: dict) -> PhotoGenerationResponse:
+    """
+    Bitta edit task'i kie_jobs orqali: klient uzilsa yoki worker restart
+    bo'lsa ham task yetim qolmaydi, natija GET /api/photo/jobs da.
+    """
+    manager = get_kie_job_manager()
+    job = await manager.submit(
+        user_id=user["user_id"],
+        kind="image",
+        model=kie_service.EDIT_MODEL,
+        input_data=input_data,
+    )
+    job = await manager.wait(job["job_id"])
+    return PhotoGenerationResponse(
+        file_name=job["file_name"],
+        file_url=job["file_url"],
+    )
+
+
 @router.post("/generate/scene", response_model=PhotoGenerationResponse)
 async def generate_scene(
     request: SceneGenerateRequest,
@@ -214,21 +244,61 @@ async def generate_scene(
             f"Details: {item.prompt}. High quality, photorealistic, studio lighting, clean background."
         )
 
-        result = await kie_service.change_scene(request.photo_url, full_prompt)
-
-        image_bytes = result["image"]
-        rel_path = save_generated_file(image_bytes, kind="image")
-
-        return PhotoGenerationResponse(
-            file_name=rel_path,
-            file_url=get_file_url(rel_path),
-        )
+        return await _run_image_job(user, kie_service.build_scene_input(request.photo_url, full_prompt))
 
     except Exception as e:
         logger.error(f"Scene generation error: {e}")
         raise HTTPException(500, str(e))
     
 
+async def _product_cards_stream(data: dict):
+    """Har karta tayyor bo'lishi bilan saqlanadi va event sifatida yuboriladi."""
+    done = failed = 0
+    try:
+        async for card in kie_service.iter_product_cards(data):
+            image = card.pop("image", None)
+            if image is None:
+                failed += 1
+                event = {"type": "card_failed", **card}
+            else:
+                done += 1
+                rel_path = await asyncio.to_thread(save_generated_file, image, "image")
+                event = {
+                    "type": "card_done",
+                    **card,
+                    "file_name": rel_path,
+                    "file_url": get_file_url(rel_path),
+                }
+            yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+        yield f"data: {json.dumps({'type': 'completed', 'done': done, 'failed': failed})}\n\n"
+    except Exception as e:
+        logger.error(f"Product cards generation error: {e}")
+        yield f"data: {json.dumps({'type': 'error', 'error': str(e), 'done': done, 'failed': failed}, ensure_ascii=False)}\n\n"
+
+    yield "data: [DONE]\n\n"
+
+
+@router.post("/generate/product-cards")
+async def generate_product_cards(
+    request: ProductCardsGenerateRequest,
+    user: dict = Depends(get_current_user),
+):
+    """
+    Tanlangan sahnalar bo'yicha mahsulot kartalari (SSE): sahnalar parallel
+    generatsiya qilinadi, har biri tugashi bilan card_done / card_failed.
+    """
+    if request.generation_type == "group_scenes" and request.selected_group is None:
+        raise HTTPException(400, "selected_group is required for group_scenes")
+    if request.generation_type == "single_scene" and request.selected_item is None:
+        raise HTTPException(400, "selected_item is required for single_scene")
+
+    return StreamingResponse(
+        _product_cards_stream(request.model_dump()),
+        media_type="text/event-stream",
+    )
+
+
 @router.post("/generate/pose", response_model=PhotoGenerationResponse)
 async def generate_pose(
     request: PoseGenerateRequest,
@@ -242,14 +312,8 @@ async def generate_pose(
         if not pose_prompt:
             raise HTTPException(404, "Pose prompt not found")
 
-        result = await kie_service.change_pose(request.photo_url, pose_prompt.prompt)
-
-        image_bytes = result["image"]
-        rel_path = save_generated_file(image_bytes, kind="image")
-
-        return PhotoGenerationResponse(
-            file_name=rel_path,
-            file_url=get_file_url(rel_path),
+        return await _run_image_job(
+            user, kie_service.build_pose_input(request.photo_url, pose_prompt.prompt)
         )
 
     except Exception as e:
@@ -264,15 +328,7 @@ async def generate_custom(
 ):
     try:
         prompt = request.prompt
-        result = await kie_service.custom_generation(request.photo_url, prompt)
-
-        image_bytes = result["image"]
-        rel_path = save_generated_file(image_bytes, kind="image")
-
-        return PhotoGenerationResponse(
-            file_name=rel_path,
-            file_url=get_file_url(rel_path),
-        )
+        return await _run_image_job(user, kie_service.build_custom_input(request.photo_url, prompt))
 
     except Exception as e:
         logger.error(f"Custom generation error: {e}")
@@ -285,14 +341,8 @@ async def enhance_photo(
     user: dict = Depends(get_current_user),
 ):
     try:
-        result = await kie_service.enhance_photo(request.photo_url, request.level)
-
-        image_bytes = result["image"]
-        rel_path = save_generated_file(image_bytes, kind="image")
-
-        return PhotoGenerationResponse(
-            file_name=rel_path,
-            file_url=get_file_url(rel_path),
+        return await _run_image_job(
+            user, kie_service.build_enhance_input(request.photo_url, request.level)
         )
 
     except Exception as e:
@@ -300,48 +350,151 @@ async def enhance_photo(
         raise HTTPException(500, str(e))
 
 
+def _resolve_video_prompt(request: VideoGenerateRequest, db: Session) -> str:
+    # Prompt ni aniqlash: scenario_id yoki to'g'ridan-to'g'ri prompt
+    final_prompt = request.prompt
+
+    if request.scenario_id:
+        from repositories.video_scenario_repository import VideoScenarioRepository
+        video_repo = VideoScenarioRepository(db)
+        scenario = video_repo.get_by_id(request.scenario_id)
+        if not scenario:
+            raise HTTPException(404, "Video scenario not found")
+        final_prompt = scenario.prompt
+
+    if not final_prompt:
+        raise HTTPException(400, "Either prompt or scenario_id must be provided")
+    return final_prompt
+
+
+async def _submit_video_job(request: VideoGenerateRequest, db: Session, user: dict) -> dict:
+    final_prompt = _resolve_video_prompt(request, db)
+    input_data = kie_service.build_video_input(
+        image_url=request.photo_url,
+        prompt=final_prompt,
+        model=request.model,
+        duration=request.duration,
+        resolution=request.resolution,
+    )
+    return await get_kie_job_manager().submit(
+        user_id=user["user_id"],
+        kind="video",
+        model=request.model,
+        input_data=input_data,
+    )
+
+
 @router.post("/generate/video", response_model=VideoGenerationResponse)
 async def generate_video(
     request: VideoGenerateRequest,
     db: Session = Depends(get_db_dependency),
     user: dict = Depends(get_current_user),
 ):
+    """
+    Natijani kutib qaytaradi. Generatsiya kie_jobs'da – klient uzilsa ham
+    tugatiladi (GET /api/photo/jobs dan topiladi). Kutmasdan: POST /jobs/video.
+    """
     try:
-        # Prompt ni aniqlash: scenario_id yoki to'g'ridan-to'g'ri prompt
-        final_prompt = request.prompt
-        
-        if request.scenario_id:
-            from repositories.video_scenario_repository import VideoScenarioRepository
-            video_repo = VideoScenarioRepository(db)
-            scenario = video_repo.get_by_id(request.scenario_id)
-            if not scenario:
-                raise HTTPException(404, "Video scenario not found")
-            final_prompt = scenario.prompt
-        
-        if not final_prompt:
-            raise HTTPException(400, "Either prompt or scenario_id must be provided")
-
-        result = await kie_service.generate_video(
-            image_url=request.photo_url,
-            prompt=final_prompt,
-            model=request.model,
-            duration=request.duration,
-            resolution=request.resolution,
-        )
-
-        video_bytes = result["video"]
-        rel_path = save_generated_file(video_bytes, kind="video")
+        job = await _submit_video_job(request, db, user)
+        job = await get_kie_job_manager().wait(job["job_id"])
 
         return VideoGenerationResponse(
-            file_name=rel_path,
-            file_url=get_file_url(rel_path),
+            file_name=job["file_name"],
+            file_url=job["file_url"],
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Video generation error: {e}")
         raise HTTPException(500, str(e))
 
 
+# ===== KIE JOBS (kutmasdan: job_id darhol, holat – GET / SSE) =====
+
+
+def _get_own_kie_job(job_id: int, user: dict):
+    job = get_kie_job_manager().get_job(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    if job.user_id != user["user_id"] and user.get("role") != "admin":
+        raise HTTPException(403, "Not your job")
+    return job
+
+
+@router.post("/jobs/video", status_code=202)
+async def create_video_job(
+    request: VideoGenerateRequest,
+    db: Session = Depends(get_db_dependency),
+    user: dict = Depends(get_current_user),
+):
+    try:
+        return await _submit_video_job(request, db, user)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Video job error: {e}")
+        raise HTTPException(500, str(e))
+
+
+@router.get("/jobs")
+def list_kie_jobs(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    state: Optional[str] = Query(None),
+    db: Session = Depends(get_db_dependency),
+    user: dict = Depends(get_current_user),
+):
+    jobs = KIEJobRepository(db).list_jobs(user["user_id"], limit=limit, offset=offset, state=state)
+    return [kie_job_to_dict(job) for job in jobs]
+
+
+@router.get("/jobs/{job_id}")
+async def get_kie_job(
+    job_id: int,
+    user: dict = Depends(get_current_user),
+):
+    job = await asyncio.to_thread(_get_own_kie_job, job_id, user)
+    return kie_job_to_dict(job)
+
+
+async def _kie_job_stream(job_id: int):
+    """Holat o'zgarganda event; completed/failed da tugaydi."""
+    last_state = None
+    last_sent = asyncio.get_running_loop().time()
+
+    while True:
+        job = await asyncio.to_thread(get_kie_job_manager().get_job, job_id)
+        if job is None:
+            yield f"data: {json.dumps({'type': 'error', 'error': 'Job not found'})}\n\n"
+            return
+
+        if job.state != last_state:
+            last_state = job.state
+            last_sent = asyncio.get_running_loop().time()
+            payload = {"type": "job_status", **kie_job_to_dict(job)}
+            yield f"data: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+
+        if job.state in TERMINAL_KIE_STATES:
+            yield "data: [DONE]\n\n"
+            return
+
+        if asyncio.get_running_loop().time() - last_sent > 15.0:
+            last_sent = asyncio.get_running_loop().time()
+            yield ": keepalive\n\n"
+
+        await asyncio.sleep(1.0)
+
+
+@router.get("/jobs/{job_id}/events")
+async def kie_job_events(
+    job_id: int,
+    user: dict = Depends(get_current_user),
+):
+    await asyncio.to_thread(_get_own_kie_job, job_id, user)
+    return StreamingResponse(_kie_job_stream(job_id), media_type="text/event-stream")
+
+
 @router.get("/models/categories", response_model=List[ModelCategoryOut])
 async def list_model_categories(
     db: Session = Depends(get_db_dependency),
@@ -6,7 +6,10 @@ from sqlalchemy.orm import Session
 from controllers.process_controller import ProcessController
 from core.dependencies import get_current_user
 from core.database import get_db_dependency
+from core.rate_limit import get_openai_limiter
+from core.wb_rate_limit import get_wb_rate_limiter
 from schemas.process import ProcessRequest
+from services.image_analyzer_service import ImageAnalyzerService
 
 router = APIRouter()
 process_controller = ProcessController()
@@ -54,3 +57,24 @@ async def get_current_card(
         raise HTTPException(status_code=404, detail="Card not found")
 
     return card_data
+
+
+@router.get("/image-analysis/stats")
+async def image_analysis_stats(
+    current_user: dict = Depends(get_current_user),
+):
+    return ImageAnalyzerService.get_cache_stats()
+
+
+@router.get("/openai/limiter")
+async def openai_limiter_stats(
+    current_user: dict = Depends(get_current_user),
+):
+    return get_openai_limiter().stats()
+
+
+@router.get("/wb/limiter")
+async def wb_limiter_stats(
+    current_user: dict = Depends(get_current_user),
+):
+    return get_wb_rate_limiter().stats()
@@ -1,52 +1,219 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from typing import List
 from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
 
-from services.batch_processor import BatchProcessor
+from core.config import settings
+from core.database import SessionLocal, get_db_dependency
 from core.dependencies import get_current_user
+from models.batch_job import BatchJob
+from repositories.batch_job_repository import BatchJobRepository
 import json
 import asyncio
 
 
 router = APIRouter()
 
+TERMINAL_EVENTS = {"batch_completed", "batch_cancelled"}
+EVENT_SETTLE_SECONDS = 1.0
+KEEPALIVE_SECONDS = 15.0
+
 
 class BatchProcessRequest(BaseModel):
-    articles: List[str] = Field(..., min_items=1, max_items=50)
+    articles: List[str] = Field(..., min_items=1, max_items=settings.BATCH_MAX_ARTICLES)
+
+
+def _job_to_dict(job: BatchJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "total": job.total,
+        "completed": job.completed,
+        "failed": job.failed,
+        "progress": (job.completed + job.failed) / job.total * 100 if job.total else 0,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _get_own_job(repo: BatchJobRepository, job_id: int, current_user: dict) -> BatchJob:
+    job = repo.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.user_id != current_user["user_id"] and current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Not your job")
+    return job
+
+
+def _create_job(articles: List[str], user_id: int) -> BatchJob:
+    # Bo'sh va takroriy artikullarni olib tashlaymiz, tartib saqlanadi
+    cleaned = list(dict.fromkeys(a.strip() for a in articles if a and a.strip()))
+    if not cleaned:
+        raise HTTPException(status_code=400, detail="Empty articles list")
+
+    db = SessionLocal()
+    try:
+        return BatchJobRepository(db).create_job(
+            user_id=user_id,
+            articles=cleaned,
+            max_attempts=settings.BATCH_TASK_MAX_ATTEMPTS,
+        )
+    finally:
+        db.close()
+
 
+def _read_events(job_id: int, last_event_id: int):
+    db = SessionLocal()
+    try:
+        repo = BatchJobRepository(db)
+        job = repo.get_job(job_id)
+        finished = job is None or job.status not in ("queued", "running")
+        created_before = (
+            None if finished
+            else datetime.utcnow() - timedelta(seconds=EVENT_SETTLE_SECONDS)
+        )
+        events = repo.get_events_after(job_id, last_event_id, created_before=created_before)
+        # Yakuniy natija faqat oxirgi event'lar uzatilgandan keyin kerak
+        results = repo.get_results(job) if finished and job and not events else None
+        return [
+            {
+                "id": e.id,
+                "type": e.type,
+                "article": e.article,
+                "timestamp": e.created_at.isoformat(),
+                **(e.payload or {}),
+            }
+            for e in events
+        ], results, finished
+    finally:
+        db.close()
 
 
+async def _event_stream(job_id: int, last_event_id: int = 0):
+    """
+    Job event'larini SSE sifatida uzatadi. Ulanish uzilsa – klient
+    Last-Event-ID bilan qayta ulanib, qolgan joyidan davom ettiradi.
+    """
+    last_sent = asyncio.get_running_loop().time()
+
+    while True:
+        events, results, finished = await asyncio.to_thread(_read_events, job_id, last_event_id)
+
+        for event in events:
+            last_event_id = event["id"]
+            yield f"id: {event['id']}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+        if events:
+            last_sent = asyncio.get_running_loop().time()
+
+        if finished and not events:
+            yield f"data: {json.dumps({'type': 'final_results', 'data': results}, ensure_ascii=False, default=str)}\n\n"
+            return
+
+        if asyncio.get_running_loop().time() - last_sent > KEEPALIVE_SECONDS:
+            last_sent = asyncio.get_running_loop().time()
+            yield ": keepalive\n\n"
+
+        await asyncio.sleep(1.0)
+
 
 @router.post("/batch")
 async def process_batch(
     request: BatchProcessRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    """Process multiple cards in parallel with real-time progress"""
-    
-    async def event_generator():
-        processor = BatchProcessor(max_workers=3)
-        
-        async def progress_callback(event: dict):
-            # Send event to client
-            yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
-            await asyncio.sleep(0.01)
-        
-        try:
-            results = await processor.process_batch(
-                articles=request.articles,
-                user_id=current_user["user_id"],
-                progress_callback=progress_callback
-            )
-            
-            # Send final results
-            yield f"data: {json.dumps({'type': 'final_results', 'data': results}, ensure_ascii=False)}\n\n"
-        
-        except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)}, ensure_ascii=False)}\n\n"
-    
+    """
+    Batch'ni navbatga qo'yadi va progress'ni darhol SSE bilan uzatadi.
+    Ishni worker'lar bajaradi – tab yopilsa ham job davom etadi,
+    GET /jobs/{job_id}/events orqali qayta ulanish mumkin.
+    """
+    job = await asyncio.to_thread(_create_job, request.articles, current_user["user_id"])
+
     return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream"
-    )
\ No newline at end of file
+        _event_stream(job.id),
+        media_type="text/event-stream",
+        headers={"X-Batch-Job-Id": str(job.id)},
+    )
+
+
+@router.post("/jobs")
+async def create_job(
+    request: BatchProcessRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    job = await asyncio.to_thread(_create_job, request.articles, current_user["user_id"])
+    return _job_to_dict(job)
+
+
+@router.get("/jobs")
+def list_jobs(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db_dependency),
+):
+    jobs = BatchJobRepository(db).list_jobs(current_user["user_id"], limit=limit, offset=offset)
+    return [_job_to_dict(job) for job in jobs]
+
+
+@router.get("/jobs/{job_id}")
+def get_job(
+    job_id: int,
+    include_tasks: bool = Query(False),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db_dependency),
+):
+    repo = BatchJobRepository(db)
+    job = _get_own_job(repo, job_id, current_user)
+    data = _job_to_dict(job)
+
+    if include_tasks:
+        data["tasks"] = [
+            {
+                "id": t.id,
+                "article": t.article,
+                "status": t.status,
+                "attempts": t.attempts,
+                "history_id": t.history_id,
+                "last_error": t.last_error,
+                "processing_time": t.processing_time,
+            }
+            for t in repo.get_tasks(job_id)
+        ]
+    return data
+
+
+@router.get("/jobs/{job_id}/events")
+def job_events(
+    job_id: int,
+    last_event_id_query: Optional[int] = Query(None, alias="last_event_id"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db_dependency),
+):
+    _get_own_job(BatchJobRepository(db), job_id, current_user)
+
+    start_from = last_event_id_query or 0
+    if last_event_id and last_event_id.isdigit():
+        start_from = max(start_from, int(last_event_id))
+
+    return StreamingResponse(
+        _event_stream(job_id, start_from),
+        media_type="text/event-stream",
+    )
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(
+    job_id: int,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db_dependency),
+):
+    repo = BatchJobRepository(db)
+    _get_own_job(repo, job_id, current_user)
+    job = repo.cancel_job(job_id)
+    return _job_to_dict(job)
@@ -21,14 +21,5 @@ async def update_card_dimensions(
     dimensions: dict,
     user: dict = Depends(get_current_user),
 ):
-    payload = [{
-        "nmID": nm_id,
-        "dimensions": {
-            "length": int(dimensions.get("length", 0)),
-            "width": int(dimensions.get("width", 0)),
-            "height": int(dimensions.get("height", 0)),
-            "weightBrutto": float(dimensions.get("weightBrutto", 0)),
-        }
-    }]
-    result = controller.repo.update_cards(payload)
+    await controller.update_dimensions(nm_id, dimensions)
     return {"status": "ok", "message": "Габариты обновлены"}
\ No newline at end of file
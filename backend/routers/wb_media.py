@@ -1,6 +1,8 @@
 # routers/wb_media.py
 from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+import tempfile
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Query
+from fastapi.responses import StreamingResponse
 from core.dependencies import get_current_user
 from controllers.wb_media_controller import WBMediaController
 import json
@@ -9,11 +11,28 @@ router = APIRouter(prefix="/wb", tags=["WB - Media"])
 controller = WBMediaController()
 
 
+def _detach_upload(file: UploadFile) -> UploadFile:
+    """
+    FastAPI form fayllarini endpoint javob qaytargan zahoti yopadi –
+    StreamingResponse esa undan keyin ishlaydi. Fayl handle'ini yangi
+    UploadFile'ga o'tkazamiz (nusxa ko'chirilmaydi), formaga bo'sh fayl qoladi.
+    """
+    detached = UploadFile(
+        file=file.file,
+        size=file.size,
+        filename=file.filename,
+        headers=file.headers,
+    )
+    file.file = tempfile.SpooledTemporaryFile()
+    return detached
+
+
 @router.post("/media/sync")
 async def sync_wb_media(
     nmID: int = Form(...),
     finalPhotos: str = Form(..., alias="finalPhotos"),
     files: List[UploadFile] = File([]),
+    stream: bool = Query(False, description="SSE: har fayl yuklanish holati"),
     user: dict = Depends(get_current_user),
 ):
 
@@ -22,4 +41,14 @@ async def sync_wb_media(
     except Exception:
         raise ValueError("finalPhotos JSON xato")
 
-    return await controller.sync_media(nm_id=nmID, final_photos=photos, new_files=files)
+    if not stream:
+        return await controller.sync_media(nm_id=nmID, final_photos=photos, new_files=files)
+
+    detached = [_detach_upload(f) for f in files]
+
+    async def event_stream():
+        async for event in controller.sync_media_stream(nm_id=nmID, final_photos=photos, new_files=detached):
+            yield f"data: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+
+
+class LLMResponseCache:
+    """
+    OpenAI javoblari uchun content-addressed kesh (lokal SQLite).
+
+    Kalit – hash(model, system_prompt, payload, photo_urls, max_tokens).
+    TTL o'tgan yozuvlar o'qilmaydi, hajm/son limitidan oshganda eng kam
+    ishlatilganlari (accessed_at bo'yicha LRU) o'chiriladi.
+
+    Kesh xatolari hech qachon asosiy chaqiruvni buzmaydi – faqat log.
+    """
+
+    EVICT_EVERY_N_WRITES = 20
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_seconds: int,
+        max_entries: int,
+        max_bytes: int,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)"
+            )
+
+    # ===== KEY =====
+
+    @staticmethod
+    def make_key(
+        model: str,
+        system_prompt: str,
+        payload: Any,
+        photo_urls: Optional[List[str]],
+        max_tokens: int,
+    ) -> str:
+        raw = json.dumps(
+            {
+                "model": model,
+                "system_prompt": system_prompt,
+                "payload": payload,
+                "photo_urls": list(photo_urls or []),
+                "max_tokens": max_tokens,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # ===== GET / SET =====
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?",
+                    (key,),
+                ).fetchone()
+
+                if row is None:
+                    self.misses += 1
+                    return None
+
+                value, created_at = row
+                if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self.misses += 1
+                    return None
+
+                conn.execute(
+                    "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                    (now, key),
+                )
+
+            self.hits += 1
+            return json.loads(value)
+        except Exception as e:
+            print(f"⚠️ LLM cache read error: {e}")
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        try:
+            data = json.dumps(value, ensure_ascii=False)
+            with self._connect() as conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (key, data, len(data.encode("utf-8")), now, now),
+                )
+
+            with self._lock:
+                self._writes += 1
+                should_evict = self._writes % self.EVICT_EVERY_N_WRITES == 0
+            if should_evict:
+                self.evict()
+        except Exception as e:
+            print(f"⚠️ LLM cache write error: {e}")
+
+    def evict(self) -> int:
+        """TTL o'tganlarni va limitdan oshgan eng eski (LRU) yozuvlarni o'chiradi."""
+        removed = 0
+        with self._connect() as conn:
+            if self.ttl_seconds:
+                cur = conn.execute(
+                    "DELETE FROM llm_cache WHERE created_at < ?",
+                    (time.time() - self.ttl_seconds,),
+                )
+                removed += cur.rowcount
+
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+
+            if count <= self.max_entries and total <= self.max_bytes:
+                return removed
+
+            rows = conn.execute(
+                "SELECT key, size FROM llm_cache ORDER BY accessed_at ASC"
+            ).fetchall()
+
+            to_delete = []
+            for key, size in rows:
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                to_delete.append((key,))
+                count -= 1
+                total -= size
+
+            conn.executemany("DELETE FROM llm_cache WHERE key = ?", to_delete)
+            removed += len(to_delete)
+
+        return removed
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    # ===== INTERNAL =====
+
+    def _connect(self) -> sqlite3.Connection:
+        # Har bir thread o'z connection'iga ega (sqlite3 thread-safe emas)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return _Transaction(conn)
+
+
+class _Transaction:
+    """`with cache._connect() as conn:` – BEGIN/COMMIT yoki ROLLBACK."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Process-wide kesh. LLM_CACHE_ENABLED=False bo'lsa None."""
+    global _cache
+
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = LLMResponseCache(
+                        path=settings.LLM_CACHE_PATH,
+                        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                        max_bytes=settings.LLM_CACHE_MAX_BYTES,
+                    )
+                except Exception as e:
+                    print(f"⚠️ LLM cache disabled, init failed: {e}")
+                    return None
+    return _cache
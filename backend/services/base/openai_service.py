@@ -1,20 +1,21 @@
+import asyncio
 import json
-import time
 from typing import Dict, Any, List, Optional
 from abc import ABC, abstractmethod
-from openai import OpenAI, http_client
-import httpx
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
 
+from core.background_loop import run_sync
 from core.config import settings
+from core.http_clients import get_async_openai_client, get_openai_client
+from core.rate_limit import get_openai_limiter
+from services.base.llm_cache import get_llm_cache
 
 
 class BaseOpenAIService(ABC):
 
     def __init__(self):
-        self.client = OpenAI(
-            api_key=settings.OPENAI_API_KEY,
-            http_client=http_client
-        )
+        self.client = get_openai_client()
+
     def _build_user_content(
         self,
         user_payload: Dict[str, Any],
@@ -55,26 +56,72 @@ class BaseOpenAIService(ABC):
         photo_urls: Optional[List[str]] = None,
         max_tokens: int = 2048,
         max_retries: int = 3,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Sync API – _acall_openai ustidagi yupqa o'ram (umumiy fon loop'da)."""
+        return run_sync(
+            self._acall_openai(
+                system_prompt=system_prompt,
+                user_payload=user_payload,
+                photo_urls=photo_urls,
+                max_tokens=max_tokens,
+                max_retries=max_retries,
+                use_cache=use_cache,
+            )
+        )
+
+    async def _acall_openai(
+        self,
+        system_prompt: str,
+        user_payload: Dict[str, Any],
+        photo_urls: Optional[List[str]] = None,
+        max_tokens: int = 2048,
+        max_retries: int = 3,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         last_error = None
 
         model_name = settings.OPENAI_MODEL
 
+        cache = get_llm_cache() if use_cache else None
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(
+                model_name, system_prompt, user_payload, photo_urls, max_tokens
+            )
+            # SQLite – sinxron I/O, umumiy fon loop'ni bloklamasin
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            if cached is not None:
+                return cached
+
+        user_content = self._build_user_content(user_payload, photo_urls)
+
+        api_params = {
+            "model": model_name,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_content},
+            ],
+            "response_format": {"type": "json_object"},
+            "max_completion_tokens": max_tokens,
+        }
+
+        limiter = get_openai_limiter()
+        estimated_tokens = limiter.estimate_tokens(
+            text_chars=len(system_prompt) + len(json.dumps(user_payload, ensure_ascii=False)),
+            image_count=len([u for u in (photo_urls or []) if u]),
+            max_tokens=max_tokens,
+        )
+
         for attempt in range(max_retries):
             try:
-                user_content = self._build_user_content(user_payload, photo_urls)
-
-                api_params = {
-                    "model": model_name,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_content},
-                    ],
-                    "response_format": {"type": "json_object"},
-                    "max_completion_tokens": max_tokens,
-                }
+                client = get_async_openai_client()
 
-                response = self.client.chat.completions.create(**api_params)
+                async with limiter.limit(estimated_tokens) as slot:
+                    raw = await client.chat.completions.with_raw_response.create(**api_params)
+                    limiter.update_from_headers(raw.headers)
+                    response = raw.parse()
+                    slot.settle(response.usage.total_tokens if response.usage else None)
 
                 if not response.choices:
                     raise ValueError("Empty response from OpenAI")
@@ -100,7 +147,23 @@ class BaseOpenAIService(ABC):
                     content = content[:-3]
 
                 content = content.strip()
-                return json.loads(content)
+                data = json.loads(content)
+
+                if cache is not None:
+                    await asyncio.to_thread(cache.set, cache_key, data)
+                return data
+
+            except RateLimitError as e:
+                last_error = e
+                # Retry-After / x-ratelimit-reset-* – limiter orqali hamma kutadi
+                wait_time = limiter.retry_after_from_headers(
+                    getattr(e.response, "headers", None)
+                ) or 2.0 * (2 ** attempt)
+                limiter.backoff(wait_time)
+
+                print(f"❌ Attempt {attempt + 1}/{max_retries} rate limited, retry in {wait_time:.1f}s")
+                if attempt == max_retries - 1:
+                    break
 
             except Exception as e:
                 last_error = e
@@ -109,13 +172,13 @@ class BaseOpenAIService(ABC):
                 print(f"❌ Attempt {attempt + 1}/{max_retries} failed: {str(e)}")
 
                 if (
-                    ("rate_limit" in error_str or "429" in error_str or
-                     "timeout" in error_str or "500" in error_str)
+                    ("timeout" in error_str or "500" in error_str or
+                     isinstance(e, (APITimeoutError, APIConnectionError, InternalServerError)))
                     and attempt < max_retries - 1
                 ):
                     wait_time = 2.0 * (2 ** attempt)
                     print(f"⚠️ Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
+                    await asyncio.sleep(wait_time)
                     continue
 
                 if attempt == max_retries - 1:
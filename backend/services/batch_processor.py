@@ -6,13 +6,15 @@ import time
 
 from services.pipeline_service import PipelineService
 from repositories.history_repository import HistoryRepository
+from core.config import settings
 from core.database import get_db
 
 
 class BatchProcessor:
     
-    def __init__(self, max_workers: int = 3):
-        self.max_workers = max_workers
+    def __init__(self, max_workers: Optional[int] = None):
+        # OpenAI chaqiruvlari umumiy limiter'dan o'tadi, shuning uchun workerlarni oshirish xavfsiz
+        self.max_workers = max_workers or settings.BATCH_MAX_WORKERS
         self.pipeline = PipelineService()
     
     async def process_batch(
@@ -44,7 +46,7 @@ class BatchProcessor:
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             future_to_article = {
                 executor.submit(
-                    self._process_single_card,
+                    self.process_single_card,
                     article,
                     user_id,
                     progress_callback
@@ -57,6 +59,8 @@ class BatchProcessor:
                 
                 try:
                     result = future.result()
+                    if result.get("status") == "error":
+                        raise RuntimeError(result.get("message") or "Processing error")
                     results["completed"] += 1
                     results["cards"].append(result)
                     
@@ -98,12 +102,18 @@ class BatchProcessor:
         
         return results
     
-    def _process_single_card(
+    def process_single_card(
         self,
         article: str,
         user_id: int,
-        progress_callback: Optional[Callable]
+        progress_callback: Optional[Callable],
+        save_failed: bool = True,
     ) -> Dict[str, Any]:
+        """
+        Bitta artikul: pipeline + ProcessingHistory'ga yozish.
+        Natijada "history_id" ham qaytadi. save_failed=False – xato tarixga
+        yozilmaydi (navbat worker'i oxirgi urinishgacha qayta urinadi).
+        """
         start_time = time.time()
         
         try:
@@ -122,14 +132,24 @@ class BatchProcessor:
             processing_time = time.time() - start_time
             result["processing_time"] = processing_time
 
-            self._save_to_history(result, user_id, processing_time)
+            if result.get("status") == "error":
+                # Pipeline xatoni exception emas, natija sifatida qaytaradi –
+                # "completed" deb tarixga yozmaymiz
+                if save_failed:
+                    self.save_failed_to_history(
+                        article, user_id, result.get("message") or "Processing error", processing_time
+                    )
+                return result
+
+            result["history_id"] = self._save_to_history(result, user_id, processing_time)
             
             return result
         
         except Exception as e:
             processing_time = time.time() - start_time
             
-            self._save_failed_to_history(article, user_id, str(e), processing_time)
+            if save_failed:
+                self.save_failed_to_history(article, user_id, str(e), processing_time)
             
             raise
     
@@ -152,10 +172,10 @@ class BatchProcessor:
         result: Dict[str, Any],
         user_id: int,
         processing_time: float
-    ):
+    ) -> int:
         with get_db() as db:
             history_repo = HistoryRepository(db)
-            history_repo.create_history(
+            history = history_repo.create_history(
                 user_id=user_id,
                 nm_id=result.get("nmID"),
                 article=result.get("article"),
@@ -178,8 +198,9 @@ class BatchProcessor:
                 photo_urls=result.get("photo_urls"),
                 status="completed"
             )
+            return history.id
     
-    def _save_failed_to_history(
+    def save_failed_to_history(
         self,
         article: str,
         user_id: int,
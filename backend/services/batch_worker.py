@@ -0,0 +1,340 @@
+# services/batch_worker.py
+"""
+Batch navbati worker'i (batch_jobs / batch_tasks jadvallari).
+
+Ishga tushirish (har node'da bir yoki bir nechta process):
+
+    python -m services.batch_worker --concurrency 4
+
+Task'lar FOR UPDATE SKIP LOCKED bilan lease qilinadi, lease heartbeat bilan
+uzaytiriladi. Worker o'lsa / restart bo'lsa lease muddati tugaydi va task'ni
+boshqa worker qayta oladi. Xato bo'lsa – exponential backoff bilan qayta urinish.
+"""
+
+import argparse
+import os
+import random
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from core.config import settings
+from core.database import SessionLocal
+from repositories.batch_job_repository import BatchJobRepository
+from services.batch_processor import BatchProcessor
+from services.data_registry import get_data_registry
+
+
+# Bu xatolarda qayta urinish foydasiz – karta / subject konfiguratsiyasi o'zgarmaydi
+NON_RETRYABLE_ERRORS = {"card_not_found", "subject_config_not_found"}
+
+
+class BatchWorker:
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        lease_seconds: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        self.concurrency = concurrency or settings.BATCH_WORKER_CONCURRENCY
+        self.lease_seconds = lease_seconds or settings.BATCH_TASK_LEASE_SECONDS
+        self.poll_interval = poll_interval or settings.BATCH_WORKER_POLL_SECONDS
+
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.processor = BatchProcessor(max_workers=1)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix="batch-task",
+        )
+        self._active: Dict[int, Future] = {}
+        self._active_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self._next_cleanup = 0.0
+
+    # ================== LIFECYCLE ==================
+
+    def run_forever(self) -> None:
+        print(f"🚀 Batch worker {self.worker_id} started (concurrency={self.concurrency})")
+
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop,
+            name="batch-heartbeat",
+            daemon=True,
+        )
+        self._heartbeat_thread.start()
+
+        try:
+            while not self._stop.is_set():
+                leased = 0
+                try:
+                    leased = self._lease_and_submit()
+                except Exception as e:
+                    print(f"⚠️ Batch worker lease error: {e}")
+
+                self._cleanup_events()
+
+                # Ish bo'lsa darhol keyingisini olamiz, bo'lmasa kutamiz
+                self._stop.wait(0.2 if leased else self.poll_interval)
+        finally:
+            self._shutdown()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _cleanup_events(self) -> None:
+        """Eski card_log event'larini o'chirish (BATCH_EVENT_CLEANUP_INTERVAL_SECONDS da bir)."""
+        now = time.monotonic()
+        if now < self._next_cleanup:
+            return
+        self._next_cleanup = now + settings.BATCH_EVENT_CLEANUP_INTERVAL_SECONDS
+
+        db = SessionLocal()
+        try:
+            deleted = BatchJobRepository(db).delete_log_events(settings.BATCH_JOB_LOG_RETENTION_DAYS)
+            if deleted:
+                print(f"🧹 Batch worker: {deleted} old card_log events deleted")
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Batch event cleanup error: {e}")
+        finally:
+            db.close()
+
+    def _shutdown(self) -> None:
+        print(f"🛑 Batch worker {self.worker_id} stopping, waiting for running tasks...")
+        self._executor.shutdown(wait=True)
+        print(f"✅ Batch worker {self.worker_id} stopped")
+
+    # ================== LEASE ==================
+
+    def _lease_and_submit(self) -> int:
+        with self._active_lock:
+            free = self.concurrency - len(self._active)
+        if free <= 0:
+            return 0
+
+        db = SessionLocal()
+        try:
+            tasks = BatchJobRepository(db).lease_tasks(
+                worker_id=self.worker_id,
+                limit=free,
+                lease_seconds=self.lease_seconds,
+            )
+            leased = [
+                (task.id, task.job_id, task.article, task.job.user_id, task.attempts)
+                for task in tasks
+            ]
+        finally:
+            db.close()
+
+        for task_id, job_id, article, user_id, attempt in leased:
+            future = self._executor.submit(
+                self._run_task, task_id, job_id, article, user_id, attempt
+            )
+            with self._active_lock:
+                self._active[task_id] = future
+            future.add_done_callback(lambda _f, tid=task_id: self._forget(tid))
+
+        return len(leased)
+
+    def _forget(self, task_id: int) -> None:
+        with self._active_lock:
+            self._active.pop(task_id, None)
+
+    def _heartbeat_loop(self) -> None:
+        interval = max(1.0, self.lease_seconds / 3)
+        # stop'dan keyin ham ishlayotgan task'lar tugaguncha lease'ni uzaytiramiz
+        while True:
+            time.sleep(interval)
+            with self._active_lock:
+                task_ids = list(self._active)
+            if not task_ids:
+                if self._stop.is_set():
+                    return
+                continue
+
+            db = SessionLocal()
+            try:
+                BatchJobRepository(db).heartbeat(self.worker_id, task_ids, self.lease_seconds)
+            except Exception as e:
+                print(f"⚠️ Batch worker heartbeat error: {e}")
+            finally:
+                db.close()
+
+    # ================== TASK ==================
+
+    def _run_task(
+        self,
+        task_id: int,
+        job_id: int,
+        article: str,
+        user_id: int,
+        attempt: int,
+    ) -> None:
+        start_time = time.time()
+
+        self._emit(job_id, "card_processing", article, {"attempt": attempt})
+
+        # Pipeline log'lari (kartaga o'nlab qator) bufferlanadi va karta tugaganda
+        # bitta card_log event sifatida yoziladi – har qator uchun INSERT+COMMIT emas
+        log_lines: List[str] = []
+
+        def progress_callback(event: dict) -> None:
+            if event.get("type") == "card_log" and settings.BATCH_JOB_LOG_EVENTS:
+                log_lines.append(str(event.get("message")))
+
+        try:
+            result = self.processor.process_single_card(
+                article=article,
+                user_id=user_id,
+                progress_callback=progress_callback,
+                save_failed=False,
+            )
+        except Exception as e:
+            self._emit_logs(job_id, article, attempt, log_lines)
+            self._handle_failure(task_id, job_id, article, user_id, attempt, e, start_time)
+            return
+
+        self._emit_logs(job_id, article, attempt, log_lines)
+
+        if result.get("status") == "error":
+            self._handle_failure(
+                task_id,
+                job_id,
+                article,
+                user_id,
+                attempt,
+                RuntimeError(result.get("message") or result.get("error_type") or "Processing error"),
+                start_time,
+                retryable=result.get("error_type") not in NON_RETRYABLE_ERRORS,
+            )
+            return
+
+        processing_time = time.time() - start_time
+        db = SessionLocal()
+        try:
+            BatchJobRepository(db).complete_task(
+                task_id=task_id,
+                worker_id=self.worker_id,
+                history_id=result.get("history_id"),
+                processing_time=processing_time,
+                payload={
+                    "history_id": result.get("history_id"),
+                    "nmID": result.get("nmID"),
+                    "status": result.get("status"),
+                    "new_title": result.get("new_title"),
+                    "validation_score": result.get("validation_score"),
+                    "processing_time": round(processing_time, 2),
+                },
+            )
+        finally:
+            db.close()
+
+    def _handle_failure(
+        self,
+        task_id: int,
+        job_id: int,
+        article: str,
+        user_id: int,
+        attempt: int,
+        error: Exception,
+        start_time: float,
+        retryable: bool = True,
+    ) -> None:
+        processing_time = time.time() - start_time
+        delay = min(
+            settings.BATCH_RETRY_MAX_DELAY_SECONDS,
+            settings.BATCH_RETRY_BASE_DELAY_SECONDS * (2 ** (attempt - 1)),
+        )
+        delay *= random.uniform(0.8, 1.2)
+
+        db = SessionLocal()
+        try:
+            outcome = BatchJobRepository(db).fail_task(
+                task_id=task_id,
+                worker_id=self.worker_id,
+                error=str(error),
+                retry_delay_seconds=delay,
+                processing_time=processing_time,
+                retryable=retryable,
+            )
+        finally:
+            db.close()
+
+        print(f"❌ Batch task {task_id} ({article}) attempt {attempt} failed: {error} -> {outcome}")
+
+        if outcome == "failed":
+            self.processor.save_failed_to_history(article, user_id, str(error), processing_time)
+
+    def _emit_logs(self, job_id: int, article: str, attempt: int, log_lines: List[str]) -> None:
+        if log_lines:
+            self._emit(
+                job_id,
+                "card_log",
+                article,
+                {"message": "\n".join(log_lines), "lines": len(log_lines), "attempt": attempt},
+            )
+
+    def _emit(self, job_id: int, type: str, article: Optional[str], payload: dict) -> None:
+        db = SessionLocal()
+        try:
+            BatchJobRepository(db).add_event(job_id, type, article, payload)
+        except Exception as e:
+            print(f"⚠️ Batch event write error: {e}")
+        finally:
+            db.close()
+
+
+# ================== EMBEDDED (API process ichida) ==================
+
+_embedded: Optional[BatchWorker] = None
+
+
+def start_embedded_worker() -> None:
+    """BATCH_EMBEDDED_WORKER=True (default) – alohida worker process'siz ham /batch ishlaydi."""
+    global _embedded
+    if _embedded is not None:
+        return
+    _embedded = BatchWorker()
+    threading.Thread(target=_embedded.run_forever, name="batch-worker", daemon=True).start()
+
+
+def stop_embedded_worker() -> None:
+    if _embedded is not None:
+        _embedded.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch queue worker")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--lease-seconds", type=int, default=None)
+    parser.add_argument("--poll-interval", type=float, default=None)
+    args = parser.parse_args()
+
+    worker = BatchWorker(
+        concurrency=args.concurrency,
+        lease_seconds=args.lease_seconds,
+        poll_interval=args.poll_interval,
+    )
+
+    def handle_signal(signum, frame):
+        print(f"⚠️ Signal {signum} received at {datetime.utcnow().isoformat()}")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    # Lug'atlarni oldindan yuklash – birinchi task'lar cold lookup kutmasin
+    get_data_registry().start_watcher()
+
+    worker.run_forever()
+
+
+if __name__ == "__main__":
+    main()
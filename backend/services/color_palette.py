@@ -0,0 +1,240 @@
+# services/color_palette.py
+"""
+color_names.json (WB ranglar palitrasi) indeksi.
+
+Avval load_parent_names / load_by_parent har chaqiruvda faylni qayta
+o'qib parse qilardi (ColorService har aniqlangan parent rang uchun bir marta).
+ColorPalette bir marta quriladi va fayl mtime/size o'zgarmaguncha
+qayta ishlatiladi:
+
+- parent -> ranglar ro'yxati (fayldagi tartibda)
+- rang -> parent
+- normallashtirilgan nom (lower, ё->е, ortiqcha bo'shliqsiz) -> kanonik nom
+
+Ixcham ko'rinish (to_compact / from_compact): parent'lar ro'yxati + nomlar +
+har bir nom uchun parent indeksi. COLOR_PALETTE_SIDECAR_ENABLED=True bo'lsa
+DATA_DIR/.color_names.index.json ga yoziladi va cold start'da o'qiladi.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.config import settings
+
+
+def normalize_color_name(name: Any) -> str:
+    return " ".join(str(name).replace("ё", "е").replace("Ё", "Е").split()).lower()
+
+
+class ColorPalette:
+    FORMAT_VERSION = 1
+
+    def __init__(self, items: Iterable[Tuple[str, Optional[str]]]):
+        parent_names: List[str] = []
+        by_parent: Dict[str, List[str]] = {}
+        parent_of: Dict[str, str] = {}
+        normalized: Dict[str, str] = {}
+        names: List[str] = []
+
+        for name, parent in items:
+            if not name:
+                continue
+            names.append(name)
+            normalized.setdefault(normalize_color_name(name), name)
+            if not parent:
+                continue
+            if parent not in by_parent:
+                by_parent[parent] = []
+                parent_names.append(parent)
+            by_parent[parent].append(name)
+            parent_of.setdefault(name, parent)
+
+        self.names: Tuple[str, ...] = tuple(names)
+        self.parent_names: Tuple[str, ...] = tuple(sorted(parent_names))
+        self._by_parent: Dict[str, Tuple[str, ...]] = {p: tuple(v) for p, v in by_parent.items()}
+        self._parent_of = parent_of
+        self._normalized = normalized
+        self._normalized_parents = {normalize_color_name(p): p for p in self.parent_names}
+        # parent'ning o'zi ham rang nomi sifatida ishlatilishi mumkin
+        for p in self.parent_names:
+            self._normalized.setdefault(normalize_color_name(p), p)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: Any) -> bool:
+        return self.canonical(name) is not None
+
+    # ===== LOOKUP =====
+
+    def names_for(self, parent: Any) -> List[str]:
+        """Parent rang ostidagi nomlar (LLM javobidagi registr/ё farqlariga chidamli)."""
+        if not isinstance(parent, str):
+            return []
+        names = self._by_parent.get(parent)
+        if names is None:
+            key = self._normalized_parents.get(normalize_color_name(parent))
+            names = self._by_parent.get(key, ()) if key else ()
+        return list(names)
+
+    def parent_for(self, name: Any) -> Optional[str]:
+        canonical = self.canonical(name)
+        if canonical is None:
+            return None
+        if canonical in self._by_parent:
+            return canonical
+        return self._parent_of.get(canonical)
+
+    def canonical(self, name: Any) -> Optional[str]:
+        if not isinstance(name, str):
+            return None
+        if name in self._parent_of or name in self._by_parent:
+            return name
+        return self._normalized.get(normalize_color_name(name))
+
+    def canonicalize(self, names: Iterable[Any], keep_unknown: bool = True) -> List[str]:
+        """Ro'yxatni kanonik nomlarga keltiradi (takrorlarsiz, tartib saqlanadi)."""
+        result: List[str] = []
+        for name in names:
+            canonical = self.canonical(name)
+            if canonical is None:
+                if not keep_unknown or not isinstance(name, str) or not name.strip():
+                    continue
+                canonical = name.strip()
+            if canonical not in result:
+                result.append(canonical)
+        return result
+
+    # ===== COMPACT FORM =====
+
+    def to_compact(self) -> Dict[str, Any]:
+        parents = sorted(self._by_parent)
+        parent_index = {p: i for i, p in enumerate(parents)}
+        return {
+            "format": self.FORMAT_VERSION,
+            "parents": parents,
+            "names": list(self.names),
+            "parent_idx": [
+                parent_index.get(self._parent_of.get(name), -1) for name in self.names
+            ],
+        }
+
+    @classmethod
+    def from_compact(cls, data: Dict[str, Any]) -> "ColorPalette":
+        if data.get("format") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported color palette format: {data.get('format')}")
+        parents = data["parents"]
+        return cls(
+            (name, parents[idx] if idx >= 0 else None)
+            for name, idx in zip(data["names"], data["parent_idx"])
+        )
+
+    @classmethod
+    def from_color_names(cls, data: Dict[str, Any]) -> "ColorPalette":
+        return cls(
+            (item.get("name"), item.get("parentName"))
+            for item in data.get("data", []) or []
+        )
+
+
+class _PaletteHolder:
+    """color_names.json imzosi (mtime/size) bo'yicha bitta palitra."""
+
+    def __init__(self, path: Path, sidecar_path: Path):
+        self.path = path
+        self.sidecar_path = sidecar_path
+        self.lock = threading.Lock()
+        self.signature: Optional[tuple] = None
+        self.palette: Optional[ColorPalette] = None
+
+    def get(self) -> ColorPalette:
+        signature = self._signature()
+        palette = self.palette
+        if palette is not None and self.signature == signature:
+            return palette
+
+        with self.lock:
+            if self.palette is None or self.signature != signature:
+                self.palette = self._load(signature)
+                self.signature = signature
+            return self.palette
+
+    def reset(self) -> None:
+        with self.lock:
+            self.palette = None
+            self.signature = None
+
+    def _signature(self) -> Optional[tuple]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self, signature: Optional[tuple]) -> ColorPalette:
+        if signature is None:
+            print(f"⚠️ Color palette not found: {self.path}")
+            return ColorPalette(())
+
+        # Binar snapshot (DATA_SNAPSHOT_ENABLED) – JSON parse'siz
+        from services.data_registry import get_data_registry
+        mapped = get_data_registry().mapped_snapshot()
+        if mapped is not None and mapped.sources.get(self.path.name) == signature:
+            return ColorPalette(mapped.colors())
+
+        if settings.COLOR_PALETTE_SIDECAR_ENABLED:
+            palette = self._read_sidecar(signature)
+            if palette is not None:
+                return palette
+
+        with self.path.open("r", encoding="utf-8") as f:
+            palette = ColorPalette.from_color_names(json.load(f))
+
+        if settings.COLOR_PALETTE_SIDECAR_ENABLED:
+            self._write_sidecar(signature, palette)
+        return palette
+
+    def _read_sidecar(self, signature: tuple) -> Optional[ColorPalette]:
+        try:
+            with self.sidecar_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            if tuple(data.get("source_signature") or ()) != tuple(signature):
+                return None
+            return ColorPalette.from_compact(data)
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
+            return None
+
+    def _write_sidecar(self, signature: tuple, palette: ColorPalette) -> None:
+        data = palette.to_compact()
+        data["source_signature"] = list(signature)
+        tmp_path = self.sidecar_path.with_suffix(".tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            tmp_path.replace(self.sidecar_path)
+        except OSError as e:
+            print(f"⚠️ Color palette sidecar write failed: {e}")
+
+
+_holder: Optional[_PaletteHolder] = None
+_holder_lock = threading.Lock()
+
+
+def _get_holder() -> _PaletteHolder:
+    global _holder
+    if _holder is None:
+        with _holder_lock:
+            if _holder is None:
+                path = settings.DATA_DIR / "color_names.json"
+                _holder = _PaletteHolder(path, path.with_name(".color_names.index.json"))
+    return _holder
+
+
+def get_color_palette() -> ColorPalette:
+    return _get_holder().get()
+
+
+def reset_color_palette() -> None:
+    _get_holder().reset()
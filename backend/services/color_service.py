@@ -3,7 +3,7 @@ from typing import List, Dict, Any, Optional
 from services.base.openai_service import BaseOpenAIService
 from core.database import get_db
 from services.promnt_loader import PromptLoaderService
-from services.data_loader import DataLoader
+from services.color_palette import get_color_palette
 
 
 class ColorService(BaseOpenAIService):
@@ -14,15 +14,13 @@ class ColorService(BaseOpenAIService):
         log_callback=None,
     ):
 
-        dataloader = DataLoader()
+        palette = get_color_palette()
 
         try:
             max_colors = 5
             system_prompt_parent = self._load_prompt(type="parent")
             system_prompt_names = self._load_prompt(type="names")
-            parent_names = dataloader.load_parent_names()
-            if isinstance(parent_names, set):
-                parent_names = sorted(list(parent_names))
+            parent_names = list(palette.parent_names)
 
             if log_callback:
                 log_callback("🎨 Detecting colors from text...")
@@ -48,7 +46,7 @@ class ColorService(BaseOpenAIService):
 
             color_items = []
             for i in colors_parent:
-                color_items.append(dataloader.load_by_parent(i))
+                color_items.append(palette.names_for(i))
 
             if not color_items:
                 return [colors_parent]
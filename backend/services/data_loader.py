@@ -1,9 +1,7 @@
-import json
-from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
-from functools import lru_cache
 
 from core.config import settings
+from services.data_registry import get_data_registry
 
 
 class SubjectConfigNotFoundError(Exception):
@@ -14,45 +12,43 @@ class SubjectConfigNotFoundError(Exception):
 class DataLoader:
     
     @staticmethod
-    @lru_cache(maxsize=50)
-    def load_subject_config(subject_id: int) -> Dict[str, Any]:
-        charcs_dir = settings.DATA_DIR / "charcs"
-        config_path = charcs_dir / f"{subject_id}.json"
-        
-        if not config_path.exists():
-            raise SubjectConfigNotFoundError(subject_id)
-        
+    def data_version() -> int:
+        """DATA_DIR snapshot versiyasi – keshlar shu bo'yicha kalitlanadi."""
+        return get_data_registry().version
+
+    @staticmethod
+    def get_subject_config_version(subject_id: int) -> Optional[Tuple[int, int]]:
+        """data/charcs/{id}.json versiyasi: (mtime_ns, size) yoki None (fayl yo'q)."""
+        entry = get_data_registry().current().subjects.get(int(subject_id))
+        return entry.signature if entry is not None else None
+
+    @staticmethod
+    def _subject_entry(subject_id: int):
         try:
-            with config_path.open("r", encoding="utf-8") as f:
-                config = json.load(f)
+            subject_id = int(subject_id)
+        except (TypeError, ValueError):
+            raise SubjectConfigNotFoundError(subject_id)
 
-            if not isinstance(config, dict):
-                raise ValueError(f"Invalid config format for subject {subject_id}")
-            
-            if "characteristics" not in config:
-                raise ValueError(f"Missing 'characteristics' in config for subject {subject_id}")
-            
-            return config
-            
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in config for subject {subject_id}: {e}")
+        entry = get_data_registry().current().subjects.get(subject_id)
+        if entry is None:
+            raise SubjectConfigNotFoundError(subject_id)
+        if entry.error:
+            raise ValueError(entry.error)
+        return entry
+
+    @staticmethod
+    def load_subject_config(subject_id: int) -> Dict[str, Any]:
+        # Registry fayl o'zgarishini kuzatadi – restart'siz yangi config o'qiladi
+        return DataLoader._subject_entry(subject_id).config
+
+    @staticmethod
+    def get_config_chars_index(subject_id: int) -> Dict[Any, Dict[str, Any]]:
+        """charcID (int va str ko'rinishlari) -> config characteristic."""
+        return DataLoader._subject_entry(subject_id).config_chars
         
     @staticmethod
     def get_available_subject_ids() -> List[int]:
-        charcs_dir = settings.DATA_DIR / "charcs"
-        
-        if not charcs_dir.exists():
-            return []
-        
-        subject_ids = []
-        for file_path in charcs_dir.glob("*.json"):
-            try:
-                subject_id = int(file_path.stem)
-                subject_ids.append(subject_id)
-            except ValueError:
-                continue
-        
-        return sorted(subject_ids)
+        return sorted(get_data_registry().current().subjects)
         
     @staticmethod
     def validate_subject_config(subject_id: int) -> Tuple[bool, Optional[str]]:
@@ -73,24 +69,7 @@ class DataLoader:
         gender: str = None,
     ) -> Tuple[List[Dict], List[Dict], List[Dict], List[Dict]]:
         try:
-            config = DataLoader.load_subject_config(subject_id)
-
-            config_chars: Dict[Any, Dict[str, Any]] = {}
-            for c in config.get("characteristics", []):
-                cid = c.get("charcID")
-                if cid is None:
-                    continue
-                config_chars[cid] = c
-                try:
-                    config_chars[int(cid)] = c
-                except Exception:
-                    pass
-                try:
-                    if isinstance(cid, int):
-                        config_chars[str(cid)] = c
-                except Exception:
-                    pass
-
+            config_chars = DataLoader.get_config_chars_index(subject_id)
         except (SubjectConfigNotFoundError, ValueError):
             return [], [], [], charcs_meta
 
@@ -163,16 +142,13 @@ class DataLoader:
             return []
     
     @staticmethod
-    @lru_cache(maxsize=2)
     def load_limits(color_only: bool = False) -> Dict[str, Dict[str, int]]:
-        limits_path = settings.DATA_DIR / "Справочник лимитов.json"
-        with limits_path.open("r", encoding="utf-8") as f:
-            all_limits = json.load(f)
-        
-        if color_only:
-            return {"Цвет": all_limits.get("Цвет", {})}
-        else:
-            return {k: v for k, v in all_limits.items() if k != "Цвет"}
+        snapshot = get_data_registry().current()
+        if snapshot.limits is None:
+            raise FileNotFoundError(
+                f"Справочник лимитов.json not found: {settings.DATA_DIR / 'Справочник лимитов.json'}"
+            )
+        return snapshot.limits_color if color_only else snapshot.limits_other
     
     @staticmethod
     def get_limits_for_field(name: str) -> Dict[str, int]:
@@ -187,21 +163,17 @@ class DataLoader:
         return limits
 
     @staticmethod
-    @lru_cache(maxsize=1)
     def load_generator_dict() -> Dict[str, List[str]]:
-        gen_dict_path = settings.DATA_DIR / "Ключевые_слова.json"
-        with gen_dict_path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        # Generator lug'ati – xuddi shu Ключевые_слова.json
+        return DataLoader.load_keywords()
 
     @staticmethod
-    @lru_cache(maxsize=1)
     def load_keywords() -> Dict[str, List[str]]:
-        path = settings.DATA_DIR / "Ключевые_слова.json"
-        if not path.exists():
+        snapshot = get_data_registry().current()
+        if snapshot.keywords is None:
+            path = settings.DATA_DIR / "Ключевые_слова.json"
             raise FileNotFoundError(f"Ключевые_слова.json not found: {path}")
-        
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        return snapshot.keywords
 
     @staticmethod
     def build_allowed_values_from_keywords(
@@ -276,32 +248,26 @@ class DataLoader:
     
     @staticmethod
     def clear_cache():
-        DataLoader.load_limits.cache_clear()
-        DataLoader.load_generator_dict.cache_clear()
-        DataLoader.load_subject_config.cache_clear()
-        DataLoader.load_keywords.cache_clear()
+        # Diskdan to'liq qayta o'qish – yangi versiya (bog'liq keshlar ham yangilanadi)
+        get_data_registry().reload(force=True)
+
+        from services.color_palette import reset_color_palette
+        from services.field_catalog import reset_field_catalog
+        from services.subject_plan import get_subject_plan_cache
+        reset_color_palette()
+        reset_field_catalog()
+        get_subject_plan_cache().clear()
         print("✅ Data loader cache cleared")
 
     @staticmethod
     def load_parent_names() -> List[str]:
-        path = settings.DATA_DIR / "color_names.json"
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        parent_names = {item["parentName"] for item in data.get('data', []) if item.get("parentName")}
-        return sorted(parent_names)
+        from services.color_palette import get_color_palette
+        return list(get_color_palette().parent_names)
         
     @staticmethod
     def load_by_parent(parent_name: str) -> List[str]:
-        path = settings.DATA_DIR / "color_names.json"
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        return [
-            item["name"]
-            for item in data.get('data', [])
-            if item.get("parentName") == parent_name
-        ]
+        from services.color_palette import get_color_palette
+        return get_color_palette().names_for(parent_name)
 
     @staticmethod
     def should_fill_conditional_field(
@@ -0,0 +1,439 @@
+# services/data_registry.py
+"""
+DATA_DIR lug'atlari uchun versiyalangan registry.
+
+Startup'da hamma narsa (Справочник лимитов.json, Ключевые_слова.json,
+data/charcs/*.json) bitta DataSnapshot'ga yuklanadi. Fon thread fayllarning
+mtime/size imzolarini kuzatadi; biror fayl o'zgarsa yangi snapshot quriladi
+(o'zgarmagan qismlar eski snapshot'dan olinadi) va bitta assignment bilan
+almashtiriladi – o'quvchilar hech qachon yarim yangilangan holatni ko'rmaydi.
+
+snapshot.version har almashishda oshadi; pastdagi keshlar (field catalog,
+subject plan) shu versiya bo'yicha kalitlanadi.
+
+Watcher ishga tushirilmagan process'larda (masalan batch worker) current()
+har DATA_REGISTRY_POLL_SECONDS da bir marta imzolarni o'zi tekshiradi.
+
+DATA_SNAPSHOT_ENABLED=True bo'lsa imzosi mos kelgan qismlar JSON o'rniga
+mmap qilingan binar snapshot'dan (services/data_snapshot.py) lazy o'qiladi.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.config import settings
+from services.data_snapshot import MappedSnapshot
+
+
+LIMITS_FILE = "Справочник лимитов.json"
+KEYWORDS_FILE = "Ключевые_слова.json"
+CHARCS_DIR = "charcs"
+
+Signature = Tuple[int, int]
+
+
+def _file_signature(path: Path) -> Optional[Signature]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _read_json(path: Path) -> Any:
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _build_config_chars_index(config: Dict[str, Any]) -> Dict[Any, Dict[str, Any]]:
+    """charcID (int va str ko'rinishlari) -> config characteristic."""
+    config_chars: Dict[Any, Dict[str, Any]] = {}
+    for c in config.get("characteristics", []):
+        cid = c.get("charcID")
+        if cid is None:
+            continue
+        config_chars[cid] = c
+        try:
+            config_chars[int(cid)] = c
+        except Exception:
+            pass
+        try:
+            if isinstance(cid, int):
+                config_chars[str(cid)] = c
+        except Exception:
+            pass
+    return config_chars
+
+
+def _parse_subject_config(subject_id: int, raw: bytes) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    try:
+        config = json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        return None, f"Invalid JSON in config for subject {subject_id}: {e}"
+
+    if not isinstance(config, dict):
+        return None, f"Invalid config format for subject {subject_id}"
+    if "characteristics" not in config:
+        return None, f"Missing 'characteristics' in config for subject {subject_id}"
+    return config, None
+
+
+class SubjectConfigEntry:
+    """
+    Bitta data/charcs/{id}.json. JSON'dan yuklanganda darhol parse qilinadi,
+    binar snapshot'dan esa – birinchi murojaatda (lazy).
+    """
+
+    __slots__ = ("subject_id", "signature", "_raw_loader", "_config", "_config_chars", "_error")
+
+    def __init__(
+        self,
+        subject_id: int,
+        signature: Signature,
+        raw_loader: Callable[[], bytes],
+        lazy: bool = False,
+    ):
+        self.subject_id = subject_id
+        self.signature = signature
+        self._raw_loader: Optional[Callable[[], bytes]] = raw_loader
+        self._config: Optional[Dict[str, Any]] = None
+        self._config_chars: Dict[Any, Dict[str, Any]] = {}
+        self._error: Optional[str] = None
+        if not lazy:
+            self._ensure()
+
+    def _ensure(self) -> None:
+        loader = self._raw_loader
+        if loader is None:
+            return
+        # Parallel birinchi murojaatlar bir xil natija beradi – lock shart emas
+        config, error = _parse_subject_config(self.subject_id, loader())
+        self._config = config
+        self._config_chars = _build_config_chars_index(config) if config is not None else {}
+        self._error = error
+        self._raw_loader = None
+
+    @property
+    def config(self) -> Optional[Dict[str, Any]]:
+        self._ensure()
+        return self._config
+
+    @property
+    def config_chars(self) -> Dict[Any, Dict[str, Any]]:
+        self._ensure()
+        return self._config_chars
+
+    @property
+    def error(self) -> Optional[str]:
+        self._ensure()
+        return self._error
+
+
+class DataSnapshot:
+    """Bir lahzadagi DATA_DIR holati. O'zgartirilmaydi – faqat almashtiriladi."""
+
+    __slots__ = (
+        "version",
+        "loaded_at",
+        "signatures",
+        "limits",
+        "limits_other",
+        "limits_color",
+        "keywords",
+        "subjects",
+    )
+
+    def __init__(
+        self,
+        version: int,
+        signatures: Dict[str, Optional[Signature]],
+        limits: Optional[Dict[str, Dict[str, int]]],
+        keywords: Optional[Dict[str, List[str]]],
+        subjects: Dict[int, SubjectConfigEntry],
+        previous: Optional["DataSnapshot"] = None,
+    ):
+        self.version = version
+        self.loaded_at = time.time()
+        self.signatures = signatures
+        self.limits = limits
+        self.keywords = keywords
+        self.subjects = subjects
+
+        if previous is not None and previous.limits is limits:
+            # Limitlar o'zgarmagan – hosila dict'lar ham o'sha (keshlar identity bo'yicha)
+            self.limits_color = previous.limits_color
+            self.limits_other = previous.limits_other
+        elif limits is not None:
+            self.limits_color = {"Цвет": limits.get("Цвет", {})}
+            self.limits_other = {k: v for k, v in limits.items() if k != "Цвет"}
+        else:
+            self.limits_color = None
+            self.limits_other = None
+
+
+class DataRegistry:
+    def __init__(
+        self,
+        data_dir: Path,
+        poll_seconds: float,
+        snapshot_path: Optional[Path] = None,
+    ):
+        self.data_dir = Path(data_dir)
+        self.poll_seconds = poll_seconds
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+
+        self._mapped: Optional[MappedSnapshot] = None
+        self._mapped_lock = threading.Lock()
+        self._mapped_failed: Optional[Signature] = None
+
+        self._snapshot: Optional[DataSnapshot] = None
+        self._reload_lock = threading.Lock()
+        self._last_check = 0.0
+        self._failed_signatures: Optional[Dict[str, Optional[Signature]]] = None
+
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error: Optional[str] = None
+
+    # ===== PUBLIC =====
+
+    def current(self) -> DataSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.reload()
+
+        if (
+            self._watcher is None
+            and self.poll_seconds > 0
+            and time.monotonic() - self._last_check >= self.poll_seconds
+        ):
+            # Watcher'siz process: imzolarni o'zimiz tekshiramiz (faqat bitta thread)
+            if self._reload_lock.acquire(blocking=False):
+                try:
+                    self._reload_locked(force=False)
+                except Exception as e:
+                    self._record_error(e)
+                finally:
+                    self._reload_lock.release()
+            snapshot = self._snapshot
+        return snapshot
+
+    @property
+    def version(self) -> int:
+        return self.current().version
+
+    def reload(self, force: bool = False) -> DataSnapshot:
+        """Imzolar o'zgargan bo'lsa (force=True – har doim) yangi snapshot."""
+        with self._reload_lock:
+            return self._reload_locked(force=force)
+
+    def start_watcher(self, poll_seconds: Optional[float] = None) -> None:
+        if poll_seconds is not None:
+            self.poll_seconds = poll_seconds
+
+        # Preload – birinchi so'rov kutmasin
+        self.current()
+
+        if self.poll_seconds <= 0 or self._watcher is not None:
+            return
+
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop,
+            name="data-registry-watcher",
+            daemon=True,
+        )
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop.set()
+        watcher = self._watcher
+        self._watcher = None
+        if watcher is not None:
+            watcher.join(timeout=5)
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "subjects": len(snapshot.subjects) if snapshot else 0,
+            "keywords_fields": len(snapshot.keywords or {}) if snapshot else 0,
+            "watching": self._watcher is not None,
+            "binary_snapshot": str(self._mapped.path) if self._mapped is not None else None,
+            "poll_seconds": self.poll_seconds,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_error": self.last_error,
+        }
+
+    # ===== INTERNAL =====
+
+    def _watch_loop(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.reload()
+            except Exception as e:
+                self._record_error(e)
+
+    def _record_error(self, error: Exception) -> None:
+        self.reload_errors += 1
+        self.last_error = str(error)
+        print(f"⚠️ Data registry reload failed (keeping version "
+              f"{self._snapshot.version if self._snapshot else None}): {error}")
+
+    def _scan_signatures(self) -> Dict[str, Optional[Signature]]:
+        signatures: Dict[str, Optional[Signature]] = {
+            LIMITS_FILE: _file_signature(self.data_dir / LIMITS_FILE),
+            KEYWORDS_FILE: _file_signature(self.data_dir / KEYWORDS_FILE),
+        }
+        charcs_dir = self.data_dir / CHARCS_DIR
+        if charcs_dir.exists():
+            for path in charcs_dir.glob("*.json"):
+                signatures[f"{CHARCS_DIR}/{path.name}"] = _file_signature(path)
+        return signatures
+
+    def _reload_locked(self, force: bool) -> DataSnapshot:
+        self._last_check = time.monotonic()
+        signatures = self._scan_signatures()
+        previous = self._snapshot
+
+        if previous is not None and not force and previous.signatures == signatures:
+            return previous
+        # Xuddi shu buzilgan holatni har poll'da qayta parse qilmaymiz
+        if previous is not None and not force and signatures == self._failed_signatures:
+            return previous
+
+        try:
+            snapshot = self._build_snapshot(signatures, previous, force)
+        except Exception:
+            self._failed_signatures = signatures
+            raise
+        self._failed_signatures = None
+        self._snapshot = snapshot
+        self.reloads += 1
+
+        if previous is not None:
+            print(f"🔄 Data registry reloaded: version {snapshot.version}")
+        return snapshot
+
+    def _build_snapshot(
+        self,
+        signatures: Dict[str, Optional[Signature]],
+        previous: Optional[DataSnapshot],
+        force: bool,
+    ) -> DataSnapshot:
+        reuse = previous if previous is not None and not force else None
+
+        def unchanged(key: str) -> bool:
+            return reuse is not None and reuse.signatures.get(key) == signatures.get(key)
+
+        # Binar snapshot – faqat manba imzosi mos kelgan qismlar uchun
+        mapped = self.mapped_snapshot()
+
+        def from_mapped(key: str) -> bool:
+            return mapped is not None and mapped.sources.get(key) == signatures.get(key)
+
+        # Parse xatosi bo'lsa – exception, eski snapshot ishlatilishda davom etadi
+        if unchanged(LIMITS_FILE):
+            limits = reuse.limits
+        elif signatures[LIMITS_FILE] is None:
+            limits = None
+        elif from_mapped(LIMITS_FILE):
+            limits = mapped.limits()
+        else:
+            limits = _read_json(self.data_dir / LIMITS_FILE)
+
+        if unchanged(KEYWORDS_FILE):
+            keywords = reuse.keywords
+        elif signatures[KEYWORDS_FILE] is None:
+            keywords = None
+        elif from_mapped(KEYWORDS_FILE):
+            keywords = mapped.keywords()
+        else:
+            keywords = _read_json(self.data_dir / KEYWORDS_FILE)
+
+        subjects: Dict[int, SubjectConfigEntry] = {}
+        for key, signature in signatures.items():
+            if not key.startswith(f"{CHARCS_DIR}/") or signature is None:
+                continue
+            try:
+                subject_id = int(Path(key).stem)
+            except ValueError:
+                continue
+
+            old = reuse.subjects.get(subject_id) if reuse is not None else None
+            if old is not None and old.signature == signature:
+                subjects[subject_id] = old
+            elif from_mapped(key):
+                subjects[subject_id] = SubjectConfigEntry(
+                    subject_id,
+                    signature,
+                    lambda sid=subject_id: mapped.subject_config_bytes(sid) or b"",
+                    lazy=True,
+                )
+            else:
+                subjects[subject_id] = self._load_subject(subject_id, signature)
+
+        return DataSnapshot(
+            version=(previous.version + 1) if previous is not None else 1,
+            signatures=signatures,
+            limits=limits,
+            keywords=keywords,
+            subjects=subjects,
+            previous=reuse,
+        )
+
+    def _load_subject(self, subject_id: int, signature: Signature) -> SubjectConfigEntry:
+        path = self.data_dir / CHARCS_DIR / f"{subject_id}.json"
+        return SubjectConfigEntry(subject_id, signature, path.read_bytes)
+
+    # ===== BINARY SNAPSHOT =====
+
+    def mapped_snapshot(self) -> Optional[MappedSnapshot]:
+        """DATA_SNAPSHOT_ENABLED bo'lsa – mmap qilingan snapshot (fayl o'zgarsa qayta ochiladi)."""
+        if not self.snapshot_path:
+            return None
+
+        signature = _file_signature(self.snapshot_path)
+        mapped = self._mapped
+        if signature is None or signature == self._mapped_failed:
+            return None
+        if mapped is not None and mapped.signature == signature:
+            return mapped
+
+        with self._mapped_lock:
+            if self._mapped is None or self._mapped.signature != signature:
+                try:
+                    self._mapped = MappedSnapshot(self.snapshot_path)
+                    print(f"🗺️ Data snapshot mapped: {self.snapshot_path}")
+                except Exception as e:
+                    print(f"⚠️ Data snapshot unusable ({self.snapshot_path}): {e}")
+                    self._mapped = None
+                    self._mapped_failed = signature
+            return self._mapped
+
+
+_registry: Optional[DataRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_data_registry() -> DataRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = DataRegistry(
+                    data_dir=settings.DATA_DIR,
+                    poll_seconds=settings.DATA_REGISTRY_POLL_SECONDS,
+                    snapshot_path=(
+                        settings.DATA_SNAPSHOT_PATH if settings.DATA_SNAPSHOT_ENABLED else None
+                    ),
+                )
+    return _registry
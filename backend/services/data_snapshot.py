@@ -0,0 +1,398 @@
+# services/data_snapshot.py
+"""
+DATA_DIR lug'atlarining kompilyatsiya qilingan binar snapshot'i (mmap).
+
+Har bir uvicorn worker Ключевые_слова.json, limitlar, color_names.json va
+charcs/*.json'ni o'zi parse qilib, o'z nusxasini xotirada ushlardi. Snapshot
+bitta fayl – mmap qilinadi, sahifalari OS page cache orqali worker'lar
+o'rtasida bo'lishiladi, kerakli qismlar faqat murojaat qilinganda decode
+qilinadi.
+
+Build (deploy / lug'at o'zgargandan keyin):
+
+    python -m services.data_snapshot build
+    python -m services.data_snapshot info
+
+Format (native byte order, META'da yozib qo'yiladi):
+
+    header   : magic "WBDS" | format u32 | section_count u32
+    directory: section_count × (name 8s | offset u64 | length u64)
+    META     : JSON – manba fayllar imzolari (mtime_ns, size), byteorder
+    STRS     : intern qilingan satrlar – count u32 | offsets u32[count+1] | utf-8 blob
+    KWDS     : field_count u32 | (name_sid, start, count) u32[3×n] | value_sid u32[...]
+    LIMS     : count u32 | (field_sid u32, key_sid u32, value i64)[...]
+    COLR     : count u32 | (name_sid u32, parent_sid i32)[...]
+    SUBJ     : count u32 | (subject_id i64, offset u64, length u64)[...] | JSON blob'lar
+
+Manba fayl imzosi snapshot'dagisi bilan mos kelmasa – o'sha qism uchun
+snapshot ishlatilmaydi (registry JSON'dan o'qiydi).
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from core.config import settings
+
+
+MAGIC = b"WBDS"
+FORMAT_VERSION = 1
+
+LIMITS_FILE = "Справочник лимитов.json"
+KEYWORDS_FILE = "Ключевые_слова.json"
+COLORS_FILE = "color_names.json"
+CHARCS_DIR = "charcs"
+
+_HEADER = struct.Struct("=4sII")
+_DIR_ENTRY = struct.Struct("=8sQQ")
+_LIMIT_ENTRY = struct.Struct("=IIq")
+_COLOR_ENTRY = struct.Struct("=Ii")
+_SUBJ_ENTRY = struct.Struct("=qQQ")
+_U32 = struct.Struct("=I")
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# ================== BUILD ==================
+
+class _StringTable:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, value: str) -> int:
+        sid = self.ids.get(value)
+        if sid is None:
+            sid = len(self.strings)
+            self.ids[value] = sid
+            self.strings.append(value)
+        return sid
+
+    def encode(self) -> bytes:
+        blobs = [s.encode("utf-8") for s in self.strings]
+        offsets = array("I", [0])
+        total = 0
+        for b in blobs:
+            total += len(b)
+            offsets.append(total)
+        return _U32.pack(len(blobs)) + offsets.tobytes() + b"".join(blobs)
+
+
+def build_snapshot(data_dir: Path, output: Path) -> Dict[str, Any]:
+    """DATA_DIR -> binar snapshot (atomik yoziladi). Statistikani qaytaradi."""
+    data_dir = Path(data_dir)
+    output = Path(output)
+    strings = _StringTable()
+    sources: Dict[str, Optional[Tuple[int, int]]] = {}
+
+    def load(rel: str) -> Any:
+        path = data_dir / rel
+        # Imzo o'qishdan OLDIN olinadi: o'qish paytida fayl o'zgarsa snapshot eskirgan hisoblanadi
+        signature = _file_signature(path)
+        if signature is None:
+            return None
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        sources[rel] = signature
+        return data
+
+    # ----- KWDS -----
+    keywords = load(KEYWORDS_FILE) or {}
+    field_rows = array("I")
+    value_ids = array("I")
+    for name, values in keywords.items():
+        values = [v for v in (values or []) if isinstance(v, str)]
+        field_rows.extend((strings.add(name), len(value_ids), len(values)))
+        value_ids.extend(strings.add(v) for v in values)
+    kwds = _U32.pack(len(keywords)) + field_rows.tobytes() + value_ids.tobytes()
+
+    # ----- LIMS -----
+    limits = load(LIMITS_FILE) or {}
+    limit_rows = []
+    for name, field_limits in limits.items():
+        for key, value in (field_limits or {}).items():
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"Limit {name}.{key} is not an integer: {value!r}")
+            limit_rows.append(_LIMIT_ENTRY.pack(strings.add(name), strings.add(key), value))
+    lims = _U32.pack(len(limit_rows)) + b"".join(limit_rows)
+
+    # ----- COLR -----
+    colors = load(COLORS_FILE) or {}
+    color_rows = []
+    for item in colors.get("data", []) or []:
+        name = item.get("name")
+        if not name:
+            continue
+        parent = item.get("parentName")
+        color_rows.append(
+            _COLOR_ENTRY.pack(strings.add(name), strings.add(parent) if parent else -1)
+        )
+    colr = _U32.pack(len(color_rows)) + b"".join(color_rows)
+
+    # ----- SUBJ -----
+    subj_rows = []
+    subj_blobs = []
+    blob_offset = 0
+    charcs_dir = data_dir / CHARCS_DIR
+    for path in sorted(charcs_dir.glob("*.json")) if charcs_dir.exists() else []:
+        try:
+            subject_id = int(path.stem)
+        except ValueError:
+            continue
+        signature = _file_signature(path)
+        # Config'lar ichki tuzilmasi erkin – JSON sifatida, lekin ixcham
+        raw = path.read_bytes()
+        try:
+            blob = json.dumps(
+                json.loads(raw.decode("utf-8")), ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8")
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            # Buzilgan config – aynan shunday saqlaymiz, o'qishda o'sha xato chiqadi
+            blob = raw
+        sources[f"{CHARCS_DIR}/{path.name}"] = signature
+        subj_rows.append(_SUBJ_ENTRY.pack(subject_id, blob_offset, len(blob)))
+        subj_blobs.append(blob)
+        blob_offset += len(blob)
+    subj = _U32.pack(len(subj_rows)) + b"".join(subj_rows) + b"".join(subj_blobs)
+
+    meta = json.dumps(
+        {
+            "created_at": time.time(),
+            "byteorder": sys.byteorder,
+            "sources": {k: list(v) for k, v in sources.items() if v is not None},
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+    sections = [
+        (b"META", meta),
+        (b"STRS", strings.encode()),
+        (b"KWDS", kwds),
+        (b"LIMS", lims),
+        (b"COLR", colr),
+        (b"SUBJ", subj),
+    ]
+
+    offset = _HEADER.size + _DIR_ENTRY.size * len(sections)
+    directory = []
+    for name, payload in sections:
+        # 8 bayt chegarasiga tekislash – memoryview.cast uchun
+        offset += (-offset) % 8
+        directory.append((name, offset, len(payload)))
+        offset += len(payload)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output.with_suffix(f".{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(sections)))
+        for name, off, length in directory:
+            f.write(_DIR_ENTRY.pack(name.ljust(8, b"\0"), off, length))
+        for (name, payload), (_, off, _) in zip(sections, directory):
+            f.write(b"\0" * (off - f.tell()))
+            f.write(payload)
+    os.replace(tmp_path, output)
+
+    return {
+        "path": str(output),
+        "bytes": output.stat().st_size,
+        "strings": len(strings.strings),
+        "keyword_fields": len(keywords),
+        "keyword_values": len(value_ids),
+        "limits": len(limit_rows),
+        "colors": len(color_rows),
+        "subjects": len(subj_rows),
+    }
+
+
+# ================== READ ==================
+
+class MappedSnapshot:
+    """
+    mmap qilingan snapshot. Satrlar birinchi murojaatda decode qilinadi va
+    intern qilinadi (bir sid – bitta str obyekti).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.signature = _file_signature(self.path)
+
+        with self.path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+
+        magic, fmt, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"Unsupported data snapshot: {path} (magic={magic!r}, format={fmt})")
+
+        self._sections: Dict[str, memoryview] = {}
+        for i in range(count):
+            name, off, length = _DIR_ENTRY.unpack_from(self._mm, _HEADER.size + i * _DIR_ENTRY.size)
+            self._sections[name.rstrip(b"\0").decode("ascii")] = self._view[off:off + length]
+
+        self.meta: Dict[str, Any] = json.loads(bytes(self._sections["META"]).decode("utf-8"))
+        if self.meta.get("byteorder") != sys.byteorder:
+            raise ValueError(f"Data snapshot byte order mismatch: {self.meta.get('byteorder')}")
+        self.sources: Dict[str, Tuple[int, int]] = {
+            k: tuple(v) for k, v in (self.meta.get("sources") or {}).items()
+        }
+
+        strs = self._sections["STRS"]
+        (self._string_count,) = _U32.unpack_from(strs, 0)
+        self._string_offsets = strs[4:4 + 4 * (self._string_count + 1)].cast("I")
+        self._string_blob = strs[4 + 4 * (self._string_count + 1):]
+        self._strings: List[Optional[str]] = [None] * self._string_count
+        self._lock = threading.Lock()
+
+        self._keywords: Optional["KeywordsView"] = None
+        self._subject_index: Optional[Dict[int, Tuple[int, int]]] = None
+        self._subject_blob: Optional[memoryview] = None
+
+    # ===== STRINGS =====
+
+    def string(self, sid: int) -> str:
+        value = self._strings[sid]
+        if value is None:
+            start = self._string_offsets[sid]
+            end = self._string_offsets[sid + 1]
+            value = sys.intern(str(self._string_blob[start:end], "utf-8"))
+            self._strings[sid] = value
+        return value
+
+    # ===== SECTIONS =====
+
+    def keywords(self) -> "KeywordsView":
+        if self._keywords is None:
+            with self._lock:
+                if self._keywords is None:
+                    self._keywords = KeywordsView(self)
+        return self._keywords
+
+    def limits(self) -> Dict[str, Dict[str, int]]:
+        section = self._sections["LIMS"]
+        (count,) = _U32.unpack_from(section, 0)
+        result: Dict[str, Dict[str, int]] = {}
+        for i in range(count):
+            field_sid, key_sid, value = _LIMIT_ENTRY.unpack_from(section, 4 + i * _LIMIT_ENTRY.size)
+            result.setdefault(self.string(field_sid), {})[self.string(key_sid)] = value
+        return result
+
+    def colors(self) -> Iterator[Tuple[str, Optional[str]]]:
+        section = self._sections["COLR"]
+        (count,) = _U32.unpack_from(section, 0)
+        for i in range(count):
+            name_sid, parent_sid = _COLOR_ENTRY.unpack_from(section, 4 + i * _COLOR_ENTRY.size)
+            yield self.string(name_sid), (self.string(parent_sid) if parent_sid >= 0 else None)
+
+    def subject_ids(self) -> List[int]:
+        return sorted(self._subjects())
+
+    def subject_config_bytes(self, subject_id: int) -> Optional[bytes]:
+        entry = self._subjects().get(int(subject_id))
+        if entry is None:
+            return None
+        offset, length = entry
+        return bytes(self._subject_blob[offset:offset + length])
+
+    def _subjects(self) -> Dict[int, Tuple[int, int]]:
+        if self._subject_index is None:
+            with self._lock:
+                if self._subject_index is None:
+                    section = self._sections["SUBJ"]
+                    (count,) = _U32.unpack_from(section, 0)
+                    index = {}
+                    for i in range(count):
+                        subject_id, offset, length = _SUBJ_ENTRY.unpack_from(
+                            section, 4 + i * _SUBJ_ENTRY.size
+                        )
+                        index[subject_id] = (offset, length)
+                    self._subject_blob = section[4 + count * _SUBJ_ENTRY.size:]
+                    self._subject_index = index
+        return self._subject_index
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "bytes": len(self._mm),
+            "created_at": self.meta.get("created_at"),
+            "strings": self._string_count,
+            "keyword_fields": len(self.keywords()),
+            "subjects": len(self._subjects()),
+            "sources": {k: list(v) for k, v in self.sources.items()},
+        }
+
+
+class KeywordsView(Mapping):
+    """
+    Ключевые_слова.json'ning dict o'rniga ishlatiladigan ko'rinishi.
+    Maydon qiymatlari birinchi murojaatda decode qilinadi va saqlanadi.
+    """
+
+    def __init__(self, snapshot: MappedSnapshot):
+        section = snapshot._sections["KWDS"]
+        (count,) = _U32.unpack_from(section, 0)
+        self._snapshot = snapshot
+        self._fields = section[4:4 + 12 * count].cast("I")
+        self._values = section[4 + 12 * count:].cast("I")
+        self._index: Dict[str, int] = {
+            snapshot.string(self._fields[3 * i]): i for i in range(count)
+        }
+        self._decoded: Dict[str, List[str]] = {}
+
+    def __getitem__(self, name: str) -> List[str]:
+        values = self._decoded.get(name)
+        if values is not None:
+            return values
+        i = self._index[name]
+        start, count = self._fields[3 * i + 1], self._fields[3 * i + 2]
+        values = [self._snapshot.string(sid) for sid in self._values[start:start + count]]
+        self._decoded[name] = values
+        return values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index
+
+
+# ================== CLI ==================
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DATA_DIR binary snapshot")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="DATA_DIR -> snapshot")
+    build.add_argument("--data-dir", type=Path, default=settings.DATA_DIR)
+    build.add_argument("--output", type=Path, default=settings.DATA_SNAPSHOT_PATH)
+
+    info = sub.add_parser("info", help="Snapshot haqida ma'lumot")
+    info.add_argument("--path", type=Path, default=settings.DATA_SNAPSHOT_PATH)
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        stats = build_snapshot(args.data_dir, args.output)
+        print(f"✅ Data snapshot built: {json.dumps(stats, ensure_ascii=False)}")
+    else:
+        print(json.dumps(MappedSnapshot(args.path).info(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,12 @@
 import json
 import time
 from typing import Dict, Any, List, Optional
-from openai import OpenAI
-import httpx
+from openai import RateLimitError
 
 from core.config import settings
+from core.http_clients import get_openai_client
+from core.rate_limit import get_openai_limiter
+from services.base.llm_cache import get_llm_cache
 from core.database import get_db
 from services.promnt_loader import PromptLoaderService
 from services.strict_validator import StrictValidatorService
@@ -15,8 +17,7 @@ from services.strict_validator import StrictValidatorService
 class DescriptionService:
     def __init__(self):
         self.validator = StrictValidatorService()
-        http_client = httpx.Client(timeout=180.0)
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client)
+        self.client = get_openai_client()
 
     # ===================== DESCRIPTION ===================== #
 
@@ -166,11 +167,47 @@ class DescriptionService:
         }
 
 
+    def _create_completion(
+        self,
+        system_prompt: str,
+        user_content: str,
+        max_tokens: int = 2048,
+    ):
+        """chat.completions.create – umumiy RPM/TPM limiter orqali."""
+        limiter = get_openai_limiter()
+        estimated_tokens = limiter.estimate_tokens(
+            text_chars=len(system_prompt) + len(user_content),
+            image_count=0,
+            max_tokens=max_tokens,
+        )
+
+        try:
+            with limiter.limit_sync(estimated_tokens) as slot:
+                raw = self.client.chat.completions.with_raw_response.create(
+                    model=settings.OPENAI_MODEL,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_content},
+                    ],
+                    max_completion_tokens=max_tokens,
+                    response_format={"type": "json_object"},
+                )
+                limiter.update_from_headers(raw.headers)
+                response = raw.parse()
+                slot.settle(response.usage.total_tokens if response.usage else None)
+                return response
+        except RateLimitError as e:
+            limiter.backoff(
+                limiter.retry_after_from_headers(getattr(e.response, "headers", None)) or 2.0
+            )
+            raise
+
     def _call_openai_description(
         self,
         system_prompt: str,
         payload: Dict[str, Any],
-        max_retries: int = 3
+        max_retries: int = 3,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
 
         user_prompt = (
@@ -180,19 +217,22 @@ class DescriptionService:
             f"ДАННЫЕ:\n{json.dumps(payload, ensure_ascii=False)}"
         )
 
+        cache = get_llm_cache() if use_cache else None
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(
+                settings.OPENAI_MODEL, system_prompt, user_prompt, None, 2048
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                print("♻️ Description: cached OpenAI response")
+                return cached
+
         for attempt in range(1, max_retries + 1):
             try:
                 print(f"⏳ Попытка {attempt}/{max_retries}...")
                 
-                response = self.client.chat.completions.create(
-                    model=settings.OPENAI_MODEL,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    max_completion_tokens=2048,
-                    response_format={"type": "json_object"},
-                )
+                response = self._create_completion(system_prompt, user_prompt)
 
                 raw = response.choices[0].message.content
                 
@@ -232,6 +272,8 @@ class DescriptionService:
                         data["description"] = ""
                     else:
                         print(f"✅ Description length: {len(data['description'])}")
+                        if cache is not None and data["description"]:
+                            cache.set(cache_key, data)
                     
                     return data
                     
@@ -256,9 +298,21 @@ class DescriptionService:
         payload: Dict[str, Any],
         key: str,
         retries: int = 3,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         fallback = {key: ""}
 
+        cache = get_llm_cache() if use_cache else None
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(
+                settings.OPENAI_MODEL, system_prompt, payload, None, 2048
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                print(f"♻️ {key}: cached OpenAI response")
+                return cached
+
         print("\n" + "="*60)
         print(f"📤 SENDING TO OPENAI ({key.upper()})")
         print("="*60)
@@ -276,14 +330,8 @@ class DescriptionService:
             try:
                 print(f"⏳ Попытка {attempt}/{retries}...")
                 
-                response = self.client.chat.completions.create(
-                    model=settings.OPENAI_MODEL,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
-                    ],
-                    response_format={"type": "json_object"},
-                    max_completion_tokens=2048,
+                response = self._create_completion(
+                    system_prompt, json.dumps(payload, ensure_ascii=False)
                 )
 
                 msg = response.choices[0].message
@@ -332,6 +380,8 @@ class DescriptionService:
                         data[key] = ""
                     else:
                         print(f"✅ {key} value: {data[key][:100] if len(str(data[key])) > 100 else data[key]}")
+                        if cache is not None and data[key]:
+                            cache.set(cache_key, data)
                     
                     return data
                     
@@ -0,0 +1,334 @@
+# services/field_catalog.py
+"""
+Ключевые_слова.json + Справочник лимитов.json dan bir marta kompilyatsiya
+qilinadigan maydonlar katalogi.
+
+Har bir FieldSpec o'zgarmas va quyidagilarni oldindan hisoblab qo'yadi:
+- aniq qiymatlar to'plami, lower-case -> kanonik yozilish xaritasi
+- limitlar (min / max)
+- substring qidiruv indekslari:
+    * find_contained(text) – matn ichida uchraydigan lug'at qiymati
+      (faqat lug'atdagi uzunliklar bo'yicha sliding window)
+    * has_superstring(text) – matnni o'z ichiga olgan lug'at qiymati
+      (trigram indeks)
+
+Validatorlar va generatorlar bir xil FieldSpec'larni ishlatadi, shu sabab
+har chaqiruvda set/dict qayta qurilmaydi va O(values × dictionary) skan yo'q.
+"""
+
+import difflib
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+def get_max_limit(limits: Optional[Mapping[str, Any]], name: str) -> Optional[int]:
+    """limits[name] dan max/maxCount/max_count (birinchi truthy)."""
+    field_limits = (limits or {}).get(name) or {}
+    max_limit = (
+        field_limits.get("max")
+        or field_limits.get("maxCount")
+        or field_limits.get("max_count")
+    )
+    return max_limit if isinstance(max_limit, int) and max_limit > 0 else None
+
+
+def split_values(value: Any, split_commas: bool = True) -> List[str]:
+    """Characteristic value -> tozalangan string'lar ro'yxati (generator qoidasi)."""
+    if isinstance(value, str):
+        if split_commas and "," in value:
+            return [v.strip() for v in value.split(",") if v.strip()]
+        return [value.strip()] if value.strip() else []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    if value is not None:
+        v = str(value).strip()
+        return [v] if v else []
+    return []
+
+
+class FieldSpec:
+    """Bitta maydon uchun kompilyatsiya qilingan lug'at (o'zgarmas)."""
+
+    __slots__ = (
+        "name",
+        "values",
+        "value_set",
+        "raw_values",
+        "raw_value_set",
+        "lower_values",
+        "lower_map",
+        "limits",
+        "max_count",
+        "_first_index",
+        "_lengths",
+        "_trigrams",
+        "_short_substrings",
+        "_suggest_cache",
+        "_suggest_lock",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        values: Iterable[Any],
+        limits: Optional[Mapping[str, Any]] = None,
+    ):
+        values = list(values)
+        raw_values = tuple(v for v in values if isinstance(v, str))
+        normalized = tuple(str(v).strip() for v in values if str(v).strip())
+
+        self.name = name
+        self.values: Tuple[str, ...] = normalized
+        self.value_set: FrozenSet[str] = frozenset(normalized)
+        # WB'ga ketadigan qiymatlar aynan lug'atdagi yozilishda tekshiriladi
+        self.raw_values: Tuple[str, ...] = raw_values
+        self.raw_value_set: FrozenSet[str] = frozenset(raw_values)
+        self.lower_values: Tuple[str, ...] = tuple(v.lower() for v in normalized)
+
+        # {v.lower(): v for v in values} – oxirgisi yutadi (eski kod bilan bir xil)
+        self.lower_map: Mapping[str, str] = MappingProxyType(
+            {low: v for low, v in zip(self.lower_values, normalized)}
+        )
+
+        self.limits: Mapping[str, Any] = MappingProxyType(dict(limits or {}))
+        self.max_count: Optional[int] = get_max_limit({name: self.limits}, name)
+
+        first_index: Dict[str, int] = {}
+        trigrams: Dict[str, set] = {}
+        short_substrings: set = set()
+        for i, low in enumerate(self.lower_values):
+            first_index.setdefault(low, i)
+            for j in range(len(low)):
+                short_substrings.add(low[j:j + 1])
+                short_substrings.add(low[j:j + 2])
+                if j + 3 <= len(low):
+                    trigrams.setdefault(low[j:j + 3], set()).add(i)
+
+        self._first_index: Mapping[str, int] = MappingProxyType(first_index)
+        self._lengths: Tuple[int, ...] = tuple(sorted({len(k) for k in first_index}))
+        self._trigrams: Mapping[str, FrozenSet[int]] = MappingProxyType(
+            {k: frozenset(v) for k, v in trigrams.items()}
+        )
+        self._short_substrings: FrozenSet[str] = frozenset(short_substrings)
+
+        self._suggest_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._suggest_lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.values)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<FieldSpec(name={self.name}, values={len(self.values)}, max={self.max_count})>"
+
+    # ===== LOOKUP =====
+
+    def contains(self, value: str) -> bool:
+        """Aniq moslik (lug'atdagi yozilish bilan, strip qilinmagan)."""
+        return value in self.raw_value_set
+
+    def canonical(self, value: str) -> Optional[str]:
+        return self.lower_map.get(value.strip().lower())
+
+    def find_contained(self, text: str) -> Optional[str]:
+        """
+        Lug'at tartibida birinchi qiymat, uning lower'i text.lower() ichida uchraydi.
+        Eski `for dv in dict: if dv.lower() in text.lower()` bilan bir xil natija.
+        """
+        low = text.lower()
+        best: Optional[int] = None
+        n = len(low)
+        for length in self._lengths:
+            if length > n:
+                break
+            for start in range(n - length + 1):
+                idx = self._first_index.get(low[start:start + length])
+                if idx is not None and (best is None or idx < best):
+                    best = idx
+                    if best == 0:
+                        return self.values[0]
+        return self.values[best] if best is not None else None
+
+    def has_superstring(self, text: str) -> bool:
+        """Biror lug'at qiymati text.lower()'ni o'z ichiga oladimi."""
+        low = text.lower()
+        if not low:
+            return bool(self.values)
+        if len(low) < 3:
+            return low in self._short_substrings
+
+        candidates: Optional[FrozenSet[int]] = None
+        for j in range(len(low) - 2):
+            postings = self._trigrams.get(low[j:j + 3])
+            if not postings:
+                return False
+            candidates = postings if candidates is None else candidates & postings
+            if not candidates:
+                return False
+
+        return any(low in self.lower_values[i] for i in candidates or ())
+
+    def is_allowed_loose(self, value: str) -> bool:
+        """Aniq (case-insensitive) yoki ikki tomonlama substring moslik."""
+        low = value.lower()
+        if low in self._first_index:
+            return True
+        return self.find_contained(value) is not None or self.has_superstring(value)
+
+    def map_value(self, raw: str) -> Optional[str]:
+        """
+        Generator/validator normalizatsiyasi:
+        aniq -> qavssiz asos -> lower -> lower asos -> substring.
+        """
+        raw_str = str(raw).strip()
+        if not raw_str:
+            return None
+
+        if raw_str in self.value_set:
+            return raw_str
+
+        base = raw_str.split("(")[0].split("[")[0].strip()
+        base = base.rstrip(" .,-;")
+
+        if base in self.value_set:
+            return base
+
+        val = self.lower_map.get(raw_str.lower())
+        if val is not None:
+            return val
+
+        val = self.lower_map.get(base.lower())
+        if val is not None:
+            return val
+
+        return self.find_contained(raw_str)
+
+    def suggest(self, value: str, n: int = 3, cutoff: float = 0.6) -> List[str]:
+        """difflib.get_close_matches – natija keshlanadi (katta lug'atlarda qimmat)."""
+        key = f"{n}:{cutoff}:{value}"
+        with self._suggest_lock:
+            cached = self._suggest_cache.get(key)
+            if cached is not None:
+                self._suggest_cache.move_to_end(key)
+                return list(cached)
+
+        result = difflib.get_close_matches(value, self.raw_values, n=n, cutoff=cutoff)
+
+        with self._suggest_lock:
+            self._suggest_cache[key] = result
+            if len(self._suggest_cache) > 512:
+                self._suggest_cache.popitem(last=False)
+        return list(result)
+
+
+class FieldCatalog:
+    """
+    Barcha maydonlar uchun FieldSpec'lar. Validatorlarga keladigan
+    allowed_values odatda shu lug'atdan olingan ro'yxatlar – resolve()
+    ularni identity/tenglik bo'yicha tayyor spec'ga bog'laydi, boshqa
+    ro'yxatlar uchun ad-hoc spec kompilyatsiya qilib keshlaydi.
+    """
+
+    ADHOC_CACHE_SIZE = 256
+
+    def __init__(
+        self,
+        keywords: Mapping[str, Sequence[Any]],
+        limits: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    ):
+        limits = limits or {}
+        self._specs: Mapping[str, FieldSpec] = MappingProxyType(
+            {
+                name: FieldSpec(name, values or [], limits.get(name))
+                for name, values in keywords.items()
+            }
+        )
+        self._sources: Mapping[str, Sequence[Any]] = MappingProxyType(dict(keywords))
+        self._limits: Mapping[str, Mapping[str, Any]] = MappingProxyType(dict(limits))
+
+        self._adhoc: "OrderedDict[Tuple[str, Tuple[str, ...]], FieldSpec]" = OrderedDict()
+        self._adhoc_lock = threading.Lock()
+        self.sources: Tuple[Any, ...] = ()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def get(self, name: str) -> Optional[FieldSpec]:
+        return self._specs.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def limits_for(self, name: str) -> Mapping[str, Any]:
+        return self._limits.get(name) or {}
+
+    def resolve(self, name: str, values: Sequence[Any]) -> FieldSpec:
+        spec = self._specs.get(name)
+        if spec is not None:
+            source = self._sources.get(name)
+            if values is source or list(values) == list(source or []):
+                return spec
+
+        key = (name, tuple(str(v) for v in values))
+        with self._adhoc_lock:
+            spec = self._adhoc.get(key)
+            if spec is not None:
+                self._adhoc.move_to_end(key)
+                return spec
+
+        spec = FieldSpec(name, values, self._limits.get(name))
+
+        with self._adhoc_lock:
+            self._adhoc[key] = spec
+            if len(self._adhoc) > self.ADHOC_CACHE_SIZE:
+                self._adhoc.popitem(last=False)
+        return spec
+
+
+_EMPTY: Dict[str, Any] = {}
+_catalog: Optional[FieldCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_field_catalog() -> FieldCatalog:
+    """
+    Process bo'yicha umumiy katalog. Data registry Ключевые_слова.json yoki
+    limitlarni qayta yuklasa (yangi obyektlar) – katalog ham qayta quriladi.
+    """
+    global _catalog
+    from services.data_loader import DataLoader
+
+    try:
+        keywords = DataLoader.load_keywords()
+    except FileNotFoundError:
+        keywords = _EMPTY
+    try:
+        other_limits = DataLoader.load_limits(color_only=False)
+        color_limits = DataLoader.load_limits(color_only=True)
+    except FileNotFoundError:
+        other_limits = color_limits = _EMPTY
+
+    sources = (keywords, other_limits, color_limits)
+    catalog = _catalog
+    if catalog is not None and _same_sources(catalog.sources, sources):
+        return catalog
+
+    with _catalog_lock:
+        if _catalog is None or not _same_sources(_catalog.sources, sources):
+            limits = dict(other_limits)
+            limits.update(color_limits)
+            _catalog = FieldCatalog(keywords, limits)
+            _catalog.sources = sources
+        return _catalog
+
+
+def _same_sources(a: Tuple[Any, ...], b: Tuple[Any, ...]) -> bool:
+    # Registry o'zgarmagan fayllar uchun aynan o'sha obyektlarni qaytaradi
+    return len(a) == len(b) and all(x is y for x, y in zip(a, b))
+
+
+def reset_field_catalog() -> None:
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
@@ -4,6 +4,7 @@ import json
 from services.base.openai_service import BaseOpenAIService
 from core.database import get_db
 from services.promnt_loader import PromptLoaderService
+from services.field_catalog import get_field_catalog, get_max_limit, split_values
 
 
 class CharacteristicsGeneratorService(BaseOpenAIService):
@@ -131,6 +132,7 @@ class CharacteristicsGeneratorService(BaseOpenAIService):
                 log_callback(msg)
 
         violations = []
+        catalog = get_field_catalog()
 
         for char in characteristics:
             name = char.get("name")
@@ -140,98 +142,34 @@ class CharacteristicsGeneratorService(BaseOpenAIService):
             value = char.get("value", [])
 
             # 1. Listga normalizatsiya (eski kod)
-            if isinstance(value, str):
-                if "," in value:
-                    values_list = [v.strip() for v in value.split(",") if v.strip()]
-                else:
-                    values_list = [value.strip()] if value.strip() else []
-            elif isinstance(value, list):
-                values_list = [str(v).strip() for v in value if str(v).strip()]
-            elif value is not None:
-                v = str(value).strip()
-                values_list = [v] if v else []
-            else:
-                values_list = []
+            values_list = split_values(value)
+            max_limit = get_max_limit(limits, name)
 
             # 2. allowed_values tekshiruvi
             dict_vals = allowed_values.get(name) or []
             if not dict_vals:
                 # Free text field - faqat limitni tekshirish
-                field_limits = limits.get(name) or {}
-                max_limit = (
-                    field_limits.get("max")
-                    or field_limits.get("maxCount")
-                    or field_limits.get("max_count")
-                )
-                if isinstance(max_limit, int) and max_limit > 0:
-                    if len(values_list) > max_limit:
-                        violations.append(
-                            f"⚠️ {name}: {len(values_list)} > {max_limit} (kesib tashlandi)"
-                        )
-                        values_list = values_list[:max_limit]
+                if max_limit and len(values_list) > max_limit:
+                    violations.append(
+                        f"⚠️ {name}: {len(values_list)} > {max_limit} (kesib tashlandi)"
+                    )
+                    values_list = values_list[:max_limit]
                 char["value"] = values_list
                 continue
 
-            # 3. Dictionary mavjud - QATTIQ TEKSHIRISH
-            normalized_dict = [str(v).strip() for v in dict_vals if str(v).strip()]
-            dict_lower_map = {v.lower(): v for v in normalized_dict}
+            # 3. Dictionary mavjud - QATTIQ TEKSHIRISH (kompilyatsiya qilingan katalog)
+            spec = catalog.resolve(name, dict_vals)
 
             mapped: List[str] = []
             invalid_values: List[str] = []
 
-            for raw in values_list:
-                if not raw:
-                    continue
-                raw_str = str(raw).strip()
-
-                matched = False
-
-                # a) To'g'ridan-to'g'ri match
-                if raw_str in normalized_dict:
-                    if raw_str not in mapped:
-                        mapped.append(raw_str)
-                    matched = True
-                    continue
-
-                # b) Qavs va qo'shimcha belgilarni olib tashlash
-                base = raw_str.split("(")[0].split("[")[0].strip()
-                base = base.rstrip(" .,-;")
-
-                if base in normalized_dict:
-                    if base not in mapped:
-                        mapped.append(base)
-                    matched = True
-                    continue
-
-                # c) Lower-case match
-                lower_raw = raw_str.lower()
-                lower_base = base.lower()
-
-                if lower_raw in dict_lower_map:
-                    val = dict_lower_map[lower_raw]
-                    if val not in mapped:
-                        mapped.append(val)
-                    matched = True
-                    continue
-
-                if lower_base in dict_lower_map:
-                    val = dict_lower_map[lower_base]
-                    if val not in mapped:
-                        mapped.append(val)
-                    matched = True
-                    continue
-
-                # d) Substring match
-                for dv in normalized_dict:
-                    if dv.lower() in raw_str.lower():
-                        if dv not in mapped:
-                            mapped.append(dv)
-                        matched = True
-                        break
-
-                # Agar hech narsa topilmasa - INVALID
-                if not matched:
+            for raw_str in values_list:
+                val = spec.map_value(raw_str)
+                if val is None:
+                    # Agar hech narsa topilmasa - INVALID
                     invalid_values.append(raw_str)
+                elif val not in mapped:
+                    mapped.append(val)
 
             # VIOLATION xabarlari
             if invalid_values:
@@ -240,18 +178,11 @@ class CharacteristicsGeneratorService(BaseOpenAIService):
                 )
 
             # 4. LIMIT tekshiruvi
-            field_limits = limits.get(name) or {}
-            max_limit = (
-                field_limits.get("max")
-                or field_limits.get("maxCount")
-                or field_limits.get("max_count")
-            )
-            if isinstance(max_limit, int) and max_limit > 0:
-                if len(mapped) > max_limit:
-                    violations.append(
-                        f"⚠️ {name}: {len(mapped)} > {max_limit} (kesib tashlandi)"
-                    )
-                    mapped = mapped[:max_limit]
+            if max_limit and len(mapped) > max_limit:
+                violations.append(
+                    f"⚠️ {name}: {len(mapped)} > {max_limit} (kesib tashlandi)"
+                )
+                mapped = mapped[:max_limit]
 
             char["value"] = mapped
 
@@ -1,31 +1,55 @@
-from typing import List, Optional
+import hashlib
 import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
+from core.config import settings
 from services.base.openai_service import BaseOpenAIService
 from core.database import get_db
 from services.promnt_loader import PromptLoaderService
+from repositories.image_analysis_repository import ImageAnalysisRepository
+from repositories.promt_repository import PromptRepository
 
 
 class ImageAnalyzerService(BaseOpenAIService):
+    PROMPT_TYPE = "image_analyzer"
+    MAX_FOCUS_FIELDS = 50
+
+    # Process bo'yicha umumiy hit/miss hisoblagichi (barcha instance'lar uchun)
+    _stats_lock = threading.Lock()
+    _stats = {"hits": 0, "misses": 0, "stored": 0, "errors": 0}
+
     def analyze_images(
         self,
         photo_urls: List[str],
         subject_name: Optional[str] = None,
         log_callback=None,
         target_char_names: Optional[List[str]] = None,  # 👈 YANGI
+        use_cache: bool = True,
     ) -> str:
 
         if not photo_urls:
             return "Rasm mavjud emas"
         
         try:
-            system_prompt = self._load_prompt()
-            
-            if log_callback:
-                log_callback(f"🔍 Analyzing {len(photo_urls)} images...")
+            system_prompt, prompt_version = self._load_prompt_with_version()
 
             # Target namesni 50 taga cheklab yuborsak ham bo‘ladi
-            focus_fields = (target_char_names or [])[:50]
+            focus_fields = (target_char_names or [])[:self.MAX_FOCUS_FIELDS]
+
+            cache_key = None
+            if use_cache:
+                cache_key = self.build_cache_key(
+                    photo_urls, subject_name, focus_fields, prompt_version
+                )
+                cached = self._get_stored(cache_key)
+                if cached:
+                    if log_callback:
+                        log_callback(f"♻️ Image analysis reused from store ({len(cached)} characters)")
+                    return cached
+
+            if log_callback:
+                log_callback(f"🔍 Analyzing {len(photo_urls)} images...")
 
             result = self._call_openai(
                 system_prompt=system_prompt,
@@ -40,6 +64,7 @@ class ImageAnalyzerService(BaseOpenAIService):
                 },
                 photo_urls=photo_urls,
                 max_tokens=16000,
+                use_cache=use_cache,
             )
             
             description = result.get("description", "").strip()
@@ -49,6 +74,16 @@ class ImageAnalyzerService(BaseOpenAIService):
             
             if log_callback:
                 log_callback(f"✅ Image analysis: {len(description)} characters")
+
+            if cache_key:
+                self._store(
+                    cache_key,
+                    photo_urls=photo_urls,
+                    subject_name=subject_name,
+                    target_fields=focus_fields,
+                    prompt_version=prompt_version,
+                    description=description,
+                )
             
             return description
             
@@ -56,15 +91,111 @@ class ImageAnalyzerService(BaseOpenAIService):
             if log_callback:
                 log_callback(f"❌ Image analysis error: {str(e)}")
             return f"Image analysis failed: {str(e)}"
-    
+
+    # ===== RESULT STORE (Postgres) =====
+
+    @staticmethod
+    def build_cache_key(
+        photo_urls: List[str],
+        subject_name: Optional[str],
+        target_fields: List[str],
+        prompt_version: str,
+    ) -> str:
+        raw = json.dumps(
+            {
+                "photo_urls": sorted(u for u in photo_urls if u),
+                "subject_name": subject_name or "",
+                "target_fields": sorted(target_fields or []),
+                "prompt_version": prompt_version,
+                "model": settings.OPENAI_MODEL,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _get_stored(self, cache_key: str) -> Optional[str]:
+        try:
+            with get_db() as db:
+                repo = ImageAnalysisRepository(db)
+                row = repo.get_by_key(cache_key)
+                if row is None:
+                    self._count("misses")
+                    return None
+                repo.touch(row)
+                self._count("hits")
+                return row.description
+        except Exception as e:
+            print(f"⚠️ Image analysis store read error: {e}")
+            self._count("errors")
+            return None
+
+    def _store(
+        self,
+        cache_key: str,
+        photo_urls: List[str],
+        subject_name: Optional[str],
+        target_fields: List[str],
+        prompt_version: str,
+        description: str,
+    ) -> None:
+        try:
+            with get_db() as db:
+                ImageAnalysisRepository(db).save(
+                    cache_key=cache_key,
+                    photo_urls=sorted(u for u in photo_urls if u),
+                    subject_name=subject_name,
+                    target_fields=sorted(target_fields or []),
+                    prompt_version=prompt_version,
+                    model=settings.OPENAI_MODEL,
+                    description=description,
+                )
+            self._count("stored")
+        except Exception as e:
+            print(f"⚠️ Image analysis store write error: {e}")
+            self._count("errors")
+
+    @classmethod
+    def _count(cls, name: str) -> None:
+        with cls._stats_lock:
+            cls._stats[name] += 1
+
+    @classmethod
+    def get_cache_stats(cls) -> Dict[str, Any]:
+        with cls._stats_lock:
+            stats = dict(cls._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+
+        try:
+            with get_db() as db:
+                stats.update(ImageAnalysisRepository(db).get_statistics())
+        except Exception:
+            pass
+        return stats
+
+    # ===== PROMPT =====
 
     def _load_prompt(self) -> str:
+        return self._load_prompt_with_version()[0]
+
+    def _load_prompt_with_version(self) -> Tuple[str, str]:
+        """
+        (prompt, version). Version = DB versiya raqami + prompt matni hash'i,
+        shunda admin promptni o'zgartirsa eski natijalar qayta ishlatilmaydi.
+        """
         try:
             with get_db() as db:
                 loader = PromptLoaderService(db)
-                return loader.get_full_prompt("image_analyzer")
+                prompt = loader.get_full_prompt(self.PROMPT_TYPE)
+                template = PromptRepository(db).get_active_prompt(self.PROMPT_TYPE)
+                version = f"v{template.version if template else 0}"
         except Exception:
-            return self.get_fallback_prompt()
+            prompt = self.get_fallback_prompt()
+            version = "fallback"
+
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12]
+        return prompt, f"{version}:{digest}"
     
     def get_fallback_prompt(self) -> str:
         return """
@@ -0,0 +1,294 @@
+# services/kie_job_manager.py
+"""
+KIE generatsiyalari uchun persistent job'lar (kie_jobs jadvali).
+
+Avval task faqat so'rovni kutayotgan coroutine ichida yashardi: worker restart
+bo'lsa yoki klient uzilsa, pullik KIE task'i yetim qolardi va natija
+yuklab olinmasdi. Endi:
+
+- submit() job'ni DB'ga yozadi va uni fon asyncio task'ida bajaradi
+  (createTask -> poller -> download -> MEDIA_ROOT), so'rovdan mustaqil
+- har holat o'zgarishi DB'da:
+  queued -> submitting -> submitted -> downloading -> completed / failed
+- createTask'dan oldin "submitting" yoziladi; process shu oraliqda o'lsa
+  job qayta yuborilmaydi (KIE task yaratilgan bo'lishi mumkin), failed bo'ladi
+- job'ni bajarayotgan process lease'ni heartbeat bilan uzaytirib turadi;
+  process o'lsa lease tugaydi va resumer (har process'da, startup'da va
+  davriy) job'ni task_id dan davom ettiradi – qayta pul to'lamasdan
+- bir xil (user, model, input) faol job bo'lsa yangisi yaratilmaydi
+
+Qamrov (routers/photo_generator.py): video, enhance, scene, pose, custom –
+bitta task'li generatsiyalar shu yerdan o'tadi. Normalize (ghost + combine,
+ikki bosqich, ghost kesh bilan) va product-cards (parallel SSE) hali so'rov
+ichida ishlaydi: restart / uzilishda ularning KIE task'lari yetim qoladi,
+task_id faqat log'da.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+from core.database import SessionLocal
+from models.kie_job import KIEJob
+from repositories.kie_job_repository import SUBMIT_INTERRUPTED_ERROR, KIEJobRepository
+from services.kie_service.kie_services import kie_service
+from services.media_storage import get_file_url, save_generated_file
+
+
+TERMINAL_KIE_STATES = ("completed", "failed")
+
+
+class KIEJobFailedError(Exception):
+    pass
+
+
+def input_hash(model: str, input_data: Dict[str, Any]) -> str:
+    raw = json.dumps({"model": model, "input": input_data}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def kie_job_to_dict(job: KIEJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "model": job.model,
+        "state": job.state,
+        "task_id": job.task_id,
+        "result_urls": job.result_urls,
+        "file_name": job.file_path,
+        "file_url": get_file_url(job.file_path) if job.file_path else None,
+        "error": job.error_message,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class KIEJobManager:
+    def __init__(
+        self,
+        lease_seconds: Optional[int] = None,
+        heartbeat_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.lease_seconds = lease_seconds or settings.KIE_JOB_LEASE_SECONDS
+        self.heartbeat_seconds = heartbeat_seconds or settings.KIE_JOB_HEARTBEAT_SECONDS
+        self.max_attempts = max_attempts or settings.KIE_JOB_MAX_ATTEMPTS
+
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        # job_id -> shu process'da bajarilayotgan task
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._supervisor: Optional[asyncio.Task] = None
+        # False – faqat heartbeat (KIE_JOB_RESUMER_ENABLED=False bo'lsa ham lease uzayadi)
+        self._resume = False
+
+    # ================== LIFECYCLE ==================
+
+    def start(self) -> None:
+        """Startup'da (event loop ichida): resumer + heartbeat sikli."""
+        self._resume = True
+        self._ensure_supervisor()
+        print(f"🚀 KIE job manager {self.worker_id} started")
+
+    def _ensure_supervisor(self) -> None:
+        # Job ishga tushgan har process'da heartbeat bo'lishi shart – aks holda
+        # lease tugaydi va boshqa process'ning resumer'i job'ni qayta oladi
+        if self._supervisor is None or self._supervisor.done():
+            self._supervisor = asyncio.get_running_loop().create_task(self._supervise())
+
+    async def stop(self) -> None:
+        self._resume = False
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            await asyncio.gather(self._supervisor, return_exceptions=True)
+            self._supervisor = None
+        # Bajarilayotgan job'lar DB'da qoladi – lease tugagach boshqa process davom ettiradi
+
+    # ================== PUBLIC ==================
+
+    async def submit(
+        self,
+        user_id: int,
+        kind: str,
+        model: str,
+        input_data: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        job = await asyncio.to_thread(self._create_or_reuse, user_id, kind, model, input_data)
+        if job.lease_owner == self.worker_id and job.state not in TERMINAL_KIE_STATES:
+            self._spawn(job.id)
+        return kie_job_to_dict(job)
+
+    async def wait(self, job_id: int, poll_interval: float = 2.0) -> Dict[str, Any]:
+        """
+        Job tugashini kutadi. Shu process'da bo'lsa – task'ning o'zini,
+        aks holda DB'dagi holatni. failed -> KIEJobFailedError.
+        """
+        while True:
+            task = self._tasks.get(job_id)
+            if task is not None:
+                # shield – so'rov bekor qilinsa ham job davom etadi
+                await asyncio.shield(task)
+            job = await asyncio.to_thread(self._get, job_id)
+            if job is None:
+                raise KIEJobFailedError(f"KIE job {job_id} not found")
+            if job.state == "completed":
+                return kie_job_to_dict(job)
+            if job.state == "failed":
+                raise KIEJobFailedError(job.error_message or "KIE job failed")
+            if task is None:
+                await asyncio.sleep(poll_interval)
+
+    def get_job(self, job_id: int) -> Optional[KIEJob]:
+        return self._get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "running": sorted(self._tasks),
+        }
+
+    # ================== INTERNAL ==================
+
+    def _create_or_reuse(
+        self,
+        user_id: int,
+        kind: str,
+        model: str,
+        input_data: Dict[str, Any],
+    ) -> KIEJob:
+        digest = input_hash(model, input_data)
+        db = SessionLocal()
+        try:
+            repo = KIEJobRepository(db)
+            existing = repo.find_active(user_id, digest)
+            if existing is not None:
+                print(f"♻️ KIE job {existing.id} already running for the same input – reusing")
+                return existing
+            return repo.create_job(
+                user_id=user_id,
+                kind=kind,
+                model=model,
+                input_data=input_data,
+                input_hash=digest,
+                worker_id=self.worker_id,
+                lease_seconds=self.lease_seconds,
+            )
+        finally:
+            db.close()
+
+    def _get(self, job_id: int) -> Optional[KIEJob]:
+        db = SessionLocal()
+        try:
+            return KIEJobRepository(db).get_job(job_id)
+        finally:
+            db.close()
+
+    def _spawn(self, job_id: int) -> None:
+        if job_id in self._tasks:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        self._ensure_supervisor()
+
+    async def _run(self, job_id: int) -> None:
+        job = await asyncio.to_thread(self._get, job_id)
+        if job is None or job.state in TERMINAL_KIE_STATES:
+            return
+
+        try:
+            task_id = job.task_id
+            if not task_id and job.state == "submitting":
+                raise KIEJobFailedError(SUBMIT_INTERRUPTED_ERROR)
+            if not task_id:
+                await asyncio.to_thread(self._repo_call, "set_submitting", job_id)
+                task_id = await asyncio.to_thread(kie_service.create_task, job.model, job.input_data)
+                # DB yozuvidan oldin log – yozuv muvaffaqiyatsiz bo'lsa ham task_id qoladi
+                print(f"📨 KIE job {job_id}: task {task_id} submitted ({job.model})")
+                await asyncio.to_thread(self._repo_call, "set_submitted", job_id, task_id)
+            else:
+                print(f"🔁 KIE job {job_id}: resuming task {task_id} (state={job.state})")
+
+            urls = job.result_urls if job.state == "downloading" else None
+            if not urls:
+                result = await kie_service.poll_task(
+                    task_id,
+                    max_attempts=int(settings.KIE_TASK_TIMEOUT_SECONDS // 10),
+                    model=job.model,
+                )
+                urls = result.get("resultUrls") or []
+                if not urls:
+                    raise ValueError(f"No result URLs in result: {result}")
+                await asyncio.to_thread(self._repo_call, "set_downloading", job_id, urls)
+
+            content = await kie_service.download_image(urls[0])
+            rel_path = await asyncio.to_thread(save_generated_file, content, job.kind)
+            await asyncio.to_thread(self._repo_call, "complete", job_id, rel_path)
+            print(f"✅ KIE job {job_id} completed: {rel_path}")
+        except asyncio.CancelledError:
+            # Shutdown – job active holatda qoladi, lease tugagach davom ettiriladi
+            raise
+        except Exception as e:
+            print(f"❌ KIE job {job_id} failed: {e}")
+            await asyncio.to_thread(self._repo_call, "fail", job_id, str(e))
+
+    async def _supervise(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self._heartbeat)
+                if self._resume:
+                    for job in await asyncio.to_thread(self._claim_stale):
+                        self._spawn(job.id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ KIE job supervisor error: {e}")
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    def _heartbeat(self) -> None:
+        job_ids = list(self._tasks)
+        if job_ids:
+            self._repo_call("heartbeat", self.worker_id, job_ids, self.lease_seconds)
+
+    def _claim_stale(self) -> List[KIEJob]:
+        db = SessionLocal()
+        try:
+            claimed = KIEJobRepository(db).claim_stale(
+                self.worker_id,
+                limit=settings.KIE_JOB_RESUME_BATCH,
+                lease_seconds=self.lease_seconds,
+                max_attempts=self.max_attempts,
+            )
+        finally:
+            db.close()
+        if claimed:
+            print(f"🔁 KIE job manager: resuming {len(claimed)} unfinished job(s)")
+        return claimed
+
+    @staticmethod
+    def _repo_call(method: str, *args: Any) -> Any:
+        db = SessionLocal()
+        try:
+            return getattr(KIEJobRepository(db), method)(*args)
+        finally:
+            db.close()
+
+
+_manager: Optional[KIEJobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_kie_job_manager() -> KIEJobManager:
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = KIEJobManager()
+    return _manager
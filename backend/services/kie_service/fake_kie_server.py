@@ -0,0 +1,149 @@
+# backend/services/kie_service/fake_kie_server.py
+"""
+KIE API'ning lokal o'rinbosari (test / dev uchun, kredit sarflamasdan).
+
+    python -m services.kie_service.fake_kie_server --port 8099 --duration 3
+
+va .env da:
+
+    KIE_API_BASE_URL=http://127.0.0.1:8099
+    KIE_CALLBACK_ENABLED=True
+    KIE_CALLBACK_URL=http://127.0.0.1:8000/api/kie/callback
+    KIE_CALLBACK_SECRET=dev-secret
+
+- POST /api/v1/jobs/createTask – taskId qaytaradi, task --duration sekunddan keyin tugaydi
+- GET  /api/v1/jobs/recordInfo?taskId=... – KIE formatidagi holat
+- callBackUrl berilgan bo'lsa tugaganda unga KIE kabi POST qiladi
+  (--callback-delay bilan kechiktirish, --drop-callbacks bilan umuman yubormaslik –
+  polling zaxirasini tekshirish uchun)
+- prompt'da "FAIL" bo'lsa task fail bilan tugaydi
+- GET /files/{taskId}.png – natija "rasmi"
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import aiohttp
+from aiohttp import web
+
+# 1x1 PNG
+_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082"
+)
+
+
+class FakeKIEServer:
+    def __init__(
+        self,
+        duration: float = 3.0,
+        callback_delay: float = 0.0,
+        drop_callbacks: bool = False,
+        public_url: Optional[str] = None,
+    ):
+        self.duration = duration
+        self.callback_delay = callback_delay
+        self.drop_callbacks = drop_callbacks
+        self.public_url = public_url
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.record_info_calls = 0
+        self.callbacks_sent = 0
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/v1/jobs/createTask", self.create_task)
+        app.router.add_get("/api/v1/jobs/recordInfo", self.record_info)
+        app.router.add_get("/files/{name}", self.file)
+        return app
+
+    async def create_task(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        task_id = uuid.uuid4().hex
+        prompt = str((body.get("input") or {}).get("prompt", ""))
+        self.tasks[task_id] = {
+            "model": body.get("model"),
+            "param": json.dumps(body, ensure_ascii=False),
+            "created": time.time(),
+            "fail": "FAIL" in prompt,
+            "callback": body.get("callBackUrl"),
+        }
+        if body.get("callBackUrl") and not self.drop_callbacks:
+            asyncio.get_running_loop().create_task(self._send_callback(task_id, str(request.url.origin())))
+        return web.json_response({"code": 200, "msg": "success", "data": {"taskId": task_id}})
+
+    async def record_info(self, request: web.Request) -> web.Response:
+        self.record_info_calls += 1
+        task_id = request.query.get("taskId", "")
+        if task_id not in self.tasks:
+            return web.json_response({"code": 404, "msg": "Task not found"})
+        return web.json_response(self._record(task_id, str(request.url.origin())))
+
+    async def file(self, request: web.Request) -> web.Response:
+        return web.Response(body=_PNG, content_type="image/png")
+
+    def _record(self, task_id: str, origin: str) -> Dict[str, Any]:
+        task = self.tasks[task_id]
+        done = time.time() - task["created"] >= self.duration
+        data: Dict[str, Any] = {
+            "taskId": task_id,
+            "model": task["model"],
+            "param": task["param"],
+            "state": "generating",
+            "resultJson": "",
+            "failCode": None,
+            "failMsg": None,
+            "createTime": int(task["created"] * 1000),
+        }
+        if done and task["fail"]:
+            data.update(state="fail", failCode="500", failMsg="Fake failure")
+            # recordInfo – code 200, callback – 501 (KIE kabi)
+            return {"code": 200, "msg": "success", "data": data}
+        if done:
+            base = (self.public_url or origin).rstrip("/")
+            data.update(
+                state="success",
+                resultJson=json.dumps({"resultUrls": [f"{base}/files/{task_id}.png"]}),
+                completeTime=int(time.time() * 1000),
+            )
+        return {"code": 200, "msg": "success", "data": data}
+
+    async def _send_callback(self, task_id: str, origin: str) -> None:
+        await asyncio.sleep(self.duration + self.callback_delay)
+        task = self.tasks[task_id]
+        body = self._record(task_id, origin)
+        if body["data"]["state"] == "fail":
+            body.update(code=501, msg="Task failed")
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(task["callback"], json=body) as resp:
+                    await resp.read()
+            self.callbacks_sent += 1
+        except Exception as e:
+            print(f"⚠️ Fake KIE callback failed for {task_id}: {e}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the KIE jobs API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--callback-delay", type=float, default=0.0)
+    parser.add_argument("--drop-callbacks", action="store_true")
+    parser.add_argument("--public-url", default=None)
+    args = parser.parse_args()
+
+    server = FakeKIEServer(
+        duration=args.duration,
+        callback_delay=args.callback_delay,
+        drop_callbacks=args.drop_callbacks,
+        public_url=args.public_url,
+    )
+    web.run_app(server.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
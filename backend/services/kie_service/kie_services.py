@@ -2,15 +2,21 @@
 
 import aiohttp
 import asyncio
-import requests
+import hashlib
 import json
 import logging
-from typing import List, Dict, Tuple, Optional
+from datetime import datetime
+from urllib.parse import urlencode
+from typing import AsyncIterator, List, Dict, Tuple, Optional
 
 from core.config import settings
 from core.database import SessionLocal
+from core.http_clients import get_aiohttp_session, get_requests_session
 from repositories.scence_repositories import SceneCategoryRepository
 from repositories.promt_repository import PromptRepository
+from repositories.ghost_cache_repository import GhostCacheRepository
+from services.media_storage import get_file_url, save_media_file
+from services.kie_service.task_poller import get_kie_task_poller, parse_task_status
 
 logger = logging.getLogger(__name__)
 
@@ -23,14 +29,22 @@ class KIEInsufficientCreditsError(Exception):
 
 
 class KIEService:
+    # enhance / scene / pose / custom – bitta edit modeli
+    EDIT_MODEL = "google/nano-banana-edit"
+
     def __init__(self):
         self.api_key = settings.KIE_API_KEY
-        self.create_url = "https://api.kie.ai/api/v1/jobs/createTask"
-        self.query_url = "https://api.kie.ai/api/v1/jobs/recordInfo"
+        base_url = settings.KIE_API_BASE_URL.rstrip("/")
+        self.create_url = f"{base_url}/api/v1/jobs/createTask"
+        self.query_url = f"{base_url}/api/v1/jobs/recordInfo"
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
         }
+        self.session = get_requests_session("kie")
+        # ghost kesh kaliti -> bajarilayotgan render (bir vaqtdagi takrorlar uchun)
+        self._ghost_inflight: Dict[tuple, asyncio.Future] = {}
+        self._callback_secret_warned = False
 
     # ===== DEFAULT PROMPTS (fallback uchun) =====
 
@@ -92,12 +106,45 @@ class KIEService:
     def get_model_base(self, model: str) -> str:
         return model.split("/")[0]
 
-    def create_task(self, model: str, input_data: dict) -> str:
+    @property
+    def callback_url(self) -> Optional[str]:
+        """
+        KIE_CALLBACK_ENABLED bo'lsa – KIE natijani shu URL'ga POST qiladi.
+        KIE_CALLBACK_SECRET'siz callback rejimi yoqilmaydi: aks holda har kim
+        soxta resultUrls yuborib serverni ixtiyoriy URL'ni yuklab olishga
+        majburlashi mumkin (SSRF). Bunday holda faqat polling.
+        """
+        if not settings.KIE_CALLBACK_ENABLED:
+            return None
+        if not settings.KIE_CALLBACK_SECRET:
+            if not self._callback_secret_warned:
+                self._callback_secret_warned = True
+                logger.warning("KIE_CALLBACK_ENABLED without KIE_CALLBACK_SECRET – callbacks disabled, polling only")
+            return None
+        url = settings.KIE_CALLBACK_URL or (
+            f"{settings.PUBLIC_BASE_URL.rstrip('/')}/api/kie/callback"
+        )
+        return f"{url}{'&' if '?' in url else '?'}{urlencode({'token': settings.KIE_CALLBACK_SECRET})}"
+
+    def create_task(
+        self,
+        model: str,
+        input_data: dict,
+        callback_url: Optional[str] = None,
+    ) -> str:
         payload = {"model": model, "input": input_data}
+        callback_url = callback_url or self.callback_url
+        if callback_url:
+            payload["callBackUrl"] = callback_url
         logger.info(f"Creating task with model: {model}")
         logger.info(f"Input data: {json.dumps(input_data, ensure_ascii=False)[:500]}...")
 
-        response = requests.post(self.create_url, headers=self.headers, data=json.dumps(payload))
+        response = self.session.post(
+            self.create_url,
+            headers=self.headers,
+            data=json.dumps(payload),
+            timeout=settings.KIE_HTTP_TIMEOUT,
+        )
         logger.info(f"KIE HTTP status: {response.status_code}, body: {response.text[:500]}")
         response.raise_for_status()
         result = response.json()
@@ -129,86 +176,57 @@ class KIEService:
             raise ValueError("Task ID cannot be None")
 
         params = {"taskId": task_id}
-        response = requests.get(self.query_url, params=params, headers=self.headers)
+        response = self.session.get(
+            self.query_url,
+            params=params,
+            headers=self.headers,
+            timeout=settings.KIE_HTTP_TIMEOUT,
+        )
         logger.info(f"Status request URL: {response.url}, status: {response.status_code}")
         logger.info(f"Raw response: {response.text[:500]}")
         response.raise_for_status()
         result = response.json()
         logger.info(f"Status response parsed: {result}")
+        return parse_task_status(task_id, result)
 
-        if result.get("code") != 200:
-            error_msg = result.get("message") or result.get("msg", "Unknown error")
-            logger.error(f"API status error: {result}")
-            raise ValueError(f"Failed to get status: {error_msg}")
-
-        data = result.get("data", {})
-        state = data.get("state", "unknown")
-        result_json_str = data.get("resultJson", "{}")
-
-        try:
-            result_dict = json.loads(result_json_str) if result_json_str else {}
-            logger.info(f"Parsed resultJson: {result_dict}")
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse resultJson: {result_json_str}, error: {e}")
-            result_dict = {}
-
-        if state in ["fail", "failed", "error"]:
-            fail_msg = data.get("failMsg", "Unknown error")
-            fail_code = data.get("failCode", "Unknown")
-            logger.error(f"Task failed - Code: {fail_code}, Message: {fail_msg}")
-            raise Exception(f"Task failed: {fail_msg} (code: {fail_code})")
-
-        return {"status": state, "result": result_dict}
-
-    async def poll_task(self, task_id: str, max_attempts: int = 120) -> dict:
-        for attempt in range(max_attempts):
-            try:
-                status_info = await asyncio.to_thread(self.get_task_status, task_id)
-                logger.info(
-                    f"Poll attempt {attempt + 1}/{max_attempts} for {task_id}: "
-                    f"status={status_info['status']}"
-                )
-                if status_info["status"] == "success":
-                    logger.info(f"Task {task_id} completed successfully!")
-                    return status_info["result"]
-                elif status_info["status"] in ["fail", "failed", "error"]:
-                    logger.error(f"Task {task_id} failed with status: {status_info['status']}")
-                    raise Exception(f"Task failed: {status_info}")
-                logger.info("Task still processing, waiting 10 seconds...")
-                await asyncio.sleep(10)
-            except Exception as e:
-                logger.error(f"Error polling task {task_id} on attempt {attempt + 1}: {e}")
-                if attempt == max_attempts - 1:
-                    raise
-                logger.info("Retrying in 10 seconds...")
-                await asyncio.sleep(10)
-
-        raise Exception(
-            f"Task timeout after {max_attempts} attempts ({max_attempts * 10} seconds)"
+    async def poll_task(
+        self,
+        task_id: str,
+        max_attempts: int = 120,
+        model: Optional[str] = None,
+    ) -> dict:
+        """
+        Task tugashini markaziy poller orqali kutadi (task_poller.py).
+        max_attempts – eski 10 s'lik urinishlar soni, umumiy muddat sifatida saqlangan.
+        """
+        return await get_kie_task_poller().wait(
+            task_id,
+            model=model,
+            timeout=max_attempts * 10,
+            callback=self.callback_url is not None,
         )
 
     async def download_image(self, url: str) -> bytes:
         logger.info(f"Downloading content from: {url}")
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url,
-                    timeout=aiohttp.ClientTimeout(total=300),
-                ) as response:
-                    response.raise_for_status()
-                    content = await response.read()
-                    logger.info(f"Successfully downloaded {len(content)} bytes")
-                    return content
+            session = get_aiohttp_session()
+            async with session.get(
+                url,
+                timeout=aiohttp.ClientTimeout(total=300),
+            ) as response:
+                response.raise_for_status()
+                content = await response.read()
+                logger.info(f"Successfully downloaded {len(content)} bytes")
+                return content
         except Exception as e:
             logger.error(f"Failed to download from {url}: {e}")
             raise
 
     # ===== PRODUCT CARD SCENES =====
 
-    async def generate_product_cards(self, data: dict) -> List[dict]:
-        photo_url = data["photo_url"]
-        results: List[dict] = []
-        model = "google/nano-banana-edit"
+    def _product_card_items(self, data: dict) -> List[dict]:
+        """generation_type bo'yicha generatsiya qilinadigan sahnalar ro'yxati (DB'dan)."""
+        items: List[dict] = []
 
         db = SessionLocal()
         try:
@@ -218,39 +236,16 @@ class KIEService:
             if gen_type == "all_scenes":
                 hierarchy = scene_repo.get_full_hierarchy()
                 for cat_id, cat in hierarchy.items():
-                    cat_name = cat["name"]
                     for sub_id, sub in cat["subcategories"].items():
-                        sub_name = sub["name"]
                         for item in sub["items"]:
-                            item_name = item["name"]
-                            item_prompt = item["prompt"]
-                            full_prompt = (
-                                "Create a professional product card: Place the product from the "
-                                f"reference image into the scene: {cat_name} → {sub_name} → {item_name}. "
-                                f"Details: {item_prompt}. High quality, photorealistic, studio lighting, clean background."
-                            )
-                            input_data = {
-                                "prompt": full_prompt,
-                                "image_urls": [photo_url],
-                                "output_format": "png",
-                                "image_size": "3:4",
-                            }
-                            task_id = await asyncio.to_thread(
-                                self.create_task, model, input_data
+                            items.append(
+                                {
+                                    "category": cat["name"],
+                                    "subcategory": sub["name"],
+                                    "item": item["name"],
+                                    "prompt": item["prompt"],
+                                }
                             )
-                            result = await self.poll_task(task_id)
-                            if "resultUrls" in result and result["resultUrls"]:
-                                image_bytes = await self.download_image(
-                                    result["resultUrls"][0]
-                                )
-                                results.append(
-                                    {
-                                        "image": image_bytes,
-                                        "category": cat_name,
-                                        "subcategory": sub_name,
-                                        "item": item_name,
-                                    }
-                                )
 
             elif gen_type == "group_scenes":
                 category_id = int(data["selected_group"])
@@ -260,35 +255,15 @@ class KIEService:
 
                 subcats = scene_repo.get_subcategories_by_category(category_id)
                 for sub in subcats:
-                    items = scene_repo.get_items_by_subcategory(sub.id)
-                    for it in items:
-                        full_prompt = (
-                            "Create a professional product card: Place the product from the "
-                            f"reference image into the scene: {category.name} → {sub.name} → {it.name}. "
-                            f"Details: {it.prompt}. High quality, photorealistic, studio lighting, clean background."
-                        )
-                        input_data = {
-                            "prompt": full_prompt,
-                            "image_urls": [photo_url],
-                            "output_format": "png",
-                            "image_size": "3:4",
-                        }
-                        task_id = await asyncio.to_thread(
-                            self.create_task, model, input_data
+                    for it in scene_repo.get_items_by_subcategory(sub.id):
+                        items.append(
+                            {
+                                "category": category.name,
+                                "subcategory": sub.name,
+                                "item": it.name,
+                                "prompt": it.prompt,
+                            }
                         )
-                        result = await self.poll_task(task_id)
-                        if "resultUrls" in result and result["resultUrls"]:
-                            image_bytes = await self.download_image(
-                                result["resultUrls"][0]
-                            )
-                            results.append(
-                                {
-                                    "image": image_bytes,
-                                    "category": category.name,
-                                    "subcategory": sub.name,
-                                    "item": it.name,
-                                }
-                            )
 
             elif gen_type == "single_scene":
                 item_id = int(data["selected_item"])
@@ -308,38 +283,199 @@ class KIEService:
                         f"Category {sub.category_id} for subcategory {sub.id} not found"
                     )
 
-                full_prompt = (
-                    "Create a professional product card: Place the product from the "
-                    f"reference image into the scene: {cat.name} → {sub.name} → {item.name}. "
-                    f"Details: {item.prompt}. High quality, photorealistic, studio lighting, clean background."
+                items.append(
+                    {
+                        "category": cat.name,
+                        "subcategory": sub.name,
+                        "item": item.name,
+                        "prompt": item.prompt,
+                    }
                 )
-                input_data = {
-                    "prompt": full_prompt,
-                    "image_urls": [photo_url],
-                    "output_format": "png",
-                    "image_size": "3:4",
-                }
-                task_id = await asyncio.to_thread(self.create_task, model, input_data)
-                result = await self.poll_task(task_id)
-                if "resultUrls" in result and result["resultUrls"]:
-                    image_bytes = await self.download_image(result["resultUrls"][0])
-                    results.append(
-                        {
-                            "image": image_bytes,
-                            "category": cat.name,
-                            "subcategory": sub.name,
-                            "item": item.name,
-                        }
-                    )
             else:
                 raise ValueError("Unknown generation_type")
         finally:
             db.close()
 
-        return results
+        return items
+
+    async def _generate_product_card(self, photo_url: str, scene: dict) -> dict:
+        model = "google/nano-banana-edit"
+        full_prompt = (
+            "Create a professional product card: Place the product from the "
+            f"reference image into the scene: {scene['category']} → {scene['subcategory']} → {scene['item']}. "
+            f"Details: {scene['prompt']}. High quality, photorealistic, studio lighting, clean background."
+        )
+        input_data = {
+            "prompt": full_prompt,
+            "image_urls": [photo_url],
+            "output_format": "png",
+            "image_size": "3:4",
+        }
+        task_id = await asyncio.to_thread(self.create_task, model, input_data)
+        result = await self.poll_task(task_id, model=model)
+        if "resultUrls" in result and result["resultUrls"]:
+            return {"image": await self.download_image(result["resultUrls"][0])}
+        raise ValueError("No image in result")
+
+    async def iter_product_cards(
+        self,
+        data: dict,
+        concurrency: Optional[int] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Sahnalarni parallel (KIE_PRODUCT_CARDS_CONCURRENCY tadan) generatsiya qiladi
+        va har biri tugashi bilan yield qiladi (tugash tartibida):
+        {"index", "total", "category", "subcategory", "item", "image"} yoki
+        {..., "error"} – bitta sahna xatosi qolganlariga ta'sir qilmaydi.
+        Kredit / ruxsat xatosida qolganlari bekor qilinadi va xato ko'tariladi.
+        """
+        photo_url = data["photo_url"]
+        scenes = await asyncio.to_thread(self._product_card_items, data)
+        total = len(scenes)
+        if not scenes:
+            return
+
+        semaphore = asyncio.Semaphore(
+            max(1, concurrency or settings.KIE_PRODUCT_CARDS_CONCURRENCY)
+        )
+
+        async def run(index: int, scene: dict) -> dict:
+            info = {
+                "index": index,
+                "total": total,
+                "category": scene["category"],
+                "subcategory": scene["subcategory"],
+                "item": scene["item"],
+            }
+            async with semaphore:
+                try:
+                    result = await self._generate_product_card(photo_url, scene)
+                except (KIEInsufficientCreditsError, PermissionError):
+                    raise
+                except Exception as e:
+                    logger.error(f"Product card {index + 1}/{total} ({scene['item']}) failed: {e}")
+                    return {**info, "error": str(e)}
+            logger.info(f"Product card {index + 1}/{total} ({scene['item']}) done")
+            return {**info, "image": result["image"]}
+
+        tasks = [asyncio.create_task(run(i, scene)) for i, scene in enumerate(scenes)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Kredit tugasa yoki iste'molchi to'xtasa – qolganlarini bekor qilamiz
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def generate_product_cards(self, data: dict) -> List[dict]:
+        """Muvaffaqiyatli kartalar sahnalar tartibida (xato bo'lgan sahnalar tashlab ketiladi)."""
+        results: List[dict] = []
+        async for card in self.iter_product_cards(data):
+            if "image" in card:
+                results.append(card)
+        results.sort(key=lambda card: card["index"])
+        return [
+            {
+                "image": card["image"],
+                "category": card["category"],
+                "subcategory": card["subcategory"],
+                "item": card["item"],
+            }
+            for card in results
+        ]
 
     # ===== NORMALIZE / OWN MODEL (DB prompts bilan) =====
 
+    async def _render_ghost(self, item_image_url: str, ghost_prompt: str, model: str) -> str:
+        input_data_ghost = {
+            "prompt": ghost_prompt,
+            "image_urls": [item_image_url],
+            "output_format": "png",
+            "image_size": "3:4",
+        }
+        task_id_ghost = await asyncio.to_thread(
+            self.create_task, model, input_data_ghost
+        )
+        ghost_result = await self.poll_task(task_id_ghost, model=model)
+        if "resultUrls" not in ghost_result or not ghost_result["resultUrls"]:
+            raise ValueError("No ghost image in result")
+        return ghost_result["resultUrls"][0]
+
+    async def _get_ghost_url(self, item_image_url: str, ghost_prompt: str, model: str) -> str:
+        """
+        Ghost mannequin URL'i. Kalit: (foto kontenti sha256, ghost prompt sha256, model) –
+        prompt DB'da yangilansa yoki override berilsa kalit ham o'zgaradi.
+        Ghost nusxasi MEDIA_ROOT/ghosts ga saqlanadi (KIE tempfile URL'i eskiradi).
+        Bir vaqtdagi bir xil so'rovlar bitta render'ni kutadi.
+        """
+        if not settings.KIE_GHOST_CACHE_ENABLED:
+            return await self._render_ghost(item_image_url, ghost_prompt, model)
+
+        photo_bytes = await self.download_image(item_image_url)
+        key = (
+            hashlib.sha256(photo_bytes).hexdigest(),
+            hashlib.sha256(ghost_prompt.encode("utf-8")).hexdigest(),
+            model,
+        )
+
+        entry = await asyncio.to_thread(self._ghost_cache_call, "get", *key)
+        if entry is not None:
+            await asyncio.to_thread(self._ghost_cache_call, "touch", entry.id)
+            logger.info(f"Ghost cache hit (entry {entry.id}, hits={entry.hits + 1})")
+            return self._ghost_entry_url(entry)
+
+        inflight = self._ghost_inflight.get(key)
+        if inflight is not None:
+            logger.info("Ghost render already in progress for this photo – waiting")
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._ghost_inflight[key] = future
+        try:
+            ghost_url = await self._render_ghost(item_image_url, ghost_prompt, model)
+            try:
+                ghost_bytes = await self.download_image(ghost_url)
+                rel_path = await asyncio.to_thread(
+                    save_media_file, ghost_bytes, f"ghosts/{key[0][:2]}/{key[0]}_{key[1][:16]}.png"
+                )
+                await asyncio.to_thread(
+                    self._ghost_cache_call, "save", *key, ghost_url, rel_path
+                )
+            except Exception as e:
+                # Kesh ixtiyoriy – ghost baribir tayyor
+                logger.warning(f"Failed to cache ghost image: {e}")
+            future.set_result(ghost_url)
+            return ghost_url
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+                # Kutuvchi bo'lmasa "exception was never retrieved" bo'lmasin
+                future.exception()
+            raise
+        finally:
+            self._ghost_inflight.pop(key, None)
+
+    @staticmethod
+    def _ghost_entry_url(entry) -> str:
+        age = (datetime.utcnow() - entry.created_at).total_seconds()
+        if entry.result_url and age < settings.KIE_GHOST_REMOTE_URL_TTL_SECONDS:
+            return entry.result_url
+        return get_file_url(entry.file_path)
+
+    @staticmethod
+    def _ghost_cache_call(method: str, *args):
+        db = SessionLocal()
+        try:
+            return getattr(GhostCacheRepository(db), method)(*args)
+        finally:
+            db.close()
+
+
     async def normalize_own_model(
         self, 
         item_image_url: str, 
@@ -359,20 +495,8 @@ class KIEService:
             if combine_prompt_override:
                 own_combine_prompt = combine_prompt_override
 
-            # 1-qadam: itemdan ghost / maneken
-            input_data_ghost = {
-                "prompt": ghost_prompt,
-                "image_urls": [item_image_url],
-                "output_format": "png",
-                "image_size": "3:4",
-            }
-            task_id_ghost = await asyncio.to_thread(
-                self.create_task, model, input_data_ghost
-            )
-            ghost_result = await self.poll_task(task_id_ghost)
-            if "resultUrls" not in ghost_result or not ghost_result["resultUrls"]:
-                raise ValueError("No ghost image in result")
-            ghost_url = ghost_result["resultUrls"][0]
+            # 1-qadam: itemdan ghost / maneken (keshlangan – ikkala rejim uchun umumiy)
+            ghost_url = await self._get_ghost_url(item_image_url, ghost_prompt, model)
 
             # 2-qadam: ghost + model photo
             input_data_combine = {
@@ -384,7 +508,7 @@ class KIEService:
             task_id_combine = await asyncio.to_thread(
                 self.create_task, model, input_data_combine
             )
-            combine_result = await self.poll_task(task_id_combine)
+            combine_result = await self.poll_task(task_id_combine, model=model)
             if "resultUrls" in combine_result and combine_result["resultUrls"]:
                 return {"image": await self.download_image(combine_result["resultUrls"][0])}
             raise ValueError("No final image in result")
@@ -408,20 +532,8 @@ class KIEService:
             if ghost_prompt_override:
                 ghost_prompt = ghost_prompt_override
 
-            # 1-qadam: itemdan ghost / maneken
-            input_data_ghost = {
-                "prompt": ghost_prompt,
-                "image_urls": [item_image_url],
-                "output_format": "png",
-                "image_size": "3:4",
-            }
-            task_id_ghost = await asyncio.to_thread(
-                self.create_task, model, input_data_ghost
-            )
-            ghost_result = await self.poll_task(task_id_ghost)
-            if "resultUrls" not in ghost_result or not ghost_result["resultUrls"]:
-                raise ValueError("No ghost image in result")
-            ghost_url = ghost_result["resultUrls"][0]
+            # 1-qadam: itemdan ghost / maneken (keshlangan – ikkala rejim uchun umumiy)
+            ghost_url = await self._get_ghost_url(item_image_url, ghost_prompt, model)
 
             # 2-qadam: yangi fotomodelni AI bilan generatsiya qilish
             if new_model_prompt_override:
@@ -441,7 +553,7 @@ class KIEService:
             task_id_combine = await asyncio.to_thread(
                 self.create_task, model, input_data_combine
             )
-            combine_result = await self.poll_task(task_id_combine)
+            combine_result = await self.poll_task(task_id_combine, model=model)
             if "resultUrls" in combine_result and combine_result["resultUrls"]:
                 return {"image": await self.download_image(combine_result["resultUrls"][0])}
             raise ValueError("No final image in result")
@@ -450,9 +562,15 @@ class KIEService:
 
     # ===== VIDEO / SIMPLE EDITS =====
 
-    async def enhance_photo(self, photo_url: str, level: str = "medium") -> dict:
-        model = "google/nano-banana-edit"
-        
+    async def _run_edit(self, input_data: dict) -> dict:
+        """Bitta EDIT_MODEL task'i: createTask -> poll -> download (so'rov ichida)."""
+        task_id = await asyncio.to_thread(self.create_task, self.EDIT_MODEL, input_data)
+        result = await self.poll_task(task_id, model=self.EDIT_MODEL)
+        if "resultUrls" in result and result["resultUrls"]:
+            return {"image": await self.download_image(result["resultUrls"][0])}
+        raise ValueError("No image in result")
+
+    def build_enhance_input(self, photo_url: str, level: str = "medium") -> dict:
         prompts = {
             "light": (
                 "Light photo enhancement: slightly improve sharpness, "
@@ -471,22 +589,17 @@ class KIEService:
         
         prompt = prompts.get(level, prompts["medium"])
         
-        input_data = {
+        return {
             "prompt": prompt,
             "image_urls": [photo_url],
             "output_format": "png",
             "image_size": "original",
         }
-        
-        task_id = await asyncio.to_thread(self.create_task, model, input_data)
-        result = await self.poll_task(task_id)
-        
-        if "resultUrls" in result and result["resultUrls"]:
-            return {"image": await self.download_image(result["resultUrls"][0])}
-        
-        raise ValueError("No image in result")
 
-    async def generate_video(
+    async def enhance_photo(self, photo_url: str, level: str = "medium") -> dict:
+        return await self._run_edit(self.build_enhance_input(photo_url, level))
+
+    def build_video_input(
         self,
         image_url: str,
         prompt: str,
@@ -494,33 +607,43 @@ class KIEService:
         duration: int,
         resolution: str,
     ) -> dict:
-        logger.info(f"Starting video generation with model: {model}")
-        logger.info(f"Image URL: {image_url}")
-        logger.info(f"Prompt: {prompt}")
-        logger.info(f"Duration: {duration}, Resolution: {resolution}")
-
+        """Video modeli uchun createTask input'i (kie_job_manager ham ishlatadi)."""
         if "grok" in model.lower():
-            input_data = {
+            logger.info("Using Grok model format")
+            return {
                 "image_urls": [image_url],
                 "index": 0,
                 "prompt": prompt,
                 "mode": "normal",
             }
-            logger.info("Using Grok model format")
-        else:
-            input_data = {
-                "prompt": prompt,
-                "image_url": image_url,
-                "duration": str(duration),
-                "resolution": resolution,
-            }
-            logger.info("Using Hailuo model format")
+        logger.info("Using Hailuo model format")
+        return {
+            "prompt": prompt,
+            "image_url": image_url,
+            "duration": str(duration),
+            "resolution": resolution,
+        }
+
+    async def generate_video(
+        self,
+        image_url: str,
+        prompt: str,
+        model: str,
+        duration: int,
+        resolution: str,
+    ) -> dict:
+        logger.info(f"Starting video generation with model: {model}")
+        logger.info(f"Image URL: {image_url}")
+        logger.info(f"Prompt: {prompt}")
+        logger.info(f"Duration: {duration}, Resolution: {resolution}")
+
+        input_data = self.build_video_input(image_url, prompt, model, duration, resolution)
 
         logger.info(f"Creating task with input: {input_data}")
         task_id = await asyncio.to_thread(self.create_task, model, input_data)
         logger.info(f"Task created with ID: {task_id}")
         logger.info("Starting to poll task status...")
-        result = await self.poll_task(task_id)
+        result = await self.poll_task(task_id, model=model)
         logger.info(f"Video generation complete! Result: {result}")
 
         if "resultUrls" in result and result["resultUrls"]:
@@ -535,61 +658,54 @@ class KIEService:
 
     # ===== SIMPLE SCENE / POSE / CUSTOM EDITS =====
 
-    async def change_scene(self, image_url: str, prompt: str) -> dict:
-        model = "google/nano-banana-edit"
+    # build_*_input – kie_job_manager ham ishlatadi (routers/photo_generator.py)
+
+    def build_scene_input(self, image_url: str, prompt: str) -> dict:
         full_prompt = (
             "Scene transformation using the reference image: Change the background and scene to "
             f"{prompt}. Keep the main subject (person or product) unchanged, professional photography, "
             "high detail, photorealistic."
         )
-        input_data = {
+        return {
             "prompt": full_prompt,
             "image_urls": [image_url],
             "output_format": "png",
             "image_size": "3:4",
         }
-        task_id = await asyncio.to_thread(self.create_task, model, input_data)
-        result = await self.poll_task(task_id)
-        if "resultUrls" in result and result["resultUrls"]:
-            return {"image": await self.download_image(result["resultUrls"][0])}
-        raise ValueError("No image in result")
 
-    async def change_pose(self, image_url: str, prompt: str) -> dict:
-        model = "google/nano-banana-edit"
+    def build_pose_input(self, image_url: str, prompt: str) -> dict:
         full_prompt = (
             "Pose transformation using the reference image: Change the pose to "
             f"{prompt}. Keep the face, clothing, and other details unchanged, "
             "natural body position, professional photography, high quality."
         )
-        input_data = {
+        return {
             "prompt": full_prompt,
             "image_urls": [image_url],
             "output_format": "png",
             "image_size": "3:4",
         }
-        task_id = await asyncio.to_thread(self.create_task, model, input_data)
-        result = await self.poll_task(task_id)
-        if "resultUrls" in result and result["resultUrls"]:
-            return {"image": await self.download_image(result["resultUrls"][0])}
-        raise ValueError("No image in result")
 
-    async def custom_generation(self, image_url: str, prompt: str) -> dict:
-        model = "google/nano-banana-edit"
+    def build_custom_input(self, image_url: str, prompt: str) -> dict:
         full_prompt = (
             "Custom image edit based on the reference image: "
             f"{prompt}. High quality, photorealistic, maintain original subject details."
         )
-        input_data = {
+        return {
             "prompt": full_prompt,
             "image_urls": [image_url],
             "output_format": "png",
             "image_size": "3:4",
         }
-        task_id = await asyncio.to_thread(self.create_task, model, input_data)
-        result = await self.poll_task(task_id)
-        if "resultUrls" in result and result["resultUrls"]:
-            return {"image": await self.download_image(result["resultUrls"][0])}
-        raise ValueError("No image in result")
+
+    async def change_scene(self, image_url: str, prompt: str) -> dict:
+        return await self._run_edit(self.build_scene_input(image_url, prompt))
+
+    async def change_pose(self, image_url: str, prompt: str) -> dict:
+        return await self._run_edit(self.build_pose_input(image_url, prompt))
+
+    async def custom_generation(self, image_url: str, prompt: str) -> dict:
+        return await self._run_edit(self.build_custom_input(image_url, prompt))
 
 
 kie_service = KIEService()
\ No newline at end of file
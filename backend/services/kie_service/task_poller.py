@@ -0,0 +1,397 @@
+# backend/services/kie_service/task_poller.py
+"""
+KIE task'lari uchun markaziy poller.
+
+Avval har operatsiya o'zining poll_task siklini yurgizardi: har 10 sekundda
+to_thread(requests.get) – tez rasm task'i ham kamida 10 s kutardi, 50 ta
+video esa 50 ta coroutine + thread band qilardi.
+
+Endi event loop bo'yicha bitta fon coroutine barcha kutilayotgan taskId'larni
+kuzatadi:
+
+- har task uchun keyingi so'rov vaqti alohida: boshida tez, keyin
+  KIE_POLL_BACKOFF_FACTOR bilan siyraklashadi (KIE_POLL_MAX_INTERVAL gacha)
+- boshlang'ich interval modelning kutilgan davomiyligidan
+  (KIE_MODEL_EXPECTED_SECONDS) olinadi – video rasmga qaraganda siyrakroq
+- status so'rovlari aiohttp orqali (thread'siz), bir vaqtda KIE_POLL_CONCURRENCY tadan
+- kutayotganlar future orqali natija oladi; bitta taskId'ni bir nechta
+  joy kutsa ham u bir marta so'raladi
+- callBackUrl bilan yaratilgan task'lar KIE callback'i kelganda darhol
+  yakunlanadi (routers/kie_callback.py -> resolve/reject); polling faqat
+  callback kechiksa ishlaydi – birinchi so'rov kutilgan davomiylikdan keyin
+"""
+
+import asyncio
+import json
+import logging
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+from core.config import settings
+from core.http_clients import get_aiohttp_session
+
+logger = logging.getLogger(__name__)
+
+
+FAIL_STATES = ("fail", "failed", "error")
+SUCCESS_STATE = "success"
+
+# Callback task wait() dan oldin kelishi mumkin – natija qisqa vaqt saqlanadi
+_EARLY_RESULTS_MAX = 1000
+_EARLY_RESULTS_TTL = 600.0
+
+
+class KIETaskFailedError(Exception):
+    """KIE task fail holatida tugadi."""
+
+    def __init__(self, task_id: str, fail_msg: Any, fail_code: Any):
+        self.task_id = task_id
+        self.fail_msg = fail_msg
+        self.fail_code = fail_code
+        super().__init__(f"Task failed: {fail_msg} (code: {fail_code})")
+
+
+class KIETaskTimeoutError(Exception):
+    pass
+
+
+def parse_task_status(task_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    recordInfo javobi -> {"status": state, "result": resultJson dict}.
+    Fail holatida KIETaskFailedError.
+    """
+    data = result.get("data") or {}
+    state = data.get("state", "unknown")
+
+    # Fail holati code != 200 bilan ham kelishi mumkin – bu tarmoq xatosi emas
+    if result.get("code") != 200 and state not in FAIL_STATES:
+        error_msg = result.get("message") or result.get("msg", "Unknown error")
+        logger.error(f"API status error: {result}")
+        raise ValueError(f"Failed to get status: {error_msg}")
+    result_json_str = data.get("resultJson", "{}")
+
+    try:
+        result_dict = json.loads(result_json_str) if result_json_str else {}
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse resultJson: {result_json_str}, error: {e}")
+        result_dict = {}
+
+    if state in FAIL_STATES:
+        fail_msg = data.get("failMsg", "Unknown error")
+        fail_code = data.get("failCode", "Unknown")
+        logger.error(f"Task {task_id} failed - Code: {fail_code}, Message: {fail_msg}")
+        raise KIETaskFailedError(task_id, fail_msg, fail_code)
+
+    return {"status": state, "result": result_dict}
+
+
+def parse_callback_payload(payload: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+    """
+    KIE callback body ({"code", "msg", "data": {"taskId", "state", "resultJson", ...}})
+    -> (task_id, natija dict | KIETaskFailedError | None – hali tugamagan).
+    Fail callback'larida code 501 bo'ladi, shuning uchun faqat state'ga qaraymiz.
+    """
+    data = payload.get("data") or {}
+    task_id = data.get("taskId")
+    if not task_id:
+        return None, None
+
+    state = data.get("state")
+    if state in FAIL_STATES or (state is None and payload.get("code") not in (None, 200)):
+        fail_msg = data.get("failMsg") or payload.get("msg") or "Unknown error"
+        fail_code = data.get("failCode") or payload.get("code") or "Unknown"
+        return task_id, KIETaskFailedError(task_id, fail_msg, fail_code)
+    if state != SUCCESS_STATE:
+        return task_id, None
+
+    try:
+        result_dict = json.loads(data.get("resultJson") or "{}")
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse callback resultJson for {task_id}: {e}")
+        result_dict = {}
+    return task_id, result_dict
+
+
+def expected_seconds_for(model: Optional[str]) -> float:
+    """
+    KIE_MODEL_EXPECTED_SECONDS: kalit model nomining boshi yoki bir qismi
+    ("google/nano-banana-edit", "hailuo", "grok"...). Eng uzun mos kalit yutadi.
+    """
+    if model:
+        name = model.lower()
+        best: Optional[str] = None
+        for key in settings.KIE_MODEL_EXPECTED_SECONDS:
+            if key.lower() in name and (best is None or len(key) > len(best)):
+                best = key
+        if best is not None:
+            return float(settings.KIE_MODEL_EXPECTED_SECONDS[best])
+    return float(settings.KIE_DEFAULT_EXPECTED_SECONDS)
+
+
+class _PendingTask:
+    __slots__ = (
+        "task_id", "model", "future", "waiters", "created_at", "deadline",
+        "next_poll_at", "interval", "polls", "errors",
+    )
+
+    def __init__(
+        self,
+        task_id: str,
+        model: Optional[str],
+        future: asyncio.Future,
+        deadline: float,
+        callback: bool = False,
+    ):
+        now = time.monotonic()
+        self.task_id = task_id
+        self.model = model
+        self.future = future
+        self.waiters = 0
+        self.created_at = now
+        self.deadline = deadline
+        # Boshlang'ich interval: kutilgan davomiylikning ~1/10 qismi
+        expected = expected_seconds_for(model)
+        self.interval = min(
+            settings.KIE_POLL_MAX_INTERVAL,
+            max(settings.KIE_POLL_MIN_INTERVAL, expected / 10.0),
+        )
+        first_delay = self.interval
+        if callback:
+            # Natija callback bilan keladi – polling faqat zaxira
+            first_delay = max(first_delay, expected * settings.KIE_CALLBACK_FALLBACK_FACTOR)
+        self.next_poll_at = min(now + first_delay, deadline)
+        self.polls = 0
+        self.errors = 0
+
+    def schedule_next(self, now: float) -> None:
+        self.interval = min(
+            settings.KIE_POLL_MAX_INTERVAL,
+            self.interval * settings.KIE_POLL_BACKOFF_FACTOR,
+        )
+        self.next_poll_at = min(now + self.interval, self.deadline)
+
+
+class KIETaskPoller:
+    def __init__(self, query_url: Optional[str] = None, api_key: Optional[str] = None):
+        self.query_url = query_url or f"{settings.KIE_API_BASE_URL.rstrip('/')}/api/v1/jobs/recordInfo"
+        self.headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key or settings.KIE_API_KEY}",
+        }
+        self._pending: Dict[str, _PendingTask] = {}
+        self._wakeup = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+        self._semaphore = asyncio.Semaphore(max(1, settings.KIE_POLL_CONCURRENCY))
+        # task_id -> (kelgan vaqti, natija yoki exception)
+        self._early: "OrderedDict[str, tuple]" = OrderedDict()
+
+        self.total_polls = 0
+        self.completed = 0
+        self.failed = 0
+
+    # ===== PUBLIC =====
+
+    async def wait(
+        self,
+        task_id: str,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        callback: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        taskId tugashini kutadi va resultJson (dict) ni qaytaradi.
+        Fail -> KIETaskFailedError, muddat o'tsa -> KIETaskTimeoutError.
+        callback=True – task callBackUrl bilan yaratilgan, birinchi poll kechroq.
+        """
+        if not task_id:
+            raise ValueError("Task ID cannot be None")
+
+        early = self._early.pop(task_id, None)
+        if early is not None:
+            outcome = early[1]
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+
+        pending = self._pending.get(task_id)
+        if pending is None:
+            timeout = timeout or settings.KIE_TASK_TIMEOUT_SECONDS
+            pending = _PendingTask(
+                task_id,
+                model,
+                asyncio.get_running_loop().create_future(),
+                deadline=time.monotonic() + timeout,
+                callback=callback,
+            )
+            self._pending[task_id] = pending
+            logger.info(
+                f"Tracking KIE task {task_id} (model={model}, callback={callback}, "
+                f"first poll in {pending.next_poll_at - pending.created_at:.1f}s)"
+            )
+            self._ensure_runner()
+            self._wakeup.set()
+
+        pending.waiters += 1
+        try:
+            # shield – bitta kutuvchi bekor qilinsa umumiy future buzilmasin
+            return await asyncio.shield(pending.future)
+        finally:
+            pending.waiters -= 1
+            if pending.waiters <= 0 and not pending.future.done():
+                # Hech kim kutmayapti – so'rashni to'xtatamiz
+                self._pending.pop(task_id, None)
+                pending.future.cancel()
+
+    def resolve(self, task_id: str, result: Dict[str, Any]) -> bool:
+        """Tashqi manbadan (masalan callback) kelgan natija bilan kutuvchilarni uyg'otadi."""
+        pending = self._pending.pop(task_id, None)
+        if pending is None or pending.future.done():
+            return False
+        pending.future.set_result(result)
+        self.completed += 1
+        return True
+
+    def reject(self, task_id: str, error: BaseException) -> bool:
+        pending = self._pending.pop(task_id, None)
+        if pending is None or pending.future.done():
+            return False
+        pending.future.set_exception(error)
+        self.failed += 1
+        return True
+
+    def deliver(self, task_id: str, outcome: Any) -> bool:
+        """
+        Callback natijasi (dict yoki exception). Task hali kutilmayotgan bo'lsa
+        (callback wait() dan oldin keldi) – keyingi wait() uchun saqlab qo'yiladi.
+        Qaytaradi: kutuvchi darhol uyg'otildimi.
+        """
+        if isinstance(outcome, BaseException):
+            delivered = self.reject(task_id, outcome)
+        else:
+            delivered = self.resolve(task_id, outcome)
+        if not delivered:
+            now = time.monotonic()
+            self._early[task_id] = (now, outcome)
+            self._early.move_to_end(task_id)
+            while self._early and (
+                len(self._early) > _EARLY_RESULTS_MAX
+                or next(iter(self._early.values()))[0] < now - _EARLY_RESULTS_TTL
+            ):
+                self._early.popitem(last=False)
+        return delivered
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "pending": len(self._pending),
+            "early_results": len(self._early),
+            "total_polls": self.total_polls,
+            "completed": self.completed,
+            "failed": self.failed,
+            "tasks": [
+                {
+                    "task_id": p.task_id,
+                    "model": p.model,
+                    "age": round(now - p.created_at, 1),
+                    "polls": p.polls,
+                    "next_poll_in": round(max(0.0, p.next_poll_at - now), 1),
+                }
+                for p in self._pending.values()
+            ],
+        }
+
+    # ===== INTERNAL =====
+
+    def _ensure_runner(self) -> None:
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._pending:
+            now = time.monotonic()
+            due = [p for p in self._pending.values() if p.next_poll_at <= now]
+
+            if due:
+                await asyncio.gather(*(self._poll(p) for p in due))
+                continue
+
+            sleep_for = min(p.next_poll_at for p in self._pending.values()) - now
+            self._wakeup.clear()
+            try:
+                # Yangi task qo'shilsa erta uyg'onamiz (uning jadvali yaqinroq bo'lishi mumkin)
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, sleep_for))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, pending: _PendingTask) -> None:
+        task_id = pending.task_id
+        async with self._semaphore:
+            if self._pending.get(task_id) is not pending:
+                return
+            pending.polls += 1
+            self.total_polls += 1
+            try:
+                status_info = await self._fetch_status(task_id)
+            except KIETaskFailedError as e:
+                self.reject(task_id, e)
+                return
+            except Exception as e:
+                pending.errors += 1
+                logger.error(f"Error polling task {task_id} (poll {pending.polls}): {e}")
+                if pending.errors >= settings.KIE_POLL_MAX_ERRORS:
+                    self.reject(task_id, e)
+                    return
+                status_info = None
+
+        now = time.monotonic()
+        if status_info is not None:
+            pending.errors = 0
+            logger.info(
+                f"Poll {pending.polls} for {task_id}: status={status_info['status']} "
+                f"({now - pending.created_at:.1f}s)"
+            )
+            if status_info["status"] == SUCCESS_STATE:
+                logger.info(f"Task {task_id} completed successfully!")
+                self.resolve(task_id, status_info["result"])
+                return
+
+        if now >= pending.deadline:
+            self.reject(
+                task_id,
+                KIETaskTimeoutError(
+                    f"Task timeout after {pending.polls} polls ({now - pending.created_at:.0f} seconds)"
+                ),
+            )
+            return
+        pending.schedule_next(now)
+
+    async def _fetch_status(self, task_id: str) -> Dict[str, Any]:
+        session = get_aiohttp_session()
+        async with session.get(
+            self.query_url,
+            params={"taskId": task_id},
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=settings.KIE_HTTP_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+            result = await response.json(content_type=None)
+        return parse_task_status(task_id, result)
+
+
+_pollers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, KIETaskPoller]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_kie_task_poller() -> KIETaskPoller:
+    """Joriy event loop uchun poller (future'lar loop'ga bog'langan). Async kontekstdan chaqiriladi."""
+    loop = asyncio.get_running_loop()
+    poller = _pollers.get(loop)
+    if poller is None:
+        poller = KIETaskPoller()
+        _pollers[loop] = poller
+    return poller
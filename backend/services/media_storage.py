@@ -26,6 +26,23 @@ def save_generated_file(content: bytes, kind: str = "image") -> str:
     return rel_path
 
 
+def save_media_file(content: bytes, rel_path: str) -> str:
+    """
+    Aniq nisbiy yo'lga yozadi (keshlar uchun, masalan "ghosts/<hash>.png").
+    /generated ro'yxatiga tushmaydi – u faqat photos/ va videos/ ni ko'radi.
+    """
+    rel_path = (rel_path or "").lstrip("/").replace("\\", "/")
+    abs_path = os.path.join(settings.MEDIA_ROOT, rel_path)
+    os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+
+    tmp_path = f"{abs_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, abs_path)
+
+    return rel_path
+
+
 def get_file_url(rel_path: str) -> str:
     """
     Always returns public URL to backend media:
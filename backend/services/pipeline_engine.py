@@ -0,0 +1,136 @@
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+
+StageFunc = Callable[..., Union[Any, Awaitable[Any]]]
+
+
+class PipelineStage:
+    """
+    Bitta pipeline bosqichi.
+
+    `requires` – qaysi bosqichlar (yoki boshlang'ich context kalitlari)
+    natijasi kerakligi. Funksiya shu nomlar bilan keyword argument oladi,
+    natijasi context'ga `name` kaliti bilan yoziladi.
+
+    Sync funksiyalar worker thread'da (asyncio.to_thread), async
+    funksiyalar to'g'ridan-to'g'ri event loop'da bajariladi.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: StageFunc,
+        requires: Iterable[str] = (),
+    ):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+
+    async def run(self, context: Dict[str, Any]) -> Any:
+        kwargs = {dep: context[dep] for dep in self.requires}
+
+        if inspect.iscoroutinefunction(self.func):
+            return await self.func(**kwargs)
+
+        result = await asyncio.to_thread(self.func, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<PipelineStage(name={self.name}, requires={list(self.requires)})>"
+
+
+class PipelineEngine:
+    """
+    Bosqichlarni DAG sifatida bajaradi: bog'liqligi tayyor bo'lgan har bir
+    bosqich darhol ishga tushadi, mustaqil bosqichlar parallel ketadi.
+
+    Birinchi xato qolgan bosqichlarni bekor qiladi va yuqoriga ko'tariladi.
+    """
+
+    def __init__(
+        self,
+        stages: List[PipelineStage],
+        max_concurrency: Optional[int] = None,
+    ):
+        names = [s.name for s in stages]
+        if len(names) != len(set(names)):
+            raise ValueError(f"Duplicate stage names in pipeline: {names}")
+
+        self.stages: Dict[str, PipelineStage] = {s.name: s for s in stages}
+        self.max_concurrency = max_concurrency
+
+    def _validate(self, initial: Dict[str, Any]) -> None:
+        known = set(initial) | set(self.stages)
+        for stage in self.stages.values():
+            missing = [dep for dep in stage.requires if dep not in known]
+            if missing:
+                raise ValueError(
+                    f"Stage '{stage.name}' requires unknown inputs: {missing}"
+                )
+
+        # Sikl bormi – Kahn algoritmi bilan tekshiramiz
+        pending = {
+            name: {d for d in s.requires if d in self.stages}
+            for name, s in self.stages.items()
+        }
+        done: set = set()
+        while pending:
+            ready = [n for n, deps in pending.items() if deps <= done]
+            if not ready:
+                raise ValueError(
+                    f"Pipeline has a dependency cycle among: {sorted(pending)}"
+                )
+            for n in ready:
+                done.add(n)
+                pending.pop(n)
+
+    async def run(self, initial: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        context: Dict[str, Any] = dict(initial or {})
+        self._validate(context)
+
+        semaphore = (
+            asyncio.Semaphore(self.max_concurrency)
+            if self.max_concurrency and self.max_concurrency > 0
+            else None
+        )
+
+        async def run_stage(stage: PipelineStage) -> Any:
+            if semaphore is None:
+                return await stage.run(context)
+            async with semaphore:
+                return await stage.run(context)
+
+        waiting = dict(self.stages)
+        running: Dict[asyncio.Task, str] = {}
+
+        try:
+            while waiting or running:
+                for name, stage in list(waiting.items()):
+                    if all(dep in context for dep in stage.requires):
+                        task = asyncio.create_task(run_stage(stage), name=name)
+                        running[task] = name
+                        waiting.pop(name)
+
+                if not running:
+                    # _validate() sikllarni ushlaydi, bu yerga kelmasligi kerak
+                    raise RuntimeError(
+                        f"Pipeline stalled, unresolved stages: {sorted(waiting)}"
+                    )
+
+                finished, _ = await asyncio.wait(
+                    running.keys(), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in finished:
+                    name = running.pop(task)
+                    context[name] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return context
@@ -1,7 +1,8 @@
-from logging import log 
-import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Callable, List, Optional
 
+from core.config import settings
 from services.validators.global_validator import validation_card
 from services.image_analyzer_service import ImageAnalyzerService
 from services.color_service import ColorService
@@ -12,10 +13,16 @@ from services.description_service import DescriptionService
 from repositories.cards_repository import CardsRepository
 from repositories.fixed_repository import FixedRepository
 from repositories.wb_repository import WBRepository
+from services.wb_catalog_service import WBCatalogService
 from services.data_loader import DataLoader
+from services.subject_plan import get_subject_plan_cache
+from services.pipeline_engine import PipelineEngine, PipelineStage
 
 
 class PipelineService:
+    # Boshqa maydonlar shularga bog'liq (conditional fill), shuning uchun avval generatsiya qilinadi
+    PRIMARY_FIELD_NAMES = {"Тип низа", "Тип верха", "Пол", "Сезон"}
+
     def __init__(self):
         self.image_analyzer = ImageAnalyzerService()
         self.color_service = ColorService()
@@ -29,14 +36,29 @@ class PipelineService:
         self.cards_repo = CardsRepository()
         self.fixed_repo = FixedRepository()
         self.wb_repo = WBRepository()
+        self.wb_catalog = WBCatalogService(self.wb_repo)
 
         self.data_loader = DataLoader()
 
     def _load_card_from_api(self, article: str) -> Dict[str, Any]:
+        # Avval lokal mirror (WB round-trip'siz), topilmasa/eskirgan bo'lsa – WB API
+        if settings.WB_CATALOG_MIRROR_ENABLED:
+            try:
+                card = self.wb_catalog.get_card(
+                    article,
+                    max_age_seconds=settings.WB_CATALOG_MAX_AGE_SECONDS,
+                )
+                if card:
+                    return card
+            except Exception as e:
+                print(f"⚠️ WB catalog mirror read error: {e}")
 
         card = self.wb_repo.get_card_by_article(article)
         if not card:
             raise ValueError(f"Card with article {article} not found in WB API")
+
+        if settings.WB_CATALOG_MIRROR_ENABLED:
+            self.wb_catalog.store_cards([card])
         return card
 
     def get_current_card(self, article: str) -> Dict[str, Any] | None:
@@ -56,9 +78,10 @@ class PipelineService:
         other_limits = DataLoader.load_limits(color_only=False)
 
         gender = self._extract_gender_from_card(card)
-        
-        fixed_fields, conditional_skip, conditional_fill, generate_fields = \
-                self.data_loader.filter_characteristics_by_type(charcs_meta_raw, subject_id, gender)
+
+        subject_plan = get_subject_plan_cache().get(
+            subject_id, gender, charcs_meta_raw, self.PRIMARY_FIELD_NAMES
+        )
 
         validation_messages = validation_card(
             card,
@@ -66,7 +89,7 @@ class PipelineService:
             all_allowed_values,
             color_limits,
             other_limits,
-            conditional_skip
+            subject_plan.conditional_skip
         )
         return {
             "status": "ok",
@@ -79,7 +102,20 @@ class PipelineService:
         article: str,
         log_callback: Optional[Callable[[str], None]] = None
     ) -> Dict[str, Any]:
-        
+        """
+        Sync API (BatchProcessor, worker thread'lar uchun) –
+        process_article_async ustidagi yupqa o'ram.
+        """
+        return asyncio.run(
+            self.process_article_async(article=article, log_callback=log_callback)
+        )
+
+    async def process_article_async(
+        self,
+        article: str,
+        log_callback: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+
         def log(msg: str):
             print(msg)
             if log_callback:
@@ -87,15 +123,13 @@ class PipelineService:
 
         try:
             log("📥 Loading card data (via WB API)...")
-            card = self._load_card_from_api(article)
+            card = await asyncio.to_thread(self._load_card_from_api, article)
 
             subject_id = card["subjectID"]
             subject_name = card.get("subjectName") or card.get("subject", {}).get("name")
             
             log(f"📋 Subject ID: {subject_id}, Name: {subject_name}")
 
-            from services.data_loader import DataLoader
-            
             is_valid, error_msg = DataLoader.validate_subject_config(subject_id)
             
             if not is_valid:
@@ -117,287 +151,84 @@ class PipelineService:
                 log(f"💡 Available subject IDs (showing first 10): {available_ids[:10]}")
                 
                 return error_response
-            
-
-            fixed_row = self.fixed_repo.get_by_artikul(article)
-            fixed_data = self._build_fixed_data_dict(fixed_row)
-            
-            photo_urls = self.cards_repo.extract_photo_urls(card)
-            charcs_meta_raw = self.wb_repo.get_subject_charcs(subject_id)
-
-            gender = self._extract_gender_from_card(card)
-            
-
-            fixed_fields, conditional_skip, conditional_fill, generate_fields = \
-                self.data_loader.filter_characteristics_by_type(charcs_meta_raw, subject_id, gender)
-
-            fixed_field_names = {f.get("name") for f in fixed_fields if f.get("name")}
-            skip_field_names = {f.get("name") for f in conditional_skip if f.get("name")}
-            excel_fixed_names = set(fixed_data.keys())
-
-            locked_field_names = fixed_field_names | skip_field_names | excel_fixed_names
-
-            generate_fields_for_ai = [
-                meta for meta in generate_fields
-                if meta.get("name") and meta.get("name") not in locked_field_names
-            ]
-
-
-            generate_field_names = [f["name"] for f in generate_fields_for_ai if f.get("name")]
-
-            allowed_values = DataLoader.build_allowed_values_from_keywords(generate_field_names)
-            other_limits = DataLoader.load_limits(color_only=False)
-            filtered_limits = {name: other_limits.get(name, {}) for name in generate_field_names}
-
-            fields_with_dict = {name for name, vals in allowed_values.items() if vals}
-            fields_without_dict = set(generate_field_names) - fields_with_dict
-            
-            if fields_without_dict:
-                log(f"ℹ️  Text fields (no dictionary): {len(fields_without_dict)}")
-            log("\n🖼️  STEP 1: Analyzing images...")
-            
-            image_description = self.image_analyzer.analyze_images(
-                photo_urls=photo_urls[:2],
-                subject_name=subject_name,
-                log_callback=log,
-                target_char_names=generate_field_names,
-            )
-
-            log(f"✅ Image analysis: {len(image_description)} chars")
-
-            log("\n🎨 STEP 2: Color detection + validation...")
-            
-            color_result = self.color_service.detect_colors_from_text(
-                image_description=image_description,
-                log_callback=log
-            )
-            
-            if isinstance(color_result, tuple):
-                detected_colors, allowed_colors = color_result
-            else:
-                detected_colors = color_result
-                allowed_colors = []
-            
-            if isinstance(detected_colors, dict):
-                detected_colors = detected_colors.get("colors", [])
-            elif not isinstance(detected_colors, list):
-                detected_colors = []
-
-            normalized_colors = []
-            for c in detected_colors:
-                cs = str(c).strip()
-                if cs and cs not in normalized_colors:
-                    normalized_colors.append(cs)
-            detected_colors = normalized_colors[:5]
-            
-            log(f"✅ Colors detected: {detected_colors}")
-
-            log("\n⚙️  STEP 3: Generating characteristics...")
-            
-            primary_field_names = {"Тип низа", "Тип верха", "Пол", "Сезон"}
-            
-            primary_fields = [
-                f for f in generate_fields_for_ai 
-                if f.get("name") in primary_field_names
-            ]
-            
-            secondary_fields = [
-                f for f in generate_fields_for_ai 
-                if f.get("name") not in primary_field_names
-            ]
-            
-            log(f"   📍 Primary fields (dependencies): {len(primary_fields)}")
-            log(f"   📍 Secondary fields: {len(secondary_fields)}")
-
-            if primary_fields:
-                log("   🔄 Generating PRIMARY fields...")
-                
-                primary_names = [f["name"] for f in primary_fields if f.get("name")]
-                primary_allowed = {
-                    name: allowed_values.get(name, []) 
-                    for name in primary_names
-                }
-                primary_limits = {
-                    name: filtered_limits.get(name, {}) 
-                    for name in primary_names
-                }
-                
-                primary_result = self._generate_and_validate_characteristics_batched(
-                    image_description=image_description,
-                    charcs_meta_raw=primary_fields,
-                    limits=primary_limits,
-                    allowed_values=primary_allowed,
-                    detected_colors=detected_colors,
-                    fixed_data=fixed_data,
-                    subject_name=subject_name,
-                    log_callback=log,
-                    all_field_names=generate_field_names,
-                    conditional_skip=conditional_skip,
-                    locked_fields=list(locked_field_names),
-                )
-                
-                primary_charcs = primary_result["characteristics"]
-                log(f"   ✅ PRIMARY fields generated: {len(primary_charcs)}")
-            else:
-                primary_charcs = []
-            
-            # Filter SECONDARY fields based on conditional logic
-            log("   🔍 Filtering SECONDARY fields based on conditions...")
-            
-            filtered_secondary = DataLoader.filter_conditional_fields_by_context(
-                secondary_fields,
-                primary_charcs
-            )
-            
-            removed_count = len(secondary_fields) - len(filtered_secondary)
-            if removed_count > 0:
-                removed_names = [
-                    f.get("name") 
-                    for f in secondary_fields 
-                    if f not in filtered_secondary
-                ]
-                log(f"   ℹ️  Removed {removed_count} conditional fields: {removed_names}")
-            
-            # Generate SECONDARY fields
-            if filtered_secondary:
-                log(f"   🔄 Generating SECONDARY fields ({len(filtered_secondary)})...")
-                
-                secondary_names = [f["name"] for f in filtered_secondary if f.get("name")]
-                secondary_allowed = {
-                    name: allowed_values.get(name, []) 
-                    for name in secondary_names
-                }
-                secondary_limits = {
-                    name: filtered_limits.get(name, {}) 
-                    for name in secondary_names
-                }
-                
-                secondary_result = self._generate_and_validate_characteristics_batched(
-                    image_description=image_description,
-                    charcs_meta_raw=filtered_secondary,
-                    limits=secondary_limits,
-                    allowed_values=secondary_allowed,
-                    detected_colors=detected_colors,
-                    fixed_data=fixed_data,
-                    subject_name=subject_name,
-                    log_callback=log,
-                    all_field_names=generate_field_names,
-                    conditional_skip=conditional_skip,
-                    locked_fields=list(locked_field_names),
-                )
-                
-                secondary_charcs = secondary_result["characteristics"]
-                log(f"   ✅ SECONDARY fields generated: {len(secondary_charcs)}")
-            else:
-                secondary_charcs = []
-                secondary_result = {
-                    "score": 100,
-                    "iterations": 0,
-                    "issues": []
-                }
-            
-            # Combine results
-            ai_charcs_all = primary_charcs + secondary_charcs
-            
-            # Average scores
-            if primary_fields and filtered_secondary:
-                chars_score = int(
-                    (primary_result["score"] + secondary_result["score"]) / 2
-                )
-                chars_iterations = primary_result["iterations"] + secondary_result["iterations"]
-                chars_issues = primary_result["issues"] + secondary_result["issues"]
-            elif primary_fields:
-                chars_score = primary_result["score"]
-                chars_iterations = primary_result["iterations"]
-                chars_issues = primary_result["issues"]
-            elif filtered_secondary:
-                chars_score = secondary_result["score"]
-                chars_iterations = secondary_result["iterations"]
-                chars_issues = secondary_result["issues"]
-            else:
-                chars_score = 0
-                chars_iterations = 0
-                chars_issues = []
-
-            log(f"✅ Characteristics validated (score: {chars_score})")
 
             # ========================================
-            # Merge all characteristics
+            # DAG: har bir bosqich o'z kirishlarini e'lon qiladi,
+            # mustaqil bosqichlar parallel bajariladi:
+            #
+            #   fixed_row ─┐
+            #              ├─ plan ─ image_description ─┬─ colors ─ primary ─ secondary ─ merged ─┐
+            #   charcs ────┘                            └─ description ──────────────────────────┴─ title
             # ========================================
-            merged_charcs = self._build_full_characteristics(
-                charcs_meta_raw=charcs_meta_raw,
-                fixed_row=fixed_row,
-                ai_charcs=ai_charcs_all,
-                detected_colors=detected_colors,
-                fixed_fields=fixed_fields,
-                conditional_skip=conditional_skip,
-                conditional_fill=conditional_fill,
-            )
-
-            # ========================================
-            # Statistics
-            # ========================================
-            ai_filled = sum(1 for c in ai_charcs_all if c.get("value"))
-            fixed_filled = sum(
-                1
-                for c in merged_charcs
-                if c.get("name") in [f.get("name") for f in fixed_fields] and c.get("value")
-            )
-            total_filled = sum(1 for c in merged_charcs if c.get("value"))
-
-            total_fields = len(charcs_meta_raw)
-            required_fields = sum(1 for m in charcs_meta_raw if m.get("required"))
-            optional_fields = total_fields - required_fields
-
-            name_to_required = {
-                m.get("name"): bool(m.get("required"))
-                for m in charcs_meta_raw
-                if m.get("name")
-            }
-
-            required_filled = 0
-            for ch in merged_charcs:
-                name = ch.get("name")
-                if not name or not name_to_required.get(name):
-                    continue
-                val = ch.get("value")
-                if isinstance(val, list):
-                    is_filled = any(str(v).strip() for v in val)
-                else:
-                    is_filled = bool(str(val or "").strip())
-                if is_filled:
-                    required_filled += 1
-
-            required_missing = required_fields - required_filled
-            ai_target_fields = len(generate_fields_for_ai)
-            final_charcs = merged_charcs
-
-            # ========================================
-            # STEP 4: Description Generation
-            # ========================================
-            log("\n📝 STEP 4: Description generation + validation...")
-            
-            wb_description_result = self.description_service.generate_description(
-                image_description=image_description,
-                max_iterations=3
-            )
-            
-            log(f"✅ Description: {len(wb_description_result['new_description'])} chars (score: {wb_description_result['score']})")
-            time.sleep(1)
-            
-            # ========================================
-            # STEP 5: Title Generation
-            # ========================================
-            log("\n🏷️  STEP 5: Title generation + validation...")
-            
-            wb_title_result = self.description_service.generate_title(
-                subject_name=subject_name,
-                characteristics=final_charcs,
-                description=wb_description_result["new_description"],
-                max_iterations=3
-            )
-            
-            log(f"✅ Title: {wb_title_result['new_title']} (score: {wb_title_result['score']})")
+            engine = PipelineEngine([
+                PipelineStage(
+                    "fixed_row",
+                    lambda: self.fixed_repo.get_by_artikul(article),
+                ),
+                PipelineStage(
+                    "charcs_meta_raw",
+                    lambda: self.wb_repo.get_subject_charcs(subject_id),
+                ),
+                PipelineStage(
+                    "plan",
+                    lambda fixed_row, charcs_meta_raw: self._build_article_plan(
+                        card, subject_id, fixed_row, charcs_meta_raw, log
+                    ),
+                    requires=("fixed_row", "charcs_meta_raw"),
+                ),
+                PipelineStage(
+                    "image_description",
+                    lambda plan: self._stage_analyze_images(card, subject_name, plan, log),
+                    requires=("plan",),
+                ),
+                PipelineStage(
+                    "detected_colors",
+                    lambda image_description: self._stage_detect_colors(image_description, log),
+                    requires=("image_description",),
+                ),
+                PipelineStage(
+                    "primary",
+                    lambda plan, image_description, detected_colors: self._stage_generate_primary(
+                        plan, image_description, detected_colors, subject_name, log
+                    ),
+                    requires=("plan", "image_description", "detected_colors"),
+                ),
+                PipelineStage(
+                    "secondary",
+                    lambda plan, image_description, detected_colors, primary: self._stage_generate_secondary(
+                        plan, image_description, detected_colors, primary, subject_name, log
+                    ),
+                    requires=("plan", "image_description", "detected_colors", "primary"),
+                ),
+                PipelineStage(
+                    "merged",
+                    lambda plan, detected_colors, primary, secondary: self._stage_merge_characteristics(
+                        plan, detected_colors, primary, secondary, log
+                    ),
+                    requires=("plan", "detected_colors", "primary", "secondary"),
+                ),
+                PipelineStage(
+                    "description",
+                    lambda image_description: self._stage_generate_description(image_description, log),
+                    requires=("image_description",),
+                ),
+                PipelineStage(
+                    "title",
+                    lambda merged, description: self._stage_generate_title(
+                        subject_name, merged, description, log
+                    ),
+                    requires=("merged", "description"),
+                ),
+            ])
+
+            ctx = await engine.run()
+
+            plan = ctx["plan"]
+            primary = ctx["primary"]
+            secondary = ctx["secondary"]
+            merged = ctx["merged"]
+            wb_description_result = ctx["description"]
+            wb_title_result = ctx["title"]
 
             # ========================================
             # Final Response
@@ -413,20 +244,20 @@ class PipelineService:
                 "old_description": card.get("description"),
                 "old_characteristics": card.get("characteristics") or [],
 
-                "photo_urls": photo_urls,
-                "image_description": image_description,
+                "photo_urls": plan["photo_urls"],
+                "image_description": ctx["image_description"],
 
                 "new_title": wb_title_result["new_title"],
                 "new_description": wb_description_result["new_description"],
-                "new_characteristics": final_charcs,
+                "new_characteristics": merged["characteristics"],
                 
-                "conditional_skip_fields": conditional_skip,
+                "conditional_skip_fields": plan["conditional_skip"],
 
-                "detected_colors": detected_colors,
+                "detected_colors": ctx["detected_colors"],
 
-                "validation_score": chars_score,
-                "validation_issues": chars_issues,
-                "iterations_done": chars_iterations,
+                "validation_score": merged["score"],
+                "validation_issues": merged["issues"],
+                "iterations_done": merged["iterations"],
 
                 "title_history": wb_title_result.get("history", []),
                 "title_warnings": wb_title_result["warnings"],
@@ -438,25 +269,17 @@ class PipelineService:
                 "description_score": wb_description_result["score"],
                 "description_attempts": wb_description_result["attempts"],
 
-                "fixed_row": fixed_row,
+                "fixed_row": ctx["fixed_row"],
 
                 "stats": {
-                    "fixed_fields": len(fixed_fields),
-                    "conditional_skip": len(conditional_skip),
-                    "conditional_fill": len(conditional_fill),
-                    "generated_fields": len(generate_fields_for_ai),
-                    "primary_fields_generated": len(primary_fields),
-                    "secondary_fields_generated": len(filtered_secondary),
-                    "conditional_fields_removed": removed_count if filtered_secondary else 0,
-                    "total_fields": total_fields,
-                    "required_fields": required_fields,
-                    "optional_fields": optional_fields,
-                    "required_filled": required_filled,
-                    "required_missing": required_missing,
-                    "ai_target_fields": ai_target_fields,
-                    "ai_filled": ai_filled,
-                    "fixed_filled": fixed_filled,
-                    "total_filled": total_filled,
+                    "fixed_fields": len(plan["fixed_fields"]),
+                    "conditional_skip": len(plan["conditional_skip"]),
+                    "conditional_fill": len(plan["conditional_fill"]),
+                    "generated_fields": len(plan["generate_fields_for_ai"]),
+                    "primary_fields_generated": len(plan["primary_fields"]),
+                    "secondary_fields_generated": len(secondary["fields"]),
+                    "conditional_fields_removed": secondary["removed_count"] if secondary["fields"] else 0,
+                    **merged["stats"],
                 }
             }
         
@@ -484,6 +307,356 @@ class PipelineService:
                 "traceback": traceback.format_exc()
             }
 
+    # ========================================
+    # Pipeline bosqichlari (PipelineEngine uchun)
+    # ========================================
+
+    def _build_article_plan(
+        self,
+        card: Dict[str, Any],
+        subject_id: int,
+        fixed_row: Dict[str, Any],
+        charcs_meta_raw: list,
+        log: Callable[[str], None],
+    ) -> Dict[str, Any]:
+        fixed_data = self._build_fixed_data_dict(fixed_row)
+        photo_urls = self.cards_repo.extract_photo_urls(card)
+
+        gender = self._extract_gender_from_card(card)
+
+        # Subject bo'yicha qism keshlanadi – batch'da bir subject uchun bir marta
+        subject_plan = get_subject_plan_cache().get(
+            subject_id, gender, charcs_meta_raw, self.PRIMARY_FIELD_NAMES
+        )
+        plan = subject_plan.for_article(fixed_data)
+
+        fields_without_dict = {
+            name for name in plan["generate_field_names"]
+            if not plan["allowed_values"].get(name)
+        }
+        if fields_without_dict:
+            log(f"ℹ️  Text fields (no dictionary): {len(fields_without_dict)}")
+
+        plan.update({
+            "charcs_meta_raw": charcs_meta_raw,
+            "fixed_row": fixed_row,
+            "fixed_data": fixed_data,
+            "photo_urls": photo_urls,
+        })
+        return plan
+
+    def _stage_analyze_images(
+        self,
+        card: Dict[str, Any],
+        subject_name: Optional[str],
+        plan: Dict[str, Any],
+        log: Callable[[str], None],
+    ) -> str:
+        log("\n🖼️  STEP 1: Analyzing images...")
+
+        image_description = self.image_analyzer.analyze_images(
+            photo_urls=plan["photo_urls"][:2],
+            subject_name=subject_name,
+            log_callback=log,
+            target_char_names=plan["generate_field_names"],
+        )
+
+        log(f"✅ Image analysis: {len(image_description)} chars")
+        return image_description
+
+    def _stage_detect_colors(
+        self,
+        image_description: str,
+        log: Callable[[str], None],
+    ) -> List[str]:
+        log("\n🎨 STEP 2: Color detection + validation...")
+
+        color_result = self.color_service.detect_colors_from_text(
+            image_description=image_description,
+            log_callback=log
+        )
+
+        if isinstance(color_result, tuple):
+            detected_colors, allowed_colors = color_result
+        else:
+            detected_colors = color_result
+            allowed_colors = []
+
+        if isinstance(detected_colors, dict):
+            detected_colors = detected_colors.get("colors", [])
+        elif not isinstance(detected_colors, list):
+            detected_colors = []
+
+        normalized_colors = []
+        for c in detected_colors:
+            cs = str(c).strip()
+            if cs and cs not in normalized_colors:
+                normalized_colors.append(cs)
+        detected_colors = normalized_colors[:5]
+
+        log(f"✅ Colors detected: {detected_colors}")
+        return detected_colors
+
+    def _stage_generate_primary(
+        self,
+        plan: Dict[str, Any],
+        image_description: str,
+        detected_colors: List[str],
+        subject_name: Optional[str],
+        log: Callable[[str], None],
+    ) -> Dict[str, Any]:
+        log("\n⚙️  STEP 3: Generating characteristics...")
+
+        primary_fields = plan["primary_fields"]
+
+        log(f"   📍 Primary fields (dependencies): {len(primary_fields)}")
+        log(f"   📍 Secondary fields: {len(plan['secondary_fields'])}")
+
+        if not primary_fields:
+            return {"characteristics": [], "score": 0, "iterations": 0, "issues": []}
+
+        log("   🔄 Generating PRIMARY fields...")
+
+        primary_result = self._generate_fields_group(
+            plan, primary_fields, image_description, detected_colors, subject_name, log
+        )
+
+        log(f"   ✅ PRIMARY fields generated: {len(primary_result['characteristics'])}")
+        return primary_result
+
+    def _stage_generate_secondary(
+        self,
+        plan: Dict[str, Any],
+        image_description: str,
+        detected_colors: List[str],
+        primary: Dict[str, Any],
+        subject_name: Optional[str],
+        log: Callable[[str], None],
+    ) -> Dict[str, Any]:
+        secondary_fields = plan["secondary_fields"]
+
+        # Filter SECONDARY fields based on conditional logic
+        log("   🔍 Filtering SECONDARY fields based on conditions...")
+
+        filtered_secondary = DataLoader.filter_conditional_fields_by_context(
+            secondary_fields,
+            primary["characteristics"]
+        )
+
+        removed_count = len(secondary_fields) - len(filtered_secondary)
+        if removed_count > 0:
+            removed_names = [
+                f.get("name")
+                for f in secondary_fields
+                if f not in filtered_secondary
+            ]
+            log(f"   ℹ️  Removed {removed_count} conditional fields: {removed_names}")
+
+        if not filtered_secondary:
+            return {
+                "characteristics": [],
+                "score": 100,
+                "iterations": 0,
+                "issues": [],
+                "fields": [],
+                "removed_count": removed_count,
+            }
+
+        log(f"   🔄 Generating SECONDARY fields ({len(filtered_secondary)})...")
+
+        secondary_result = self._generate_fields_group(
+            plan, filtered_secondary, image_description, detected_colors, subject_name, log
+        )
+
+        log(f"   ✅ SECONDARY fields generated: {len(secondary_result['characteristics'])}")
+
+        secondary_result["fields"] = filtered_secondary
+        secondary_result["removed_count"] = removed_count
+        return secondary_result
+
+    def _generate_fields_group(
+        self,
+        plan: Dict[str, Any],
+        fields: List[Dict[str, Any]],
+        image_description: str,
+        detected_colors: List[str],
+        subject_name: Optional[str],
+        log: Callable[[str], None],
+    ) -> Dict[str, Any]:
+        names = [f["name"] for f in fields if f.get("name")]
+        group_allowed = {
+            name: plan["allowed_values"].get(name, [])
+            for name in names
+        }
+        group_limits = {
+            name: plan["filtered_limits"].get(name, {})
+            for name in names
+        }
+
+        return self._generate_and_validate_characteristics_batched(
+            image_description=image_description,
+            charcs_meta_raw=fields,
+            limits=group_limits,
+            allowed_values=group_allowed,
+            detected_colors=detected_colors,
+            fixed_data=plan["fixed_data"],
+            subject_name=subject_name,
+            log_callback=log,
+            all_field_names=plan["generate_field_names"],
+            conditional_skip=plan["conditional_skip"],
+            locked_fields=list(plan["locked_field_names"]),
+        )
+
+    def _stage_merge_characteristics(
+        self,
+        plan: Dict[str, Any],
+        detected_colors: List[str],
+        primary: Dict[str, Any],
+        secondary: Dict[str, Any],
+        log: Callable[[str], None],
+    ) -> Dict[str, Any]:
+        primary_charcs = primary["characteristics"]
+        secondary_charcs = secondary["characteristics"]
+        has_primary = bool(plan["primary_fields"])
+        has_secondary = bool(secondary["fields"])
+
+        # Combine results
+        ai_charcs_all = primary_charcs + secondary_charcs
+
+        # Average scores
+        if has_primary and has_secondary:
+            chars_score = int(
+                (primary["score"] + secondary["score"]) / 2
+            )
+            chars_iterations = primary["iterations"] + secondary["iterations"]
+            chars_issues = primary["issues"] + secondary["issues"]
+        elif has_primary:
+            chars_score = primary["score"]
+            chars_iterations = primary["iterations"]
+            chars_issues = primary["issues"]
+        elif has_secondary:
+            chars_score = secondary["score"]
+            chars_iterations = secondary["iterations"]
+            chars_issues = secondary["issues"]
+        else:
+            chars_score = 0
+            chars_iterations = 0
+            chars_issues = []
+
+        log(f"✅ Characteristics validated (score: {chars_score})")
+
+        charcs_meta_raw = plan["charcs_meta_raw"]
+        fixed_fields = plan["fixed_fields"]
+
+        # ========================================
+        # Merge all characteristics
+        # ========================================
+        merged_charcs = self._build_full_characteristics(
+            charcs_meta_raw=charcs_meta_raw,
+            fixed_row=plan["fixed_row"],
+            ai_charcs=ai_charcs_all,
+            detected_colors=detected_colors,
+            fixed_fields=fixed_fields,
+            conditional_skip=plan["conditional_skip"],
+            conditional_fill=plan["conditional_fill"],
+        )
+
+        # ========================================
+        # Statistics
+        # ========================================
+        ai_filled = sum(1 for c in ai_charcs_all if c.get("value"))
+        fixed_names = {f.get("name") for f in fixed_fields}
+        fixed_filled = sum(
+            1
+            for c in merged_charcs
+            if c.get("name") in fixed_names and c.get("value")
+        )
+        total_filled = sum(1 for c in merged_charcs if c.get("value"))
+
+        total_fields = len(charcs_meta_raw)
+        required_fields = sum(1 for m in charcs_meta_raw if m.get("required"))
+        optional_fields = total_fields - required_fields
+
+        name_to_required = {
+            m.get("name"): bool(m.get("required"))
+            for m in charcs_meta_raw
+            if m.get("name")
+        }
+
+        required_filled = 0
+        for ch in merged_charcs:
+            name = ch.get("name")
+            if not name or not name_to_required.get(name):
+                continue
+            val = ch.get("value")
+            if isinstance(val, list):
+                is_filled = any(str(v).strip() for v in val)
+            else:
+                is_filled = bool(str(val or "").strip())
+            if is_filled:
+                required_filled += 1
+
+        required_missing = required_fields - required_filled
+
+        return {
+            "characteristics": merged_charcs,
+            "score": chars_score,
+            "iterations": chars_iterations,
+            "issues": chars_issues,
+            "stats": {
+                "total_fields": total_fields,
+                "required_fields": required_fields,
+                "optional_fields": optional_fields,
+                "required_filled": required_filled,
+                "required_missing": required_missing,
+                "ai_target_fields": len(plan["generate_fields_for_ai"]),
+                "ai_filled": ai_filled,
+                "fixed_filled": fixed_filled,
+                "total_filled": total_filled,
+            },
+        }
+
+    def _stage_generate_description(
+        self,
+        image_description: str,
+        log: Callable[[str], None],
+    ) -> Dict[str, Any]:
+        # ========================================
+        # STEP 4: Description Generation
+        # faqat image_description kerak – rang/xarakteristikalar bilan parallel
+        # ========================================
+        log("\n📝 STEP 4: Description generation + validation...")
+
+        wb_description_result = self.description_service.generate_description(
+            image_description=image_description,
+            max_iterations=3
+        )
+
+        log(f"✅ Description: {len(wb_description_result['new_description'])} chars (score: {wb_description_result['score']})")
+        return wb_description_result
+
+    def _stage_generate_title(
+        self,
+        subject_name: Optional[str],
+        merged: Dict[str, Any],
+        description: Dict[str, Any],
+        log: Callable[[str], None],
+    ) -> Dict[str, Any]:
+        # ========================================
+        # STEP 5: Title Generation
+        # ========================================
+        log("\n🏷️  STEP 5: Title generation + validation...")
+
+        wb_title_result = self.description_service.generate_title(
+            subject_name=subject_name,
+            characteristics=merged["characteristics"],
+            description=description["new_description"],
+            max_iterations=3
+        )
+
+        log(f"✅ Title: {wb_title_result['new_title']} (score: {wb_title_result['score']})")
+        return wb_title_result
+
     def _extract_gender_from_card(self, card: Dict[str, Any]) -> Optional[str]:
         characteristics = card.get("characteristics", [])
         for char in characteristics:
@@ -563,7 +736,17 @@ class PipelineService:
         all_field_names: List[str] = None,
         conditional_skip: List[Dict[str, Any]] = None,
         locked_fields: List[str] = None,
+        max_concurrency: Optional[int] = None,
     ) -> Dict[str, Any]:
+        """
+        Maydonlarni batch_size bo'yicha bo'lib generatsiya + validatsiya qiladi.
+
+        Batch'lar final merge'gacha umumiy holatga ega emas, shuning uchun
+        max_concurrency > 1 bo'lsa ular parallel ishlaydi (default:
+        settings.CHARCS_BATCH_CONCURRENCY). Natijalar har doim batch
+        tartibida birlashtiriladi – parallel va ketma-ket rejim bir xil
+        ko'rinishdagi natija beradi.
+        """
 
         def log(msg: str):
             if log_callback:
@@ -578,161 +761,195 @@ class PipelineService:
         total_fields = len(charcs_meta_raw)
         log(f"  🔧 AI fields to generate (batched): {total_fields}")
 
+        batches = [
+            (start // batch_size + 1, start, charcs_meta_raw[start:start + batch_size])
+            for start in range(0, total_fields, batch_size)
+        ]
+
+        if max_concurrency is None:
+            max_concurrency = settings.CHARCS_BATCH_CONCURRENCY
+        workers = max(1, min(max_concurrency or 1, len(batches)))
+
+        def run_batch(batch: tuple) -> Dict[str, Any]:
+            batch_no, start, batch_meta = batch
+            return self._run_characteristics_batch(
+                batch_no=batch_no,
+                start=start,
+                batch_meta=batch_meta,
+                image_description=image_description,
+                limits=limits,
+                allowed_values=allowed_values,
+                detected_colors=detected_colors,
+                fixed_data=fixed_data,
+                subject_name=subject_name,
+                all_field_names=all_field_names,
+                skip_names=skip_names,
+                locked_fields=locked_fields,
+                log=log,
+            )
+
+        if workers > 1:
+            log(f"  ⚡ Running {len(batches)} batches in parallel (max {workers})")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # map() natijalarni kiritilgan tartibda qaytaradi – merge deterministik
+                batch_results = list(executor.map(run_batch, batches))
+        else:
+            batch_results = [run_batch(b) for b in batches]
+
         all_charcs: List[Dict[str, Any]] = []
         batch_scores: List[int] = []
         all_issues: List[Any] = []
         total_iterations = 0
 
-        def is_empty_value(char: Dict[str, Any]) -> bool:
-            v = char.get("value")
-            if v is None:
-                return True
-            if isinstance(v, str):
-                return not v.strip()
-            if isinstance(v, list):
-                return not [str(x).strip() for x in v if str(x).strip()]
-            return not str(v).strip()
-
-        for start in range(0, total_fields, batch_size):
-            end = min(start + batch_size, total_fields)
-            batch_meta = charcs_meta_raw[start:end]
-            batch_names = [m.get("name") for m in batch_meta if m.get("name")]
-
-            log(
-                f"  ▶️ Batch {start // batch_size + 1}: fields {start+1}-{end} ({len(batch_meta)} items)"
-            )
+        for batch_result in batch_results:
+            all_charcs.extend(batch_result["characteristics"])
+            batch_scores.append(batch_result["score"])
+            all_issues.extend(batch_result["issues"])
+            total_iterations += batch_result["iterations"]
 
-            batch_limits: Dict[str, Dict[str, int]] = {
-                name: limits.get(name, {}) for name in batch_names
-            }
-            batch_allowed: Dict[str, List[str]] = {
-                name: allowed_values.get(name, []) for name in batch_names
-            }
+        overall_score = int(sum(batch_scores) / len(batch_scores)) if batch_scores else 0
 
-            strict_instructions = {}
-            for name in batch_names:
-                vals = batch_allowed.get(name, [])
-                lims = batch_limits.get(name, {})
-                max_count = (
-                    lims.get("max") or lims.get("maxCount") or lims.get("max_count") or 99
-                )
+        # Fixed data fallback
+        if fixed_data:
+            for ch in all_charcs:
+                name = ch.get("name")
+                if not name:
+                    continue
+                if name in fixed_data and self._is_empty_value(ch):
+                    ch["value"] = list(fixed_data[name])
 
-                if vals:
-                    strict_instructions[name] = {
-                        "allowed_count": len(vals),
-                        "max_count": max_count,
-                        "sample_values": vals[:10],  # Birinchi 10 ta misol
-                        "rule": f"FAQAT {len(vals)} ta qiymatdan tanlash. Max {max_count} ta.",
-                    }
-                else:
-                    strict_instructions[name] = {
-                        "type": "free_text",
-                        "max_count": max_count,
-                        "rule": f"Free text. Max {max_count} ta element.",
-                    }
+        return {
+            "characteristics": all_charcs,
+            "score": overall_score,
+            "iterations": total_iterations,
+            "issues": all_issues,
+        }
 
-            def process_batch(
-                batch_meta_local: list, batch_names_local: List[str]
-            ) -> Dict[str, Any]:
-                # GENERATSIYA
-                ai_charcs_batch = self.characteristics_generator.generate_characteristics(
-                    image_description=image_description,
-                    charcs_meta_raw=batch_meta_local,
-                    limits=batch_limits,
-                    allowed_values=batch_allowed,
-                    detected_colors=detected_colors,
-                    fixed_data=fixed_data,
-                    subject_name=subject_name,
-                    log_callback=log,
-                    all_field_names=all_field_names,  # CONTEXT
-                )
+    @staticmethod
+    def _is_empty_value(char: Dict[str, Any]) -> bool:
+        v = char.get("value")
+        if v is None:
+            return True
+        if isinstance(v, str):
+            return not v.strip()
+        if isinstance(v, list):
+            return not [str(x).strip() for x in v if str(x).strip()]
+        return not str(v).strip()
+
+    def _run_characteristics_batch(
+        self,
+        batch_no: int,
+        start: int,
+        batch_meta: list,
+        image_description: str,
+        limits: Dict[str, Dict[str, int]],
+        allowed_values: Dict[str, List[str]],
+        detected_colors: List[str],
+        fixed_data: Dict[str, List[str]],
+        subject_name: Optional[str],
+        all_field_names: Optional[List[str]],
+        skip_names: set,
+        locked_fields: List[str],
+        log: Callable[[str], None],
+    ) -> Dict[str, Any]:
+        end = start + len(batch_meta)
+        batch_names = [m.get("name") for m in batch_meta if m.get("name")]
 
-                # VALIDATSIYA
-                validation = self.characteristics_validator.validate_characteristics(
-                    characteristics=ai_charcs_batch,
-                    charcs_meta_raw=batch_meta_local,
-                    limits=batch_limits,
-                    allowed_values=batch_allowed,
-                    locked_fields=locked_fields,
-                    log_callback=log,
-                )
-                return validation
-
-            validation_result = process_batch(batch_meta, batch_names)
-            batch_charcs = validation_result["characteristics"]
-            batch_score = validation_result["score"]
-            batch_issues = validation_result["issues"]
-            batch_iterations = validation_result["iterations"]
-
-            # Check missing fields
-            got_nonempty_names = set()
-            for c in batch_charcs:
-                nm = c.get("name")
-                if not nm:
-                    continue
-                if is_empty_value(c):
-                    continue
-                got_nonempty_names.add(nm)
+        log(
+            f"  ▶️ Batch {batch_no}: fields {start+1}-{end} ({len(batch_meta)} items)"
+        )
 
-            expected_names = {n for n in batch_names if n}
-            missing = expected_names - got_nonempty_names
+        batch_limits: Dict[str, Dict[str, int]] = {
+            name: limits.get(name, {}) for name in batch_names
+        }
+        batch_allowed: Dict[str, List[str]] = {
+            name: allowed_values.get(name, []) for name in batch_names
+        }
 
-            if missing:
-                log(f"  ⚠️ Missing fields in batch: {missing}")
+        def process_batch(batch_meta_local: list) -> Dict[str, Any]:
+            # GENERATSIYA
+            ai_charcs_batch = self.characteristics_generator.generate_characteristics(
+                image_description=image_description,
+                charcs_meta_raw=batch_meta_local,
+                limits=batch_limits,
+                allowed_values=batch_allowed,
+                detected_colors=detected_colors,
+                fixed_data=fixed_data,
+                subject_name=subject_name,
+                log_callback=log,
+                all_field_names=all_field_names,  # CONTEXT
+            )
 
-                should_retry = missing - skip_names
-                should_ignore = missing & skip_names
+            # VALIDATSIYA
+            validation = self.characteristics_validator.validate_characteristics(
+                characteristics=ai_charcs_batch,
+                charcs_meta_raw=batch_meta_local,
+                limits=batch_limits,
+                allowed_values=batch_allowed,
+                locked_fields=locked_fields,
+                log_callback=log,
+            )
+            return validation
+
+        validation_result = process_batch(batch_meta)
+        batch_charcs = validation_result["characteristics"]
+        batch_score = validation_result["score"]
+        batch_issues = list(validation_result["issues"])
+        batch_iterations = validation_result["iterations"]
+
+        # Check missing fields
+        got_nonempty_names = set()
+        for c in batch_charcs:
+            nm = c.get("name")
+            if not nm:
+                continue
+            if self._is_empty_value(c):
+                continue
+            got_nonempty_names.add(nm)
 
-                if should_ignore:
-                    log(f"  ℹ️ Ignoring conditional_skip fields: {should_ignore}")
+        expected_names = {n for n in batch_names if n}
+        missing = expected_names - got_nonempty_names
 
-                if not should_retry:
-                    log(f"  ✅ All missing fields are conditional_skip, continuing...")
-                else:
-                    log(f"  🔄 Retrying only for: {should_retry}")
+        if missing:
+            log(f"  ⚠️ Missing fields in batch {batch_no}: {missing}")
 
-                    retry_meta = [m for m in batch_meta if m.get("name") in should_retry]
+            should_retry = missing - skip_names
+            should_ignore = missing & skip_names
 
-                    if retry_meta:
-                        retry_validation = process_batch(retry_meta, list(should_retry))
-                        retry_charcs = retry_validation["characteristics"]
+            if should_ignore:
+                log(f"  ℹ️ Ignoring conditional_skip fields: {should_ignore}")
 
-                        got_names_after = {
-                            c.get("name") for c in batch_charcs if c.get("name")
-                        }
-                        for ch in retry_charcs:
-                            nm = ch.get("name")
-                            if nm and nm not in got_names_after:
-                                batch_charcs.append(ch)
-                                got_names_after.add(nm)
+            if not should_retry:
+                log(f"  ✅ All missing fields are conditional_skip, continuing...")
+            else:
+                log(f"  🔄 Retrying only for: {should_retry}")
 
-                        batch_score = max(batch_score, retry_validation["score"])
-                        batch_issues.extend(retry_validation["issues"])
-                        batch_iterations += retry_validation["iterations"]
+                retry_meta = [m for m in batch_meta if m.get("name") in should_retry]
 
-            all_charcs.extend(batch_charcs)
-            batch_scores.append(batch_score)
-            all_issues.extend(batch_issues)
-            total_iterations += batch_iterations
+                if retry_meta:
+                    retry_validation = process_batch(retry_meta)
+                    retry_charcs = retry_validation["characteristics"]
 
-            log(f"  ✅ Batch done: score={batch_score}, fields={len(batch_charcs)}")
+                    got_names_after = {
+                        c.get("name") for c in batch_charcs if c.get("name")
+                    }
+                    for ch in retry_charcs:
+                        nm = ch.get("name")
+                        if nm and nm not in got_names_after:
+                            batch_charcs.append(ch)
+                            got_names_after.add(nm)
 
-        overall_score = int(sum(batch_scores) / len(batch_scores)) if batch_scores else 0
+                    batch_score = max(batch_score, retry_validation["score"])
+                    batch_issues.extend(retry_validation["issues"])
+                    batch_iterations += retry_validation["iterations"]
 
-        # Fixed data fallback
-        if fixed_data:
-            for ch in all_charcs:
-                name = ch.get("name")
-                if not name:
-                    continue
-                if name in fixed_data and is_empty_value(ch):
-                    ch["value"] = list(fixed_data[name])
+        log(f"  ✅ Batch {batch_no} done: score={batch_score}, fields={len(batch_charcs)}")
 
         return {
-            "characteristics": all_charcs,
-            "score": overall_score,
-            "iterations": total_iterations,
-            "issues": all_issues,
+            "characteristics": batch_charcs,
+            "score": batch_score,
+            "issues": batch_issues,
+            "iterations": batch_iterations,
         }
 
     def _build_full_characteristics(
@@ -807,12 +1024,14 @@ class PipelineService:
             meta_id = meta.get("charcID")
 
             # CONDITIONAL SKIP → doim bo‘sh
+            # (clear=True – nashrda kartadagi qiymat ham o'chiriladi)
             if meta_id in skip_ids:
                 full_result.append(
                     {
                         "id": meta_id,
                         "name": name,
                         "value": [],
+                        "clear": True,
                     }
                 )
                 continue
@@ -921,6 +1140,7 @@ class PipelineService:
                     for ch in full_charcs:
                         if ch.get("name") == target_name:
                             ch["value"] = []
+                            ch["clear"] = True
                             break
 
             return full_charcs
\ No newline at end of file
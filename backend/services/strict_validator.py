@@ -1,11 +1,10 @@
 import json
 import re
 from typing import Dict, Any, List, Tuple
-import httpx
-from openai import OpenAI
-import requests
 
 from core.config import settings
+from core.http_clients import get_openai_client, get_requests_session
+from core.rate_limit import get_openai_limiter
 
 
 class StrictValidatorService:
@@ -24,7 +23,7 @@ class StrictValidatorService:
     }
 
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = get_openai_client()
     
     def validate_title_strict(
         self,
@@ -322,8 +321,23 @@ class StrictValidatorService:
             "response_format": {"type": "json_object"},
         }
         
-        resp = requests.post(url, headers=headers, json=body, timeout=180)
-        
+        limiter = get_openai_limiter()
+        estimated_tokens = limiter.estimate_tokens(
+            text_chars=len(system_prompt) + len(user_message),
+            image_count=0,
+            max_tokens=body["max_completion_tokens"],
+        )
+        with limiter.limit_sync(estimated_tokens) as slot:
+            resp = get_requests_session("openai").post(
+                url, headers=headers, json=body, timeout=settings.OPENAI_TIMEOUT
+            )
+            limiter.update_from_headers(resp.headers)
+            if resp.status_code == 200:
+                slot.settle((resp.json().get("usage") or {}).get("total_tokens"))
+
+        if resp.status_code == 429:
+            limiter.backoff(limiter.retry_after_from_headers(resp.headers) or 2.0)
+
         if resp.status_code != 200:
             raise ValueError(f"OpenAI error {resp.status_code}: {resp.text}")
         
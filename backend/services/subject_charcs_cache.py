@@ -0,0 +1,206 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.config import settings
+
+
+CharcsFetcher = Callable[[int], List[Dict[str, Any]]]
+
+
+class SubjectCharcsCache:
+    """
+    WB subject characteristics meta (content/v2/object/charcs/{id}) keshi.
+
+    - xotirada TTL bilan saqlanadi, TTL o'tsa eski qiymat darhol qaytadi
+      va fon thread'da yangilanadi (stale-while-revalidate)
+    - bir subject uchun bir vaqtda faqat bitta WB so'rov (single-flight)
+    - har muvaffaqiyatli javob diskka snapshot qilinadi
+      (DATA_DIR/subject_charcs/{id}.json); restartdan keyin yoki WB
+      ishlamay qolganda shu snapshot ishlatiladi
+    - umuman hech narsa bo'lmasa – data/charcs/{id}.json config'idan
+    """
+
+    def __init__(self, snapshot_dir: Path, ttl_seconds: int):
+        self.snapshot_dir = Path(snapshot_dir)
+        self.ttl_seconds = ttl_seconds
+
+        # subject_id -> (charcs, fetched_at)
+        self._entries: Dict[int, Tuple[List[Dict[str, Any]], float]] = {}
+        self._inflight: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="charcs-refresh")
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    # ===== PUBLIC =====
+
+    def get(self, subject_id: int, fetch: CharcsFetcher) -> List[Dict[str, Any]]:
+        subject_id = int(subject_id)
+
+        entry = self._entries.get(subject_id)
+        if entry is None:
+            entry = self._load_snapshot(subject_id)
+            if entry is not None:
+                with self._lock:
+                    self._entries.setdefault(subject_id, entry)
+
+        if entry is not None:
+            charcs, fetched_at = entry
+            if time.time() - fetched_at < self.ttl_seconds:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._refresh_in_background(subject_id, fetch)
+            return self._copy(charcs)
+
+        self.misses += 1
+        try:
+            return self._copy(self._fetch_single_flight(subject_id, fetch))
+        except Exception as e:
+            fallback = self._load_from_subject_config(subject_id)
+            if fallback is None:
+                raise
+            print(f"⚠️ WB charcs for subject {subject_id} unavailable ({e}), using data/charcs config")
+            return self._copy(fallback)
+
+    def invalidate(self, subject_id: Optional[int] = None) -> None:
+        with self._lock:
+            if subject_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(int(subject_id), None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subjects": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    # ===== FETCH =====
+
+    def _fetch_single_flight(self, subject_id: int, fetch: CharcsFetcher) -> List[Dict[str, Any]]:
+        with self._lock:
+            future = self._inflight.get(subject_id)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[subject_id] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            charcs = fetch(subject_id)
+            fetched_at = time.time()
+            with self._lock:
+                self._entries[subject_id] = (charcs, fetched_at)
+            self._save_snapshot(subject_id, charcs, fetched_at)
+            future.set_result(charcs)
+            return charcs
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(subject_id, None)
+
+    def _refresh_in_background(self, subject_id: int, fetch: CharcsFetcher) -> None:
+        if subject_id in self._inflight:
+            return
+
+        def refresh():
+            try:
+                self._fetch_single_flight(subject_id, fetch)
+            except Exception as e:
+                # Eski qiymat/snapshot ishlatilishda davom etadi
+                print(f"⚠️ WB charcs refresh failed for subject {subject_id}: {e}")
+
+        self._refresher.submit(refresh)
+
+    # ===== SNAPSHOT =====
+
+    def _snapshot_path(self, subject_id: int) -> Path:
+        return self.snapshot_dir / f"{subject_id}.json"
+
+    def _load_snapshot(self, subject_id: int) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        path = self._snapshot_path(subject_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["charcs"], float(data.get("fetched_at", 0))
+        except Exception as e:
+            print(f"⚠️ Broken charcs snapshot {path}: {e}")
+            return None
+
+    def _save_snapshot(self, subject_id: int, charcs: List[Dict[str, Any]], fetched_at: float) -> None:
+        path = self._snapshot_path(subject_id)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"subject_id": subject_id, "fetched_at": fetched_at, "charcs": charcs},
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Failed to write charcs snapshot {path}: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _load_from_subject_config(subject_id: int) -> Optional[List[Dict[str, Any]]]:
+        config_path = settings.DATA_DIR / "charcs" / f"{subject_id}.json"
+        if not config_path.exists():
+            return None
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        except Exception:
+            return None
+
+        return [
+            {
+                "charcID": item["charcID"],
+                "name": item["name"],
+                "required": item.get("required", False),
+            }
+            for item in config.get("characteristics", [])
+            if "charcID" in item and "name" in item
+        ] or None
+
+    @staticmethod
+    def _copy(charcs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Chaqiruvchilar ro'yxatni o'zgartirsa ham kesh buzilmasin
+        return [dict(item) for item in charcs]
+
+
+_cache: Optional[SubjectCharcsCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_subject_charcs_cache() -> SubjectCharcsCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SubjectCharcsCache(
+                    snapshot_dir=settings.SUBJECT_CHARCS_SNAPSHOT_DIR,
+                    ttl_seconds=settings.SUBJECT_CHARCS_TTL_SECONDS,
+                )
+    return _cache
@@ -0,0 +1,252 @@
+# services/subject_plan.py
+"""
+Subject bo'yicha oldindan kompilyatsiya qilingan pipeline rejasi.
+
+process_article har safar bir xil narsalarni hisoblardi: config_chars indeksi,
+fixed / conditional / generate bo'linishi, locked maydonlar, allowed_values,
+limitlar, primary / secondary bo'linishi. Bularning hammasi faqat
+(subject_id, gender, DATA_DIR versiyasi, WB charcs meta) ga
+bog'liq – SubjectPlan shu kalit bo'yicha bir marta quriladi va keshlanadi.
+
+Artikulga xos qism (fixed.xlsx'dagi qiymatlar) for_article() da arzon
+filtrlash bilan qo'shiladi. Data registry config, keywords yoki limitlarni
+qayta yuklasa versiya o'zgaradi va reja qayta quriladi.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from core.config import settings
+from services.data_loader import DataLoader
+
+
+PlanKey = Tuple[int, Optional[str], int, str]
+
+
+def charcs_fingerprint(charcs_meta_raw: List[Dict[str, Any]]) -> str:
+    """WB charcs meta mazmuni bo'yicha qisqa hash (kesh nusxalar qaytaradi)."""
+    raw = json.dumps(charcs_meta_raw, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SubjectPlan:
+    """
+    Bitta (subject, gender, data versiyasi, charcs) uchun reja.
+    Ichidagi ro'yxat/dict'lar umumiy – chaqiruvchilar o'zgartirmasligi kerak,
+    for_article() esa har safar yangi (sayoz) nusxalar qaytaradi.
+    """
+
+    __slots__ = (
+        "key",
+        "subject_id",
+        "gender",
+        "charcs_meta_raw",
+        "fixed_fields",
+        "conditional_skip",
+        "conditional_fill",
+        "conditional_rules",
+        "generate_fields",
+        "fixed_field_names",
+        "skip_field_names",
+        "allowed_values",
+        "limits",
+        "primary_field_names",
+    )
+
+    def __init__(
+        self,
+        key: PlanKey,
+        subject_id: int,
+        gender: Optional[str],
+        charcs_meta_raw: List[Dict[str, Any]],
+        primary_field_names: Iterable[str],
+    ):
+        self.key = key
+        self.subject_id = subject_id
+        self.gender = gender
+        self.charcs_meta_raw = charcs_meta_raw
+        self.primary_field_names: FrozenSet[str] = frozenset(primary_field_names)
+
+        fixed_fields, conditional_skip, conditional_fill, generate_fields = \
+            DataLoader.filter_characteristics_by_type(charcs_meta_raw, subject_id, gender)
+
+        self.fixed_fields = fixed_fields
+        self.conditional_skip = conditional_skip
+        self.conditional_fill = conditional_fill
+        self.generate_fields = generate_fields
+
+        # maydon nomi -> condition (fill qoidalari)
+        self.conditional_rules: Dict[str, Dict[str, Any]] = {
+            f["name"]: f.get("condition") or {}
+            for f in conditional_fill
+            if f.get("name")
+        }
+
+        self.fixed_field_names: FrozenSet[str] = frozenset(
+            f.get("name") for f in fixed_fields if f.get("name")
+        )
+        self.skip_field_names: FrozenSet[str] = frozenset(
+            f.get("name") for f in conditional_skip if f.get("name")
+        )
+
+        # Excel fixed'dan oldingi barcha generate maydonlari uchun – artikulda
+        # shulardan qism-to'plam olinadi
+        candidate_names = [
+            f["name"]
+            for f in generate_fields
+            if f.get("name")
+            and f["name"] not in self.fixed_field_names
+            and f["name"] not in self.skip_field_names
+        ]
+        self.allowed_values: Dict[str, List[str]] = \
+            DataLoader.build_allowed_values_from_keywords(candidate_names)
+
+        other_limits = DataLoader.load_limits(color_only=False)
+        self.limits: Dict[str, Dict[str, int]] = {
+            name: other_limits.get(name, {}) for name in candidate_names
+        }
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return (
+            f"<SubjectPlan(subject_id={self.subject_id}, gender={self.gender}, "
+            f"generate={len(self.generate_fields)})>"
+        )
+
+    def for_article(self, fixed_data: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Artikul fixed qiymatlarini hisobga olgan holda pipeline plan dict'i."""
+        excel_fixed_names = set(fixed_data.keys())
+        locked_field_names = set(self.fixed_field_names | self.skip_field_names) | excel_fixed_names
+
+        generate_fields_for_ai = [
+            meta for meta in self.generate_fields
+            if meta.get("name") and meta.get("name") not in locked_field_names
+        ]
+        generate_field_names = [f["name"] for f in generate_fields_for_ai if f.get("name")]
+
+        allowed_values = {
+            name: self.allowed_values[name]
+            for name in generate_field_names
+            if name in self.allowed_values
+        }
+        filtered_limits = {name: self.limits.get(name, {}) for name in generate_field_names}
+
+        primary_fields = [
+            f for f in generate_fields_for_ai
+            if f.get("name") in self.primary_field_names
+        ]
+        secondary_fields = [
+            f for f in generate_fields_for_ai
+            if f.get("name") not in self.primary_field_names
+        ]
+
+        return {
+            "charcs_meta_raw": self.charcs_meta_raw,
+            "fixed_fields": list(self.fixed_fields),
+            "conditional_skip": list(self.conditional_skip),
+            "conditional_fill": list(self.conditional_fill),
+            "conditional_rules": self.conditional_rules,
+            "locked_field_names": locked_field_names,
+            "generate_fields_for_ai": generate_fields_for_ai,
+            "generate_field_names": generate_field_names,
+            "allowed_values": allowed_values,
+            "filtered_limits": filtered_limits,
+            "primary_fields": primary_fields,
+            "secondary_fields": secondary_fields,
+        }
+
+
+class SubjectPlanCache:
+    """LRU: kalit -> SubjectPlan. Bir kalit bir vaqtda faqat bir marta quriladi."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._plans: "OrderedDict[PlanKey, SubjectPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[PlanKey, threading.Lock] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        subject_id: int,
+        gender: Optional[str],
+        charcs_meta_raw: List[Dict[str, Any]],
+        primary_field_names: Iterable[str],
+    ) -> SubjectPlan:
+        subject_id = int(subject_id)
+        key: PlanKey = (
+            subject_id,
+            gender,
+            DataLoader.data_version(),
+            charcs_fingerprint(charcs_meta_raw),
+        )
+
+        plan = self._lookup(key)
+        if plan is not None:
+            return plan
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            plan = self._lookup(key)
+            if plan is not None:
+                return plan
+
+            self.misses += 1
+            plan = SubjectPlan(key, subject_id, gender, charcs_meta_raw, primary_field_names)
+
+            with self._lock:
+                # Eski data versiyasidagi rejalar endi kerak emas
+                for old_key in [k for k in self._plans if k[2] < key[2]]:
+                    del self._plans[old_key]
+                self._plans[key] = plan
+                while len(self._plans) > self.max_size:
+                    self._plans.popitem(last=False)
+                self._build_locks.pop(key, None)
+
+        return plan
+
+    def invalidate(self, subject_id: Optional[int] = None) -> None:
+        with self._lock:
+            if subject_id is None:
+                self._plans.clear()
+            else:
+                for key in [k for k in self._plans if k[0] == int(subject_id)]:
+                    del self._plans[key]
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "plans": len(self._plans),
+            "hits": self.hits,
+            "misses": self.misses,
+            "max_size": self.max_size,
+        }
+
+    def _lookup(self, key: PlanKey) -> Optional[SubjectPlan]:
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+            return plan
+
+
+_cache: Optional[SubjectPlanCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_subject_plan_cache() -> SubjectPlanCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SubjectPlanCache(max_size=settings.SUBJECT_PLAN_CACHE_SIZE)
+    return _cache
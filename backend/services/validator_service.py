@@ -1,10 +1,9 @@
 import json
 import time
 from typing import Dict, Any, List, Optional, Callable
-from openai import OpenAI
-import httpx
 
 from core.config import settings
+from core.http_clients import get_openai_client
 from core.database import get_db
 from services.promnt_loader import PromptLoaderService
 
@@ -12,20 +11,8 @@ from services.promnt_loader import PromptLoaderService
 class ValidatorService:
     
     def __init__(self):
-        if settings.USE_PROXY and settings.PROXY_URL:
-            http_client = httpx.Client(
-                proxies={
-                    "http://": settings.PROXY_URL,
-                    "https://": settings.PROXY_URL,
-                },
-                timeout=180.0
-            )
-            self.client = OpenAI(
-                api_key=settings.OPENAI_API_KEY,
-                http_client=http_client
-            )
-        else:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        # Proxy (USE_PROXY/PROXY_URL) umumiy client'da sozlanadi
+        self.client = get_openai_client()
     
     def validate_with_iterations(
         self,
@@ -3,6 +3,7 @@ from typing import List, Dict, Any, Optional
 from services.base.openai_service import BaseOpenAIService
 from core.database import get_db
 from services.promnt_loader import PromptLoaderService
+from services.field_catalog import get_field_catalog, get_max_limit, split_values
 
 
 class CharacteristicsValidatorService(BaseOpenAIService):
@@ -110,6 +111,7 @@ class CharacteristicsValidatorService(BaseOpenAIService):
         Backend tomonidan QATTIQ TEKSHIRISH
         """
         violations = []
+        catalog = get_field_catalog()
 
         for char in characteristics:
             name = char.get("name")
@@ -118,49 +120,29 @@ class CharacteristicsValidatorService(BaseOpenAIService):
 
             value = char.get("value", [])
 
-            # Listga normalizatsiya
-            if isinstance(value, str):
-                values_list = [value.strip()] if value.strip() else []
-            elif isinstance(value, list):
-                values_list = [str(v).strip() for v in value if str(v).strip()]
+            # Listga normalizatsiya (vergul bo'yicha bo'linmaydi)
+            if isinstance(value, (str, list)):
+                values_list = split_values(value, split_commas=False)
             else:
                 values_list = []
 
-            # 1. allowed_values tekshiruvi
+            # 1. allowed_values tekshiruvi – aniq yoki substring match
             dict_vals = allowed_values.get(name) or []
             if dict_vals:
-                normalized_dict = set(str(v).strip().lower() for v in dict_vals)
+                spec = catalog.resolve(name, dict_vals)
 
                 for val in values_list:
-                    val_lower = val.lower()
-
-                    # Aniq match yoki substring match
-                    found = False
-                    if val_lower in normalized_dict:
-                        found = True
-                    else:
-                        for dv in dict_vals:
-                            if dv.lower() in val_lower or val_lower in dv.lower():
-                                found = True
-                                break
-
-                    if not found:
+                    if not spec.is_allowed_loose(val):
                         violations.append(
                             f"{name}: '{val}' yo'q allowed_values ichida"
                         )
 
             # 2. Limit tekshiruvi
-            field_limits = limits.get(name) or {}
-            max_limit = (
-                field_limits.get("max")
-                or field_limits.get("maxCount")
-                or field_limits.get("max_count")
-            )
-            if isinstance(max_limit, int) and max_limit > 0:
-                if len(values_list) > max_limit:
-                    violations.append(
-                        f"{name}: {len(values_list)} > max={max_limit}"
-                    )
+            max_limit = get_max_limit(limits, name)
+            if max_limit and len(values_list) > max_limit:
+                violations.append(
+                    f"{name}: {len(values_list)} > max={max_limit}"
+                )
 
         return violations
 
@@ -228,6 +210,7 @@ class CharacteristicsValidatorService(BaseOpenAIService):
         """
         allowed_values = allowed_values or {}
         limits = limits or {}
+        catalog = get_field_catalog()
 
         for char in characteristics:
             name = char.get("name")
@@ -235,96 +218,28 @@ class CharacteristicsValidatorService(BaseOpenAIService):
                 char["value"] = []
                 continue
 
-            value = char["value"]
-
             # 1) Listga normalizatsiya
-            if isinstance(value, str):
-                if "," in value:
-                    values_list = [v.strip() for v in value.split(",") if v.strip()]
-                else:
-                    values_list = [value.strip()] if value.strip() else []
-            elif isinstance(value, list):
-                values_list = [str(v).strip() for v in value if str(v).strip()]
-            elif value is not None:
-                v = str(value).strip()
-                values_list = [v] if v else []
-            else:
-                values_list = []
+            values_list = split_values(char["value"])
+            max_limit = get_max_limit(limits, name)
 
             dict_vals = allowed_values.get(name) or []
             if not dict_vals:
-                field_limits = limits.get(name) or {}
-                max_limit = (
-                    field_limits.get("max")
-                    or field_limits.get("maxCount")
-                    or field_limits.get("max_count")
-                )
-                if (
-                    isinstance(max_limit, int)
-                    and max_limit > 0
-                    and len(values_list) > max_limit
-                ):
+                if max_limit and len(values_list) > max_limit:
                     values_list = values_list[:max_limit]
                 char["value"] = values_list
                 continue
 
-            # Dictionary bor - mapping
-            normalized_dict = [str(v).strip() for v in dict_vals if str(v).strip()]
-            dict_lower_map = {v.lower(): v for v in normalized_dict}
+            # Dictionary bor - mapping (topilmaganlar tashlab yuboriladi)
+            spec = catalog.resolve(name, dict_vals)
 
             mapped: List[str] = []
-
-            for raw in values_list:
-                if not raw:
-                    continue
-                raw_str = str(raw).strip()
-
-                if raw_str in normalized_dict:
-                    if raw_str not in mapped:
-                        mapped.append(raw_str)
-                    continue
-
-                base = raw_str.split("(")[0].split("[")[0].strip()
-                base = base.rstrip(" .,-;")
-
-                if base in normalized_dict:
-                    if base not in mapped:
-                        mapped.append(base)
-                    continue
-
-                lower_raw = raw_str.lower()
-                lower_base = base.lower()
-
-                if lower_raw in dict_lower_map:
-                    val = dict_lower_map[lower_raw]
-                    if val not in mapped:
-                        mapped.append(val)
-                    continue
-
-                if lower_base in dict_lower_map:
-                    val = dict_lower_map[lower_base]
-                    if val not in mapped:
-                        mapped.append(val)
-                    continue
-
-                matched = False
-                for dv in normalized_dict:
-                    if dv.lower() in raw_str.lower():
-                        if dv not in mapped:
-                            mapped.append(dv)
-                        matched = True
-                        break
-                if matched:
-                    continue
+            for raw_str in values_list:
+                val = spec.map_value(raw_str)
+                if val is not None and val not in mapped:
+                    mapped.append(val)
 
             # Limit
-            field_limits = limits.get(name) or {}
-            max_limit = (
-                field_limits.get("max")
-                or field_limits.get("maxCount")
-                or field_limits.get("max_count")
-            )
-            if isinstance(max_limit, int) and max_limit > 0 and len(mapped) > max_limit:
+            if max_limit and len(mapped) > max_limit:
                 mapped = mapped[:max_limit]
 
             char["value"] = mapped
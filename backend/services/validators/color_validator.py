@@ -4,6 +4,7 @@ import time
 from core.database import get_db
 from services.base.openai_service import BaseOpenAIService
 from services.promnt_loader import PromptLoaderService
+from services.color_palette import get_color_palette
 
 
 class ColorValidatorService(BaseOpenAIService):
@@ -25,16 +26,18 @@ class ColorValidatorService(BaseOpenAIService):
 
         if isinstance(allowed_colors, (list, tuple, set)):
             for v in allowed_colors:
-                if isinstance(v, str):
+                # ColorService parent bo'yicha ro'yxatlar ro'yxatini qaytaradi
+                if isinstance(v, (list, tuple)):
+                    normalized_allowed.extend(c for c in v if isinstance(c, str))
+                elif isinstance(v, str):
                     normalized_allowed.append(v) 
         else:
             normalized_allowed = []
 
-        normalized_allowed = [
-            c.strip()
-            for c in normalized_allowed
-            if isinstance(c, str) and c.strip()
-        ]
+        # Palitradagi kanonik yozilish, takrorlarsiz
+        palette = get_color_palette()
+        normalized_allowed = palette.canonicalize(normalized_allowed)
+        detected_colors = palette.canonicalize(detected_colors or [])
 
         log(f"Allowed colors (normalized) count: {len(normalized_allowed)}")
 
@@ -1,5 +1,7 @@
+from services.field_catalog import get_field_catalog
+
+
 def validation_card(card, subjects, allowed_values, colors_limits, charcs_limits, conditional_skip):
-    import difflib  
 
     messages = []
 
@@ -240,6 +242,7 @@ def validation_card(card, subjects, allowed_values, colors_limits, charcs_limits
     allowed_values = allowed_values or {}
     colors_limits = colors_limits or {}
     charcs_limits = charcs_limits or {}
+    catalog = get_field_catalog()
 
     for c in chars:
         name = c.get("name")
@@ -254,24 +257,17 @@ def validation_card(card, subjects, allowed_values, colors_limits, charcs_limits
             values_list = [value]
 
         if name in allowed_values:
-            allowed_list = list(allowed_values.get(name, []))
-            allowed_set = set(allowed_list)
+            spec = catalog.resolve(name, list(allowed_values.get(name, [])))
 
             invalid_values = [
                 v for v in values_list
-                if isinstance(v, str) and v not in allowed_set
+                if isinstance(v, str) and not spec.contains(v)
             ]
 
             if invalid_values:
                 suggestions = {}
                 for bad in invalid_values:
-                    close = difflib.get_close_matches(
-                        bad,
-                        allowed_list,
-                        n=3,
-                        cutoff=0.6, 
-                    )
-                    suggestions[bad] = close
+                    suggestions[bad] = spec.suggest(bad, n=3, cutoff=0.6)
 
                 invalid_str = ", ".join(map(str, invalid_values))
                 msg_text = (
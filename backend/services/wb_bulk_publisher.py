@@ -0,0 +1,400 @@
+# services/wb_bulk_publisher.py
+"""
+Tasdiqlangan ProcessingHistory natijalarini WB'ga ommaviy nashr qilish
+(POST /content/v2/cards/update).
+
+- har natija joriy WB kartasi bilan solishtiriladi: faqat o'zgargan
+  xarakteristikalar, title va description almashtiriladi, qolgan maydonlar
+  (sizes, dimensions, boshqa xarakteristikalar) joriy kartadan olinadi –
+  cards/update kartani butunlay qayta yozadi
+- hech narsa o'zgarmagan kartalar yuborilmaydi ("unchanged")
+- kartalar WB limitlari ichida chunk'larga bo'linadi
+  (WB_BULK_UPDATE_MAX_CARDS ta / WB_BULK_UPDATE_MAX_BYTES)
+- chunk'lar WB_BULK_UPDATE_CONCURRENCY tadan parallel yuboriladi,
+  429 / 5xx / tarmoq xatolarida qayta urinadi
+- WB chunk'ni validatsiya xatosi bilan rad etsa – chunk ikkiga bo'linib
+  qayta yuboriladi, oxirida xato aynan qaysi nmID'da ekanligi aniqlanadi
+- har nmID holati event sifatida (SSE uchun) uzatiladi va
+  processing_history.publish_status ga yoziladi
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from core.config import settings
+from core.database import SessionLocal
+from models.processing_history import ProcessingHistory
+from repositories.history_repository import HistoryRepository
+from repositories.wb_async_repository import AsyncWBRepository, WBAPIError
+from repositories.wb_repository import WBRepository
+from services.wb_catalog_service import WBCatalogService
+
+
+_RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+# Shu javoblarda chunk bo'linadi (karta ma'lumotidagi xato / so'rov juda katta)
+_SPLIT_STATUSES = {400, 413, 422}
+_DIMENSION_KEYS = ("length", "width", "height", "weightBrutto")
+_SIZE_KEYS = ("chrtID", "techSize", "wbSize", "skus")
+
+# Ishlayotgan nashr task'lari (GC ularni yig'ib olmasligi uchun)
+_running_tasks: set = set()
+
+
+def _normalize_value(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    text = str(value).strip()
+    return [text] if text else []
+
+
+def _wb_value(new_value: List[str], old_value: Any) -> Any:
+    """Raqamli xarakteristikalar WB'da son sifatida saqlanadi – turini saqlaymiz."""
+    if isinstance(old_value, (int, float)) and not isinstance(old_value, bool) and len(new_value) == 1:
+        try:
+            number = float(new_value[0].replace(",", "."))
+            return int(number) if number.is_integer() else number
+        except ValueError:
+            pass
+    return new_value
+
+
+def build_update_item(
+    history: ProcessingHistory,
+    card: Dict[str, Any],
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Joriy WB kartasi + history natijasi -> cards/update elementi.
+    Qaytaradi: (item yoki None – o'zgarish yo'q, o'zgarishlar xulosasi).
+    """
+    old_charcs: Dict[int, Any] = {}
+    order: List[int] = []
+    for ch in card.get("characteristics") or []:
+        charc_id = ch.get("id")
+        if charc_id is None:
+            continue
+        old_charcs[charc_id] = ch.get("value")
+        order.append(charc_id)
+
+    changed_ids: List[int] = []
+    new_charcs = dict(old_charcs)
+    for ch in history.new_characteristics or []:
+        charc_id = ch.get("id")
+        if charc_id is None:
+            continue
+        new_value = _normalize_value(ch.get("value"))
+        # Bo'sh qiymat = "LLM/Excel qiymat bermadi" – kartadagi qiymat saqlanadi.
+        # O'chirish faqat aniq signal bilan (clear=True – conditional skip/fill qoidasi)
+        if not new_value and not ch.get("clear"):
+            continue
+        if new_value == _normalize_value(old_charcs.get(charc_id)):
+            continue
+        changed_ids.append(charc_id)
+        if new_value:
+            new_charcs[charc_id] = _wb_value(new_value, old_charcs.get(charc_id))
+            if charc_id not in old_charcs:
+                order.append(charc_id)
+        else:
+            new_charcs.pop(charc_id, None)
+
+    title = card.get("title") or ""
+    description = card.get("description") or ""
+    title_changed = bool(history.new_title) and history.new_title.strip() != title.strip()
+    description_changed = (
+        bool(history.new_description)
+        and history.new_description.strip() != description.strip()
+    )
+
+    changes = {
+        "characteristics": changed_ids,
+        "title": title_changed,
+        "description": description_changed,
+    }
+    if not changed_ids and not title_changed and not description_changed:
+        return None, changes
+
+    dimensions = card.get("dimensions") or {}
+    item = {
+        "nmID": card["nmID"],
+        "vendorCode": card.get("vendorCode", ""),
+        "brand": card.get("brand") or "",
+        "title": history.new_title.strip() if title_changed else title,
+        "description": history.new_description.strip() if description_changed else description,
+        "dimensions": {k: dimensions[k] for k in _DIMENSION_KEYS if k in dimensions},
+        "characteristics": [
+            {"id": charc_id, "value": new_charcs[charc_id]}
+            for charc_id in order
+            if charc_id in new_charcs
+        ],
+        "sizes": [
+            {k: size[k] for k in _SIZE_KEYS if k in size}
+            for size in card.get("sizes") or []
+        ],
+    }
+    return item, changes
+
+
+def chunk_items(
+    items: List[Dict[str, Any]],
+    max_cards: int,
+    max_bytes: int,
+) -> List[List[Dict[str, Any]]]:
+    """Kartalarni soni va JSON hajmi bo'yicha chunk'larga bo'ladi (tartib saqlanadi)."""
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_bytes = 2  # "[]"
+
+    for item in items:
+        size = len(json.dumps(item, ensure_ascii=False).encode("utf-8")) + 1
+        if current and (len(current) >= max_cards or current_bytes + size > max_bytes):
+            chunks.append(current)
+            current = []
+            current_bytes = 2
+        current.append(item)
+        current_bytes += size
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class WBBulkPublisher:
+    def __init__(self, async_repo: Optional[AsyncWBRepository] = None):
+        self.async_repo = async_repo or AsyncWBRepository()
+        self.catalog = WBCatalogService(WBRepository(self.async_repo))
+        self.max_cards = max(1, settings.WB_BULK_UPDATE_MAX_CARDS)
+        self.max_bytes = settings.WB_BULK_UPDATE_MAX_BYTES
+        self.concurrency = max(1, settings.WB_BULK_UPDATE_CONCURRENCY)
+        self.retries = max(0, settings.WB_BULK_UPDATE_RETRIES)
+
+    async def publish(
+        self,
+        history_ids: List[int],
+        user_id: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Nashr jarayoni event'lari:
+        publish_started, card_status (har nmID), chunk_done, publish_completed.
+        user_id=None – admin (istalgan foydalanuvchi natijalari).
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def emit(event: Dict[str, Any]) -> None:
+            await queue.put(event)
+
+        async def run() -> None:
+            try:
+                await self._run(history_ids, user_id, emit)
+            except Exception as e:
+                await emit({"type": "publish_error", "message": str(e)})
+            finally:
+                await queue.put(done)
+
+        # Klient uzilsa ham nashr oxirigacha davom etadi (holat history'da qoladi)
+        task = asyncio.create_task(run())
+        _running_tasks.add(task)
+        task.add_done_callback(_running_tasks.discard)
+        while True:
+            event = await queue.get()
+            if event is done:
+                break
+            yield event
+
+    # ===== INTERNAL =====
+
+    async def _run(self, history_ids: List[int], user_id: Optional[int], emit) -> None:
+        histories = await asyncio.to_thread(self._load_histories, history_ids, user_id)
+        counts = {"published": 0, "unchanged": 0, "failed": 0, "skipped": 0}
+
+        async def card_status(history: Any, status: str, **extra: Any) -> None:
+            if status in counts:
+                counts[status] += 1
+            await emit({
+                "type": "card_status",
+                "history_id": history.id,
+                "nmID": history.nm_id,
+                "article": history.article,
+                "status": status,
+                **extra,
+            })
+
+        found_ids = {h.id for h in histories}
+        await emit({"type": "publish_started", "total": len(history_ids), "found": len(histories)})
+        for missing_id in history_ids:
+            if missing_id not in found_ids:
+                counts["skipped"] += 1
+                await emit({
+                    "type": "card_status",
+                    "history_id": missing_id,
+                    "status": "skipped",
+                    "error": "History item not found",
+                })
+
+        # Bir nmID uchun faqat eng oxirgi natija
+        latest: Dict[int, Any] = {}
+        for history in histories:
+            if history.status != "completed" or not history.nm_id:
+                error = "Not a completed result with nmID"
+                await asyncio.to_thread(self._set_status, [history.id], "skipped", error)
+                await card_status(history, "skipped", error=error)
+                continue
+            previous = latest.get(history.nm_id)
+            if previous is not None:
+                error = f"Superseded by history {history.id}"
+                await asyncio.to_thread(self._set_status, [previous.id], "skipped", error)
+                await card_status(previous, "skipped", error=error)
+            latest[history.nm_id] = history
+
+        # Joriy kartalar (mirror yoki WB API) va update elementlari
+        semaphore = asyncio.Semaphore(self.concurrency * 2)
+        items: List[Dict[str, Any]] = []
+        by_nm_id: Dict[int, Any] = {}
+        unchanged: List[int] = []
+
+        async def prepare(history: Any) -> None:
+            async with semaphore:
+                try:
+                    card = await self._load_card(history.nm_id)
+                except Exception as e:
+                    await asyncio.to_thread(self._set_status, [history.id], "failed", str(e))
+                    await card_status(history, "failed", error=f"Card load failed: {e}")
+                    return
+
+            item, changes = build_update_item(history, card)
+            if item is None:
+                unchanged.append(history.id)
+                await card_status(history, "unchanged", changes=changes)
+                return
+            items.append(item)
+            by_nm_id[item["nmID"]] = history
+            await card_status(history, "queued", changes=changes)
+
+        await asyncio.gather(*(prepare(h) for h in latest.values()))
+        await asyncio.to_thread(self._set_status, unchanged, "unchanged")
+
+        # Chunk'lar tartib bo'yicha (nmID), parallel yuboriladi
+        items.sort(key=lambda i: i["nmID"])
+        chunks = chunk_items(items, self.max_cards, self.max_bytes)
+        await asyncio.to_thread(
+            self._set_status, [h.id for h in by_nm_id.values()], "publishing"
+        )
+
+        chunk_semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(index: int, chunk: List[Dict[str, Any]]) -> None:
+            async with chunk_semaphore:
+                results = await self._send_chunk(chunk)
+
+            ok_nm_ids = [nm_id for nm_id, error in results if error is None]
+            await asyncio.to_thread(
+                self._set_status, [by_nm_id[n].id for n in ok_nm_ids], "published"
+            )
+            if ok_nm_ids:
+                await asyncio.to_thread(self.catalog.invalidate, ok_nm_ids)
+
+            for nm_id, error in results:
+                history = by_nm_id[nm_id]
+                if error is None:
+                    await card_status(history, "published")
+                else:
+                    await asyncio.to_thread(self._set_status, [history.id], "failed", error)
+                    await card_status(history, "failed", error=error)
+
+            await emit({
+                "type": "chunk_done",
+                "chunk": index + 1,
+                "chunks": len(chunks),
+                "cards": len(chunk),
+                "failed": len(results) - len(ok_nm_ids),
+            })
+
+        await asyncio.gather(*(send(i, c) for i, c in enumerate(chunks)))
+        await emit({"type": "publish_completed", **counts})
+
+    async def _send_chunk(self, chunk: List[Dict[str, Any]]) -> List[Tuple[int, Optional[str]]]:
+        """
+        Chunk'ni yuboradi. Qaytaradi: [(nmID, xato yoki None), ...].
+        Validatsiya xatosida chunk ikkiga bo'linadi – xato karta ajratiladi.
+        """
+        attempts = self.retries + 1
+        error: Optional[str] = None
+        split = False
+
+        for attempt in range(1, attempts + 1):
+            try:
+                await self.async_repo.update_cards(chunk)
+                return [(item["nmID"], None) for item in chunk]
+            except WBAPIError as e:
+                error = str(e)
+                if e.status not in _RETRY_STATUSES:
+                    split = e.status in _SPLIT_STATUSES
+                    break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if attempt < attempts:
+                delay = min(2 ** attempt, 30)
+                print(f"⚠️ WB cards/update retry {attempt}/{attempts - 1} ({len(chunk)} cards): {error} – {delay}s")
+                await asyncio.sleep(delay)
+        else:
+            # Qayta urinishlar tugadi (429 / 5xx / tarmoq) – bo'lishning foydasi yo'q
+            return [(item["nmID"], error) for item in chunk]
+
+        if not split or len(chunk) == 1:
+            return [(item["nmID"], error) for item in chunk]
+
+        middle = len(chunk) // 2
+        left, right = await asyncio.gather(
+            self._send_chunk(chunk[:middle]),
+            self._send_chunk(chunk[middle:]),
+        )
+        return left + right
+
+    async def _load_card(self, nm_id: int) -> Dict[str, Any]:
+        article = str(nm_id)
+        if settings.WB_CATALOG_MIRROR_ENABLED:
+            try:
+                card = await asyncio.to_thread(
+                    self.catalog.get_card,
+                    article,
+                    settings.WB_CATALOG_MAX_AGE_SECONDS,
+                )
+                if card and card.get("nmID") == nm_id:
+                    return card
+            except Exception as e:
+                print(f"⚠️ WB catalog mirror read error: {e}")
+
+        card = await self.async_repo.get_card_by_article(article)
+        if card.get("nmID") != nm_id:
+            raise ValueError(f"Card {nm_id} not found in WB API")
+        return card
+
+    @staticmethod
+    def _load_histories(history_ids: List[int], user_id: Optional[int]) -> List[ProcessingHistory]:
+        db = SessionLocal()
+        try:
+            histories = HistoryRepository(db).get_for_publish(history_ids, user_id)
+            # Sessiya yopilgandan keyin ham atributlar o'qilishi uchun
+            for history in histories:
+                db.expunge(history)
+            return histories
+        finally:
+            db.close()
+
+    @staticmethod
+    def _set_status(history_ids: List[int], status: str, error: Optional[str] = None) -> None:
+        if not history_ids:
+            return
+        db = SessionLocal()
+        try:
+            HistoryRepository(db).set_publish_status(history_ids, status, error)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Publish status update error: {e}")
+        finally:
+            db.close()
@@ -0,0 +1,255 @@
+# services/wb_catalog_service.py
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+
+from core.config import settings
+from core.database import SessionLocal, engine
+from repositories.wb_catalog_repository import WBCatalogRepository
+from repositories.wb_repository import WBRepository
+
+
+class WBCatalogService:
+    """
+    WB kartochkalar katalogining Postgres'dagi nusxasi (wb_catalog_cards).
+
+    - sync(full=True)  – butun katalogni cursor bilan boshidan o'qiydi
+    - sync(full=False) – saqlangan cursor'dan (updatedAt, nmID) davom etadi,
+      ya'ni faqat oxirgi sync'dan keyin o'zgargan kartalar keladi
+    - get_card(article) – pipeline uchun mirror'dan o'qish
+
+    Bir vaqtda faqat bitta process sync qiladi (pg advisory lock).
+    """
+
+    STATE_NAME = "cards"
+    ADVISORY_LOCK_KEY = 0x57424341  # "WBCA"
+
+    def __init__(self, wb_repo: Optional[WBRepository] = None):
+        self.wb_repo = wb_repo or WBRepository()
+
+    # ================== SYNC ==================
+
+    def sync(
+        self,
+        full: bool = False,
+        log_callback: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        def log(msg: str):
+            print(msg)
+            if log_callback:
+                log_callback(msg)
+
+        page_size = settings.WB_CATALOG_PAGE_SIZE
+
+        # Advisory lock alohida connection'da – session commit'lari uni bo'shatmaydi
+        with engine.connect() as lock_conn:
+            locked = lock_conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"),
+                {"key": self.ADVISORY_LOCK_KEY},
+            ).scalar()
+            # session-level lock commit'dan keyin ham saqlanadi, "idle in transaction" bo'lmasin
+            lock_conn.commit()
+            if not locked:
+                log("⏭️ WB catalog sync already running in another process")
+                return {"status": "skipped", "reason": "locked"}
+
+            try:
+                return self._sync_locked(full, page_size, log)
+            finally:
+                lock_conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"),
+                    {"key": self.ADVISORY_LOCK_KEY},
+                )
+                lock_conn.commit()
+
+    def _sync_locked(
+        self,
+        full: bool,
+        page_size: int,
+        log: Callable[[str], None],
+    ) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            repo = WBCatalogRepository(db)
+            state = repo.get_state(self.STATE_NAME)
+
+            # Hali bironta ham to'liq sync bo'lmagan bo'lsa – incremental ham boshidan
+            if full or not state.cursor_updated_at:
+                cursor: Optional[Dict[str, Any]] = None
+                full = True
+            else:
+                cursor = {
+                    "updatedAt": state.cursor_updated_at,
+                    "nmID": state.cursor_nm_id,
+                }
+
+            state.status = "running"
+            state.error_message = None
+            repo.save_state(state)
+
+            log(f"🔄 WB catalog sync started ({'full' if full else 'incremental'})")
+
+            synced = 0
+            pages = 0
+            try:
+                while True:
+                    page = self.wb_repo.get_cards_page(cursor, limit=page_size)
+                    cards = page["cards"]
+                    next_cursor = page["cursor"]
+                    pages += 1
+
+                    if cards:
+                        synced += repo.upsert_cards(cards)
+
+                    if next_cursor.get("updatedAt") and next_cursor.get("nmID"):
+                        state.cursor_updated_at = next_cursor["updatedAt"]
+                        state.cursor_nm_id = next_cursor["nmID"]
+                    state.total_synced = (state.total_synced or 0) + len(cards)
+                    repo.save_state(state)
+
+                    # total < limit – oxirgi sahifa
+                    if not cards or int(next_cursor.get("total", 0)) < page_size:
+                        break
+
+                    new_cursor = {
+                        "updatedAt": next_cursor.get("updatedAt"),
+                        "nmID": next_cursor.get("nmID"),
+                    }
+                    if new_cursor == cursor:
+                        break
+                    cursor = new_cursor
+
+                    time.sleep(settings.WB_CATALOG_PAGE_DELAY_SECONDS)
+            except Exception as e:
+                db.rollback()
+                state.status = "error"
+                state.error_message = str(e)[:2000]
+                repo.save_state(state)
+                log(f"❌ WB catalog sync failed after {pages} pages: {e}")
+                raise
+
+            now = datetime.utcnow()
+            state.status = "idle"
+            state.last_sync_at = now
+            if full:
+                state.last_full_sync_at = now
+            repo.save_state(state)
+
+            log(f"✅ WB catalog sync done: {synced} cards, {pages} pages")
+
+            return {
+                "status": "ok",
+                "mode": "full" if full else "incremental",
+                "synced": synced,
+                "pages": pages,
+            }
+        finally:
+            db.close()
+
+    # ================== READ ==================
+
+    def get_card(
+        self,
+        article: str,
+        max_age_seconds: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Mirror'dan kartani qaytaradi yoki None (topilmadi / eskirgan).
+
+        Yangilik = max(karta synced_at, oxirgi muvaffaqiyatli sync): o'zgarmagan
+        kartalar incremental sync'da qayta kelmaydi, lekin baribir dolzarb.
+        """
+        db = SessionLocal()
+        try:
+            repo = WBCatalogRepository(db)
+            row = repo.find_by_article(article)
+            if row is None:
+                return None
+
+            if max_age_seconds:
+                state = repo.get_state(self.STATE_NAME)
+                fresh_at = max(
+                    d for d in (row.synced_at, state.last_sync_at) if d is not None
+                )
+                if datetime.utcnow() - fresh_at > timedelta(seconds=max_age_seconds):
+                    return None
+
+            return row.card
+        finally:
+            db.close()
+
+    def store_cards(self, cards: List[Dict[str, Any]]) -> int:
+        """API'dan olingan kartalarni mirror'ga yozib qo'yish (xato bo'lsa – jim)."""
+        db = SessionLocal()
+        try:
+            return WBCatalogRepository(db).upsert_cards(cards)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ WB catalog store error: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def invalidate(self, nm_ids: Iterable[int]) -> int:
+        """Kartalar WB'da o'zgartirilganda – keyingi o'qish API'dan bo'lsin."""
+        db = SessionLocal()
+        try:
+            return WBCatalogRepository(db).delete_by_nm_ids(nm_ids)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ WB catalog invalidate error: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def get_status(self) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            repo = WBCatalogRepository(db)
+            state = repo.get_state(self.STATE_NAME)
+            return {
+                "status": state.status,
+                "error_message": state.error_message,
+                "cards": repo.count(),
+                "total_synced": state.total_synced,
+                "cursor_updated_at": state.cursor_updated_at,
+                "cursor_nm_id": state.cursor_nm_id,
+                "last_sync_at": state.last_sync_at,
+                "last_full_sync_at": state.last_full_sync_at,
+            }
+        finally:
+            db.close()
+
+
+# ================== PERIODIC SYNC ==================
+
+_sync_thread: Optional[threading.Thread] = None
+_sync_stop = threading.Event()
+
+
+def start_periodic_sync(interval_seconds: int) -> None:
+    """Fon thread: har interval_seconds'da incremental sync (0 – o'chirilgan)."""
+    global _sync_thread
+
+    if interval_seconds <= 0 or (_sync_thread and _sync_thread.is_alive()):
+        return
+
+    def loop():
+        service = WBCatalogService()
+        while not _sync_stop.is_set():
+            try:
+                service.sync(full=False)
+            except Exception as e:
+                print(f"⚠️ WB catalog periodic sync error: {e}")
+            _sync_stop.wait(interval_seconds)
+
+    _sync_stop.clear()
+    _sync_thread = threading.Thread(target=loop, name="wb-catalog-sync", daemon=True)
+    _sync_thread.start()
+
+
+def stop_periodic_sync() -> None:
+    _sync_stop.set()
@@ -0,0 +1,238 @@
+# services/wb_media_uploader.py
+"""
+WB /content/v3/media/file ga parallel (cheklangan) yuklash.
+
+Avval sync_media fayllarni birma-bir, sync requests bilan yuklardi –
+har fayl event loop'ni to'xtatib turardi, fayl esa oldin to'liq
+xotiraga o'qilardi. Endi:
+
+- yuklashlar AsyncWBRepository (aiohttp) orqali, bir vaqtda WB_MEDIA_UPLOAD_CONCURRENCY tadan
+- UploadFile bo'laklab stream qilinadi (to'liq xotiraga o'qilmaydi)
+- har fayl alohida retry qilinadi (tarmoq xatosi, 429, 5xx)
+- natijalar fayllar tartibida qaytadi (photo_number ham shu tartibda)
+- har fayl holati on_progress callback'ga va hisobotga yoziladi
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+import aiohttp.payload
+from fastapi import UploadFile
+
+from core.config import settings
+from repositories.wb_async_repository import AsyncWBRepository, WBAPIError
+
+
+ProgressCallback = Callable[[Dict[str, Any]], Optional[Awaitable[None]]]
+
+_RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class MediaUploadError(Exception):
+    """Bitta fayl barcha urinishlardan keyin ham yuklanmadi."""
+
+    def __init__(self, report: Dict[str, Any]):
+        self.report = report
+        super().__init__(f"{report.get('filename')}: {report.get('error')}")
+
+
+class _RetryableUploadError(Exception):
+    pass
+
+
+class _UploadFilePayload(aiohttp.payload.Payload):
+    """
+    UploadFile'ni bo'laklab yuboradi. aiohttp'ning fayl payload'i faylni
+    yopadi / diskka ko'chiradi – retry uchun UploadFile ochiq qolishi kerak.
+    O'lcham ma'lum, shuning uchun Content-Length qo'yiladi (chunked emas).
+    """
+
+    CHUNK_SIZE = 256 * 1024
+
+    def __init__(self, file: UploadFile, size: int, **kwargs: Any):
+        super().__init__(file, **kwargs)
+        self._size = size
+
+    async def write(self, writer) -> None:
+        await self._value.seek(0)
+        while True:
+            chunk = await self._value.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            await writer.write(chunk)
+
+    def decode(self, encoding: str = "utf-8", errors: str = "strict") -> str:
+        raise TypeError("Upload payload is binary")
+
+
+class WBMediaUploader:
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        repo: Optional[AsyncWBRepository] = None,
+    ):
+        self.repo = repo or AsyncWBRepository()
+        self.concurrency = max(1, concurrency or settings.WB_MEDIA_UPLOAD_CONCURRENCY)
+        self.retries = max(0, settings.WB_MEDIA_UPLOAD_RETRIES if retries is None else retries)
+        self.timeout = timeout or settings.WB_MEDIA_UPLOAD_TIMEOUT
+
+    async def upload_all(
+        self,
+        nm_id: int,
+        files: List[UploadFile],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Fayllarni parallel yuklaydi va hisobotlarni fayllar tartibida qaytaradi:
+        {"index", "photo_number", "filename", "status", "url", "attempts", "size", "error"}.
+
+        Birorta fayl yuklanmasa qolganlari bekor qilinadi va MediaUploadError
+        ko'tariladi (avvalgi birma-bir yuklashdagi kabi).
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        reports: List[Dict[str, Any]] = [
+            {
+                # photo_number – avvalgidek fayl pozitsiyasi (1 dan)
+                "index": i,
+                "photo_number": i + 1,
+                "filename": file.filename or f"image_{i + 1}.jpg",
+                "status": "pending",
+                "url": None,
+                "attempts": 0,
+                "size": 0,
+                "error": None,
+            }
+            for i, file in enumerate(files)
+        ]
+
+        async def run(file: UploadFile, report: Dict[str, Any]) -> None:
+            async with semaphore:
+                await self._upload_one(nm_id, file, report, on_progress)
+
+        tasks = [
+            asyncio.create_task(run(file, report))
+            for file, report in zip(files, reports)
+        ]
+        if not tasks:
+            return reports
+
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        return reports
+
+    async def _upload_one(
+        self,
+        nm_id: int,
+        file: UploadFile,
+        report: Dict[str, Any],
+        on_progress: Optional[ProgressCallback],
+    ) -> None:
+        await file.seek(0)
+        file.file.seek(0, 2)
+        report["size"] = file.file.tell()
+        if report["size"] == 0:
+            report["status"] = "skipped"
+            await self._notify(on_progress, report)
+            return
+
+        attempts = self.retries + 1
+        for attempt in range(1, attempts + 1):
+            report["attempts"] = attempt
+            report["status"] = "uploading"
+            await self._notify(on_progress, report)
+
+            started = time.perf_counter()
+            try:
+                data = await self._post(
+                    nm_id,
+                    report["photo_number"],
+                    file,
+                    report["size"],
+                    report["filename"],
+                    file.content_type or "image/jpeg",
+                )
+            except _RetryableUploadError as e:
+                report["error"] = str(e)
+                if attempt < attempts:
+                    delay = min(2 ** (attempt - 1), 10)
+                    print(
+                        f"⚠️ WB upload retry {attempt}/{attempts - 1} "
+                        f"(nmID={nm_id}, {report['filename']}): {e} – {delay}s"
+                    )
+                    report["status"] = "retrying"
+                    await self._notify(on_progress, report)
+                    await asyncio.sleep(delay)
+                    continue
+                break
+            except ValueError as e:
+                report["error"] = str(e)
+                break
+
+            report["url"] = (data.get("data") or {}).get("file") if isinstance(data, dict) else None
+            report["status"] = "uploaded"
+            report["error"] = None
+            print(
+                f"📤 WB upload {report['photo_number']}/{nm_id} "
+                f"{report['filename']} ({report['size']} B) "
+                f"{time.perf_counter() - started:.2f}s"
+            )
+            await self._notify(on_progress, report)
+            return
+
+        report["status"] = "failed"
+        await self._notify(on_progress, report)
+        raise MediaUploadError(report)
+
+    async def _post(
+        self,
+        nm_id: int,
+        photo_number: int,
+        file: UploadFile,
+        size: int,
+        filename: str,
+        content_type: str,
+    ) -> Dict[str, Any]:
+        try:
+            return await self.repo.upload_media_file(
+                nm_id=nm_id,
+                photo_number=photo_number,
+                file_bytes=_UploadFilePayload(
+                    file, size, filename=filename, content_type=content_type
+                ),
+                filename=filename,
+                content_type=content_type,
+                timeout=self.timeout,
+            )
+        except WBAPIError as e:
+            if e.status in _RETRY_STATUSES:
+                raise _RetryableUploadError(str(e)) from e
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise _RetryableUploadError(f"{type(e).__name__}: {e}") from e
+
+    @staticmethod
+    async def _notify(on_progress: Optional[ProgressCallback], report: Dict[str, Any]) -> None:
+        if on_progress is None:
+            return
+        try:
+            result = on_progress(dict(report))
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            print(f"⚠️ Media upload progress callback failed: {e}")
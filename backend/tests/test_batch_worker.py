@@ -0,0 +1,74 @@
+from core.config import settings
+from services import batch_worker
+from services.batch_worker import BatchWorker
+
+
+class FakeProcessor:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+
+    def process_single_card(self, article, user_id, progress_callback, save_failed):
+        for i in range(30):
+            progress_callback({"type": "card_log", "message": f"line {i}"})
+        progress_callback({"type": "card_start"})
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class FakeRepo:
+    calls = []
+
+    def __init__(self, db):
+        pass
+
+    def add_event(self, job_id, type, article, payload):
+        self.calls.append(("event", type, payload))
+
+    def complete_task(self, **kwargs):
+        self.calls.append(("complete", kwargs["task_id"], None))
+
+    def fail_task(self, **kwargs):
+        self.calls.append(("fail", kwargs["task_id"], None))
+        return "retry"
+
+
+def _worker(monkeypatch, processor):
+    FakeRepo.calls = []
+    monkeypatch.setattr(batch_worker, "BatchJobRepository", FakeRepo)
+    monkeypatch.setattr(batch_worker, "SessionLocal", lambda: type("S", (), {"close": lambda self: None})())
+    worker = BatchWorker(concurrency=1)
+    worker.processor = processor
+    return worker
+
+
+def test_card_logs_written_as_one_event(monkeypatch):
+    worker = _worker(monkeypatch, FakeProcessor(result={"status": "completed", "history_id": 1}))
+
+    worker._run_task(task_id=5, job_id=1, article="A1", user_id=1, attempt=1)
+
+    logs = [c for c in FakeRepo.calls if c[:2] == ("event", "card_log")]
+    assert len(logs) == 1
+    assert logs[0][2]["lines"] == 30
+    assert logs[0][2]["message"].splitlines() == [f"line {i}" for i in range(30)]
+    # Log event'i natijadan oldin yoziladi
+    assert [c[0] for c in FakeRepo.calls][-1] == "complete"
+
+
+def test_card_logs_flushed_on_failure(monkeypatch):
+    worker = _worker(monkeypatch, FakeProcessor(error=RuntimeError("boom")))
+
+    worker._run_task(task_id=5, job_id=1, article="A1", user_id=1, attempt=2)
+
+    types = [c[1] if c[0] == "event" else c[0] for c in FakeRepo.calls]
+    assert types == ["card_processing", "card_log", "fail"]
+
+
+def test_card_logs_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_JOB_LOG_EVENTS", False)
+    worker = _worker(monkeypatch, FakeProcessor(result={"status": "completed"}))
+
+    worker._run_task(task_id=5, job_id=1, article="A1", user_id=1, attempt=1)
+
+    assert not [c for c in FakeRepo.calls if c[:2] == ("event", "card_log")]
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from core.config import settings
+from repositories.cards_repository import CardsRepository, iter_array_objects
+
+
+CARDS = [
+    {"nmID": 1, "vendorCode": "A-1", "title": "plain"},
+    {"nmID": 2, "vendorCode": "b-2", "title": "braces {inside} [and] brackets"},
+    {"nmID": 3, "vendorCode": "C3", "title": "quote \" and backslash \\ end\\"},
+    {"nmID": 4, "vendorCode": "d4", "sizes": [{"skus": ["1", "2"]}, {"skus": []}], "nested": {"a": {"b": [1, {"c": 2}]}}},
+    {"nmID": 5, "vendorCode": "E5", "title": "юникод ✓"},
+]
+
+
+def _write(path, cards, indent=None):
+    path.write_text(json.dumps(cards, ensure_ascii=False, indent=indent), encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_array_objects_matches_json_load(tmp_path, chunk_size, indent):
+    path = _write(tmp_path / "cards.json", CARDS, indent=indent)
+    raw = path.read_bytes()
+
+    objects = list(iter_array_objects(path, chunk_size=chunk_size))
+
+    assert [json.loads(chunk) for _, chunk in objects] == CARDS
+    # offset'lar fayldagi aynan o'sha bo'lakni ko'rsatadi
+    for offset, chunk in objects:
+        assert raw[offset:offset + len(chunk)] == chunk
+
+
+def test_iter_array_objects_escape_on_chunk_boundary(tmp_path):
+    cards = [{"t": "x" * n + "\\\"}" + "y"} for n in range(8)]
+    path = _write(tmp_path / "cards.json", cards)
+
+    for chunk_size in range(1, 12):
+        objects = [json.loads(c) for _, c in iter_array_objects(path, chunk_size=chunk_size)]
+        assert objects == cards
+
+
+def test_iter_array_objects_empty_array(tmp_path):
+    path = tmp_path / "cards.json"
+    path.write_text("[]", encoding="utf-8")
+
+    assert list(iter_array_objects(path)) == []
+
+
+@pytest.mark.parametrize("threshold_mb", [0, 1e-6])
+def test_find_by_article_in_memory_and_streaming(tmp_path, monkeypatch, threshold_mb):
+    _write(tmp_path / "cards_raw.json", CARDS + [{"nmID": 1, "vendorCode": "dup"}])
+    monkeypatch.setattr(settings, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(settings, "CARDS_STREAMING_THRESHOLD_MB", threshold_mb)
+
+    repo = CardsRepository()
+
+    assert repo._get_cards_index().streaming is (threshold_mb > 0)
+    assert repo.find_by_article("3")["title"] == CARDS[2]["title"]
+    assert repo.find_by_article(" B-2 ")["nmID"] == 2
+    # takroriy nmID – birinchisi
+    assert repo.find_by_article("1")["vendorCode"] == "A-1"
+    assert repo.find_many(["4", "missing"]) == {"4": CARDS[3], "missing": None}
+    with pytest.raises(ValueError):
+        repo.find_by_article("404")
+
+
+def test_index_rebuilt_as_new_snapshot(tmp_path, monkeypatch):
+    path = _write(tmp_path / "cards_raw.json", CARDS)
+    monkeypatch.setattr(settings, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(settings, "CARDS_STREAMING_THRESHOLD_MB", 0)
+
+    repo = CardsRepository()
+    old = repo._get_cards_index()
+
+    _write(path, CARDS + [{"nmID": 6, "vendorCode": "F6"}], indent=1)
+    new = repo._get_cards_index()
+
+    # Eski snapshot o'zgarmaydi – uni ushlab turgan o'quvchi izchil ma'lumot ko'radi
+    assert new is not old
+    assert 6 not in old.by_nm_id and len(old.cards) == len(CARDS)
+    assert repo.find_by_article("F6")["nmID"] == 6
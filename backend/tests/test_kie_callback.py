@@ -0,0 +1,186 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from aiohttp import web
+from fastapi import FastAPI
+
+from core.config import settings
+from core.http_clients import aclose_http_clients, get_aiohttp_session
+from routers import kie_callback
+from services.kie_service.fake_kie_server import FakeKIEServer
+from services.kie_service.kie_services import KIEService
+from services.kie_service.task_poller import KIETaskFailedError, get_kie_task_poller
+
+
+SECRET = "s3cret"
+
+
+@pytest.fixture(autouse=True)
+def kie_settings(monkeypatch):
+    monkeypatch.setattr(settings, "KIE_POLL_MIN_INTERVAL", 0.05)
+    monkeypatch.setattr(settings, "KIE_POLL_MAX_INTERVAL", 0.2)
+    monkeypatch.setattr(settings, "KIE_MODEL_EXPECTED_SECONDS", {"fake-fast": 0.5, "fake-slow": 60})
+    monkeypatch.setattr(settings, "KIE_CALLBACK_ENABLED", True)
+    monkeypatch.setattr(settings, "KIE_CALLBACK_SECRET", SECRET)
+
+
+def _callback_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(kie_callback.router)
+    return app
+
+
+async def _serve(app: web.Application):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
+
+
+async def _start_fake(monkeypatch, **kwargs):
+    """Fake KIE + callback qabul qiluvchi (routers/kie_callback.py ga ASGI orqali uzatadi)."""
+    fake = FakeKIEServer(**kwargs)
+    fake_runner, fake_url = await _serve(fake.make_app())
+    monkeypatch.setattr(settings, "KIE_API_BASE_URL", fake_url)
+
+    api = httpx.AsyncClient(transport=httpx.ASGITransport(app=_callback_app()), base_url="http://api")
+
+    async def forward(request: web.Request) -> web.Response:
+        resp = await api.post(
+            "/api/kie/callback",
+            params=dict(request.query),
+            content=await request.read(),
+            headers={"Content-Type": "application/json"},
+        )
+        return web.Response(status=resp.status_code, body=resp.content)
+
+    receiver = web.Application()
+    receiver.router.add_post("/api/kie/callback", forward)
+    receiver_runner, receiver_url = await _serve(receiver)
+    monkeypatch.setattr(settings, "KIE_CALLBACK_URL", f"{receiver_url}/api/kie/callback")
+
+    async def stop():
+        await receiver_runner.cleanup()
+        await fake_runner.cleanup()
+        await api.aclose()
+        await aclose_http_clients()
+
+    return fake, fake_url, stop
+
+
+async def _create_task(fake_url: str, model: str, prompt: str, callback_url=None) -> str:
+    body = {"model": model, "input": {"prompt": prompt}}
+    if callback_url:
+        body["callBackUrl"] = callback_url
+    async with get_aiohttp_session().post(f"{fake_url}/api/v1/jobs/createTask", json=body) as resp:
+        return (await resp.json())["data"]["taskId"]
+
+
+def test_poller_polls_fake_server(monkeypatch):
+    async def scenario():
+        fake, fake_url, stop = await _start_fake(monkeypatch, duration=0.3, drop_callbacks=True)
+        try:
+            task_id = await _create_task(fake_url, "fake-fast", "ok")
+            result = await get_kie_task_poller().wait(task_id, model="fake-fast", timeout=10)
+            assert result["resultUrls"] == [f"{fake_url}/files/{task_id}.png"]
+            assert fake.record_info_calls >= 1
+        finally:
+            await stop()
+
+    asyncio.run(scenario())
+
+
+def test_poller_reports_failed_task(monkeypatch):
+    async def scenario():
+        _, fake_url, stop = await _start_fake(monkeypatch, duration=0.2, drop_callbacks=True)
+        try:
+            task_id = await _create_task(fake_url, "fake-fast", "please FAIL")
+            with pytest.raises(KIETaskFailedError) as exc:
+                await get_kie_task_poller().wait(task_id, model="fake-fast", timeout=10)
+            assert exc.value.fail_msg == "Fake failure"
+        finally:
+            await stop()
+
+    asyncio.run(scenario())
+
+
+def test_callback_wakes_waiter_without_polling(monkeypatch):
+    async def scenario():
+        fake, fake_url, stop = await _start_fake(monkeypatch, duration=0.2)
+        try:
+            # Kutilgan davomiylik 60 s – zaxira poll juda kech, natija faqat callback'dan
+            task_id = await _create_task(fake_url, "fake-slow", "ok", KIEService().callback_url)
+            started = time.monotonic()
+            result = await get_kie_task_poller().wait(task_id, model="fake-slow", timeout=30, callback=True)
+
+            assert result["resultUrls"] == [f"{fake_url}/files/{task_id}.png"]
+            assert time.monotonic() - started < 5
+            assert fake.record_info_calls == 0
+        finally:
+            await stop()
+
+    asyncio.run(scenario())
+
+
+def test_failed_callback_rejects_waiter(monkeypatch):
+    async def scenario():
+        fake, fake_url, stop = await _start_fake(monkeypatch, duration=0.2)
+        try:
+            task_id = await _create_task(fake_url, "fake-slow", "FAIL", KIEService().callback_url)
+            with pytest.raises(KIETaskFailedError):
+                await get_kie_task_poller().wait(task_id, model="fake-slow", timeout=30, callback=True)
+            assert fake.record_info_calls == 0
+        finally:
+            await stop()
+
+    asyncio.run(scenario())
+
+
+def test_callback_falls_back_to_polling_when_dropped(monkeypatch):
+    async def scenario():
+        fake, fake_url, stop = await _start_fake(monkeypatch, duration=0.2, drop_callbacks=True)
+        try:
+            task_id = await _create_task(fake_url, "fake-fast", "ok", KIEService().callback_url)
+            result = await get_kie_task_poller().wait(task_id, model="fake-fast", timeout=10, callback=True)
+            assert result["resultUrls"]
+            assert fake.callbacks_sent == 0
+            assert fake.record_info_calls >= 1
+        finally:
+            await stop()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("secret, token", [(None, None), (None, "anything"), (SECRET, None), (SECRET, "wrong")])
+def test_unauthenticated_callback_is_rejected(monkeypatch, secret, token):
+    monkeypatch.setattr(settings, "KIE_CALLBACK_SECRET", secret)
+    payload = {
+        "code": 200,
+        "data": {"taskId": "t1", "state": "success", "resultJson": '{"resultUrls": ["http://169.254.169.254/"]}'},
+    }
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=_callback_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            params = {"token": token} if token else {}
+            resp = await client.post("/api/kie/callback", params=params, json=payload)
+        assert resp.status_code == 403
+        assert get_kie_task_poller().stats()["early_results"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_callback_url_requires_secret(monkeypatch):
+    monkeypatch.setattr(settings, "KIE_CALLBACK_URL", "https://example.com/api/kie/callback")
+
+    assert KIEService().callback_url == f"https://example.com/api/kie/callback?token={SECRET}"
+
+    monkeypatch.setattr(settings, "KIE_CALLBACK_SECRET", None)
+    assert KIEService().callback_url is None
+
+    monkeypatch.setattr(settings, "KIE_CALLBACK_SECRET", SECRET)
+    monkeypatch.setattr(settings, "KIE_CALLBACK_ENABLED", False)
+    assert KIEService().callback_url is None
@@ -0,0 +1,318 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+
+from repositories.wb_async_repository import WBAPIError
+from services import wb_bulk_publisher
+from services.wb_bulk_publisher import WBBulkPublisher, build_update_item, chunk_items
+
+
+def _card(**overrides):
+    card = {
+        "nmID": 100,
+        "vendorCode": "ART-1",
+        "brand": "Brand",
+        "title": "Old title",
+        "description": "Old description",
+        "dimensions": {"length": 10, "width": 20, "height": 5, "weightBrutto": 0.4, "isValid": True},
+        "characteristics": [
+            {"id": 1, "name": "Цвет", "value": ["красный"]},
+            {"id": 2, "name": "Длина", "value": 42},
+            {"id": 3, "name": "Состав", "value": ["хлопок", "эластан"]},
+        ],
+        "sizes": [{"chrtID": 7, "techSize": "M", "wbSize": "46", "skus": ["123"], "price": 1}],
+        "photos": [{"big": "https://example/1.jpg"}],
+    }
+    card.update(overrides)
+    return card
+
+
+def _history(characteristics=None, title=None, description=None):
+    return SimpleNamespace(
+        new_characteristics=characteristics or [],
+        new_title=title,
+        new_description=description,
+    )
+
+
+# ================== build_update_item ==================
+
+
+def test_unchanged_card_is_skipped():
+    history = _history(
+        characteristics=[
+            {"id": 1, "value": " красный "},
+            {"id": 2, "value": ["42"]},
+            {"id": 3, "value": ["хлопок", "эластан"]},
+        ],
+        title="Old title ",
+        description="Old description",
+    )
+
+    item, changes = build_update_item(history, _card())
+
+    assert item is None
+    assert changes == {"characteristics": [], "title": False, "description": False}
+
+
+def test_changed_characteristic_keeps_the_rest_of_the_card():
+    history = _history(characteristics=[{"id": 1, "value": ["синий"]}, {"id": 9, "value": "новая"}])
+
+    item, changes = build_update_item(history, _card())
+
+    assert changes["characteristics"] == [1, 9]
+    assert changes["title"] is False and changes["description"] is False
+    assert item["nmID"] == 100
+    assert item["title"] == "Old title"
+    assert item["description"] == "Old description"
+    # Tartib saqlanadi, yangi xarakteristika oxirida
+    assert item["characteristics"] == [
+        {"id": 1, "value": ["синий"]},
+        {"id": 2, "value": 42},
+        {"id": 3, "value": ["хлопок", "эластан"]},
+        {"id": 9, "value": ["новая"]},
+    ]
+    # cards/update faqat ruxsat etilgan maydonlarni oladi
+    assert item["dimensions"] == {"length": 10, "width": 20, "height": 5, "weightBrutto": 0.4}
+    assert item["sizes"] == [{"chrtID": 7, "techSize": "M", "wbSize": "46", "skus": ["123"]}]
+    assert "photos" not in item
+
+
+@pytest.mark.parametrize(
+    "new_value, expected",
+    [
+        (["45"], 45),
+        ("1,5", 1.5),
+        (["45.0"], 45),
+        (["не число"], ["не число"]),
+        (["1", "2"], ["1", "2"]),
+    ],
+)
+def test_number_characteristic_keeps_numeric_type(new_value, expected):
+    history = _history(characteristics=[{"id": 2, "value": new_value}])
+
+    item, changes = build_update_item(history, _card())
+
+    assert changes["characteristics"] == [2]
+    assert {"id": 2, "value": expected} in item["characteristics"]
+
+
+def test_empty_value_keeps_card_value():
+    # Pipeline LLM/Excel qiymat bermagan har bir charc uchun "value": [] saqlaydi
+    history = _history(characteristics=[{"id": 3, "value": []}, {"id": 1, "value": ""}, {"id": 2}])
+
+    item, changes = build_update_item(history, _card())
+
+    assert item is None
+    assert changes["characteristics"] == []
+
+
+def test_explicit_clear_removes_characteristic():
+    history = _history(characteristics=[
+        {"id": 3, "value": [], "clear": True},
+        {"id": 1, "value": []},
+        {"id": 2, "value": ["43"]},
+    ])
+
+    item, changes = build_update_item(history, _card())
+
+    assert changes["characteristics"] == [3, 2]
+    assert item["characteristics"] == [{"id": 1, "value": ["красный"]}, {"id": 2, "value": 43}]
+
+
+def test_removing_missing_characteristic_is_not_a_change():
+    history = _history(characteristics=[{"id": 55, "value": [], "clear": True}, {"value": ["без id"]}])
+
+    item, _ = build_update_item(history, _card())
+
+    assert item is None
+
+
+def test_title_and_description_changes():
+    history = _history(title="  New title ", description="Old description")
+
+    item, changes = build_update_item(history, _card())
+
+    assert changes == {"characteristics": [], "title": True, "description": False}
+    assert item["title"] == "New title"
+    assert item["description"] == "Old description"
+    assert item["characteristics"] == [
+        {"id": ch["id"], "value": ch["value"]} for ch in _card()["characteristics"]
+    ]
+
+
+# ================== chunk_items ==================
+
+
+def _items(n, payload=""):
+    return [{"nmID": i, "title": payload} for i in range(n)]
+
+
+def test_chunk_items_by_count_keeps_order():
+    chunks = chunk_items(_items(7), max_cards=3, max_bytes=10**6)
+
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert [i["nmID"] for c in chunks for i in c] == list(range(7))
+
+
+def test_chunk_items_by_bytes():
+    items = _items(5, payload="x" * 100)
+    item_size = len(json.dumps(items[0], ensure_ascii=False).encode("utf-8")) + 1
+    max_bytes = 2 + item_size * 2
+
+    chunks = chunk_items(items, max_cards=100, max_bytes=max_bytes)
+
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    for chunk in chunks:
+        assert len(json.dumps(chunk, ensure_ascii=False).encode("utf-8")) <= max_bytes
+
+
+def test_chunk_items_counts_utf8_bytes():
+    items = _items(2, payload="ж" * 50)  # 100 bayt, 50 belgi
+    one = len(json.dumps(items[0], ensure_ascii=False).encode("utf-8")) + 1
+
+    assert len(chunk_items(items, max_cards=10, max_bytes=2 + one + 60)) == 2
+
+
+def test_oversized_item_goes_alone():
+    items = [{"nmID": 1}, {"nmID": 2, "title": "x" * 500}, {"nmID": 3}]
+
+    chunks = chunk_items(items, max_cards=10, max_bytes=100)
+
+    assert [[i["nmID"] for i in c] for c in chunks] == [[1], [2], [3]]
+
+
+def test_chunk_items_empty():
+    assert chunk_items([], max_cards=10, max_bytes=1000) == []
+
+
+# ================== _send_chunk ==================
+
+
+class FakeWBRepo:
+    def __init__(self, bad_nm_ids=(), errors=None):
+        self.bad_nm_ids = set(bad_nm_ids)
+        # Navbatdagi chaqiruvlar uchun xatolar (exception yoki None)
+        self.errors = list(errors or [])
+        self.calls = []
+
+    async def update_cards(self, cards):
+        self.calls.append([c["nmID"] for c in cards])
+        if self.errors:
+            error = self.errors.pop(0)
+            if error is not None:
+                raise error
+        bad = self.bad_nm_ids.intersection(c["nmID"] for c in cards)
+        if bad:
+            raise WBAPIError(f"WB update error 400: bad card {sorted(bad)}", status=400)
+        return {"error": False}
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(wb_bulk_publisher.asyncio, "sleep", fake_sleep)
+    return delays
+
+
+def _publisher(repo, retries=2):
+    publisher = WBBulkPublisher(async_repo=repo)
+    publisher.retries = retries
+    return publisher
+
+
+def test_send_chunk_success():
+    repo = FakeWBRepo()
+
+    results = asyncio.run(_publisher(repo)._send_chunk(_items(3)))
+
+    assert results == [(0, None), (1, None), (2, None)]
+    assert repo.calls == [[0, 1, 2]]
+
+
+def test_send_chunk_400_isolates_the_bad_card(no_sleep):
+    repo = FakeWBRepo(bad_nm_ids={5})
+
+    results = asyncio.run(_publisher(repo)._send_chunk(_items(8)))
+
+    assert [nm_id for nm_id, error in results] == list(range(8))
+    failed = {nm_id: error for nm_id, error in results if error is not None}
+    assert list(failed) == [5]
+    assert "400" in failed[5]
+    # Validatsiya xatosi qayta urinilmaydi – faqat bo'linadi
+    assert no_sleep == []
+    assert [5] in repo.calls
+
+
+def test_send_chunk_retries_then_succeeds(no_sleep):
+    repo = FakeWBRepo(errors=[
+        WBAPIError("WB update error 429: too many requests", status=429),
+        aiohttp.ClientConnectionError("reset"),
+        None,
+    ])
+
+    results = asyncio.run(_publisher(repo, retries=2)._send_chunk(_items(2)))
+
+    assert results == [(0, None), (1, None)]
+    assert len(repo.calls) == 3
+    assert no_sleep == [2, 4]
+
+
+def test_send_chunk_gives_up_after_retries_without_splitting(no_sleep):
+    repo = FakeWBRepo(errors=[WBAPIError("WB update error 503", status=503)] * 3)
+
+    results = asyncio.run(_publisher(repo, retries=2)._send_chunk(_items(4)))
+
+    assert [error is not None for _, error in results] == [True] * 4
+    assert repo.calls == [[0, 1, 2, 3]] * 3
+
+
+def test_send_chunk_non_split_status_fails_whole_chunk(no_sleep):
+    repo = FakeWBRepo(errors=[WBAPIError("WB update error 401: unauthorized", status=401)])
+
+    results = asyncio.run(_publisher(repo)._send_chunk(_items(4)))
+
+    assert all(error and "401" in error for _, error in results)
+    assert repo.calls == [[0, 1, 2, 3]]
+
+
+# ================== publish ==================
+
+
+def test_skipped_histories_get_publish_status(monkeypatch):
+    histories = [
+        SimpleNamespace(id=1, nm_id=100, article="a", status="completed"),
+        SimpleNamespace(id=2, nm_id=None, article="b", status="failed"),
+        SimpleNamespace(id=3, nm_id=100, article="a", status="completed", new_characteristics=[],
+                        new_title=None, new_description=None),
+    ]
+    statuses = []
+    monkeypatch.setattr(WBBulkPublisher, "_load_histories", staticmethod(lambda ids, user_id: histories))
+    monkeypatch.setattr(
+        WBBulkPublisher, "_set_status",
+        staticmethod(lambda ids, status, error=None: statuses.append((list(ids), status, error))),
+    )
+    publisher = WBBulkPublisher(async_repo=FakeWBRepo())
+
+    async def load_card(nm_id):
+        return _card()
+
+    publisher._load_card = load_card
+
+    async def collect():
+        return [e async for e in publisher.publish([1, 2, 3])]
+
+    events = asyncio.run(collect())
+
+    streamed = {e["history_id"]: e["status"] for e in events if e["type"] == "card_status"}
+    assert streamed == {1: "skipped", 2: "skipped", 3: "unchanged"}
+    assert ([1], "skipped", "Superseded by history 3") in statuses
+    assert ([2], "skipped", "Not a completed result with nmID") in statuses
+    assert ([3], "unchanged", None) in statuses
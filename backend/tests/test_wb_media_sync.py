@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI
+
+from core.dependencies import get_current_user
+from repositories.wb_async_repository import WBAPIError
+from routers import wb_media
+
+
+class _BufferWriter:
+    def __init__(self):
+        self.buffer = bytearray()
+
+    async def write(self, chunk):
+        self.buffer.extend(chunk)
+
+
+class FakeMediaRepo:
+    def __init__(self, fail_first=()):
+        self.fail_first = set(fail_first)
+        self.uploaded = {}
+        self.saved = None
+
+    async def upload_media_file(self, nm_id, photo_number, file_bytes, filename, content_type, timeout=None):
+        if photo_number in self.fail_first:
+            self.fail_first.discard(photo_number)
+            raise WBAPIError("WB upload error 503", status=503)
+        # Payload aiohttp kabi yoziladi – fayl yopilgan bo'lsa shu yerda yiqiladi
+        writer = _BufferWriter()
+        await file_bytes.write(writer)
+        self.uploaded[photo_number] = bytes(writer.buffer)
+        return {"data": {"file": f"https://wb/{nm_id}/{photo_number}.jpg"}}
+
+    async def save_media_state(self, nm_id, urls):
+        self.saved = urls
+        return {"error": False}
+
+
+def _client(monkeypatch, repo):
+    monkeypatch.setattr(wb_media.controller, "repo", repo)
+    monkeypatch.setattr(wb_media.controller.uploader, "repo", repo)
+    monkeypatch.setattr(wb_media.controller.catalog, "invalidate", lambda nm_ids: None)
+
+    async def no_sleep(delay):
+        pass
+
+    monkeypatch.setattr("services.wb_media_uploader.asyncio.sleep", no_sleep)
+
+    app = FastAPI()
+    app.include_router(wb_media.router)
+    app.dependency_overrides[get_current_user] = lambda: {"id": 1}
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api")
+
+
+def _form():
+    data = {"nmID": "100", "finalPhotos": json.dumps([{"url": "https://wb/old.jpg"}])}
+    files = [("files", ("a.jpg", b"aaa", "image/jpeg")), ("files", ("b.jpg", b"bbbb", "image/jpeg"))]
+    return data, files
+
+
+def test_sync_stream_reports_each_file(monkeypatch):
+    repo = FakeMediaRepo(fail_first={2})
+
+    async def scenario():
+        data, files = _form()
+        async with _client(monkeypatch, repo) as client:
+            resp = await client.post("/wb/media/sync", params={"stream": 1}, data=data, files=files)
+        return resp
+
+    resp = asyncio.run(scenario())
+
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    lines = [line[len("data: "):] for line in resp.text.split("\n\n") if line]
+    assert lines[-1] == "[DONE]"
+    events = [json.loads(line) for line in lines[:-1]]
+
+    assert events[0] == {"type": "sync_started", "nmID": 100, "files": 2}
+    statuses = [(e["photo_number"], e["status"]) for e in events if e["type"] == "file_status"]
+    assert (2, "retrying") in statuses
+    assert {(1, "uploaded"), (2, "uploaded")} <= set(statuses)
+    assert events[-1]["type"] == "sync_completed"
+    assert events[-1]["uploaded"] == ["https://wb/100/1.jpg", "https://wb/100/2.jpg"]
+    # Fayllar javob boshlangandan keyin ham o'qiladi (forma yopilgan bo'lsa ham)
+    assert repo.uploaded == {1: b"aaa", 2: b"bbbb"}
+    assert repo.saved == ["https://wb/old.jpg", "https://wb/100/1.jpg", "https://wb/100/2.jpg"]
+
+
+def test_sync_stream_reports_failure(monkeypatch):
+    repo = FakeMediaRepo(fail_first={1})
+    monkeypatch.setattr(wb_media.controller.uploader, "retries", 0)
+
+    async def scenario():
+        data, files = _form()
+        async with _client(monkeypatch, repo) as client:
+            return await client.post("/wb/media/sync", params={"stream": 1}, data=data, files=files)
+
+    events = [json.loads(line[len("data: "):]) for line in asyncio.run(scenario()).text.split("\n\n")[:-2]]
+
+    assert {"photo_number": 1, "status": "failed"}.items() <= next(
+        e for e in events if e["type"] == "file_status" and e["status"] == "failed"
+    ).items()
+    assert events[-1]["type"] == "sync_error" and events[-1]["status_code"] == 502
+    assert repo.saved is None
+
+
+def test_sync_without_stream_returns_json(monkeypatch):
+    repo = FakeMediaRepo()
+
+    async def scenario():
+        data, files = _form()
+        async with _client(monkeypatch, repo) as client:
+            return await client.post("/wb/media/sync", data=data, files=files)
+
+    body = asyncio.run(scenario()).json()
+
+    assert [f["status"] for f in body["files"]] == ["uploaded", "uploaded"]
+    assert repo.uploaded == {1: b"aaa", 2: b"bbbb"}